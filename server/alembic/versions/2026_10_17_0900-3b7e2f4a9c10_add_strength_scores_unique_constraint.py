@@ -0,0 +1,46 @@
+"""add unique constraint on strength_scores entity/date/period
+
+Revision ID: 3b7e2f4a9c10
+Revises: 2025_01_20_0001
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e2f4a9c10'
+down_revision: Union[str, Sequence[str], None] = '2025_01_20_0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - one strength score per (entity_type, entity_id, date, period)."""
+
+    # 清理重复记录：保留 id 最大（最新写入）的一条
+    op.execute("""
+        DELETE FROM strength_scores ss
+        USING strength_scores newer
+        WHERE ss.entity_type = newer.entity_type
+          AND ss.entity_id = newer.entity_id
+          AND ss.date = newer.date
+          AND ss.period = newer.period
+          AND ss.id < newer.id
+    """)
+
+    # 唯一约束，供批量 INSERT ... ON CONFLICT 使用
+    op.create_unique_constraint(
+        'uq_strength_scores_entity_date_period',
+        'strength_scores',
+        ['entity_type', 'entity_id', 'date', 'period']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop strength_scores unique constraint."""
+
+    op.drop_constraint('uq_strength_scores_entity_date_period', 'strength_scores', type_='unique')
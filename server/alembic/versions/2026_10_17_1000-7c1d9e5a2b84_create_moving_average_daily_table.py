@@ -0,0 +1,71 @@
+"""create moving_average_daily read model
+
+Revision ID: 7c1d9e5a2b84
+Revises: 3b7e2f4a9c10
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1d9e5a2b84'
+down_revision: Union[str, Sequence[str], None] = '3b7e2f4a9c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - one row per (entity_type, entity_id, date) with all MA periods."""
+
+    op.create_table(
+        'moving_average_daily',
+        sa.Column('entity_type', sa.String(length=10), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('close', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma5', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma10', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma20', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma30', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma60', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma90', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma120', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma240', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('entity_type', 'entity_id', 'date'),
+    )
+    op.create_index('idx_moving_average_daily_type_date', 'moving_average_daily', ['entity_type', 'date'], unique=False)
+
+    # 从 moving_average_data 回填：每个 (实体, 日期) 的 8 个周期合并为一行
+    op.execute("""
+        INSERT INTO moving_average_daily
+            (entity_type, entity_id, date, symbol, close,
+             ma5, ma10, ma20, ma30, ma60, ma90, ma120, ma240)
+        SELECT ma.entity_type, ma.entity_id, ma.date, max(ma.symbol), max(dmd.close),
+               max(ma.ma_value) FILTER (WHERE ma.period = '5d'),
+               max(ma.ma_value) FILTER (WHERE ma.period = '10d'),
+               max(ma.ma_value) FILTER (WHERE ma.period = '20d'),
+               max(ma.ma_value) FILTER (WHERE ma.period = '30d'),
+               max(ma.ma_value) FILTER (WHERE ma.period = '60d'),
+               max(ma.ma_value) FILTER (WHERE ma.period = '90d'),
+               max(ma.ma_value) FILTER (WHERE ma.period = '120d'),
+               max(ma.ma_value) FILTER (WHERE ma.period = '240d')
+        FROM moving_average_data ma
+        LEFT JOIN daily_market_data dmd
+          ON dmd.entity_type = ma.entity_type
+         AND dmd.entity_id = ma.entity_id
+         AND dmd.date = ma.date
+        GROUP BY ma.entity_type, ma.entity_id, ma.date
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop moving_average_daily."""
+
+    op.drop_index('idx_moving_average_daily_type_date', table_name='moving_average_daily')
+    op.drop_table('moving_average_daily')
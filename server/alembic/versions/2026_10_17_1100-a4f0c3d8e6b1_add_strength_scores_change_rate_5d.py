@@ -0,0 +1,50 @@
+"""add strength_scores.change_rate_5d and widen change_rate_1d
+
+Revision ID: a4f0c3d8e6b1
+Revises: 7c1d9e5a2b84
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f0c3d8e6b1'
+down_revision: Union[str, Sequence[str], None] = '7c1d9e5a2b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - store change_rate_5d; widen change_rate_1d so low prior scores do not overflow."""
+
+    op.alter_column(
+        'strength_scores',
+        'change_rate_1d',
+        existing_type=sa.Numeric(precision=5, scale=2),
+        type_=sa.Numeric(precision=10, scale=2),
+        existing_nullable=True,
+        existing_comment='1日得分变化率(%)',
+    )
+    op.add_column(
+        'strength_scores',
+        sa.Column('change_rate_5d', sa.Numeric(precision=10, scale=2), nullable=True,
+                  comment='5日得分变化率(%)，相对前5个交易日平均得分'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop change_rate_5d and restore change_rate_1d precision."""
+
+    op.drop_column('strength_scores', 'change_rate_5d')
+    op.alter_column(
+        'strength_scores',
+        'change_rate_1d',
+        existing_type=sa.Numeric(precision=10, scale=2),
+        type_=sa.Numeric(precision=5, scale=2),
+        existing_nullable=True,
+        existing_comment='1日得分变化率(%)',
+    )
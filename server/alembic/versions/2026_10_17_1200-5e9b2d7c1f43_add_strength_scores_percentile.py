@@ -0,0 +1,34 @@
+"""add strength_scores.percentile
+
+Revision ID: 5e9b2d7c1f43
+Revises: a4f0c3d8e6b1
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9b2d7c1f43'
+down_revision: Union[str, Sequence[str], None] = 'a4f0c3d8e6b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - persist the per-day percentile assigned together with rank."""
+
+    op.add_column(
+        'strength_scores',
+        sa.Column('percentile', sa.Numeric(precision=5, scale=2), nullable=True,
+                  comment='同类实体当日百分位(0-100)，得分最高为100'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop percentile."""
+
+    op.drop_column('strength_scores', 'percentile')
@@ -0,0 +1,58 @@
+"""create strength_trends table
+
+Revision ID: b8d41f6e3a27
+Revises: 5e9b2d7c1f43
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d41f6e3a27'
+down_revision: Union[str, Sequence[str], None] = '5e9b2d7c1f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - persisted trend labels per (entity, end date, window)."""
+
+    op.create_table(
+        'strength_trends',
+        sa.Column('entity_type', sa.String(length=10), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('window_days', sa.Integer(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=True),
+        sa.Column('end_date', sa.Date(), nullable=True),
+        sa.Column('data_points', sa.Integer(), nullable=False),
+        sa.Column('trend_type', sa.String(length=20), nullable=False),
+        sa.Column('slope', sa.Numeric(precision=12, scale=4), nullable=True),
+        sa.Column('r_squared', sa.Numeric(precision=8, scale=4), nullable=True),
+        sa.Column('confidence', sa.String(length=10), nullable=True),
+        sa.Column('is_consolidating', sa.Boolean(), nullable=True),
+        sa.Column('std_dev', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('price_range', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('support_level', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('resistance_level', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('ma5_direction', sa.String(length=20), nullable=True),
+        sa.Column('ma5_slope', sa.Numeric(precision=12, scale=4), nullable=True),
+        sa.Column('ma10_direction', sa.String(length=20), nullable=True),
+        sa.Column('ma10_slope', sa.Numeric(precision=12, scale=4), nullable=True),
+        sa.Column('ma20_direction', sa.String(length=20), nullable=True),
+        sa.Column('ma20_slope', sa.Numeric(precision=12, scale=4), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('entity_type', 'entity_id', 'date', 'window_days'),
+    )
+    op.create_index('idx_strength_trends_type_date', 'strength_trends', ['entity_type', 'date', 'window_days'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop strength_trends."""
+
+    op.drop_index('idx_strength_trends_type_date', table_name='strength_trends')
+    op.drop_table('strength_trends')
@@ -0,0 +1,61 @@
+"""create latest_strength_scores read model
+
+Revision ID: d2a7c95e4f18
+Revises: b8d41f6e3a27
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c95e4f18'
+down_revision: Union[str, Sequence[str], None] = 'b8d41f6e3a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - one row per (entity_type, entity_id) with the latest strength score."""
+
+    op.create_table(
+        'latest_strength_scores',
+        sa.Column('entity_type', sa.String(length=10), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('score', sa.Numeric(precision=10, scale=4), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=True),
+        sa.Column('percentile', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('strength_grade', sa.String(length=3), nullable=True),
+        sa.Column('change_rate_1d', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('entity_type', 'entity_id'),
+    )
+    op.create_index(
+        'idx_latest_strength_scores_type_score', 'latest_strength_scores',
+        ['entity_type', 'score'], unique=False
+    )
+
+    # 从 strength_scores 回填每个实体最新交易日的得分
+    op.execute("""
+        INSERT INTO latest_strength_scores
+            (entity_type, entity_id, date, symbol, score,
+             rank, percentile, strength_grade, change_rate_1d)
+        SELECT DISTINCT ON (entity_type, entity_id)
+               entity_type, entity_id, date, symbol, score,
+               rank, percentile, strength_grade, change_rate_1d
+        FROM strength_scores
+        WHERE period = 'all'
+        ORDER BY entity_type, entity_id, date DESC
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop latest_strength_scores."""
+
+    op.drop_index('idx_latest_strength_scores_type_score', table_name='latest_strength_scores')
+    op.drop_table('latest_strength_scores')
@@ -0,0 +1,77 @@
+"""create daily_strength_aggregates read model
+
+Revision ID: e6c3f81a9d52
+Revises: d2a7c95e4f18
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c3f81a9d52'
+down_revision: Union[str, Sequence[str], None] = 'd2a7c95e4f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - one row per (date, entity_type, sector_type) with daily score aggregates."""
+
+    op.create_table(
+        'daily_strength_aggregates',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('entity_type', sa.String(length=10), nullable=False),
+        sa.Column('sector_type', sa.String(length=20), nullable=False),
+        sa.Column('total_count', sa.Integer(), nullable=False),
+        sa.Column('avg_score', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('min_score', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('max_score', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('strong_count', sa.Integer(), nullable=False),
+        sa.Column('weak_count', sa.Integer(), nullable=False),
+        sa.Column('grade_counts', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('date', 'entity_type', 'sector_type'),
+    )
+
+    # 从 strength_scores 回填全部历史：每个 (日期, 实体类型) 一行，板块另按 industry/concept 拆分
+    op.execute("""
+        INSERT INTO daily_strength_aggregates
+            (date, entity_type, sector_type, total_count, avg_score, min_score, max_score,
+             strong_count, weak_count, grade_counts)
+        SELECT ss.date, ss.entity_type,
+               CASE WHEN grouping(s.type) = 1 THEN 'all' ELSE s.type END,
+               count(*), avg(ss.score), min(ss.score), max(ss.score),
+               count(*) FILTER (WHERE ss.score > 60),
+               count(*) FILTER (WHERE ss.score != 0 AND ss.score < 40),
+               json_build_object(
+                   'S+', count(*) FILTER (WHERE ss.strength_grade = 'S+'),
+                   'S', count(*) FILTER (WHERE ss.strength_grade = 'S'),
+                   'A+', count(*) FILTER (WHERE ss.strength_grade = 'A+'),
+                   'A', count(*) FILTER (WHERE ss.strength_grade = 'A'),
+                   'B+', count(*) FILTER (WHERE ss.strength_grade = 'B+'),
+                   'B', count(*) FILTER (WHERE ss.strength_grade = 'B'),
+                   'C+', count(*) FILTER (WHERE ss.strength_grade = 'C+'),
+                   'C', count(*) FILTER (WHERE ss.strength_grade = 'C'),
+                   'D+', count(*) FILTER (WHERE ss.strength_grade = 'D+'),
+                   'D', count(*) FILTER (WHERE ss.strength_grade = 'D'),
+                   'N/A', count(*) FILTER (WHERE ss.strength_grade IS NULL OR ss.strength_grade NOT IN
+                       ('S+', 'S', 'A+', 'A', 'B+', 'B', 'C+', 'C', 'D+', 'D'))
+               )
+        FROM strength_scores ss
+        LEFT JOIN sectors s
+          ON ss.entity_type = 'sector'
+         AND ss.entity_id = s.id
+        WHERE ss.period = 'all'
+        GROUP BY GROUPING SETS ((ss.date, ss.entity_type), (ss.date, ss.entity_type, s.type))
+        HAVING grouping(s.type) = 1 OR s.type IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop daily_strength_aggregates."""
+
+    op.drop_table('daily_strength_aggregates')
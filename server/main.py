@@ -12,8 +12,9 @@ from typing import Callable
 from src.core.settings import settings
 from src.core.exceptions import setup_exception_handlers
 from src.api.router import router as api_router
-from src.api.exceptions import APIError, api_error_handler, generic_error_handler
-from src.db.database import engine
+from src.core.pagination import InvalidCursorError
+from src.api.exceptions import APIError, api_error_handler, generic_error_handler, invalid_cursor_handler
+from src.db.database import engine, AsyncSessionLocal
 from src.api.v1.error_handlers import register_classification_exception_handlers
 
 # 导入任务执行器
@@ -25,6 +26,9 @@ from src.services import task_handlers  # noqa: F401
 # 导入定时任务管理器
 from src.services.scheduler.job_manager import get_job_manager
 
+# 导入数据日期注册表
+from src.services.data_date_registry import data_date_registry
+
 # 配置日志
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
@@ -55,6 +59,14 @@ async def lifespan(app: FastAPI):
         job_manager = get_job_manager()
         job_manager.start()
         logger.info("JobManager started - scheduled tasks active")
+
+        # 预加载各实体类型的最新数据日期（失败时在首次请求时加载）
+        try:
+            async with AsyncSessionLocal() as session:
+                await data_date_registry.load(session)
+            logger.info("DataDateRegistry loaded")
+        except Exception as e:
+            logger.warning(f"DataDateRegistry preload failed: {e}")
     else:
         logger.info("Test environment detected, skip background workers")
 
@@ -87,6 +99,7 @@ setup_exception_handlers(app)
 
 # 添加 API 异常处理器
 app.add_exception_handler(APIError, api_error_handler)
+app.add_exception_handler(InvalidCursorError, invalid_cursor_handler)
 app.add_exception_handler(Exception, generic_error_handler)
 
 # 注册分类异常处理器
@@ -8,6 +8,7 @@ from typing import Optional, Dict, Any
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 
+from src.core.pagination import InvalidCursorError
 from .schemas.response import ErrorDetail, ErrorResponse
 
 
@@ -99,6 +100,23 @@ async def api_error_handler(request: Request, exc: APIError) -> JSONResponse:
     )
 
 
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError) -> JSONResponse:
+    """
+    分页游标错误处理器
+
+    将无效游标转换为数据验证错误响应。
+
+    Args:
+        request: FastAPI 请求对象
+        exc: 游标错误实例
+
+    Returns:
+        JSONResponse: 统一格式的错误响应
+    """
+    error = ValidationError("无效的分页游标", details={"cursor": exc.cursor, "reason": exc.reason})
+    return await api_error_handler(request, error)
+
+
 async def generic_error_handler(request: Request, exc: Exception) -> JSONResponse:
     """
     通用错误处理器
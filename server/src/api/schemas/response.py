@@ -43,45 +43,53 @@ class PaginatedData(BaseModel, Generic[T]):
 
     Attributes:
         items: 数据项列表
-        total: 总记录数
+        total: 总记录数（游标翻页且未要求统计时为 None）
         page: 当前页码
         page_size: 每页数量
         total_pages: 总页数
+        next_cursor: 下一页游标，没有下一页时为 None
     """
 
     items: List[T] = Field(default_factory=list, description="数据项列表")
-    total: int = Field(..., description="总记录数", ge=0)
+    total: Optional[int] = Field(..., description="总记录数", ge=0)
     page: int = Field(..., description="当前页码", ge=1)
     page_size: int = Field(..., description="每页数量", ge=1, le=100)
-    total_pages: int = Field(..., description="总页数", ge=0)
+    total_pages: Optional[int] = Field(..., description="总页数", ge=0)
+    next_cursor: Optional[str] = Field(None, description="下一页游标")
 
     @classmethod
     def create(
         cls,
         items: List[T],
-        total: int,
+        total: Optional[int],
         page: int,
         page_size: int,
+        next_cursor: Optional[str] = None,
     ) -> "PaginatedData[T]":
         """
         创建分页数据
 
         Args:
             items: 数据项列表
-            total: 总记录数
+            total: 总记录数，None 表示未统计
             page: 当前页码
             page_size: 每页数量
+            next_cursor: 下一页游标
 
         Returns:
             分页数据对象
         """
-        total_pages = (total + page_size - 1) // page_size if total > 0 else 0
+        if total is None:
+            total_pages = None
+        else:
+            total_pages = (total + page_size - 1) // page_size if total > 0 else 0
         return cls(
             items=items,
             total=total,
             page=page,
             page_size=page_size,
             total_pages=total_pages,
+            next_cursor=next_cursor,
         )
 
 
@@ -161,9 +161,41 @@ class StrengthHistoryResponse(BaseModel):
     data_points: List[StrengthHistoryData]
 
 
+class StrengthTrendData(BaseModel):
+    """趋势标签"""
+    entity_id: int
+    date: date
+    window_days: int
+    trend_type: str
+    slope: Optional[float] = None
+    r_squared: Optional[float] = None
+    confidence: Optional[str] = None
+    is_consolidating: Optional[bool] = None
+    support_level: Optional[float] = None
+    resistance_level: Optional[float] = None
+    ma5_direction: Optional[str] = None
+    ma10_direction: Optional[str] = None
+    ma20_direction: Optional[str] = None
+    data_points: int
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    class Config:
+        from_attributes = True
+
+
+class StrengthTrendResponse(BaseModel):
+    """趋势标签列表响应"""
+    entity_type: str
+    date: Optional[date] = None
+    window_days: int
+    total_count: int
+    trends: List[StrengthTrendData]
+
+
 class StrengthRankingItem(BaseModel):
     """排名项"""
-    rank: int
+    rank: Optional[int] = None  # 排名尚未赋值且为游标翻页时为空
     entity_id: int
     symbol: str
     name: Optional[str] = None
@@ -182,6 +214,7 @@ class StrengthRankingResponse(BaseModel):
     offset: int = 0
     limit: int = 50
     rankings: List[StrengthRankingItem]
+    next_cursor: Optional[str] = None  # 下一页游标，没有下一页时为 None
 
 
 class StrengthGradeDistribution(BaseModel):
@@ -289,6 +322,7 @@ class PaginationInfo(BaseModel):
     """分页信息"""
     offset: int = Field(default=0, ge=0, description="分页偏移")
     limit: int = Field(default=200, ge=1, le=500, description="每页数量")
+    cursor: Optional[str] = Field(None, description="本页使用的游标")
 
 
 class FiltersApplied(BaseModel):
@@ -312,6 +346,7 @@ class SectorScatterResponse(BaseModel):
     returned_count: int = Field(..., ge=0, description="返回的板块数")
     filters_applied: FiltersApplied = Field(..., description="应用的筛选条件")
     cache_status: str = Field(default="miss", description="缓存状态: hit 或 miss")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有下一页时为 None")
 
 
 # ========== 板块分析图表类型 ==========
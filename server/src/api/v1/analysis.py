@@ -31,6 +31,7 @@ async def get_sector_scatter_data(
     offset: int = Query(0, ge=0, description="分页偏移"),
     limit: int = Query(200, ge=1, le=500, description="每页数量"),
     calc_date: Optional[date] = Query(None, description="计算日期，默认为最新"),
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor），传入时忽略 offset"),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> ApiResponse[SectorScatterResponse]:
@@ -61,6 +62,7 @@ async def get_sector_scatter_data(
         offset: 分页偏移（默认 0）
         limit: 每页数量（默认 200，最大 500）
         calc_date: 计算日期，None 表示最新数据
+        cursor: 游标，传入上一页响应中的 next_cursor 取下一页
         session: 数据库会话
 
     Returns:
@@ -77,6 +79,7 @@ async def get_sector_scatter_data(
         offset=offset,
         limit=limit,
         calc_date=calc_date,
+        cursor=cursor,
     )
 
     return ApiResponse(success=True, data=result)
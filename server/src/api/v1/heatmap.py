@@ -7,13 +7,14 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, and_
 from datetime import datetime
 
 from src.api.deps import get_session, get_current_user
 from src.models.user import User
 from src.api.schemas.sector import HeatmapData, HeatmapResponse, HeatmapSector
 from src.models.sector import Sector as SectorModel
+from src.models.latest_strength_score import LatestStrengthScore as LatestStrengthScoreModel
 
 router = APIRouter(prefix="/heatmap", tags=["heatmap"])
 
@@ -57,32 +58,37 @@ async def get_heatmap_data(
     获取热力图渲染数据
 
     返回板块强度值，用于前端热力图渲染。
+    强度值取自最新强度得分读模型（latest_strength_scores）。
     """
-    # 构建查询
-    stmt = select(SectorModel)
+    # 构建查询（内连接：只返回有强度得分的板块）
+    stmt = select(SectorModel, LatestStrengthScoreModel.score).join(
+        LatestStrengthScoreModel,
+        and_(
+            LatestStrengthScoreModel.entity_type == "sector",
+            LatestStrengthScoreModel.entity_id == SectorModel.id,
+        ),
+    )
 
     if sector_type:
         stmt = stmt.where(SectorModel.type == sector_type)
 
-    # 只返回有强度得分的板块
-    stmt = stmt.where(SectorModel.strength_score.isnot(None))
-
     # 按强度排序
-    stmt = stmt.order_by(SectorModel.strength_score.desc())
+    stmt = stmt.order_by(LatestStrengthScoreModel.score.desc())
 
     # 执行查询
     result = await session.execute(stmt)
-    sectors = result.scalars().all()
+    rows = result.all()
 
     # 转换为热力图数据
     heatmap_sectors = []
-    for sector in sectors:
+    for sector, score in rows:
+        strength = float(score)
         heatmap_sectors.append(
             HeatmapSector(
                 id=str(sector.id),
                 name=sector.name,
-                value=sector.strength_score or 0,
-                color=_get_color_for_strength(sector.strength_score),
+                value=strength,
+                color=_get_color_for_strength(strength),
             )
         )
 
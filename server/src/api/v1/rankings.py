@@ -12,6 +12,7 @@ from sqlalchemy import select, desc, asc, func, and_
 from pydantic import BaseModel
 
 from src.api.deps import get_session, get_current_user
+from src.core.pagination import apply_keyset, count_cache, split_page
 from src.models.user import User
 from src.api.schemas.strength import (
     RankingItem, RankingResponse,  # V1 schema (向后兼容)
@@ -27,12 +28,87 @@ from src.models.stock import Stock as StockModel
 from src.models.sector import Sector as SectorModel
 from src.models.sector_stock import SectorStock as SectorStockModel
 from src.models.strength_score import StrengthScore as StrengthScoreModel
+from src.models.latest_strength_score import LatestStrengthScore as LatestStrengthScoreModel
 from src.services.strength_service_v2 import StrengthServiceV2
 from src.services.ranking_service import RankingService
+from src.services.data_date_registry import data_date_registry
 
 router = APIRouter(prefix="/rankings", tags=["rankings"])
 
 
+async def _ranking_source(session: AsyncSession, entity_type: str, calc_date: Optional[date]):
+    """
+    选择 V2 排名的数据源
+
+    指定日期时查询 strength_scores 当日数据；未指定时读取最新强度得分读模型中
+    该类型最新交易日的数据，避免扫描历史。最新交易日取自数据日期注册表。
+
+    Args:
+        session: 数据库会话
+        entity_type: 实体类型
+        calc_date: 计算日期
+
+    Returns:
+        (数据源模型, 过滤条件列表, 数据日期)
+    """
+    if calc_date:
+        return StrengthScoreModel, [
+            StrengthScoreModel.entity_type == entity_type,
+            StrengthScoreModel.period == "all",
+            StrengthScoreModel.date == calc_date,
+        ], calc_date
+
+    latest_date = await data_date_registry.get_latest_date(session, entity_type)
+    return LatestStrengthScoreModel, [
+        LatestStrengthScoreModel.entity_type == entity_type,
+        LatestStrengthScoreModel.date == latest_date,
+    ], latest_date
+
+
+async def _ranking_total(session: AsyncSession, entity_type: str, data_date: Optional[date], stmt) -> int:
+    """
+    统计 V2 排名总数，按 (实体类型, 数据日期) 缓存
+
+    Args:
+        session: 数据库会话
+        entity_type: 实体类型
+        data_date: 数据日期
+        stmt: 排名查询（不含排序和分页）
+
+    Returns:
+        总数
+    """
+    cache_key = ("rankings_v2", entity_type, data_date)
+    total = count_cache.get(cache_key)
+    if total is None:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        total = (await session.execute(count_stmt)).scalar() or 0
+        count_cache.set(cache_key, total)
+    return total
+
+
+def _item_rank(rank: Optional[int], cursor: Optional[str], offset: int, position: int) -> Optional[int]:
+    """
+    V2 排名项的排名
+
+    排名尚未赋值时，偏移翻页按页内位置补位；游标翻页不知道本页的起始位置，保持为空。
+
+    Args:
+        rank: 读模型中的排名
+        cursor: 请求的游标
+        offset: 请求的偏移量
+        position: 本页中已有的条目数
+
+    Returns:
+        排名，无法确定时返回 None
+    """
+    if rank:
+        return rank
+    if cursor:
+        return None
+    return offset + position + 1
+
+
 @router.get("/sectors", response_model=RankingResponse)
 async def get_sector_rankings(
     top_n: int = Query(20, ge=1, le=100, description="返回数量"),
@@ -44,48 +120,47 @@ async def get_sector_rankings(
     """
     获取板块排名
 
-    返回按强度得分排序的 TOP N 板块。
+    返回按强度得分排序的 TOP N 板块，得分取自最新强度得分读模型。
     """
-    # 构建查询
-    stmt = select(SectorModel)
+    # 构建查询（内连接：只返回有强度得分的板块）
+    latest_join = and_(
+        LatestStrengthScoreModel.entity_type == "sector",
+        LatestStrengthScoreModel.entity_id == SectorModel.id,
+    )
+    stmt = select(SectorModel, LatestStrengthScoreModel.score).join(LatestStrengthScoreModel, latest_join)
 
     if sector_type:
         stmt = stmt.where(SectorModel.type == sector_type)
 
-    # 只返回有强度得分的板块
-    stmt = stmt.where(SectorModel.strength_score.isnot(None))
-
     # 排序
     if order == "desc":
-        stmt = stmt.order_by(desc(SectorModel.strength_score))
+        stmt = stmt.order_by(desc(LatestStrengthScoreModel.score))
     else:
-        stmt = stmt.order_by(asc(SectorModel.strength_score))
+        stmt = stmt.order_by(asc(LatestStrengthScoreModel.score))
 
     # 限制数量
     stmt = stmt.limit(top_n)
 
     # 执行查询
     result = await session.execute(stmt)
-    sectors = result.scalars().all()
+    rows = result.all()
 
     # 转换为排名项
     items = []
-    for rank, sector in enumerate(sectors, start=1):
+    for rank, (sector, score) in enumerate(rows, start=1):
         items.append(
             RankingItem(
                 id=str(sector.id),
                 name=sector.name,
                 code=sector.code,
-                strength_score=sector.strength_score,
+                strength_score=score,
                 trend_direction=sector.trend_direction,
                 rank=rank,
             )
         )
 
     # 计算总数
-    count_stmt = select(func.count()).select_from(SectorModel).where(
-        SectorModel.strength_score.isnot(None)
-    )
+    count_stmt = select(func.count()).select_from(SectorModel).join(LatestStrengthScoreModel, latest_join)
     if sector_type:
         count_stmt = count_stmt.where(SectorModel.type == sector_type)
 
@@ -106,10 +181,14 @@ async def get_stock_rankings(
     """
     获取个股排名
 
-    返回按强度得分排序的 TOP N 个股。
+    返回按强度得分排序的 TOP N 个股，得分取自最新强度得分读模型。
     """
-    # 构建查询
-    stmt = select(StockModel)
+    # 构建查询（内连接：只返回有强度得分的股票）
+    latest_join = and_(
+        LatestStrengthScoreModel.entity_type == "stock",
+        LatestStrengthScoreModel.entity_id == StockModel.id,
+    )
+    stmt = select(StockModel, LatestStrengthScoreModel.score).join(LatestStrengthScoreModel, latest_join)
 
     # 按板块筛选（使用板块代码）
     if sector_id:
@@ -117,40 +196,35 @@ async def get_stock_rankings(
             SectorStockModel.sector_code == sector_id
         )
 
-    # 只返回有强度得分的股票
-    stmt = stmt.where(StockModel.strength_score.isnot(None))
-
     # 排序
     if order == "desc":
-        stmt = stmt.order_by(desc(StockModel.strength_score))
+        stmt = stmt.order_by(desc(LatestStrengthScoreModel.score))
     else:
-        stmt = stmt.order_by(asc(StockModel.strength_score))
+        stmt = stmt.order_by(asc(LatestStrengthScoreModel.score))
 
     # 限制数量
     stmt = stmt.limit(top_n)
 
     # 执行查询
     result = await session.execute(stmt)
-    stocks = result.scalars().all()
+    rows = result.all()
 
     # 转换为排名项
     items = []
-    for rank, stock in enumerate(stocks, start=1):
+    for rank, (stock, score) in enumerate(rows, start=1):
         items.append(
             RankingItem(
                 id=str(stock.id),
                 name=stock.name,
                 code=stock.symbol,
-                strength_score=stock.strength_score,
+                strength_score=score,
                 trend_direction=stock.trend_direction,
                 rank=rank,
             )
         )
 
     # 计算总数
-    count_stmt = select(func.count()).select_from(StockModel).where(
-        StockModel.strength_score.isnot(None)
-    )
+    count_stmt = select(func.count()).select_from(StockModel).join(LatestStrengthScoreModel, latest_join)
 
     if sector_id:
         count_stmt = count_stmt.join(
@@ -170,43 +244,31 @@ async def get_stock_rankings_v2(
     calc_date: Optional[date] = Query(None, description="计算日期，默认为最新"),
     offset: int = Query(0, ge=0, description="偏移量"),
     limit: int = Query(50, ge=1, le=200, description="返回数量"),
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor），传入时忽略 offset"),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> StrengthRankingResponse:
     """获取个股强度排名 (V2)"""
     # 查询强度数据
-    stmt = select(StrengthScoreModel, StockModel).join(
-        StockModel, StrengthScoreModel.entity_id == StockModel.id
-    ).where(
-        StrengthScoreModel.entity_type == "stock",
-        StrengthScoreModel.period == "all"
-    )
+    source, filters, data_date = await _ranking_source(session, "stock", calc_date)
+    stmt = select(source, StockModel).join(
+        StockModel, source.entity_id == StockModel.id
+    ).where(*filters)
 
-    if calc_date:
-        stmt = stmt.where(StrengthScoreModel.date == calc_date)
-    else:
-        from sqlalchemy import desc as sql_desc
-        latest_stmt = select(StrengthScoreModel.date).where(
-            StrengthScoreModel.period == "all"
-        ).order_by(sql_desc(StrengthScoreModel.date)).limit(1)
-        latest_result = await session.execute(latest_stmt)
-        latest_date = latest_result.scalar_one_or_none()
-        if latest_date:
-            stmt = stmt.where(StrengthScoreModel.date == latest_date)
-
-    stmt = stmt.order_by(desc(StrengthScoreModel.score))
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await session.execute(count_stmt)
-    total = total_result.scalar() or 0
-    stmt = stmt.offset(offset).limit(limit)
+    total = await _ranking_total(session, "stock", data_date, stmt)
+
+    # keyset 翻页：(得分, 实体ID) 降序，多取一行判断是否有下一页
+    stmt = apply_keyset(stmt, (source.score, source.entity_id), cursor).limit(limit + 1)
+    if cursor is None:
+        stmt = stmt.offset(offset)
     result = await session.execute(stmt)
-    rows = result.all()
+    rows, next_cursor = split_page(result.all(), limit, lambda row: (row[0].score, row[0].entity_id))
 
     rankings = []
     for strength, stock in rows:
         rankings.append(
             StrengthRankingItem(
-                rank=strength.rank or (offset + len(rankings) + 1),
+                rank=_item_rank(strength.rank, cursor, offset, len(rankings)),
                 entity_id=strength.entity_id,
                 symbol=strength.symbol,
                 name=stock.name,
@@ -229,6 +291,7 @@ async def get_stock_rankings_v2(
         offset=offset,
         limit=limit,
         rankings=rankings,
+        next_cursor=next_cursor,
     )
 
 
@@ -237,42 +300,30 @@ async def get_sector_rankings_v2(
     calc_date: Optional[date] = Query(None, description="计算日期，默认为最新"),
     offset: int = Query(0, ge=0, description="偏移量"),
     limit: int = Query(20, ge=1, le=100, description="返回数量"),
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor），传入时忽略 offset"),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> StrengthRankingResponse:
     """获取板块强度排名 (V2)"""
-    stmt = select(StrengthScoreModel, SectorModel).join(
-        SectorModel, StrengthScoreModel.entity_id == SectorModel.id
-    ).where(
-        StrengthScoreModel.entity_type == "sector",
-        StrengthScoreModel.period == "all"
-    )
+    source, filters, data_date = await _ranking_source(session, "sector", calc_date)
+    stmt = select(source, SectorModel).join(
+        SectorModel, source.entity_id == SectorModel.id
+    ).where(*filters)
 
-    if calc_date:
-        stmt = stmt.where(StrengthScoreModel.date == calc_date)
-    else:
-        from sqlalchemy import desc as sql_desc
-        latest_stmt = select(StrengthScoreModel.date).where(
-            StrengthScoreModel.period == "all"
-        ).order_by(sql_desc(StrengthScoreModel.date)).limit(1)
-        latest_result = await session.execute(latest_stmt)
-        latest_date = latest_result.scalar_one_or_none()
-        if latest_date:
-            stmt = stmt.where(StrengthScoreModel.date == latest_date)
-
-    stmt = stmt.order_by(desc(StrengthScoreModel.score))
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await session.execute(count_stmt)
-    total = total_result.scalar() or 0
-    stmt = stmt.offset(offset).limit(limit)
+    total = await _ranking_total(session, "sector", data_date, stmt)
+
+    # keyset 翻页：(得分, 实体ID) 降序，多取一行判断是否有下一页
+    stmt = apply_keyset(stmt, (source.score, source.entity_id), cursor).limit(limit + 1)
+    if cursor is None:
+        stmt = stmt.offset(offset)
     result = await session.execute(stmt)
-    rows = result.all()
+    rows, next_cursor = split_page(result.all(), limit, lambda row: (row[0].score, row[0].entity_id))
 
     rankings = []
     for strength, sector in rows:
         rankings.append(
             StrengthRankingItem(
-                rank=strength.rank or (offset + len(rankings) + 1),
+                rank=_item_rank(strength.rank, cursor, offset, len(rankings)),
                 entity_id=strength.entity_id,
                 symbol=strength.symbol,
                 name=sector.name,
@@ -295,6 +346,7 @@ async def get_sector_rankings_v2(
         offset=offset,
         limit=limit,
         rankings=rankings,
+        next_cursor=next_cursor,
     )
 
 
@@ -305,35 +357,24 @@ async def get_strength_stats(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> StrengthStatsResponse:
-    """获取强度统计信息 (V2)"""
+    """
+    获取强度统计信息 (V2)
+
+    按主键读取每日强度汇总（daily_strength_aggregates）中该日期、该实体类型的汇总行，
+    汇总行缺失时现场统计。
+    """
     if entity_type not in ["stock", "sector"]:
         from src.api.exceptions import NotFoundError
         raise NotFoundError(f"无效的实体类型: {entity_type}")
 
-    stmt = select(StrengthScoreModel).where(
-        StrengthScoreModel.entity_type == entity_type,
-        StrengthScoreModel.period == "all"
-    )
-
-    if calc_date:
-        stmt = stmt.where(StrengthScoreModel.date == calc_date)
-    else:
-        from sqlalchemy import desc as sql_desc
-        latest_stmt = select(StrengthScoreModel.date).where(
-            StrengthScoreModel.period == "all"
-        ).order_by(sql_desc(StrengthScoreModel.date)).limit(1)
-        latest_result = await session.execute(latest_stmt)
-        latest_date = latest_result.scalar_one_or_none()
-        if latest_date:
-            stmt = stmt.where(StrengthScoreModel.date == latest_date)
-
-    result = await session.execute(stmt)
-    scores = result.scalars().all()
+    query_date = calc_date or await data_date_registry.get_latest_date(session, entity_type)
+    aggregate = None
+    if query_date is not None:
+        aggregate = await StrengthServiceV2(session).get_daily_aggregate(query_date, entity_type)
 
-    if not scores:
-        query_date = calc_date or date.today()
+    if aggregate is None or aggregate["total_count"] == 0:
         return StrengthStatsResponse(
-            date=query_date,
+            date=query_date or date.today(),
             entity_type=entity_type,
             total_count=0,
             grade_distribution=[],
@@ -344,43 +385,27 @@ async def get_strength_stats(
             weak_ratio=0.0,
         )
 
-    query_date = scores[0].date
-    total_count = len(scores)
-    valid_scores = [s.score for s in scores if s.score is not None]
-
-    avg_score = sum(valid_scores) / len(valid_scores) if valid_scores else None
-    min_score = min(valid_scores) if valid_scores else None
-    max_score = max(valid_scores) if valid_scores else None
-
-    strong_count = len([s for s in scores if s.score and s.score > 60])
-    weak_count = len([s for s in scores if s.score and s.score < 40])
-    strong_ratio = round(strong_count / total_count * 100, 2) if total_count > 0 else 0.0
-    weak_ratio = round(weak_count / total_count * 100, 2) if total_count > 0 else 0.0
-
-    grade_counts = {}
-    for s in scores:
-        grade = s.strength_grade or "N/A"
-        grade_counts[grade] = grade_counts.get(grade, 0) + 1
-
+    total_count = aggregate["total_count"]
     grade_distribution = [
         StrengthGradeDistribution(
             grade=grade,
             count=count,
-            percentage=round(count / total_count * 100, 2) if total_count > 0 else 0.0
+            percentage=round(count / total_count * 100, 2)
         )
-        for grade, count in sorted(grade_counts.items())
+        for grade, count in sorted(aggregate["grade_counts"].items())
+        if count > 0
     ]
 
     return StrengthStatsResponse(
-        date=query_date,
+        date=aggregate["date"],
         entity_type=entity_type,
         total_count=total_count,
         grade_distribution=grade_distribution,
-        avg_score=avg_score,
-        min_score=min_score,
-        max_score=max_score,
-        strong_ratio=strong_ratio,
-        weak_ratio=weak_ratio,
+        avg_score=aggregate["avg_score"],
+        min_score=aggregate["min_score"],
+        max_score=aggregate["max_score"],
+        strong_ratio=round(aggregate["strong_count"] / total_count * 100, 2),
+        weak_ratio=round(aggregate["weak_count"] / total_count * 100, 2),
     )
 
 
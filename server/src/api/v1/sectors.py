@@ -21,6 +21,7 @@ from src.api.schemas.sector import (
 )
 from src.api.schemas.response import PaginatedData, ApiResponse
 from src.api.exceptions import NotFoundError
+from src.core.pagination import apply_keyset, sort_keys, split_page
 from src.api.schemas.strength import (
     SectorStrengthResponse,
     StrengthHistoryResponse,
@@ -34,7 +35,9 @@ from src.models.sector import Sector as SectorModel
 from src.models.sector_stock import SectorStock as SectorStockModel
 from src.models.stock import Stock as StockModel
 from src.models.strength_score import StrengthScore as StrengthScoreModel
+from src.models.latest_strength_score import LatestStrengthScore as LatestStrengthScoreModel
 from src.models.moving_average_data import MovingAverageData as MovingAverageDataModel
+from src.models.moving_average_daily import MovingAverageDaily as MovingAverageDailyModel
 from src.services.strength_service_v2 import StrengthServiceV2
 from src.services.strength_history_service import StrengthHistoryService
 
@@ -50,6 +53,8 @@ async def get_sectors(
     sort_order: str = Query("desc", description="排序方向: asc/desc"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor），传入时忽略 page"),
+    include_total: bool = Query(False, description="游标翻页时是否统计总数"),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> SectorListResponse:
@@ -57,39 +62,20 @@ async def get_sectors(
     获取板块列表
 
     返回板块基本信息和强度得分，支持筛选、排序、分页。
-    强度得分从 strength_scores 表中获取最新一天的数据。
+    强度得分从最新强度得分读模型（latest_strength_scores）中获取。
+    分页按 (排序值, 板块ID) 做 keyset 翻页：响应中的 next_cursor 传回 cursor 即取下一页。
     """
-    # 使用 CTE 获取每个板块的最新强度分数
-    latest_strength_cte = (
-        select(
-            StrengthScoreModel.entity_id,
-            StrengthScoreModel.score,
-            func.row_number().over(
-                partition_by=StrengthScoreModel.entity_id,
-                order_by=desc(StrengthScoreModel.date)
-            ).label('rn')
-        )
-        .where(StrengthScoreModel.entity_type == 'sector')
-        .subquery()
-    )
-
-    # 只保留每个板块的最新记录（rn = 1）
-    latest_strength = (
-        select(
-            latest_strength_cte.c.entity_id,
-            latest_strength_cte.c.score
-        )
-        .where(latest_strength_cte.c.rn == 1)
-        .subquery()
-    )
-
-    # 主查询：关联板块和最新强度分数
+    # 主查询：关联板块和最新强度分数（每个板块至多一行）
+    score_column = func.coalesce(LatestStrengthScoreModel.score, 0)
     stmt = select(
         SectorModel,
-        func.coalesce(latest_strength.c.score, 0).label('strength_score')
+        score_column.label('strength_score')
     ).outerjoin(
-        latest_strength,
-        SectorModel.id == latest_strength.c.entity_id
+        LatestStrengthScoreModel,
+        and_(
+            LatestStrengthScoreModel.entity_type == 'sector',
+            LatestStrengthScoreModel.entity_id == SectorModel.id
+        )
     )
 
     # 按类型筛选
@@ -98,36 +84,33 @@ async def get_sectors(
 
     # 按分数区间筛选（使用 JOIN 后的分数）
     if min_strength_score is not None:
-        stmt = stmt.where(func.coalesce(latest_strength.c.score, 0) >= min_strength_score)
+        stmt = stmt.where(score_column >= min_strength_score)
     if max_strength_score is not None:
-        stmt = stmt.where(func.coalesce(latest_strength.c.score, 0) <= max_strength_score)
+        stmt = stmt.where(score_column <= max_strength_score)
 
-    # 排序（使用 JOIN 后的分数）
+    # 计算总数（游标翻页时默认跳过）
+    total = None
+    if cursor is None or include_total:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        total_result = await session.execute(count_stmt)
+        total = total_result.scalar() or 0
+
+    # 排序键（使用 JOIN 后的分数），板块ID保证顺序唯一
     if sort_by == "strength_score":
-        score_column = func.coalesce(latest_strength.c.score, 0)
-        if sort_order == "desc":
-            stmt = stmt.order_by(desc(score_column))
-        else:
-            stmt = stmt.order_by(asc(score_column))
+        key_columns = (score_column,)
     else:
-        sort_column = getattr(SectorModel, sort_by, SectorModel.id)
-        if sort_order == "desc":
-            stmt = stmt.order_by(desc(sort_column))
-        else:
-            stmt = stmt.order_by(asc(sort_column))
+        key_columns = sort_keys(getattr(SectorModel, sort_by, SectorModel.id), descending=sort_order == "desc")
+    stmt = stmt.add_columns(*[column.label(f'sort_key_{i}') for i, column in enumerate(key_columns)])
+    stmt = apply_keyset(stmt, (*key_columns, SectorModel.id), cursor, descending=sort_order == "desc")
 
-    # 计算总数
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await session.execute(count_stmt)
-    total = total_result.scalar() or 0
-
-    # 分页
-    offset = (page - 1) * page_size
-    stmt = stmt.offset(offset).limit(page_size)
+    # 分页（多取一行判断是否有下一页）
+    if cursor is None:
+        stmt = stmt.offset((page - 1) * page_size)
+    stmt = stmt.limit(page_size + 1)
 
     # 执行查询
     result = await session.execute(stmt)
-    rows = result.all()
+    rows, next_cursor = split_page(result.all(), page_size, lambda row: (*row[-len(key_columns):], row[0].id))
 
     # 转换为响应模型
     items = []
@@ -148,7 +131,7 @@ async def get_sectors(
             )
         )
 
-    paginated_data = PaginatedData.create(items, total, page, page_size)
+    paginated_data = PaginatedData.create(items, total, page, page_size, next_cursor)
 
     return SectorListResponse(success=True, data=paginated_data)
 
@@ -613,14 +596,13 @@ async def get_sector_ma_history(
     if start_date is None:
         start_date = end_date - timedelta(days=60)  # 默认2个月
 
-    # 从 strength_scores 表获取数据 (因为均线数据已经在该表中)
-    stmt = select(StrengthScoreModel).where(
-        StrengthScoreModel.entity_type == "sector",
-        StrengthScoreModel.entity_id == sector_id,
-        StrengthScoreModel.period == "all",
-        StrengthScoreModel.date >= start_date,
-        StrengthScoreModel.date <= end_date,
-    ).order_by(asc(StrengthScoreModel.date))
+    # 从均线日表读取：每个交易日一行，包含收盘价和全部周期均线
+    stmt = select(MovingAverageDailyModel).where(
+        MovingAverageDailyModel.entity_type == "sector",
+        MovingAverageDailyModel.entity_id == sector_id,
+        MovingAverageDailyModel.date >= start_date,
+        MovingAverageDailyModel.date <= end_date,
+    ).order_by(asc(MovingAverageDailyModel.date))
 
     result = await session.execute(stmt)
     history_data = result.scalars().all()
@@ -629,7 +611,7 @@ async def get_sector_ma_history(
     data_points = [
         SectorMAHistoryPoint(
             date=item.date,
-            current_price=float(item.current_price) if item.current_price is not None else None,
+            current_price=float(item.close) if item.close is not None else None,
             ma5=float(item.ma5) if item.ma5 is not None else None,
             ma10=float(item.ma10) if item.ma10 is not None else None,
             ma20=float(item.ma20) if item.ma20 is not None else None,
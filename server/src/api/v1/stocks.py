@@ -8,7 +8,7 @@ from typing import Optional, List
 from datetime import date, timedelta
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, asc, or_
+from sqlalchemy import select, func, or_
 
 from src.api.deps import get_session, get_current_user
 from src.models.user import User
@@ -20,6 +20,7 @@ from src.api.schemas.stock import (
 )
 from src.api.schemas.response import PaginatedData
 from src.api.exceptions import NotFoundError
+from src.core.pagination import apply_keyset, sort_keys, split_page
 from src.api.schemas.strength import (
     StockStrengthResponse,
     StrengthHistoryResponse,
@@ -43,6 +44,8 @@ async def get_stocks(
     sort_order: str = Query("desc", description="排序方向: asc/desc"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor），传入时忽略 page"),
+    include_total: bool = Query(False, description="游标翻页时是否统计总数"),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> StockListResponse:
@@ -50,6 +53,7 @@ async def get_stocks(
     获取个股列表
 
     支持按板块筛选、搜索、排序、分页。
+    分页按 (排序值, 股票ID) 做 keyset 翻页：响应中的 next_cursor 传回 cursor 即取下一页。
     """
     # 构建查询
     stmt = select(StockModel)
@@ -70,28 +74,30 @@ async def get_stocks(
             )
         )
 
-    # 排序
+    # 计算总数（游标翻页时默认跳过）
+    total = None
+    if cursor is None or include_total:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        total_result = await session.execute(count_stmt)
+        total = total_result.scalar() or 0
+
+    # 排序键，股票ID保证顺序唯一
     sort_column = getattr(StockModel, sort_by, StockModel.strength_score)
     if sort_column is None:
         sort_column = StockModel.symbol
+    key_columns = sort_keys(sort_column, descending=sort_order == "desc")
+    stmt = stmt.add_columns(*[column.label(f'sort_key_{i}') for i, column in enumerate(key_columns)])
+    stmt = apply_keyset(stmt, (*key_columns, StockModel.id), cursor, descending=sort_order == "desc")
 
-    if sort_order == "desc":
-        stmt = stmt.order_by(desc(sort_column))
-    else:
-        stmt = stmt.order_by(asc(sort_column))
-
-    # 计算总数
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await session.execute(count_stmt)
-    total = total_result.scalar() or 0
-
-    # 分页
-    offset = (page - 1) * page_size
-    stmt = stmt.offset(offset).limit(page_size)
+    # 分页（多取一行判断是否有下一页）
+    if cursor is None:
+        stmt = stmt.offset((page - 1) * page_size)
+    stmt = stmt.limit(page_size + 1)
 
     # 执行查询
     result = await session.execute(stmt)
-    stocks = result.scalars().all()
+    rows, next_cursor = split_page(result.all(), page_size, lambda row: (*row[-len(key_columns):], row[0].id))
+    stocks = [row[0] for row in rows]
 
     # 转换为响应模型
     items = [
@@ -109,7 +115,7 @@ async def get_stocks(
         for s in stocks
     ]
 
-    paginated_data = PaginatedData.create(items, total, page, page_size)
+    paginated_data = PaginatedData.create(items, total, page, page_size, next_cursor)
 
     return StockListResponse(success=True, data=paginated_data)
 
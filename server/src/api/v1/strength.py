@@ -17,12 +17,15 @@ from src.api.schemas.strength import (
     StrengthResponse,
     StrengthListResponse,
     PeriodStrength,
+    StrengthTrendData,
+    StrengthTrendResponse,
 )
 from src.api.exceptions import NotFoundError
 from src.models.stock import Stock as StockModel
 from src.models.sector import Sector as SectorModel
-from src.models.moving_average_data import MovingAverageData as MovingAverageDataModel
+from src.models.moving_average_daily import MovingAverageDaily as MovingAverageDailyModel
 from src.models.period_config import PeriodConfig as PeriodConfigModel
+from src.services.trend_analysis_service import TrendAnalysisService, TREND_TYPES
 
 router = APIRouter(prefix="/strength", tags=["strength"])
 
@@ -70,22 +73,30 @@ async def _build_strength_data(
     config_result = await session.execute(config_stmt)
     period_configs = config_result.scalars().all()
 
-    # 查询各周期均线数据
+    # 均线日表中该实体最新一行包含所有周期
+    ma_stmt = select(MovingAverageDailyModel).where(
+        MovingAverageDailyModel.entity_type == entity_type,
+        MovingAverageDailyModel.entity_id == lookup_id,
+    ).order_by(desc(MovingAverageDailyModel.date)).limit(1)
+    ma_result = await session.execute(ma_stmt)
+    ma_daily = ma_result.scalar_one_or_none()
+    ma_values = ma_daily.ma_values() if ma_daily else {}
+    close = float(ma_daily.close) if ma_daily and ma_daily.close is not None else None
+
     period_strengths = {}
     for config in period_configs:
-        ma_stmt = select(MovingAverageDataModel).where(
-            MovingAverageDataModel.entity_id == lookup_id,
-            MovingAverageDataModel.entity_type == entity_type,
-            MovingAverageDataModel.period == config.period,
-        ).order_by(desc(MovingAverageDataModel.date)).limit(1)
+        days = int(config.period.rstrip("d")) if config.period.rstrip("d").isdigit() else None
+        ma_value = ma_values.get(days)
 
-        ma_result = await session.execute(ma_stmt)
-        ma_data = ma_result.scalar_one_or_none()
+        # 价格比率 = (收盘价 - 均线) / 均线 * 100，与均线计算时写入的比率一致
+        price_ratio = None
+        if ma_value and close is not None:
+            price_ratio = round((close - ma_value) / ma_value * 100, 4)
 
         period_strengths[config.period] = PeriodStrength(
             period=config.period,
-            ma_value=ma_data.ma_value if ma_data else None,
-            price_ratio=ma_data.price_ratio if ma_data else None,
+            ma_value=ma_value,
+            price_ratio=price_ratio,
             weight=config.weight,
         )
 
@@ -110,6 +121,43 @@ async def _build_strength_data(
     )
 
 
+@router.get("/trends/{entity_type}", response_model=StrengthTrendResponse)
+async def get_strength_trends(
+    entity_type: str,
+    trend_date: Optional[date] = Query(None, alias="date", description="窗口结束日期，默认最新一次批量识别"),
+    days: int = Query(30, ge=3, le=365, description="回看天数"),
+    trend_type: Optional[str] = Query(None, description="趋势类型过滤"),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> StrengthTrendResponse:
+    """
+    获取已批量识别的趋势标签
+
+    Args:
+        entity_type: 实体类型 (stock/sector)
+        trend_date: 窗口结束日期
+        days: 回看天数
+        trend_type: 趋势类型 (strong_up/up/neutral/down/strong_down)
+    """
+    if entity_type not in ["stock", "sector"]:
+        raise NotFoundError(f"无效的实体类型: {entity_type}")
+    if trend_type is not None and trend_type not in TREND_TYPES:
+        raise NotFoundError(f"无效的趋势类型: {trend_type}")
+
+    service = TrendAnalysisService(session)
+    trends = await service.get_persisted_trends(
+        entity_type, end_date=trend_date, days=days, trend_type=trend_type
+    )
+
+    return StrengthTrendResponse(
+        entity_type=entity_type,
+        date=trends[0].date if trends else trend_date,
+        window_days=days,
+        total_count=len(trends),
+        trends=[StrengthTrendData.model_validate(trend) for trend in trends],
+    )
+
+
 @router.get("/{entity_type}/{entity_id}", response_model=StrengthResponse)
 async def get_strength_detail(
     entity_type: str,
@@ -6,6 +6,8 @@
 
 from typing import Optional, TYPE_CHECKING
 
+from src.core.settings import settings
+
 if TYPE_CHECKING:
     from src.services.cache.cache_manager import CacheManager
 
@@ -95,8 +97,13 @@ class CacheConfig:
     # 是否启用缓存
     ENABLE_CACHE: bool = True
 
-    # 缓存后端: 'database' | 'redis'
-    CACHE_BACKEND: str = "database"
+    # 缓存后端: 'database' | 'memory'
+    CACHE_BACKEND: str = settings.CACHE_BACKEND
+
+    # 进程内缓存配置（CACHE_BACKEND = 'memory' 时使用）
+    MEMORY_CACHE_SHARDS: int = settings.CACHE_MEMORY_SHARDS
+    MEMORY_CACHE_MAX_ENTRIES: int = settings.CACHE_MEMORY_MAX_ENTRIES
+    MEMORY_CACHE_DISK_PATH: Optional[str] = settings.CACHE_DISK_PATH  # None 表示不启用磁盘层
 
     # Redis 配置（如果使用 Redis）
     REDIS_URL: Optional[str] = "redis://localhost:6379/0"
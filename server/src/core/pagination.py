@@ -0,0 +1,217 @@
+"""
+游标（keyset）分页
+
+列表和排名接口按 (排序值, 实体ID) 做 keyset 分页：
+    - 游标: 上一页最后一行的排序键，JSON 序列化后 base64url 编码，对客户端不透明
+    - 翻页: WHERE (排序值, ID) < (游标值) ORDER BY 排序值 DESC, ID DESC（升序时方向相反），
+      深页与首页成本相同，不再使用 OFFSET
+    - 总数: 游标翻页时可选；按数据日期计算的总数缓存在进程内，有效期内同一数据日期只统计一次
+    - 错误: 游标无效时抛出 InvalidCursorError，由 API 层转换为 422 响应
+"""
+
+import base64
+import binascii
+import json
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Hashable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, func, literal, tuple_
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无效"""
+
+    def __init__(self, cursor: str, reason: str):
+        self.cursor = cursor
+        self.reason = reason
+        super().__init__(f"无效的分页游标: {reason}")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    编码游标
+
+    Args:
+        values: 排序键的值（与 apply_keyset 的 columns 一一对应）
+
+    Returns:
+        不透明的游标字符串
+    """
+    def _default(value: Any) -> Any:
+        if isinstance(value, Decimal):
+            return str(value)
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        raise TypeError(f"无法编码的游标值类型: {type(value).__name__}")
+
+    payload = json.dumps(list(values), default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    解码游标，并按列类型还原值
+
+    Args:
+        cursor: encode_cursor 生成的游标
+        columns: 排序键的列或表达式
+
+    Returns:
+        排序键的值列表
+
+    Raises:
+        InvalidCursorError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("游标长度与排序键不一致")
+        return [_coerce(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursorError(cursor, str(e))
+
+
+def _coerce(value: Any, column: Any) -> Any:
+    """将 JSON 值还原为列类型对应的 Python 值"""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is Decimal:
+        return Decimal(str(value))
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def sort_keys(column: Any, descending: bool = True) -> Tuple[Any, ...]:
+    """
+    返回可用于 keyset 分页的非空排序键
+
+    非空列直接使用；可空列返回 (是否为 NULL 的标记, coalesce 后的值) 两个键。
+    标记列放在前面，保证 NULL 行在升序和降序下都排在最后，不会与真实值（包括负数、
+    空字符串）交错；coalesce 只是让行值比较不遇到 NULL。
+
+    Args:
+        column: 模型列
+        descending: 是否降序（决定标记列的取值方向）
+
+    Returns:
+        排序键的列或表达式元组
+    """
+    if not getattr(column, "nullable", False):
+        return (column,)
+
+    # 降序时非 NULL 为 true 排在前；升序时非 NULL 为 false 排在前
+    null_last = column.isnot(None) if descending else column.is_(None)
+
+    python_type = column.type.python_type
+    if python_type in (int, float, Decimal):
+        value = func.coalesce(column, 0)
+    elif python_type is str:
+        value = func.coalesce(column, "")
+    elif python_type is datetime:
+        value = func.coalesce(column, literal(datetime(1970, 1, 1, tzinfo=timezone.utc), column.type))
+    elif python_type is date:
+        value = func.coalesce(column, literal(date(1970, 1, 1), column.type))
+    else:
+        return (column,)
+    return (null_last, value)
+
+
+def apply_keyset(
+    stmt: Select,
+    columns: Sequence[Any],
+    cursor: Optional[str],
+    descending: bool = True,
+) -> Select:
+    """
+    为查询添加 keyset 排序和游标条件
+
+    排序键最后一列必须唯一（通常为实体ID），排序键的值不能为 NULL（可空列请用 sort_keys 展开）。
+
+    Args:
+        stmt: 查询语句（不含 ORDER BY / OFFSET）
+        columns: 排序键的列或表达式，如 (score, entity_id)
+        cursor: 上一页返回的游标，None 表示第一页
+        descending: 是否降序
+
+    Returns:
+        添加 WHERE 和 ORDER BY 后的查询语句
+    """
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, columns))
+        stmt = stmt.where(key < values if descending else key > values)
+
+    return stmt.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+
+def split_page(rows: Sequence[Any], limit: int, key: Any) -> Tuple[List[Any], Optional[str]]:
+    """
+    截取一页数据并生成下一页游标
+
+    查询时应多取一行（LIMIT limit + 1），多出的一行用于判断是否还有下一页。
+
+    Args:
+        rows: 查询结果（最多 limit + 1 行）
+        limit: 每页数量
+        key: 从行中取排序键值的函数
+
+    Returns:
+        (本页数据, 下一页游标)，没有下一页时游标为 None
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    return page, encode_cursor(key(page[-1]))
+
+
+class CountCache:
+    """
+    总数缓存（进程内）
+
+    以 (接口, 数据日期, 筛选条件) 为键缓存 COUNT 结果。数据日期变化后旧键自然失效；
+    同一日期重算期间行数可能变化，因此条目另有 TTL。超过容量时淘汰最早写入的键。
+    """
+
+    MAX_ENTRIES = 512  # 最大缓存条目数
+    TTL = 300  # 条目有效期（秒），与排名缓存一致
+
+    def __init__(self):
+        """初始化缓存"""
+        self._entries: "OrderedDict[Hashable, Tuple[int, float]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        """读取缓存的总数，不存在或已过期返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        total, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        return total
+
+    def set(self, key: Hashable, total: int) -> None:
+        """写入总数"""
+        self._entries[key] = (total, time.monotonic() + self.TTL)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+
+# 全局总数缓存
+count_cache = CountCache()
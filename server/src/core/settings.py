@@ -42,6 +42,16 @@ class Settings(BaseSettings):
     AKSHARE_TIMEOUT: int = 30
     CACHE_TTL: int = 300
 
+    # 缓存后端配置
+    CACHE_BACKEND: str = "database"  # database | memory
+    CACHE_MEMORY_SHARDS: int = 16
+    CACHE_MEMORY_MAX_ENTRIES: int = 10000
+    CACHE_DISK_PATH: Optional[str] = None  # memory 后端的磁盘层文件，None 表示不启用
+
+    # 计算配置
+    FULL_HISTORY_SHARDS: int = 1  # 完整历史计算的工作进程数，1 表示在当前进程内顺序执行
+    SNAPSHOT_CONCURRENCY: int = 1  # 强度快照并发会话数（不超过连接池大小），1 表示在单个会话中顺序执行
+
     # 邮件服务配置
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
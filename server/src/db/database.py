@@ -108,6 +108,35 @@ async def close_task_executor_engine():
         _task_executor_session_factory = None
 
 
+def create_worker_session_factory():
+    """
+    创建计算工作进程专用的数据库引擎和会话工厂
+
+    工作进程可能为每个分片启动新的 event loop，因此使用 NullPool，
+    连接不会跨 event loop 复用。
+
+    Returns:
+        (engine, session_factory)
+    """
+    worker_engine = create_async_engine(
+        DATABASE_URL,
+        echo=False,
+        poolclass=NullPool,
+        connect_args={
+            "server_settings": {"jit": "off"},
+            "command_timeout": 60,
+        },
+    )
+    session_factory = async_sessionmaker(
+        bind=worker_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+    return worker_engine, session_factory
+
+
 # 依赖注入函数
 async def get_db():
     """获取数据库会话的依赖函数"""
@@ -7,7 +7,12 @@ from .sector_stock import SectorStock
 from .period_config import PeriodConfig
 from .daily_market_data import DailyMarketData
 from .moving_average_data import MovingAverageData
+from .moving_average_daily import MovingAverageDaily
 from .strength_score import StrengthScore
+from .strength_trend import StrengthTrend
+from .latest_strength_score import LatestStrengthScore
+from .daily_strength_aggregate import DailyStrengthAggregate
+from .data_version import DataVersion
 from .user import User, EmailVerificationToken, Watchlist
 from .cache import CacheEntry
 from .update_log import DataUpdateLog
@@ -22,7 +27,12 @@ __all__ = [
     "PeriodConfig",
     "DailyMarketData",
     "MovingAverageData",
+    "MovingAverageDaily",
     "StrengthScore",
+    "StrengthTrend",
+    "LatestStrengthScore",
+    "DailyStrengthAggregate",
+    "DataVersion",
     "User",
     "EmailVerificationToken",
     "Watchlist",
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, Date, Numeric, DateTime, Integer, JSON
+from sqlalchemy.sql import func
+
+from .base import Base
+
+# 板块类型汇总行：实体类型下全部实体（股票只有这一行）
+ALL_SECTOR_TYPES = "all"
+
+
+class DailyStrengthAggregate(Base):
+    """每日强度汇总（读模型）
+
+    每个 (日期, 实体类型, 板块类型) 一行，保存当日得分的数量、均值、极值、强弱数量和等级分布。
+    sector_type 为 'all' 的行汇总该实体类型的全部实体，板块另有 industry/concept 两行。
+    由强度流水线收尾时一条 GROUP BY 写入，统计和分布接口按主键读取。
+    """
+    __tablename__ = "daily_strength_aggregates"
+
+    date = Column(Date, primary_key=True)
+    entity_type = Column(String(10), primary_key=True)  # 'stock' or 'sector'
+    sector_type = Column(String(20), primary_key=True)  # 'all', 'industry' or 'concept'
+    total_count = Column(Integer, nullable=False)
+    avg_score = Column(Numeric(precision=10, scale=4))
+    min_score = Column(Numeric(precision=10, scale=4))
+    max_score = Column(Numeric(precision=10, scale=4))
+    strong_count = Column(Integer, nullable=False)  # 得分 > 60
+    weak_count = Column(Integer, nullable=False)  # 0 < 得分 < 40
+    grade_counts = Column(JSON, nullable=False)  # {等级: 数量}，无等级计入 'N/A'
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return (
+            f"<DailyStrengthAggregate(date={self.date}, entity_type={self.entity_type}, "
+            f"sector_type={self.sector_type}, total_count={self.total_count})>"
+        )
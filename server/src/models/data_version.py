@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+
+from .base import Base
+
+# 最新强度得分读模型的版本名，刷新 latest_strength_scores 时递增
+LATEST_STRENGTH_VERSION = "latest_strength_scores"
+
+
+class DataVersion(Base):
+    """数据版本（跨进程变更信号）
+
+    每个数据名一行，写入方在写入数据的同一事务中递增 version；
+    各进程的内存缓存按主键读取版本号，与加载时的版本不同才重新加载。
+    """
+    __tablename__ = "data_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DataVersion(name={self.name}, version={self.version})>"
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, Date, Numeric, DateTime, Integer, Index
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class LatestStrengthScore(Base):
+    """最新强度得分（读模型）
+
+    每个实体一行，保存 strength_scores 中该实体最新交易日的得分、排名和等级。
+    由强度写入路径（变化率、排名更新之后）同步刷新，板块列表、热力图和排名接口直接读取，
+    查询成本与历史长度无关。
+    """
+    __tablename__ = "latest_strength_scores"
+
+    entity_type = Column(String(10), primary_key=True)  # 'stock' or 'sector'
+    entity_id = Column(Integer, primary_key=True)
+    date = Column(Date, nullable=False)  # 最新得分所在交易日
+    symbol = Column(String(20), nullable=False)  # 股票代码或板块代码
+    score = Column(Numeric(precision=10, scale=4), nullable=False)
+    rank = Column(Integer)
+    percentile = Column(Numeric(precision=5, scale=2))
+    strength_grade = Column(String(3))
+    change_rate_1d = Column(Numeric(precision=10, scale=2))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # 排名和热力图按类型取得分排序
+    __table_args__ = (
+        Index('idx_latest_strength_scores_type_score', 'entity_type', 'score'),
+    )
+
+    def __repr__(self):
+        return (
+            f"<LatestStrengthScore(entity_type={self.entity_type}, entity_id={self.entity_id}, "
+            f"date={self.date}, score={self.score})>"
+        )
@@ -0,0 +1,57 @@
+from sqlalchemy import Column, String, Date, Numeric, DateTime, Integer, Index
+from sqlalchemy.sql import func
+
+from .base import Base
+
+# 均线周期（天） -> 宽表列名
+MA_DAILY_COLUMNS = {
+    5: "ma5",
+    10: "ma10",
+    20: "ma20",
+    30: "ma30",
+    60: "ma60",
+    90: "ma90",
+    120: "ma120",
+    240: "ma240",
+}
+
+
+class MovingAverageDaily(Base):
+    """均线日表（读模型）
+
+    每个实体每个交易日一行，8 条均线和当日收盘价放在同一行。
+    由 moving_average_data（每周期一行）在写入时同步维护，供按日读取均线向量的查询使用。
+    """
+    __tablename__ = "moving_average_daily"
+
+    entity_type = Column(String(10), primary_key=True)  # 'stock' or 'sector'
+    entity_id = Column(Integer, primary_key=True)
+    date = Column(Date, primary_key=True)
+    symbol = Column(String(20), nullable=False)  # 股票代码或板块代码
+    close = Column(Numeric(precision=10, scale=2))  # 当日收盘价
+    ma5 = Column(Numeric(precision=10, scale=2))
+    ma10 = Column(Numeric(precision=10, scale=2))
+    ma20 = Column(Numeric(precision=10, scale=2))
+    ma30 = Column(Numeric(precision=10, scale=2))
+    ma60 = Column(Numeric(precision=10, scale=2))
+    ma90 = Column(Numeric(precision=10, scale=2))
+    ma120 = Column(Numeric(precision=10, scale=2))
+    ma240 = Column(Numeric(precision=10, scale=2))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # 主键 (entity_type, entity_id, date) 覆盖单实体按日期查询，另加横截面查询索引
+    __table_args__ = (
+        Index('idx_moving_average_daily_type_date', 'entity_type', 'date'),
+    )
+
+    def ma_values(self) -> dict:
+        """返回非空均线 {周期: 均线值}"""
+        values = {}
+        for period, column in MA_DAILY_COLUMNS.items():
+            value = getattr(self, column)
+            if value is not None:
+                values[period] = float(value)
+        return values
+
+    def __repr__(self):
+        return f"<MovingAverageDaily(entity_type={self.entity_type}, entity_id={self.entity_id}, date={self.date})>"
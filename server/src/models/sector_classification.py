@@ -5,7 +5,7 @@
 import decimal
 from datetime import datetime, date
 from typing import Optional
-from sqlalchemy import String, Integer, Date, DateTime, Numeric, ForeignKey
+from sqlalchemy import String, Integer, Date, DateTime, Numeric, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
@@ -30,6 +30,9 @@ class SectorClassification(Base):
         created_at: 创建时间（UTC）
     """
     __tablename__ = 'sector_classification'
+    __table_args__ = (
+        UniqueConstraint('sector_id', 'classification_date', name='uq_sector_classification_sector_date'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     sector_id: Mapped[int] = mapped_column(
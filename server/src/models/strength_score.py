@@ -1,6 +1,6 @@
 """强度得分模型"""
 
-from sqlalchemy import Column, String, Date, Integer, Numeric, DateTime, Index, text, CheckConstraint
+from sqlalchemy import Column, String, Date, Integer, Numeric, DateTime, Index, text, CheckConstraint, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -30,6 +30,7 @@ class StrengthScore(Base):
     # 基础得分数据
     score = Column(Numeric(precision=10, scale=4), nullable=False, comment="综合强度得分(0-100)")
     rank = Column(Integer, comment="排名")
+    percentile = Column(Numeric(precision=5, scale=2), comment="同类实体当日百分位(0-100)，得分最高为100")
     change_rate = Column(Numeric(precision=10, scale=4), default=0, comment="得分变化率(%)")
     strength_level = Column(String(20), comment="强度等级: weak, medium, strong, very_strong")
 
@@ -65,7 +66,8 @@ class StrengthScore(Base):
     price_above_ma240 = Column(Integer, comment="价格是否高于240日均线")
 
     # 排名和变化字段
-    change_rate_1d = Column(Numeric(precision=5, scale=2), comment="1日得分变化率(%)")
+    change_rate_1d = Column(Numeric(precision=10, scale=2), comment="1日得分变化率(%)")
+    change_rate_5d = Column(Numeric(precision=10, scale=2), comment="5日得分变化率(%)，相对前5个交易日平均得分")
     strength_grade = Column(String(3), comment="强度等级: S+, S, A+, A, B+, B, C+, C, D+, D")
 
     # 个股特有字段
@@ -92,6 +94,8 @@ class StrengthScore(Base):
         # period 已废弃，固定为 'all'
         CheckConstraint("period = 'all'", name='chk_strength_scores_period'),
         CheckConstraint("entity_type IN ('stock', 'sector')", name='chk_strength_scores_entity_type'),
+        # 每个实体每日仅一条记录，供批量 upsert 使用
+        UniqueConstraint('entity_type', 'entity_id', 'date', 'period', name='uq_strength_scores_entity_date_period'),
 
         # 价格相对均线位置约束 (0=低于, 1=高于)
         CheckConstraint('price_above_ma5 IN (0, 1)', name='chk_strength_scores_price_above_ma5'),
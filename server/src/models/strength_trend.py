@@ -0,0 +1,55 @@
+from sqlalchemy import Column, String, Date, Numeric, DateTime, Integer, Boolean, Index
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class StrengthTrend(Base):
+    """强度趋势标签
+
+    每个实体、每个结束日期、每个回看窗口一行，保存 TrendAnalysisService 的趋势识别结果
+    （线性回归斜率、R²、横盘检测、5/10/20 日均线趋势），由批量识别一次写入，供 API 直接读取。
+    """
+    __tablename__ = "strength_trends"
+
+    entity_type = Column(String(10), primary_key=True)  # 'stock' or 'sector'
+    entity_id = Column(Integer, primary_key=True)
+    date = Column(Date, primary_key=True)  # 窗口结束日期
+    window_days = Column(Integer, primary_key=True)  # 回看自然日数
+    start_date = Column(Date)  # 窗口内第一个有得分的日期
+    end_date = Column(Date)  # 窗口内最后一个有得分的日期
+    data_points = Column(Integer, nullable=False)
+
+    # 线性回归
+    trend_type = Column(String(20), nullable=False)  # strong_up, up, neutral, down, strong_down
+    slope = Column(Numeric(precision=12, scale=4))
+    r_squared = Column(Numeric(precision=8, scale=4))
+    confidence = Column(String(10))  # high, medium, low
+
+    # 横盘检测（至少 5 个数据点）
+    is_consolidating = Column(Boolean)
+    std_dev = Column(Numeric(precision=10, scale=2))
+    price_range = Column(Numeric(precision=10, scale=2))
+    support_level = Column(Numeric(precision=10, scale=2))
+    resistance_level = Column(Numeric(precision=10, scale=2))
+
+    # 均线趋势（数据点不足 window + 1 时为空）
+    ma5_direction = Column(String(20))
+    ma5_slope = Column(Numeric(precision=12, scale=4))
+    ma10_direction = Column(String(20))
+    ma10_slope = Column(Numeric(precision=12, scale=4))
+    ma20_direction = Column(String(20))
+    ma20_slope = Column(Numeric(precision=12, scale=4))
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # 主键覆盖单实体查询，另加按类型和日期筛选的索引
+    __table_args__ = (
+        Index('idx_strength_trends_type_date', 'entity_type', 'date', 'window_days'),
+    )
+
+    def __repr__(self):
+        return (
+            f"<StrengthTrend(entity_type={self.entity_type}, entity_id={self.entity_id}, "
+            f"date={self.date}, trend_type={self.trend_type})>"
+        )
@@ -5,19 +5,32 @@
 """
 
 from datetime import date
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
-from sqlalchemy import select, and_, or_
+import numpy as np
+
+from sqlalchemy import select, and_, or_, func, literal_column, bindparam, String, Integer, Date
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.daily_market_data import DailyMarketData
 from src.models.moving_average_data import MovingAverageData
+from src.models.moving_average_daily import MovingAverageDaily, MA_DAILY_COLUMNS
 from .base import BaseRepository
 
 
 class MarketDataRepository(BaseRepository[DailyMarketData]):
     """日线行情数据访问类"""
 
+    # 批量写入冲突判定使用的唯一约束
+    CONFLICT_CONSTRAINT = "uq_daily_market_data_entity_date"
+
+    # 单条 INSERT 语句的最大行数（每行 12 个参数，受 asyncpg 32767 参数上限约束）
+    UPSERT_CHUNK_SIZE = 2000
+
+    # overwrite=True 时冲突行更新的列
+    OVERWRITE_COLUMNS = ("open", "high", "low", "close", "volume", "turnover")
+
     def __init__(self, session: AsyncSession):
         """
         初始化市场数据 Repository
@@ -154,9 +167,102 @@ class MarketDataRepository(BaseRepository[DailyMarketData]):
         return result.scalar_one_or_none()
 
 
+    @staticmethod
+    def build_rows(
+        entity_type: str,
+        entity_id: int,
+        symbol: str,
+        quotes: Iterable[Mapping[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        将日线行情转换为 daily_market_data 行字典
+
+        同一日期出现多次时保留最后一条，避免单条语句内唯一键冲突。
+
+        Args:
+            entity_type: 实体类型 (stock/sector)
+            entity_id: 实体 ID
+            symbol: 股票代码或板块代码
+            quotes: 日线行情映射列表，键为 date/open/high/low/close/volume，turnover 可选
+
+        Returns:
+            行字典列表
+        """
+        rows: Dict[date, Dict[str, Any]] = {}
+        for quote in quotes:
+            rows[quote["date"]] = {
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "symbol": symbol,
+                "date": quote["date"],
+                "open": quote["open"],
+                "high": quote["high"],
+                "low": quote["low"],
+                "close": quote["close"],
+                "volume": quote["volume"],
+                "turnover": quote.get("turnover"),
+                "change": None,
+                "change_percent": None,
+            }
+        return list(rows.values())
+
+    async def bulk_upsert(
+        self,
+        rows: List[Dict[str, Any]],
+        overwrite: bool = False,
+    ) -> Dict[str, int]:
+        """
+        批量写入行情数据（INSERT ... ON CONFLICT）
+
+        overwrite=True 时冲突行更新 OHLC、成交量和换手率，否则冲突行跳过。
+        通过 RETURNING (xmax = 0) 区分新插入与更新的行。
+
+        Args:
+            rows: 行字典列表（见 build_rows）
+            overwrite: 是否覆盖已有数据
+
+        Returns:
+            {"created": 新增数, "updated": 更新数, "skipped": 跳过数}
+        """
+        counts = {"created": 0, "updated": 0, "skipped": 0}
+        if not rows:
+            return counts
+
+        for start in range(0, len(rows), self.UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + self.UPSERT_CHUNK_SIZE]
+            stmt = pg_insert(DailyMarketData).values(chunk)
+            if overwrite:
+                stmt = stmt.on_conflict_do_update(
+                    constraint=self.CONFLICT_CONSTRAINT,
+                    set_={column: stmt.excluded[column] for column in self.OVERWRITE_COLUMNS},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(constraint=self.CONFLICT_CONSTRAINT)
+            stmt = stmt.returning(literal_column("(xmax = 0)").label("inserted"))
+
+            result = await self.session.execute(stmt)
+            inserted_flags = result.scalars().all()
+            created = sum(1 for flag in inserted_flags if flag)
+
+            counts["created"] += created
+            counts["updated"] += len(inserted_flags) - created
+            counts["skipped"] += len(chunk) - len(inserted_flags)
+
+        return counts
+
+
 class MovingAverageRepository(BaseRepository[MovingAverageData]):
     """均线数据访问类"""
 
+    # 唯一约束名称（entity_type, entity_id, symbol, date, period）
+    CONFLICT_CONSTRAINT = "uq_moving_average_data_entity_date_period"
+
+    # 每条 INSERT 的行数上限（asyncpg 单条语句最多 32767 个绑定参数）
+    UPSERT_CHUNK_SIZE = 2000
+
+    # 每条均线日表刷新语句处理的 (实体, 日期) 数（键以 3 个数组参数传入，不受参数个数限制）
+    DAILY_REFRESH_CHUNK_SIZE = 10000
+
     def __init__(self, session: AsyncSession):
         """
         初始化均线数据 Repository
@@ -271,3 +377,173 @@ class MovingAverageRepository(BaseRepository[MovingAverageData]):
             插入的数据对象列表
         """
         return await self.bulk_create(data_list)
+
+    @staticmethod
+    def build_rows(
+        entity_type: str,
+        entity_id: int,
+        symbol: str,
+        period: int,
+        dates: List[date],
+        ma_values: np.ndarray,
+        price_ratios: np.ndarray,
+        trends: np.ndarray,
+    ) -> List[Dict[str, Any]]:
+        """
+        将一个周期的均线计算结果转换为 moving_average_data 行字典
+
+        均线为 NaN 的日期不生成行。
+
+        Args:
+            entity_type: 实体类型 (stock/sector)
+            entity_id: 实体 ID
+            symbol: 股票代码或板块代码
+            period: 均线周期（天）
+            dates: 日期列表
+            ma_values: 均线值数组（与 dates 对齐）
+            price_ratios: 价格比率数组
+            trends: 趋势数组
+
+        Returns:
+            行字典列表
+        """
+        period_str = f"{period}d"
+        return [
+            {
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "symbol": symbol,
+                "date": dates[i],
+                "period": period_str,
+                "ma_value": float(ma_values[i]),
+                "price_ratio": float(price_ratios[i]),
+                "trend": int(trends[i]),
+            }
+            for i in np.nonzero(np.isfinite(ma_values))[0]
+        ]
+
+    async def bulk_upsert(
+        self,
+        rows: List[Dict[str, Any]],
+        overwrite: bool = False,
+    ) -> Dict[str, int]:
+        """
+        批量写入均线数据（INSERT ... ON CONFLICT）
+
+        overwrite=True 时冲突行更新 ma_value/price_ratio/trend，否则冲突行跳过。
+        通过 RETURNING (xmax = 0) 区分新插入与更新的行。
+        实际写入的 (实体, 日期) 随后同步到均线日表（refresh_daily）。
+
+        Args:
+            rows: 均线行字典列表，需包含 entity_type, entity_id, symbol, date, period,
+                ma_value, price_ratio, trend
+            overwrite: 是否覆盖已有数据
+
+        Returns:
+            {"created": 新增数, "updated": 更新数, "skipped": 跳过数}
+        """
+        counts = {"created": 0, "updated": 0, "skipped": 0}
+        if not rows:
+            return counts
+
+        changed_keys = set()
+        for start in range(0, len(rows), self.UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + self.UPSERT_CHUNK_SIZE]
+            stmt = pg_insert(MovingAverageData).values(chunk)
+            if overwrite:
+                stmt = stmt.on_conflict_do_update(
+                    constraint=self.CONFLICT_CONSTRAINT,
+                    set_={
+                        "ma_value": stmt.excluded.ma_value,
+                        "price_ratio": stmt.excluded.price_ratio,
+                        "trend": stmt.excluded.trend,
+                    },
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(constraint=self.CONFLICT_CONSTRAINT)
+            stmt = stmt.returning(
+                literal_column("(xmax = 0)").label("inserted"),
+                MovingAverageData.entity_type,
+                MovingAverageData.entity_id,
+                MovingAverageData.date,
+            )
+
+            result = await self.session.execute(stmt)
+            written = result.all()
+            created = sum(1 for row in written if row[0])
+
+            counts["created"] += created
+            counts["updated"] += len(written) - created
+            counts["skipped"] += len(chunk) - len(written)
+            changed_keys.update((row[1], row[2], row[3]) for row in written)
+
+        await self.refresh_daily(changed_keys)
+        return counts
+
+    async def refresh_daily(self, keys: Iterable[Tuple[str, int, date]]) -> int:
+        """
+        从 moving_average_data 重建均线日表中指定 (实体, 日期) 的行
+
+        每个键的 8 个周期合并为一行（FILTER 聚合），收盘价取自 daily_market_data，
+        已存在的行整体覆盖。
+
+        Args:
+            keys: (entity_type, entity_id, date) 列表
+
+        Returns:
+            写入的行数
+        """
+        keys = list(keys)
+        columns = ["entity_type", "entity_id", "date", "symbol", "close", *MA_DAILY_COLUMNS.values()]
+        written = 0
+
+        for start in range(0, len(keys), self.DAILY_REFRESH_CHUNK_SIZE):
+            chunk = keys[start:start + self.DAILY_REFRESH_CHUNK_SIZE]
+            key_table = select(
+                func.unnest(bindparam("entity_types", [k[0] for k in chunk], type_=ARRAY(String))).label("entity_type"),
+                func.unnest(bindparam("entity_ids", [k[1] for k in chunk], type_=ARRAY(Integer))).label("entity_id"),
+                func.unnest(bindparam("dates", [k[2] for k in chunk], type_=ARRAY(Date))).label("date"),
+            ).subquery()
+
+            pivot = select(
+                MovingAverageData.entity_type,
+                MovingAverageData.entity_id,
+                MovingAverageData.date,
+                func.max(MovingAverageData.symbol),
+                func.max(DailyMarketData.close),
+                *[
+                    func.max(MovingAverageData.ma_value).filter(MovingAverageData.period == f"{period}d")
+                    for period in MA_DAILY_COLUMNS
+                ],
+            ).join(
+                key_table,
+                and_(
+                    MovingAverageData.entity_type == key_table.c.entity_type,
+                    MovingAverageData.entity_id == key_table.c.entity_id,
+                    MovingAverageData.date == key_table.c.date,
+                ),
+            ).outerjoin(
+                DailyMarketData,
+                and_(
+                    DailyMarketData.entity_type == MovingAverageData.entity_type,
+                    DailyMarketData.entity_id == MovingAverageData.entity_id,
+                    DailyMarketData.date == MovingAverageData.date,
+                ),
+            ).group_by(
+                MovingAverageData.entity_type,
+                MovingAverageData.entity_id,
+                MovingAverageData.date,
+            )
+
+            stmt = pg_insert(MovingAverageDaily).from_select(columns, pivot)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["entity_type", "entity_id", "date"],
+                set_={
+                    **{column: stmt.excluded[column] for column in columns[3:]},
+                    "updated_at": func.now(),
+                },
+            )
+            result = await self.session.execute(stmt)
+            written += result.rowcount or 0
+
+        return written
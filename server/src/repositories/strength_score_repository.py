@@ -0,0 +1,522 @@
+"""
+强度得分 Repository
+
+提供强度得分的批量写入、变化率回填、排名赋值、最新得分读模型刷新等数据访问操作。
+"""
+
+from datetime import date
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import JSON, Numeric, Select, and_, case, cast, func, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.daily_strength_aggregate import ALL_SECTOR_TYPES, DailyStrengthAggregate
+from src.models.data_version import LATEST_STRENGTH_VERSION, DataVersion
+from src.models.latest_strength_score import LatestStrengthScore
+from src.models.sector import Sector
+from src.models.strength_score import StrengthScore
+from src.config.ma_system import MA_PERIODS, STRENGTH_GRADES
+from .base import BaseRepository
+
+
+class StrengthScoreRepository(BaseRepository[StrengthScore]):
+    """强度得分数据访问类"""
+
+    # 唯一约束名称（entity_type, entity_id, date, period）
+    CONFLICT_CONSTRAINT = "uq_strength_scores_entity_date_period"
+
+    # 每条 INSERT 的行数上限（asyncpg 单条语句最多 32767 个绑定参数）
+    UPSERT_CHUNK_SIZE = 500
+
+    # 5日变化率的基准窗口（交易日数）
+    CHANGE_RATE_WINDOW_DAYS = 5
+
+    # 每日汇总中单独计数的等级，其余（含无等级）计入 'N/A'
+    AGGREGATE_GRADES = tuple(STRENGTH_GRADES.keys())
+
+    # 每日强度汇总的列（前三列为主键）
+    AGGREGATE_COLUMNS = (
+        "date", "entity_type", "sector_type", "total_count", "avg_score",
+        "min_score", "max_score", "strong_count", "weak_count", "grade_counts",
+    )
+
+    def __init__(self, session: AsyncSession):
+        """
+        初始化强度得分 Repository
+
+        Args:
+            session: 异步数据库会话
+        """
+        super().__init__(StrengthScore, session)
+
+    async def bulk_upsert(
+        self,
+        rows: Sequence[Dict[str, Any]],
+        update_columns: Optional[Sequence[str]] = None,
+    ) -> int:
+        """
+        批量写入强度得分（INSERT ... ON CONFLICT DO UPDATE）
+
+        Args:
+            rows: 行字典列表，键为 StrengthScore 列名，所有行的键集合需一致
+            update_columns: 冲突时更新的列，None 表示除唯一键外的全部传入列
+
+        Returns:
+            写入的行数
+        """
+        if not rows:
+            return 0
+
+        key_columns = {"entity_type", "entity_id", "date", "period"}
+        if update_columns is None:
+            update_columns = [c for c in rows[0].keys() if c not in key_columns]
+
+        written = 0
+        for start in range(0, len(rows), self.UPSERT_CHUNK_SIZE):
+            chunk = list(rows[start:start + self.UPSERT_CHUNK_SIZE])
+            stmt = pg_insert(StrengthScore).values(chunk)
+            set_ = {col: stmt.excluded[col] for col in update_columns}
+            set_["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                constraint=self.CONFLICT_CONSTRAINT,
+                set_=set_,
+            )
+            await self.session.execute(stmt)
+            written += len(chunk)
+
+        return written
+
+    async def update_change_rates(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        entity_type: Optional[str] = None,
+        entity_ids: Optional[Sequence[int]] = None,
+    ) -> int:
+        """
+        以一条 UPDATE ... FROM 语句回填日期范围内的 change_rate_1d / change_rate_5d
+
+        交易日取 strength_scores 中出现过的日期（按 entity_type 过滤），按日期编号后：
+            - change_rate_1d: 与上一交易日得分相比的变化率，实体上一交易日没有得分时为 NULL
+            - change_rate_5d: 与前 5 个交易日平均得分相比的变化率，窗口内没有得分时为 NULL
+        窗口函数的输入从 start_date 之前第 5 个交易日开始读取，只更新范围内的行。
+
+        Args:
+            start_date: 开始日期，None 表示从最早日期开始
+            end_date: 结束日期，None 表示与 start_date 相同（start_date 也为 None 时不限）
+            entity_type: 实体类型，None 表示股票和板块都更新
+            entity_ids: 限定的实体ID列表，None 表示全部实体
+
+        Returns:
+            更新的行数
+        """
+        if end_date is None:
+            end_date = start_date
+
+        base_filters = [StrengthScore.period == "all"]
+        if entity_type is not None:
+            base_filters.append(StrengthScore.entity_type == entity_type)
+        if end_date is not None:
+            base_filters.append(StrengthScore.date <= end_date)
+
+        # 窗口输入的下界：start_date 之前第 N 个交易日
+        window_start = None
+        if start_date is not None:
+            prior_days = (
+                select(StrengthScore.date)
+                .where(*base_filters, StrengthScore.date < start_date)
+                .distinct()
+                .order_by(StrengthScore.date.desc())
+                .limit(self.CHANGE_RATE_WINDOW_DAYS)
+                .subquery()
+            )
+            window_start = func.coalesce(
+                select(func.min(prior_days.c.date)).scalar_subquery(),
+                start_date,
+            )
+            base_filters.append(StrengthScore.date >= window_start)
+
+        # 交易日编号
+        trading_days = (
+            select(
+                StrengthScore.date,
+                func.row_number().over(order_by=StrengthScore.date).label("day_no"),
+            )
+            .where(*base_filters)
+            .group_by(StrengthScore.date)
+            .subquery("trading_days")
+        )
+
+        entity_filters = list(base_filters)
+        if entity_ids is not None:
+            entity_filters.append(StrengthScore.entity_id.in_(list(entity_ids)))
+
+        partition = (StrengthScore.entity_type, StrengthScore.entity_id)
+        scored = (
+            select(
+                StrengthScore.id,
+                StrengthScore.date,
+                StrengthScore.score,
+                trading_days.c.day_no,
+                func.lag(StrengthScore.score).over(
+                    partition_by=partition, order_by=trading_days.c.day_no
+                ).label("prev_score"),
+                func.lag(trading_days.c.day_no).over(
+                    partition_by=partition, order_by=trading_days.c.day_no
+                ).label("prev_day_no"),
+                func.avg(StrengthScore.score).over(
+                    partition_by=partition,
+                    order_by=trading_days.c.day_no,
+                    range_=(-self.CHANGE_RATE_WINDOW_DAYS, -1),
+                ).label("avg_5d"),
+            )
+            .join(trading_days, trading_days.c.date == StrengthScore.date)
+            .where(*entity_filters)
+            .subquery("scored")
+        )
+
+        change_rate_1d = case(
+            (
+                and_(scored.c.prev_day_no == scored.c.day_no - 1, scored.c.prev_score != 0),
+                func.round((scored.c.score - scored.c.prev_score) / scored.c.prev_score * 100, 2),
+            ),
+            else_=None,
+        )
+        change_rate_5d = case(
+            (
+                scored.c.avg_5d != 0,
+                func.round((scored.c.score - scored.c.avg_5d) / scored.c.avg_5d * 100, 2),
+            ),
+            else_=None,
+        )
+
+        stmt = (
+            update(StrengthScore)
+            .where(StrengthScore.id == scored.c.id)
+            .values(change_rate_1d=change_rate_1d, change_rate_5d=change_rate_5d)
+            .execution_options(synchronize_session=False)
+        )
+        if start_date is not None:
+            stmt = stmt.where(scored.c.date >= start_date)
+
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    async def update_ranks(
+        self,
+        start_date: date,
+        end_date: Optional[date] = None,
+        entity_type: Optional[str] = None,
+    ) -> int:
+        """
+        以一条 UPDATE ... FROM 语句为日期范围内每个交易日赋予排名和百分位
+
+        每个 (entity_type, date) 分区内按得分降序编号：
+            - rank: 1 为得分最高，得分相同时按 id 排序
+            - percentile: (分区总数 - rank + 1) / 分区总数 * 100，得分最高为 100
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期，None 表示与 start_date 相同
+            entity_type: 实体类型，None 表示股票和板块都更新
+
+        Returns:
+            更新的行数
+        """
+        if end_date is None:
+            end_date = start_date
+
+        filters = [
+            StrengthScore.period == "all",
+            StrengthScore.date >= start_date,
+            StrengthScore.date <= end_date,
+            StrengthScore.score.isnot(None),
+        ]
+        if entity_type is not None:
+            filters.append(StrengthScore.entity_type == entity_type)
+
+        partition = (StrengthScore.entity_type, StrengthScore.date)
+        ranked = (
+            select(
+                StrengthScore.id,
+                func.row_number().over(
+                    partition_by=partition,
+                    order_by=(StrengthScore.score.desc(), StrengthScore.id),
+                ).label("rank"),
+                func.count().over(partition_by=partition).label("total"),
+            )
+            .where(*filters)
+            .subquery("ranked")
+        )
+
+        stmt = (
+            update(StrengthScore)
+            .where(StrengthScore.id == ranked.c.id)
+            .values(
+                rank=ranked.c.rank,
+                percentile=func.round(
+                    cast(ranked.c.total - ranked.c.rank + 1, Numeric) * 100 / ranked.c.total, 2
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    async def refresh_latest(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        entity_type: Optional[str] = None,
+        entity_ids: Optional[Sequence[int]] = None,
+    ) -> int:
+        """
+        刷新最新强度得分读模型（latest_strength_scores）
+
+        取日期范围内每个实体最新一天的得分，以一条 INSERT ... SELECT DISTINCT ON 写入；
+        冲突时只在新行日期不早于已有行时覆盖，因此回填历史日期不会覆盖更新的得分。
+        同一事务中递增读模型版本号，通知其他进程的数据日期缓存重新加载。
+
+        Args:
+            start_date: 开始日期，None 表示从最早日期开始
+            end_date: 结束日期，None 表示与 start_date 相同（两者都为 None 时不限）
+            entity_type: 实体类型，None 表示股票和板块
+            entity_ids: 限定的实体ID列表，None 表示全部实体
+
+        Returns:
+            写入的行数
+        """
+        if end_date is None:
+            end_date = start_date
+
+        filters = [StrengthScore.period == "all"]
+        if start_date is not None:
+            filters.append(StrengthScore.date >= start_date)
+        if end_date is not None:
+            filters.append(StrengthScore.date <= end_date)
+        if entity_type is not None:
+            filters.append(StrengthScore.entity_type == entity_type)
+        if entity_ids is not None:
+            filters.append(StrengthScore.entity_id.in_(list(entity_ids)))
+
+        columns = [
+            "entity_type", "entity_id", "date", "symbol", "score",
+            "rank", "percentile", "strength_grade", "change_rate_1d",
+        ]
+        latest = (
+            select(*[getattr(StrengthScore, col) for col in columns])
+            .where(*filters)
+            .distinct(StrengthScore.entity_type, StrengthScore.entity_id)
+            .order_by(StrengthScore.entity_type, StrengthScore.entity_id, StrengthScore.date.desc())
+        )
+
+        stmt = pg_insert(LatestStrengthScore).from_select(columns, latest)
+        set_ = {col: stmt.excluded[col] for col in columns if col not in ("entity_type", "entity_id")}
+        set_["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["entity_type", "entity_id"],
+            set_=set_,
+            where=LatestStrengthScore.date <= stmt.excluded.date,
+        )
+
+        result = await self.session.execute(stmt)
+        await self._bump_latest_version()
+        return result.rowcount
+
+    async def _bump_latest_version(self) -> None:
+        """递增最新强度得分读模型的版本号（行不存在时创建）"""
+        stmt = pg_insert(DataVersion).values(name=LATEST_STRENGTH_VERSION, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"version": DataVersion.version + 1, "updated_at": func.now()},
+        )
+        await self.session.execute(stmt)
+
+    async def refresh_daily_aggregates(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        entity_type: Optional[str] = None,
+    ) -> int:
+        """
+        刷新每日强度汇总（daily_strength_aggregates）
+
+        以一条 INSERT ... SELECT ... GROUP BY GROUPING SETS 写入日期范围内每个
+        (日期, 实体类型) 的汇总行，以及板块按 industry/concept 拆分的汇总行。
+
+        Args:
+            start_date: 开始日期，None 表示从最早日期开始
+            end_date: 结束日期，None 表示与 start_date 相同（两者都为 None 时不限）
+            entity_type: 实体类型，None 表示股票和板块
+
+        Returns:
+            写入的行数
+        """
+        aggregates = self._daily_aggregates_select(start_date, end_date, entity_type)
+
+        stmt = pg_insert(DailyStrengthAggregate).from_select(self.AGGREGATE_COLUMNS, aggregates)
+        set_ = {col: stmt.excluded[col] for col in self.AGGREGATE_COLUMNS[3:]}
+        set_["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["date", "entity_type", "sector_type"],
+            set_=set_,
+        )
+
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    async def get_daily_aggregates(
+        self,
+        calc_date: date,
+        entity_type: str,
+        sector_types: Sequence[str] = (ALL_SECTOR_TYPES,),
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        读取某日的每日强度汇总行
+
+        按主键读取汇总表。汇总行按日期一次刷新，'all' 行存在即说明当日已刷新，
+        此时缺少的拆分行表示当日没有该类型的得分；'all' 行缺失时（写入路径尚未刷新），
+        以与 refresh_daily_aggregates 相同的口径现场统计当日得分，不写入汇总表。
+
+        Args:
+            calc_date: 日期
+            entity_type: 实体类型 (stock/sector)
+            sector_types: 需要的板块类型汇总行（'all'、'industry'、'concept'）
+
+        Returns:
+            {板块类型: 汇总行字典}，当日没有得分的板块类型不包含在内
+        """
+        stmt = select(DailyStrengthAggregate).where(
+            DailyStrengthAggregate.date == calc_date,
+            DailyStrengthAggregate.entity_type == entity_type,
+            DailyStrengthAggregate.sector_type.in_({*sector_types, ALL_SECTOR_TYPES}),
+        )
+        result = await self.session.execute(stmt)
+        rows = {
+            row.sector_type: {col: getattr(row, col) for col in self.AGGREGATE_COLUMNS}
+            for row in result.scalars().all()
+        }
+        if ALL_SECTOR_TYPES in rows:
+            return {sector_type: row for sector_type, row in rows.items() if sector_type in sector_types}
+
+        live = await self.session.execute(self._daily_aggregates_select(calc_date, calc_date, entity_type))
+        return {
+            row["sector_type"]: dict(row)
+            for row in live.mappings().all()
+            if row["sector_type"] in sector_types
+        }
+
+    def _daily_aggregates_select(
+        self,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        entity_type: Optional[str],
+    ) -> Select:
+        """
+        构造每日强度汇总的 SELECT ... GROUP BY GROUPING SETS，列与 AGGREGATE_COLUMNS 一致
+
+        Args:
+            start_date: 开始日期，None 表示从最早日期开始
+            end_date: 结束日期，None 表示与 start_date 相同（两者都为 None 时不限）
+            entity_type: 实体类型，None 表示股票和板块
+
+        Returns:
+            汇总查询语句
+        """
+        if end_date is None:
+            end_date = start_date
+
+        filters = [StrengthScore.period == "all"]
+        if start_date is not None:
+            filters.append(StrengthScore.date >= start_date)
+        if end_date is not None:
+            filters.append(StrengthScore.date <= end_date)
+        if entity_type is not None:
+            filters.append(StrengthScore.entity_type == entity_type)
+
+        score = StrengthScore.score
+        grade = StrengthScore.strength_grade
+        grade_pairs = []
+        for grade_code in self.AGGREGATE_GRADES:
+            grade_pairs += [literal(grade_code), func.count().filter(grade == grade_code)]
+        grade_pairs += [
+            literal("N/A"),
+            func.count().filter(or_(grade.is_(None), grade.notin_(self.AGGREGATE_GRADES))),
+        ]
+
+        sector_type = case(
+            (func.grouping(Sector.type) == 1, literal(ALL_SECTOR_TYPES)),
+            else_=Sector.type,
+        )
+        return (
+            select(
+                StrengthScore.date,
+                StrengthScore.entity_type,
+                sector_type.label("sector_type"),
+                func.count().label("total_count"),
+                cast(func.avg(score), Numeric(10, 4)).label("avg_score"),
+                func.min(score).label("min_score"),
+                func.max(score).label("max_score"),
+                func.count().filter(score > 60).label("strong_count"),
+                func.count().filter(and_(score != 0, score < 40)).label("weak_count"),
+                func.json_build_object(*grade_pairs, type_=JSON).label("grade_counts"),
+            )
+            .outerjoin(Sector, and_(
+                StrengthScore.entity_type == "sector",
+                StrengthScore.entity_id == Sector.id,
+            ))
+            .where(*filters)
+            .group_by(func.grouping_sets(
+                tuple_(StrengthScore.date, StrengthScore.entity_type),
+                tuple_(StrengthScore.date, StrengthScore.entity_type, Sector.type),
+            ))
+            # 按板块类型拆分的分组只保留有板块类型的行（股票没有拆分行）
+            .having(or_(func.grouping(Sector.type) == 1, Sector.type.isnot(None)))
+        )
+
+    @staticmethod
+    def result_to_row(
+        entity_type: str,
+        entity_id: int,
+        symbol: str,
+        calc_date,
+        result: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        将 StrengthCalculatorV2 结构的计算结果转换为 strength_scores 行字典
+
+        Args:
+            entity_type: 实体类型
+            entity_id: 实体ID
+            symbol: 股票代码或板块代码
+            calc_date: 计算日期
+            result: 计算结果
+
+        Returns:
+            行字典
+        """
+        ma_values = result.get('ma_values', {})
+        price_above_flags = result.get('price_above_flags', {})
+
+        row: Dict[str, Any] = {
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "symbol": symbol,
+            "date": calc_date,
+            "period": "all",
+            "score": result.get('composite_score', 0),
+            "price_position_score": result.get('price_position_score'),
+            "ma_alignment_score": result.get('ma_alignment_score'),
+            "ma_alignment_state": result.get('ma_alignment_state'),
+            "short_term_score": result.get('short_term_score'),
+            "medium_term_score": result.get('medium_term_score'),
+            "long_term_score": result.get('long_term_score'),
+            "strength_grade": result.get('strength_grade'),
+            "current_price": result.get('current_price'),
+        }
+        for period in MA_PERIODS:
+            row[f"ma{period}"] = ma_values.get(period)
+            row[f"price_above_ma{period}"] = price_above_flags.get(f"above_ma{period}")
+        return row
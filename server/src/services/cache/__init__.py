@@ -5,7 +5,7 @@
 """
 
 from .cache_manager import CacheManager, get_cache_manager, reset_cache_manager
-from .backends import DatabaseCache
+from .backends import DatabaseCache, MemoryCache
 from .strength_cache import StrengthCache
 
 __all__ = [
@@ -13,5 +13,6 @@ __all__ = [
     "get_cache_manager",
     "reset_cache_manager",
     "DatabaseCache",
+    "MemoryCache",
     "StrengthCache",
 ]
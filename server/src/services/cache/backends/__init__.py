@@ -5,5 +5,7 @@
 """
 
 from .db_cache import DatabaseCache
+from .disk_store import MmapDiskStore
+from .memory_cache import MemoryCache
 
-__all__ = ["DatabaseCache"]
+__all__ = ["DatabaseCache", "MemoryCache", "MmapDiskStore"]
@@ -7,15 +7,19 @@
 import pickle
 import asyncio
 import inspect
+import logging
 from typing import Optional, Any, Dict
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
 from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.cache import CacheEntry
 from src.db.database import AsyncSessionLocal
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def get_session():
@@ -34,6 +38,9 @@ class DatabaseCache:
     使用 CacheEntry 表存储缓存数据，支持 TTL 过期。
     """
 
+    GET_MANY_CHUNK_SIZE = 1000  # get_many 每次 IN 查询的键数
+    SET_MANY_CHUNK_SIZE = 1000  # set_many 每条 INSERT 的行数
+
     def __init__(self):
         self._lock = asyncio.Lock()
         self._cleanup_interval = 3600  # 每小时清理一次过期缓存
@@ -195,23 +202,41 @@ class DatabaseCache:
         """
         批量获取缓存
 
+        每 GET_MANY_CHUNK_SIZE 个键一次 WHERE key IN (...) 查询。
+
         Args:
             keys: 缓存键列表
 
         Returns:
             键值对字典
         """
+        keys = list(dict.fromkeys(keys))
         results = {}
-        for key in keys:
-            value = await self.get(key)
-            if value is not None:
-                results[key] = value
+        if not keys:
+            return results
+
+        now = datetime.now()
+        async with get_session() as session:
+            for start in range(0, len(keys), self.GET_MANY_CHUNK_SIZE):
+                chunk = keys[start:start + self.GET_MANY_CHUNK_SIZE]
+                stmt = select(CacheEntry.key, CacheEntry.value).where(
+                    CacheEntry.key.in_(chunk),
+                    CacheEntry.expires_at > now
+                )
+                result = await session.execute(stmt)
+                for key, raw in result.all():
+                    try:
+                        results[key] = pickle.loads(raw)
+                    except (pickle.PickleError, EOFError):
+                        continue
         return results
 
     async def set_many(self, mapping: Dict[str, Any], ttl: int = 3600) -> int:
         """
         批量设置缓存
 
+        使用 INSERT ... ON CONFLICT (key) DO UPDATE 一次写入，无法序列化的值跳过。
+
         Args:
             mapping: 键值对字典
             ttl: 过期时间（秒）
@@ -219,11 +244,30 @@ class DatabaseCache:
         Returns:
             成功设置的数量
         """
-        count = 0
+        expires_at = datetime.now() + timedelta(seconds=ttl)
+        rows = []
         for key, value in mapping.items():
-            if await self.set(key, value, ttl):
-                count += 1
-        return count
+            try:
+                rows.append({"key": key, "value": pickle.dumps(value), "expires_at": expires_at})
+            except (pickle.PickleError, TypeError, AttributeError) as e:
+                logger.error(f"缓存设置失败 {key}: {e}")
+        if not rows:
+            return 0
+
+        try:
+            async with get_session() as session:
+                for start in range(0, len(rows), self.SET_MANY_CHUNK_SIZE):
+                    stmt = pg_insert(CacheEntry).values(rows[start:start + self.SET_MANY_CHUNK_SIZE])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[CacheEntry.key],
+                        set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+                    )
+                    await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"缓存批量设置失败: {e}")
+            return 0
+        return len(rows)
 
     async def exists(self, key: str) -> bool:
         """
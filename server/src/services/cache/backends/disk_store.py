@@ -0,0 +1,324 @@
+"""
+内存映射磁盘存储
+
+为进程内缓存提供可跨重启保留的磁盘层。
+
+文件格式（追加写日志）:
+    每条记录 = 头部 (expires_at: float64, key_len: uint32, value_len: uint32) + key + value
+    - value 为 pickle 序列化后的字节
+    - value_len == 0 表示删除标记（墓碑）
+    - 同一个键以最后一条记录为准
+
+启动时顺序扫描文件重建 键 -> (偏移, 长度, 过期时间) 索引，读取时通过 mmap 直接切片，
+不需要逐条 seek/read。失效字节超过有效字节时自动压缩重写文件。
+
+同一个文件只能由一个进程打开写入。
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 记录头部: expires_at, key_len, value_len
+_HEADER = struct.Struct("<dII")
+
+
+class MmapDiskStore:
+    """
+    基于 mmap 的追加写键值存储
+
+    存储的是已序列化的字节，序列化由调用方负责。
+    """
+
+    COMPACT_MIN_BYTES = 4 * 1024 * 1024  # 失效字节达到该值且超过有效字节时压缩
+
+    def __init__(self, path: str):
+        """
+        打开（或创建）磁盘存储
+
+        Args:
+            path: 数据文件路径，所在目录不存在时自动创建
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # 键 -> (value 偏移, value 长度, 过期时间)
+        self._index: Dict[str, Tuple[int, int, float]] = {}
+        self._live_bytes = 0
+        self._dead_bytes = 0
+        self._mm: Optional[mmap.mmap] = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a+b", buffering=0)
+        self._load()
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Tuple[bytes, float]]:
+        """
+        读取单个键
+
+        Args:
+            key: 缓存键
+            now: 当前时间戳（默认 time.time()）
+
+        Returns:
+            (value 字节, 过期时间)，不存在或已过期返回 None
+        """
+        return self.get_many([key], now).get(key)
+
+    def get_many(self, keys: Iterable[str], now: Optional[float] = None) -> Dict[str, Tuple[bytes, float]]:
+        """
+        批量读取（只加一次锁、最多重新映射一次）
+
+        Args:
+            keys: 缓存键列表
+            now: 当前时间戳（默认 time.time()）
+
+        Returns:
+            键 -> (value 字节, 过期时间)，只包含存在且未过期的键
+        """
+        now = time.time() if now is None else now
+        results: Dict[str, Tuple[bytes, float]] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._index.get(key)
+                if entry is None:
+                    continue
+                offset, length, expires_at = entry
+                if expires_at <= now:
+                    continue
+                results[key] = (self._read(offset, length), expires_at)
+        return results
+
+    def ttl(self, key: str, now: Optional[float] = None) -> Optional[float]:
+        """
+        获取过期时间戳
+
+        Returns:
+            过期时间戳，不存在或已过期返回 None
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or entry[2] <= now:
+                return None
+            return entry[2]
+
+    def keys(self) -> List[str]:
+        """返回所有键（含已过期但未清理的）"""
+        with self._lock:
+            return list(self._index)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def put_many(self, items: Iterable[Tuple[str, bytes, float]]) -> int:
+        """
+        批量写入，所有记录通过一次 write 追加到文件
+
+        Args:
+            items: (键, value 字节, 过期时间戳) 列表
+
+        Returns:
+            写入的记录数
+        """
+        records = []
+        pending: List[Tuple[str, int, int, float]] = []  # 键, 记录内 value 偏移, value 长度, 过期时间
+        size = 0
+        for key, value, expires_at in items:
+            key_bytes = key.encode("utf-8")
+            records.append(_HEADER.pack(expires_at, len(key_bytes), len(value)))
+            records.append(key_bytes)
+            records.append(value)
+            value_offset = size + _HEADER.size + len(key_bytes)
+            pending.append((key, value_offset, len(value), expires_at))
+            size += _HEADER.size + len(key_bytes) + len(value)
+
+        if not pending:
+            return 0
+
+        with self._lock:
+            base = self._append(b"".join(records))
+            for key, value_offset, length, expires_at in pending:
+                self._discard(key)
+                self._index[key] = (base + value_offset, length, expires_at)
+                self._live_bytes += self._record_size(key, length)
+            self._maybe_compact()
+        return len(pending)
+
+    def delete_many(self, keys: Iterable[str]) -> List[str]:
+        """
+        批量删除（写入墓碑记录）
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            实际删除的键
+        """
+        with self._lock:
+            existing = [key for key in dict.fromkeys(keys) if key in self._index]
+            if not existing:
+                return []
+            tombstones = []
+            for key in existing:
+                key_bytes = key.encode("utf-8")
+                tombstones.append(_HEADER.pack(0.0, len(key_bytes), 0))
+                tombstones.append(key_bytes)
+                self._discard(key)
+            tombstone_bytes = b"".join(tombstones)
+            self._append(tombstone_bytes)
+            self._dead_bytes += len(tombstone_bytes)
+            self._maybe_compact()
+            return existing
+
+    def purge_expired(self, now: Optional[float] = None) -> List[str]:
+        """
+        删除已过期的键
+
+        过期记录不需要墓碑：重启后按过期时间同样会被忽略。
+
+        Returns:
+            删除的键
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [key for key, entry in self._index.items() if entry[2] <= now]
+            for key in expired:
+                self._discard(key)
+            self._maybe_compact()
+            return expired
+
+    def clear(self) -> int:
+        """
+        清空存储（截断文件）
+
+        Returns:
+            清除的键数量
+        """
+        with self._lock:
+            count = len(self._index)
+            self._close_map()
+            self._file.truncate(0)
+            self._index.clear()
+            self._live_bytes = 0
+            self._dead_bytes = 0
+            return count
+
+    def close(self) -> None:
+        """关闭文件和内存映射"""
+        with self._lock:
+            self._close_map()
+            if not self._file.closed:
+                self._file.close()
+
+    # ------------------------------------------------------------------
+    # 内部实现（调用方持有 self._lock）
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _record_size(key: str, value_len: int) -> int:
+        return _HEADER.size + len(key.encode("utf-8")) + value_len
+
+    def _discard(self, key: str) -> None:
+        """从索引移除键，并把旧记录计入失效字节"""
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            size = self._record_size(key, entry[1])
+            self._live_bytes -= size
+            self._dead_bytes += size
+
+    def _append(self, data: bytes) -> int:
+        """追加数据，返回写入起始偏移"""
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        return offset
+
+    def _read(self, offset: int, length: int) -> bytes:
+        """通过 mmap 读取，文件增长后重新映射"""
+        end = offset + length
+        if self._mm is None or len(self._mm) < end:
+            self._close_map()
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm[offset:end]
+
+    def _close_map(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _load(self) -> None:
+        """扫描数据文件重建索引，截断末尾不完整的记录"""
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            return
+
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        now = time.time()
+        pos = 0
+        while pos + _HEADER.size <= size:
+            expires_at, key_len, value_len = _HEADER.unpack_from(self._mm, pos)
+            end = pos + _HEADER.size + key_len + value_len
+            if end > size:
+                break
+            key = self._mm[pos + _HEADER.size:pos + _HEADER.size + key_len].decode("utf-8", errors="replace")
+            self._discard(key)
+            record_size = end - pos
+            if value_len == 0 or expires_at <= now:
+                self._dead_bytes += record_size
+            else:
+                self._index[key] = (end - value_len, value_len, expires_at)
+                self._live_bytes += record_size
+            pos = end
+
+        if pos < size:
+            logger.warning(f"磁盘缓存文件末尾存在不完整记录，已截断: {self.path} ({size - pos} 字节)")
+            self._close_map()
+            self._file.truncate(pos)
+
+        logger.info(f"磁盘缓存已加载: {self.path}, {len(self._index)} 条")
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        """失效字节过多时重写文件"""
+        if self._dead_bytes < self.COMPACT_MIN_BYTES or self._dead_bytes <= self._live_bytes:
+            return
+
+        tmp_path = f"{self.path}.compact"
+        new_index: Dict[str, Tuple[int, int, float]] = {}
+        with open(tmp_path, "wb") as tmp:
+            pos = 0
+            for key, (offset, length, expires_at) in self._index.items():
+                key_bytes = key.encode("utf-8")
+                tmp.write(_HEADER.pack(expires_at, len(key_bytes), length))
+                tmp.write(key_bytes)
+                tmp.write(self._read(offset, length))
+                pos += _HEADER.size + len(key_bytes)
+                new_index[key] = (pos, length, expires_at)
+                pos += length
+            tmp.flush()
+            os.fsync(tmp.fileno())
+
+        self._close_map()
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a+b", buffering=0)
+
+        logger.debug(f"磁盘缓存压缩: 释放 {self._dead_bytes} 字节")
+        self._index = new_index
+        self._live_bytes = pos
+        self._dead_bytes = 0
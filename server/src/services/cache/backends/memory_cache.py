@@ -0,0 +1,372 @@
+"""
+进程内缓存后端
+
+分片字典 + TTL 的内存缓存，可选 mmap 磁盘层使缓存跨重启保留。
+不依赖任何外部服务，命中时不产生数据库往返。
+
+设计说明:
+    - 分片: 键按哈希分到多个分片，每个分片独立加锁，减少线程间争用
+    - 淘汰: 每个分片是一个 LRU（OrderedDict），超出容量时淘汰最久未访问的条目
+    - 磁盘层: 写入时同步追加到磁盘存储；内存未命中时回查磁盘并提升到内存
+    - 批量操作: get_many/set_many 按分片分组，每个分片只加一次锁，磁盘层一次读写
+
+注意: 内存层直接保存对象引用（不做序列化），调用方不应修改取回的缓存值。
+多进程部署时各进程的内存层互相独立，需要跨进程共享时使用数据库后端。
+"""
+
+import logging
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .disk_store import MmapDiskStore
+
+logger = logging.getLogger(__name__)
+
+# 分片条目: (过期时间戳, 值)
+_Entry = Tuple[float, Any]
+
+
+class _Shard:
+    """单个分片：LRU 字典和独立的锁"""
+
+    __slots__ = ("lock", "data")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data: "OrderedDict[str, _Entry]" = OrderedDict()
+
+
+class MemoryCache:
+    """
+    进程内分片 TTL 缓存
+
+    与 DatabaseCache 接口一致，可作为 CacheManager 的后端。
+    """
+
+    DEFAULT_SHARDS = 16  # 分片数
+    DEFAULT_MAX_ENTRIES = 10000  # 内存层最大条目数（所有分片合计）
+
+    def __init__(
+        self,
+        shards: int = DEFAULT_SHARDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        disk_path: Optional[str] = None,
+    ):
+        """
+        初始化内存缓存
+
+        Args:
+            shards: 分片数
+            max_entries: 内存层最大条目数，超出后按分片 LRU 淘汰（磁盘层不受影响）
+            disk_path: 磁盘层数据文件路径，None 表示不启用磁盘层
+        """
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._shard_capacity = max(1, max_entries // len(self._shards))
+        self._disk = MmapDiskStore(disk_path) if disk_path else None
+
+        # 缓存统计
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存值，如果不存在或已过期则返回 None
+        """
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: list[str]) -> Dict[str, Any]:
+        """
+        批量获取缓存
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            键值对字典（只包含命中的键）
+        """
+        now = time.time()
+        results: Dict[str, Any] = {}
+        missing: List[str] = []
+
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            with shard.lock:
+                for key in shard_keys:
+                    entry = shard.data.get(key)
+                    if entry is None:
+                        missing.append(key)
+                    elif entry[0] <= now:
+                        del shard.data[key]
+                        missing.append(key)
+                    else:
+                        shard.data.move_to_end(key)
+                        results[key] = entry[1]
+
+        hits = len(results)
+        disk_hits = 0
+        if missing and self._disk is not None:
+            promoted: Dict[str, _Entry] = {}
+            for key, (raw, expires_at) in self._disk.get_many(missing, now).items():
+                try:
+                    value = pickle.loads(raw)
+                except (pickle.PickleError, EOFError, AttributeError, ImportError) as e:
+                    logger.warning(f"磁盘缓存反序列化失败 {key}: {e}")
+                    continue
+                results[key] = value
+                promoted[key] = (expires_at, value)
+            disk_hits = len(promoted)
+            self._store(promoted)
+
+        with self._stats_lock:
+            self._hits += hits
+            self._disk_hits += disk_hits
+            self._misses += len(keys) - hits - disk_hits
+
+        return results
+
+    async def exists(self, key: str) -> bool:
+        """
+        检查缓存是否存在
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            是否存在且未过期
+        """
+        return await self.ttl(key) is not None
+
+    async def ttl(self, key: str) -> Optional[int]:
+        """
+        获取缓存剩余 TTL
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            剩余秒数，如果不存在返回 None
+        """
+        now = time.time()
+        shard = self._shard_for(key)
+        with shard.lock:
+            entry = shard.data.get(key)
+        expires_at = entry[0] if entry is not None and entry[0] > now else None
+        if expires_at is None and self._disk is not None:
+            expires_at = self._disk.ttl(key, now)
+        if expires_at is None:
+            return None
+        return max(0, int(expires_at - now))
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    async def set(self, key: str, value: Any, ttl: int = 3600) -> bool:
+        """
+        设置缓存值
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间（秒），默认 1 小时
+
+        Returns:
+            是否成功
+        """
+        return await self.set_many({key: value}, ttl) == 1
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: int = 3600) -> int:
+        """
+        批量设置缓存
+
+        启用磁盘层时所有条目通过一次追加写入磁盘；无法序列化的值跳过。
+
+        Args:
+            mapping: 键值对字典
+            ttl: 过期时间（秒）
+
+        Returns:
+            成功设置的数量
+        """
+        expires_at = time.time() + ttl
+        entries = {key: (expires_at, value) for key, value in mapping.items()}
+
+        if self._disk is not None:
+            records = []
+            for key, value in mapping.items():
+                try:
+                    records.append((key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at))
+                except (pickle.PickleError, TypeError, AttributeError) as e:
+                    logger.error(f"缓存设置失败 {key}: {e}")
+                    del entries[key]
+            try:
+                self._disk.put_many(records)
+            except OSError as e:
+                logger.error(f"磁盘缓存写入失败: {e}")
+
+        self._store(entries)
+        return len(entries)
+
+    async def delete(self, key: str) -> bool:
+        """
+        删除缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            是否成功
+        """
+        return await self._delete_keys([key]) > 0
+
+    async def clear_pattern(self, pattern: str) -> int:
+        """
+        按模式清除缓存
+
+        Args:
+            pattern: 键模式（与数据库后端一致，使用 SQL LIKE 语法: % 和 _）
+
+        Returns:
+            清除的缓存数量
+        """
+        regex = self._like_to_regex(pattern)
+        return await self._delete_keys(key for key in self._all_keys() if regex.match(key))
+
+    async def clear_all(self) -> int:
+        """
+        清除所有缓存
+
+        Returns:
+            清除的缓存数量
+        """
+        keys = self._all_keys()
+        for shard in self._shards:
+            with shard.lock:
+                shard.data.clear()
+        if self._disk is not None:
+            self._disk.clear()
+        return len(keys)
+
+    async def cleanup_expired(self) -> int:
+        """
+        清理过期缓存
+
+        Returns:
+            清理的缓存数量
+        """
+        now = time.time()
+        expired = set()
+        for shard in self._shards:
+            with shard.lock:
+                shard_expired = [key for key, entry in shard.data.items() if entry[0] <= now]
+                for key in shard_expired:
+                    del shard.data[key]
+            expired.update(shard_expired)
+
+        if self._disk is not None:
+            expired.update(self._disk.purge_expired(now))
+        return len(expired)
+
+    # ------------------------------------------------------------------
+    # 统计与关闭
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含缓存统计的字典
+        """
+        with self._stats_lock:
+            hits, disk_hits, misses = self._hits, self._disk_hits, self._misses
+        total = hits + disk_hits + misses
+        return {
+            "hits": hits,
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "hit_rate": (hits + disk_hits) / total if total > 0 else 0,
+            "size": sum(len(shard.data) for shard in self._shards),
+            "disk_size": len(self._disk) if self._disk is not None else None,
+            "shards": len(self._shards),
+            "max_entries": self._shard_capacity * len(self._shards),
+        }
+
+    def close(self) -> None:
+        """关闭磁盘层"""
+        if self._disk is not None:
+            self._disk.close()
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+
+    def _shard_for(self, key: str) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _group_by_shard(self, keys: Iterable[str]) -> Dict[_Shard, List[str]]:
+        groups: Dict[_Shard, List[str]] = {}
+        for key in keys:
+            groups.setdefault(self._shard_for(key), []).append(key)
+        return groups
+
+    def _store(self, entries: Dict[str, _Entry]) -> None:
+        """写入内存层，按分片加锁并执行 LRU 淘汰"""
+        for shard, shard_keys in self._group_by_shard(entries).items():
+            with shard.lock:
+                for key in shard_keys:
+                    shard.data[key] = entries[key]
+                    shard.data.move_to_end(key)
+                while len(shard.data) > self._shard_capacity:
+                    shard.data.popitem(last=False)
+
+    def _all_keys(self) -> set:
+        """内存层和磁盘层的所有键"""
+        keys = set()
+        for shard in self._shards:
+            with shard.lock:
+                keys.update(shard.data)
+        if self._disk is not None:
+            keys.update(self._disk.keys())
+        return keys
+
+    async def _delete_keys(self, keys: Iterable[str]) -> int:
+        """从两层中删除，返回删除的不同键数量"""
+        keys = list(dict.fromkeys(keys))
+        deleted = set()
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            with shard.lock:
+                for key in shard_keys:
+                    if shard.data.pop(key, None) is not None:
+                        deleted.add(key)
+        if self._disk is not None:
+            deleted.update(self._disk.delete_many(keys))
+        return len(deleted)
+
+    @staticmethod
+    def _like_to_regex(pattern: str) -> "re.Pattern[str]":
+        """将 SQL LIKE 模式转换为正则表达式"""
+        parts = []
+        for char in pattern:
+            if char == "%":
+                parts.append(".*")
+            elif char == "_":
+                parts.append(".")
+            else:
+                parts.append(re.escape(char))
+        return re.compile("".join(parts) + r"\Z", re.DOTALL)
@@ -8,6 +8,7 @@ from typing import Optional, Any, Dict
 import logging
 
 from .backends.db_cache import DatabaseCache
+from .backends.memory_cache import MemoryCache
 
 logger = logging.getLogger(__name__)
 
@@ -19,18 +20,22 @@ class CacheManager:
     提供统一的缓存接口，支持多种后端实现。
     """
 
-    def __init__(self, backend: str = "database"):
+    def __init__(self, backend: str = "database", **backend_options: Any):
         """
         初始化缓存管理器
 
         Args:
-            backend: 缓存后端类型 ('database' | 'redis')
+            backend: 缓存后端类型 ('database' | 'memory')
+            **backend_options: 传给后端构造函数的参数
+                （memory: shards, max_entries, disk_path）
         """
         self.backend_type = backend
         self._backend = None
 
         if backend == "database":
-            self._backend = DatabaseCache()
+            self._backend = DatabaseCache(**backend_options)
+        elif backend == "memory":
+            self._backend = MemoryCache(**backend_options)
         # elif backend == "redis":
         #     from .backends.redis_cache import RedisCache
         #     self._backend = RedisCache()
@@ -91,11 +96,24 @@ def get_cache_manager() -> CacheManager:
     """
     global _cache_manager
     if _cache_manager is None:
-        _cache_manager = CacheManager(backend="database")
+        from src.config.cache_config import CacheConfig
+
+        if CacheConfig.CACHE_BACKEND == "memory":
+            _cache_manager = CacheManager(
+                backend="memory",
+                shards=CacheConfig.MEMORY_CACHE_SHARDS,
+                max_entries=CacheConfig.MEMORY_CACHE_MAX_ENTRIES,
+                disk_path=CacheConfig.MEMORY_CACHE_DISK_PATH,
+            )
+        else:
+            _cache_manager = CacheManager(backend=CacheConfig.CACHE_BACKEND)
+        logger.info(f"缓存后端: {CacheConfig.CACHE_BACKEND}")
     return _cache_manager
 
 
 def reset_cache_manager():
     """重置缓存管理器（主要用于测试）"""
     global _cache_manager
+    if _cache_manager is not None and hasattr(_cache_manager._backend, "close"):
+        _cache_manager._backend.close()
     _cache_manager = None
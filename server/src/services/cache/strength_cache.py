@@ -17,6 +17,8 @@ logger = logging.getLogger(__name__)
 STRENGTH_CACHE_TTL = 300  # 5分钟 - 实时强度数据
 RANKING_CACHE_TTL = 300   # 5分钟 - 排名数据
 HISTORY_CACHE_TTL = 600   # 10分钟 - 历史数据
+SCATTER_CACHE_TTL = 86400  # 1天 - 按日期预计算的散点图数据，每日数据更新后重建
+SCATTER_MISS_CACHE_TTL = 300  # 5分钟 - 读取未命中时回填的散点图数据，该日期可能仍在计算
 
 # 内存缓存配置
 IN_MEMORY_CACHE_SIZE = 1000  # 最大缓存条目数
@@ -85,6 +87,18 @@ class StrengthCache:
         """
         return f"history:{entity_type}:{entity_id}:{days}:{end_date}"
 
+    def _generate_scatter_key(self, calc_date: date) -> str:
+        """
+        生成散点图数据缓存键
+
+        Args:
+            calc_date: 计算日期
+
+        Returns:
+            散点图数据缓存键
+        """
+        return f"scatter:sector:{calc_date}"
+
     def _set_memory_cache(self, key: str, value: Any) -> None:
         """
         设置内存缓存（FIFO淘汰）
@@ -409,6 +423,72 @@ class StrengthCache:
         self._clear_memory_cache(key)
         return await self._cache_manager.delete(key)
 
+    # ========== 散点图数据缓存 ==========
+    #
+    # 散点图数据由每日数据更新在一个进程中重建，需要对所有进程立即可见，
+    # 因此只读写 L2，不经过进程内的 L1。
+
+    async def get_scatter(self, calc_date: date) -> Optional[Dict]:
+        """
+        获取散点图数据缓存
+
+        Args:
+            calc_date: 计算日期
+
+        Returns:
+            散点图数据，不存在返回 None
+        """
+        return await self._cache_manager.get(self._generate_scatter_key(calc_date))
+
+    async def set_scatter(self, calc_date: date, data: Dict, ttl: int = SCATTER_CACHE_TTL) -> bool:
+        """
+        设置散点图数据缓存
+
+        Args:
+            calc_date: 计算日期
+            data: 散点图数据
+            ttl: 过期时间（秒）
+
+        Returns:
+            是否成功
+        """
+        return await self._cache_manager.set(self._generate_scatter_key(calc_date), data, ttl)
+
+    async def delete_scatter(self, calc_date: date) -> bool:
+        """
+        删除散点图数据缓存
+
+        Args:
+            calc_date: 计算日期
+
+        Returns:
+            是否成功
+        """
+        return await self._cache_manager.delete(self._generate_scatter_key(calc_date))
+
+    async def invalidate_scatter(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """
+        强度写入后失效日期范围内的散点图缓存
+
+        单日写入只删除该日期的键；多日或不限日期的写入（回填）清除全部散点图缓存。
+
+        Args:
+            start_date: 开始日期，None 表示不限
+            end_date: 结束日期，None 表示与 start_date 相同
+
+        Returns:
+            清除的条目数
+        """
+        if end_date is None:
+            end_date = start_date
+        if start_date is not None and start_date == end_date:
+            return int(await self.delete_scatter(start_date))
+        return await self._cache_manager.clear_pattern("scatter:%")
+
     # ========== 批量操作 ==========
 
     async def get_many_strength(
@@ -460,6 +540,7 @@ class StrengthCache:
         count = await self._cache_manager.clear_pattern("strength:%")
         count += await self._cache_manager.clear_pattern("ranking:%")
         count += await self._cache_manager.clear_pattern("history:%")
+        count += await self._cache_manager.clear_pattern("scatter:%")
 
         return count
 
@@ -483,3 +564,4 @@ class StrengthCache:
     def get_memory_cache_max_size(self) -> int:
         """获取内存缓存最大容量"""
         return self._memory_cache_max
+
@@ -5,17 +5,24 @@
 - 价格位置得分计算
 - 均线排列得分计算
 - 综合强度计算
-- 数据加载
+- 整段历史的向量化强度计算
+- 数据加载及进程级均线缓存
 """
 
 from .price_position_scorer import PricePositionScorer
 from .ma_alignment_scorer import MAAlignmentScorer
 from .strength_calculator_v2 import StrengthCalculatorV2
-from .ma_data_loader import MADataLoader
+from .ma_data_loader import MADataLoader, UniverseData
+from .ma_cache import MADataCache, ma_data_cache
+from .vectorized_strength import VectorizedStrengthCalculator
 
 __all__ = [
     "PricePositionScorer",
     "MAAlignmentScorer",
     "StrengthCalculatorV2",
     "MADataLoader",
+    "UniverseData",
+    "MADataCache",
+    "ma_data_cache",
+    "VectorizedStrengthCalculator",
 ]
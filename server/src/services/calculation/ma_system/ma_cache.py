@@ -0,0 +1,227 @@
+"""
+均线数据进程级缓存
+
+为 MADataLoader 提供进程内共享的 LRU 缓存，按估算的内存字节数限制容量。
+
+缓存设计说明:
+    - 缓存键: (entity_type, entity_id, calc_date)
+    - 缓存值: 该实体截至 calc_date 的各周期最新均线及其加载时请求的周期集合
+    - 淘汰: 超出字节预算时按最近最少使用顺序淘汰
+    - 失效: 均线写入服务完成某日期的写入后，清除 calc_date >= 该日期的条目
+      （截至 calc_date 的最新均线可能正是新写入的那一天）
+
+使用限制:
+    - 单进程内存缓存，不支持多 worker 共享
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认内存预算（字节）
+MA_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# 缓存键类型: (entity_type, entity_id, calc_date)
+CacheKey = Tuple[str, int, date]
+
+
+def _estimate_size(key: CacheKey, periods: FrozenSet[int], ma_values: Dict[int, float]) -> int:
+    """
+    估算一条缓存条目占用的字节数
+
+    Args:
+        key: 缓存键
+        periods: 加载时请求的周期集合
+        ma_values: 均线值字典
+
+    Returns:
+        估算字节数
+    """
+    size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+    size += sys.getsizeof(periods) + sum(sys.getsizeof(p) for p in periods)
+    size += sys.getsizeof(ma_values)
+    size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in ma_values.items())
+    return size
+
+
+class MADataCache:
+    """
+    均线数据 LRU 缓存
+
+    线程安全，按字节预算淘汰，记录命中、未命中和淘汰次数。
+    """
+
+    def __init__(self, max_bytes: int = MA_CACHE_MAX_BYTES):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 内存预算（字节）
+        """
+        self._entries: "OrderedDict[CacheKey, Tuple[FrozenSet[int], Dict[int, float], int]]" = OrderedDict()
+        self._max_bytes = max_bytes
+        self._current_bytes = 0
+        self._lock = threading.RLock()
+
+        # 缓存统计
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key: CacheKey, periods: Iterable[int]) -> Optional[Dict[int, float]]:
+        """
+        获取缓存的均线值
+
+        只有缓存条目加载时覆盖了全部请求周期才算命中。
+
+        Args:
+            key: 缓存键
+            periods: 请求的周期列表
+
+        Returns:
+            请求周期的均线值字典（副本），未命中返回 None
+        """
+        periods = list(periods)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry[0].issuperset(periods):
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            ma_values = entry[1]
+            return {p: ma_values[p] for p in periods if p in ma_values}
+
+    def set(self, key: CacheKey, periods: Iterable[int], ma_values: Dict[int, float]) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            periods: 加载时请求的周期列表
+            ma_values: 均线值字典
+        """
+        loaded_periods = frozenset(periods)
+        values = dict(ma_values)
+        size = _estimate_size(key, loaded_periods, values)
+        if size > self._max_bytes:
+            return
+
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (loaded_periods, values, size)
+            self._current_bytes += size
+
+            while self._current_bytes > self._max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self._evictions += 1
+
+    def remove(self, key: CacheKey) -> bool:
+        """
+        移除单个条目
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            是否移除了条目
+        """
+        with self._lock:
+            return self._discard(key)
+
+    def invalidate(
+        self,
+        entity_type: str,
+        from_date: date,
+        entity_ids: Optional[Iterable[int]] = None
+    ) -> int:
+        """
+        均线写入后失效相关条目
+
+        清除 calc_date >= from_date 的条目，因为它们读取的"截至该日最新均线"
+        可能已经改变。
+
+        Args:
+            entity_type: 实体类型
+            from_date: 写入的最早日期
+            entity_ids: 只失效这些实体，None 表示该类型的全部实体
+
+        Returns:
+            清除的条目数
+        """
+        ids = set(entity_ids) if entity_ids is not None else None
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if key[0] == entity_type
+                and key[2] >= from_date
+                and (ids is None or key[1] in ids)
+            ]
+            for key in keys:
+                self._discard(key)
+            self._invalidations += len(keys)
+
+        if keys:
+            logger.debug(f"均线缓存失效: {entity_type} 自 {from_date} 起 {len(keys)} 条")
+        return len(keys)
+
+    def clear(self) -> int:
+        """
+        清空缓存
+
+        Returns:
+            清除的条目数
+        """
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._current_bytes = 0
+            return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含缓存统计的字典
+        """
+        with self._lock:
+            total_requests = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "hit_rate": self._hits / total_requests if total_requests > 0 else 0,
+                "size": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+    def reset_stats(self) -> None:
+        """重置缓存统计"""
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._invalidations = 0
+
+    def _discard(self, key: CacheKey) -> bool:
+        """移除条目并扣减字节数（调用方需持有锁）"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._current_bytes -= entry[2]
+        return True
+
+
+# 全局缓存实例
+ma_data_cache = MADataCache()
@@ -5,42 +5,117 @@
 """
 
 import logging
+from dataclasses import dataclass
 from datetime import date
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Sequence
 
+import numpy as np
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.moving_average_data import MovingAverageData
+from src.models.moving_average_daily import MovingAverageDaily
 from src.models.daily_market_data import DailyMarketData
 from src.config.ma_system import MA_PERIODS, get_available_periods
+from .ma_cache import MADataCache, ma_data_cache
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class UniverseData:
+    """
+    一批实体在某个计算日期的均线计算数据（列式存储）
+
+    各数组按 entity_ids 升序对齐；缺失的价格和均线为 NaN。
+    """
+
+    entity_type: str
+    calc_date: date
+    periods: List[int]
+    entity_ids: np.ndarray       # (n,) int64，升序
+    current_prices: np.ndarray   # (n,) float
+    ma_matrix: np.ndarray        # (n, len(periods)) float
+    available_days: np.ndarray   # (n,) int64
+
+    def __len__(self) -> int:
+        return len(self.entity_ids)
+
+    def index_of(self, entity_id: int) -> Optional[int]:
+        """
+        查找实体所在的行号
+
+        Args:
+            entity_id: 实体ID
+
+        Returns:
+            行号，不存在时返回 None
+        """
+        idx = int(np.searchsorted(self.entity_ids, entity_id))
+        if idx < len(self.entity_ids) and self.entity_ids[idx] == entity_id:
+            return idx
+        return None
+
+    def get(self, entity_id: int) -> Dict[str, Any]:
+        """
+        获取单个实体的计算数据，结构与 MADataLoader.load_data_for_calculation 相同
+
+        Args:
+            entity_id: 实体ID
+
+        Returns:
+            包含价格和均线数据的字典
+        """
+        idx = self.index_of(entity_id)
+        if idx is None:
+            return {
+                "current_price": None,
+                "ma_values": {},
+                "available_days": 0,
+                "has_data": False
+            }
+
+        price = self.current_prices[idx]
+        current_price = float(price) if np.isfinite(price) else None
+        ma_values = {
+            period: float(value)
+            for period, value in zip(self.periods, self.ma_matrix[idx])
+            if np.isfinite(value)
+        }
+        return {
+            "current_price": current_price,
+            "ma_values": ma_values,
+            "available_days": int(self.available_days[idx]),
+            "has_data": current_price is not None and len(ma_values) > 0
+        }
+
+
 class MADataLoader:
     """
     均线数据加载器
 
-    从数据库加载均线数据和当前价格，支持数据缓存。
+    从数据库加载均线数据和当前价格，均线数据使用进程级共享缓存。
     """
 
-    # 缓存配置
-    MAX_CACHE_SIZE = 1000  # 最大缓存条目数
-
-    def __init__(self, session: AsyncSession, enable_cache: bool = True):
+    def __init__(
+        self,
+        session: AsyncSession,
+        enable_cache: bool = True,
+        cache: Optional[MADataCache] = None
+    ):
         """
         初始化均线数据加载器
 
         Args:
             session: 数据库会话
             enable_cache: 是否启用缓存
+            cache: 使用的缓存实例，None 表示进程级共享缓存
         """
         self.session = session
         self.enable_cache = enable_cache
-        self._cache: Dict[str, Dict] = {}
+        self.cache = cache if cache is not None else ma_data_cache
 
-    def _make_cache_key(self, entity_type: str, entity_id: int, calc_date: date) -> str:
+    def _make_cache_key(self, entity_type: str, entity_id: int, calc_date: date) -> tuple:
         """
         生成缓存键
 
@@ -52,7 +127,7 @@ class MADataLoader:
         Returns:
             缓存键
         """
-        return f"{entity_type}:{entity_id}:{calc_date}"
+        return (entity_type, entity_id, calc_date)
 
     async def load_ma_values(
         self,
@@ -64,7 +139,8 @@ class MADataLoader:
         """
         加载均线数据
 
-        直接从均线表（MovingAverageData）加载已计算好的均线值，不重新计算。
+        从均线日表（MovingAverageDaily）读取日期 <= 计算日期的最近一行，
+        一次主键查询取得全部周期，不重新计算。
 
         Args:
             entity_type: 实体类型 ('stock' 或 'sector')
@@ -80,76 +156,38 @@ class MADataLoader:
 
         # 检查缓存
         cache_key = self._make_cache_key(entity_type, entity_id, calc_date)
-        if self.enable_cache and cache_key in self._cache:
-            cached_data = self._cache[cache_key]
-            # 返回请求的周期
-            return {p: cached_data.get(p) for p in periods if p in cached_data}
+        if self.enable_cache:
+            cached_values = self.cache.get(cache_key, periods)
+            if cached_values is not None:
+                return cached_values
 
         try:
-            # 将周期列表转换为字符串列表（如 '5d', '10d'）
-            period_strs = [f"{period}d" for period in periods]
-
-            # 使用 DISTINCT ON 为每个周期获取最新的记录（PostgreSQL 语法）
-            # 对于不支持的数据库，需要使用窗口函数或子查询
-            from sqlalchemy import distinct, literal_column
-            from sqlalchemy.dialects.postgresql import aggregate_order_by
-
-            # 构建子查询：先找出每个周期的最新日期
-            latest_dates_subq = select(
-                MovingAverageData.period,
-                func.max(MovingAverageData.date).label('max_date')
-            ).where(
-                and_(
-                    MovingAverageData.entity_type == entity_type,
-                    MovingAverageData.entity_id == entity_id,
-                    MovingAverageData.period.in_(period_strs),
-                    MovingAverageData.date <= calc_date,
-                    MovingAverageData.ma_value.isnot(None)
-                )
-            ).group_by(MovingAverageData.period).subquery()
-
-            # 主查询：通过子查询连接获取每个周期的最新数据
-            stmt = select(
-                MovingAverageData.period,
-                MovingAverageData.ma_value
-            ).join(
-                latest_dates_subq,
-                and_(
-                    MovingAverageData.period == latest_dates_subq.c.period,
-                    MovingAverageData.date == latest_dates_subq.c.max_date
-                )
-            ).where(
+            stmt = select(MovingAverageDaily).where(
                 and_(
-                    MovingAverageData.entity_type == entity_type,
-                    MovingAverageData.entity_id == entity_id,
-                    MovingAverageData.period.in_(period_strs),
-                    MovingAverageData.ma_value.isnot(None)
+                    MovingAverageDaily.entity_type == entity_type,
+                    MovingAverageDaily.entity_id == entity_id,
+                    MovingAverageDaily.date <= calc_date
                 )
-            )
+            ).order_by(MovingAverageDaily.date.desc()).limit(1)
 
-            # 执行查询
             result = await self.session.execute(stmt)
-            ma_rows = result.all()
+            daily = result.scalar_one_or_none()
 
-            # 构建结果字典
+            # 只保留请求的周期（日表中为空的周期视为缺失）
             ma_values = {}
-            for row in ma_rows:
-                period = int(row[0].rstrip('d'))  # 从 '5d' 转换为 5
-                ma_value = float(row[1])
-                ma_values[period] = ma_value
-
-            # 更新缓存（带大小限制）
+            if daily is not None:
+                ma_values = {
+                    period: value
+                    for period, value in daily.ma_values().items()
+                    if period in periods
+                }
+
+            # 更新缓存
             if self.enable_cache:
-                # 如果缓存已满，清空最旧的10%
-                if len(self._cache) >= self.MAX_CACHE_SIZE:
-                    cache_keys = list(self._cache.keys())
-                    # 移除最旧的条目（简单的FIFO策略）
-                    for key in cache_keys[:self.MAX_CACHE_SIZE // 10]:
-                        del self._cache[key]
-                self._cache[cache_key] = ma_values
+                self.cache.set(cache_key, periods, ma_values)
 
             logger.debug(
-                f"从均线表加载数据: {entity_type}={entity_id}, "
+                f"从均线日表加载数据: {entity_type}={entity_id}, "
                 f"calc_date={calc_date}, 加载周期数={len(ma_values)}/{len(periods)}"
             )
 
@@ -236,6 +274,120 @@ class MADataLoader:
             "has_data": current_price is not None and len(ma_values) > 0
         }
 
+    async def load_universe(
+        self,
+        entity_type: str,
+        calc_date: date,
+        entity_ids: Optional[Sequence[int]] = None,
+        periods: Optional[List[int]] = None
+    ) -> UniverseData:
+        """
+        批量加载一批实体的计算数据
+
+        无论实体数量多少都只执行两条查询：
+        1. DISTINCT ON (entity_id, period) 取每个实体每个周期截至计算日期的最新均线；
+        2. DISTINCT ON (entity_id) 取最新收盘价，同时用窗口函数统计可用天数。
+
+        Args:
+            entity_type: 实体类型 ('stock' 或 'sector')
+            calc_date: 计算日期
+            entity_ids: 实体ID列表，None 表示该类型的全部实体
+            periods: 要加载的周期列表，None 表示加载全部
+
+        Returns:
+            列式存储的计算数据
+        """
+        if periods is None:
+            periods = MA_PERIODS
+        periods = list(periods)
+        period_index = {f"{period}d": idx for idx, period in enumerate(periods)}
+
+        # 查询1: 每个实体每个周期的最新均线
+        ma_stmt = select(
+            MovingAverageData.entity_id,
+            MovingAverageData.period,
+            MovingAverageData.ma_value
+        ).where(
+            and_(
+                MovingAverageData.entity_type == entity_type,
+                MovingAverageData.period.in_(list(period_index)),
+                MovingAverageData.date <= calc_date,
+                MovingAverageData.ma_value.isnot(None)
+            )
+        ).distinct(
+            MovingAverageData.entity_id, MovingAverageData.period
+        ).order_by(
+            MovingAverageData.entity_id,
+            MovingAverageData.period,
+            MovingAverageData.date.desc()
+        )
+
+        # 查询2: 每个实体的最新收盘价和可用天数
+        price_stmt = select(
+            DailyMarketData.entity_id,
+            DailyMarketData.close,
+            func.count().over(partition_by=DailyMarketData.entity_id).label("available_days")
+        ).where(
+            and_(
+                DailyMarketData.entity_type == entity_type,
+                DailyMarketData.date <= calc_date,
+                DailyMarketData.close.isnot(None)
+            )
+        ).distinct(
+            DailyMarketData.entity_id
+        ).order_by(
+            DailyMarketData.entity_id,
+            DailyMarketData.date.desc()
+        )
+
+        if entity_ids is not None:
+            ma_stmt = ma_stmt.where(MovingAverageData.entity_id.in_(list(entity_ids)))
+            price_stmt = price_stmt.where(DailyMarketData.entity_id.in_(list(entity_ids)))
+
+        ma_rows = (await self.session.execute(ma_stmt)).all()
+        price_rows = (await self.session.execute(price_stmt)).all()
+
+        # 行索引：指定实体时以指定列表为准，否则取两类数据中出现过的全部实体
+        if entity_ids is not None:
+            ids = np.unique(np.asarray(list(entity_ids), dtype=np.int64))
+        else:
+            ids = np.unique(np.asarray(
+                [row[0] for row in ma_rows] + [row[0] for row in price_rows],
+                dtype=np.int64
+            ))
+
+        n = len(ids)
+        current_prices = np.full(n, np.nan)
+        available_days = np.zeros(n, dtype=np.int64)
+        ma_matrix = np.full((n, len(periods)), np.nan)
+
+        if price_rows:
+            price_ids = np.fromiter((row[0] for row in price_rows), dtype=np.int64, count=len(price_rows))
+            rows_idx = np.searchsorted(ids, price_ids)
+            current_prices[rows_idx] = [float(row[1]) for row in price_rows]
+            available_days[rows_idx] = [row[2] for row in price_rows]
+
+        if ma_rows:
+            ma_ids = np.fromiter((row[0] for row in ma_rows), dtype=np.int64, count=len(ma_rows))
+            rows_idx = np.searchsorted(ids, ma_ids)
+            cols_idx = np.fromiter((period_index[row[1]] for row in ma_rows), dtype=np.int64, count=len(ma_rows))
+            ma_matrix[rows_idx, cols_idx] = [float(row[2]) for row in ma_rows]
+
+        logger.debug(
+            f"批量加载均线数据: {entity_type} 共 {n} 个实体, calc_date={calc_date}, "
+            f"均线 {len(ma_rows)} 条, 价格 {len(price_rows)} 条"
+        )
+
+        return UniverseData(
+            entity_type=entity_type,
+            calc_date=calc_date,
+            periods=periods,
+            entity_ids=ids,
+            current_prices=current_prices,
+            ma_matrix=ma_matrix,
+            available_days=available_days
+        )
+
     async def _get_available_days(
         self,
         entity_type: str,
@@ -275,7 +427,7 @@ class MADataLoader:
 
     def clear_cache(self):
         """清空缓存"""
-        self._cache.clear()
+        self.cache.clear()
 
     def remove_from_cache(self, entity_type: str, entity_id: int, calc_date: date):
         """
@@ -286,6 +438,4 @@ class MADataLoader:
             entity_id: 实体ID
             calc_date: 计算日期
         """
-        cache_key = self._make_cache_key(entity_type, entity_id, calc_date)
-        if cache_key in self._cache:
-            del self._cache[cache_key]
+        self.cache.remove(self._make_cache_key(entity_type, entity_id, calc_date))
@@ -0,0 +1,313 @@
+"""
+均线系统向量化强度计算器
+
+以列式数组一次性计算整段历史的综合强度，结果与 StrengthCalculatorV2 逐行一致。
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.config.ma_system import (
+    MA_PERIODS,
+    MA_WEIGHTS,
+    TERM_GROUPS,
+    STRENGTH_GRADES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class VectorizedStrengthCalculator:
+    """
+    均线系统向量化强度计算器
+
+    输入为价格向量 (n,) 和均线矩阵 (n, len(periods))，缺失的均线以 NaN 表示。
+    每一行的计算逻辑与 StrengthCalculatorV2.calculate_composite_strength 完全相同，
+    累加顺序固定为 periods 顺序。
+    """
+
+    # 均线排列状态代码（与 MAAlignmentScorer 一致）
+    ALIGNMENT_STATES = ["perfect_bull", "strong_bull", "bull", "neutral", "bear", "perfect_bear"]
+
+    def __init__(
+        self,
+        periods: Optional[List[int]] = None,
+        weights: Optional[Dict[int, float]] = None
+    ):
+        """
+        初始化向量化强度计算器
+
+        Args:
+            periods: 均线周期顺序（从短期到长期），默认使用 MA_PERIODS
+            weights: 均线权重配置，默认使用 MA_WEIGHTS
+        """
+        self.periods = list(periods or MA_PERIODS)
+        self.weights = weights or MA_WEIGHTS
+
+    # ========== 价格位置得分 ==========
+
+    @staticmethod
+    def score_ratios(ratios: np.ndarray) -> np.ndarray:
+        """
+        向量化的价格位置分段得分（对应 PricePositionScorer.calculate_score）
+
+        Args:
+            ratios: 价格与均线的比率百分比数组
+
+        Returns:
+            得分数组 (0-100)
+        """
+        conditions = [
+            ratios > 5,
+            ratios > 3,
+            ratios > 1,
+            ratios > 0.5,
+            ratios > -0.5,
+            ratios > -1,
+            ratios > -3,
+            ratios > -5,
+        ]
+        choices = [
+            np.full_like(ratios, 100.0),
+            90.0 + (ratios - 3) * 5,
+            75.0 + (ratios - 1) * 7.5,
+            60.0 + (ratios - 0.5) * 30,
+            np.full_like(ratios, 50.0),
+            40.0 + (ratios + 1) * 20,
+            25.0 + (ratios + 3) * 7.5,
+            10.0 + (ratios + 5) * 7.5,
+        ]
+        return np.select(conditions, choices, default=np.maximum(0.0, (ratios + 5) * 2))
+
+    def weighted_position_scores(
+        self,
+        prices: np.ndarray,
+        ma_matrix: np.ndarray,
+        columns: Optional[List[int]] = None
+    ) -> np.ndarray:
+        """
+        计算加权价格位置得分（对应 PricePositionScorer.calculate_weighted_score）
+
+        只统计有效且大于 0 的均线；没有可用权重的行返回 50 分。
+
+        Args:
+            prices: 价格向量 (n,)
+            ma_matrix: 均线矩阵 (n, len(periods))
+            columns: 参与计算的列索引，None 表示全部列
+
+        Returns:
+            加权得分向量 (n,)
+        """
+        if columns is None:
+            columns = list(range(len(self.periods)))
+
+        n = len(prices)
+        weighted_score = np.zeros(n)
+        total_weight = np.zeros(n)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for col in columns:
+                ma = ma_matrix[:, col]
+                usable = np.isfinite(ma) & (ma > 0)
+                ratio = np.where(usable, (prices - ma) / np.where(usable, ma, 1.0) * 100, 0.0)
+                weight = self.weights.get(self.periods[col], 0.0)
+                score = self.score_ratios(ratio)
+                weighted_score = np.where(usable, weighted_score + score * weight, weighted_score)
+                total_weight = np.where(usable, total_weight + weight, total_weight)
+
+            return np.where(
+                total_weight > 0,
+                weighted_score / np.where(total_weight > 0, total_weight, 1.0),
+                50.0
+            )
+
+    def term_scores(
+        self,
+        prices: np.ndarray,
+        ma_matrix: np.ndarray,
+        term_periods: List[int]
+    ) -> np.ndarray:
+        """
+        计算短中长期强度得分（对应 StrengthCalculatorV2._calculate_term_score）
+
+        Args:
+            prices: 价格向量
+            ma_matrix: 均线矩阵
+            term_periods: 该期限包含的周期
+
+        Returns:
+            得分向量；该期限没有任何均线的行得 0 分
+        """
+        columns = [self.periods.index(p) for p in term_periods if p in self.periods]
+        if not columns:
+            return np.zeros(len(prices))
+
+        has_any = np.isfinite(ma_matrix[:, columns]).any(axis=1)
+        scores = self.weighted_position_scores(prices, ma_matrix, columns)
+        return np.where(has_any, scores, 0.0)
+
+    # ========== 均线排列得分 ==========
+
+    def alignment_scores(
+        self,
+        prices: np.ndarray,
+        ma_matrix: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        计算均线排列得分（对应 MAAlignmentScorer.calculate_score）
+
+        Args:
+            prices: 价格向量
+            ma_matrix: 均线矩阵
+
+        Returns:
+            {"score": 得分向量, "state": 状态码索引向量}
+        """
+        n = len(prices)
+        bull_count = np.zeros(n, dtype=np.int64)
+        total = np.zeros(n, dtype=np.int64)
+        present = np.isfinite(ma_matrix)
+
+        # 检测1: 价格 > MA5
+        if 5 in self.periods:
+            col5 = self.periods.index(5)
+            has5 = present[:, col5]
+            with np.errstate(invalid="ignore"):
+                bull_count += (has5 & (prices > ma_matrix[:, col5])).astype(np.int64)
+            total += has5.astype(np.int64)
+
+        # 检测2-8: 相邻均线排列
+        for i in range(len(self.periods) - 1):
+            both = present[:, i] & present[:, i + 1]
+            with np.errstate(invalid="ignore"):
+                bull_count += (both & (ma_matrix[:, i] > ma_matrix[:, i + 1])).astype(np.int64)
+            total += both.astype(np.int64)
+
+        bull = bull_count.astype(float)
+        tot = total.astype(float)
+        conditions = [
+            total == 0,
+            bull_count == total,
+            bull >= tot * 0.75,
+            bull >= tot * 0.5,
+            bull >= tot * 0.25,
+            bull_count > 0,
+        ]
+        scores = np.select(
+            conditions,
+            [
+                np.zeros(n),
+                np.full(n, 100.0),
+                80.0 + (bull - tot * 0.75) * 10,
+                60.0 + (bull - tot * 0.5) * 10,
+                40.0 + (bull - tot * 0.25) * 10,
+                bull * 10,
+            ],
+            default=0.0
+        )
+        # 状态索引对应 ALIGNMENT_STATES；total == 0 视为 perfect_bear
+        states = np.select(conditions, [5, 0, 1, 2, 3, 4], default=5)
+        return {"score": scores, "state": states}
+
+    # ========== 综合强度 ==========
+
+    @staticmethod
+    def grade_codes(scores: np.ndarray) -> np.ndarray:
+        """
+        按 STRENGTH_GRADES 区间计算强度等级（对应 get_strength_grade）
+
+        Args:
+            scores: 未取整的综合得分
+
+        Returns:
+            等级代码数组（对象数组）
+        """
+        grades = list(STRENGTH_GRADES.items())
+        conditions = [(scores >= lo) & (scores <= hi) for _, (lo, hi, _) in grades]
+        codes = np.array([g for g, _ in grades] + ["D"], dtype=object)
+        index = np.select(conditions, list(range(len(grades))), default=len(grades))
+        return codes[index]
+
+    def calculate(
+        self,
+        prices: np.ndarray,
+        ma_matrix: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        计算整段历史的所有强度指标
+
+        Args:
+            prices: 价格向量 (n,)
+            ma_matrix: 均线矩阵 (n, len(periods))，缺失值为 NaN
+
+        Returns:
+            各指标的数组字典（未取整）
+        """
+        prices = np.asarray(prices, dtype=float)
+        ma_matrix = np.asarray(ma_matrix, dtype=float).reshape(len(prices), len(self.periods))
+
+        price_position = self.weighted_position_scores(prices, ma_matrix)
+        alignment = self.alignment_scores(prices, ma_matrix)
+        composite = (price_position + alignment["score"]) / 2
+
+        return {
+            "composite_score": composite,
+            "price_position_score": price_position,
+            "ma_alignment_score": alignment["score"],
+            "ma_alignment_state": alignment["state"],
+            "short_term_score": self.term_scores(prices, ma_matrix, TERM_GROUPS['short']),
+            "medium_term_score": self.term_scores(prices, ma_matrix, TERM_GROUPS['medium']),
+            "long_term_score": self.term_scores(prices, ma_matrix, TERM_GROUPS['long']),
+            "strength_grade": self.grade_codes(composite),
+        }
+
+    def build_results(
+        self,
+        prices: np.ndarray,
+        ma_matrix: np.ndarray
+    ) -> List[Dict]:
+        """
+        计算并转换为与 StrengthCalculatorV2.calculate_composite_strength 相同结构的结果列表
+
+        Args:
+            prices: 价格向量 (n,)
+            ma_matrix: 均线矩阵 (n, len(periods))
+
+        Returns:
+            每行一个结果字典
+        """
+        arrays = self.calculate(prices, ma_matrix)
+        present = np.isfinite(ma_matrix)
+
+        results = []
+        for i in range(len(prices)):
+            price = float(prices[i])
+            ma_values = {
+                period: float(ma_matrix[i, col])
+                for col, period in enumerate(self.periods)
+                if present[i, col]
+            }
+            results.append({
+                'composite_score': round(float(arrays["composite_score"][i]), 2),
+                'price_position_score': round(float(arrays["price_position_score"][i]), 2),
+                'ma_alignment_score': round(float(arrays["ma_alignment_score"][i]), 2),
+                'ma_alignment_state': self.ALIGNMENT_STATES[int(arrays["ma_alignment_state"][i])],
+                'short_term_score': round(float(arrays["short_term_score"][i]), 2),
+                'medium_term_score': round(float(arrays["medium_term_score"][i]), 2),
+                'long_term_score': round(float(arrays["long_term_score"][i]), 2),
+                'strength_grade': arrays["strength_grade"][i],
+                'price_positions': {
+                    f"above_ma{period}": round((price - value) / value * 100, 2)
+                    for period, value in ma_values.items()
+                    if value and value > 0
+                },
+                'price_above_flags': {
+                    f"above_ma{period}": 1 if price > value else 0
+                    for period, value in ma_values.items()
+                },
+                'ma_values': ma_values,
+                'current_price': price,
+            })
+        return results
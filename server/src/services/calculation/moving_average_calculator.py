@@ -6,9 +6,10 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from datetime import date
 
+from src.config.ma_system import MA_PERIODS
 from .base_calculator import BaseCalculator, CalculationResult
 
 
@@ -19,6 +20,9 @@ class MovingAverageCalculator(BaseCalculator):
     计算指定周期的简单移动平均线和价格比率。
     """
 
+    # 矩阵计算结果保留的小数位数
+    SMA_DECIMALS = 10
+
     def __init__(self, config: Optional[Dict] = None):
         """
         初始化均线计算器
@@ -136,11 +140,212 @@ class MovingAverageCalculator(BaseCalculator):
         Returns:
             字典，键为周期，值为均线序列
         """
-        results = {}
-        for period in periods:
-            ma = self.calculate_sma(prices, period)
-            results[period] = ma
-        return results
+        ma_matrix = self.calculate_sma_matrix(prices.to_numpy(dtype=float), periods)
+        return {
+            period: pd.Series(ma_matrix[0, :, idx], index=prices.index)
+            for idx, period in enumerate(periods)
+        }
+
+    # ========== 多周期矩阵计算 ==========
+
+    @staticmethod
+    def pack_price_matrix(sequences: Sequence[Sequence[float]]) -> np.ndarray:
+        """
+        将长度不一的价格序列左对齐打包为二维矩阵
+
+        每行是一个实体按日期升序的收盘价，短序列在尾部以 NaN 补齐。
+        这样每行的滚动窗口只覆盖该实体自身的交易日，与逐实体计算一致。
+
+        Args:
+            sequences: 每个实体的价格序列
+
+        Returns:
+            价格矩阵 (实体数, 最长序列长度)
+        """
+        width = max((len(seq) for seq in sequences), default=0)
+        matrix = np.full((len(sequences), width), np.nan)
+        for row, seq in enumerate(sequences):
+            if len(seq):
+                matrix[row, :len(seq)] = np.asarray(seq, dtype=float)
+        return matrix
+
+    def calculate_sma_matrix(
+        self,
+        prices: np.ndarray,
+        periods: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        """
+        一次累加计算所有实体、所有周期的简单移动平均线
+
+        对价格矩阵按行做一次累加和，各周期的窗口和由累加和相减得到。
+        窗口内只要有 NaN（缺失或补齐位置），该位置的均线即为 NaN，
+        与 rolling(window=period, min_periods=period).mean() 的语义相同。
+
+        Args:
+            prices: 价格矩阵 (实体数, 日期数)，也接受一维价格向量
+            periods: 均线周期列表，默认使用 MA_PERIODS
+
+        Returns:
+            均线矩阵 (实体数, 日期数, 周期数)，不足周期的位置为 NaN
+        """
+        periods = list(periods or MA_PERIODS)
+        prices = np.asarray(prices, dtype=float)
+        if prices.ndim == 1:
+            prices = prices[np.newaxis, :]
+
+        n_entities, n_days = prices.shape
+        result = np.full((n_entities, n_days, len(periods)), np.nan)
+        if n_days == 0:
+            return result
+
+        value_sum, valid_count, offset = self._cumulative_sums(prices)
+
+        for idx, period in enumerate(periods):
+            if period > n_days:
+                continue
+            window_sum = value_sum[:, period:] - value_sum[:, :-period]
+            window_count = valid_count[:, period:] - valid_count[:, :-period]
+            result[:, period - 1:, idx] = np.where(
+                window_count == period,
+                window_sum / period + offset[:, np.newaxis],
+                np.nan
+            )
+        # 舍去累加相减带来的末位误差：价格与均线真实相等时比率应为 0、趋势为持平
+        return np.round(result, self.SMA_DECIMALS)
+
+    def calculate_latest_sma(
+        self,
+        prices: np.ndarray,
+        lengths: np.ndarray,
+        periods: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        """
+        只计算每个实体最后一个交易日的各周期均线
+
+        用于每日增量计算：累加一次后，每个周期只需一次相减即可得到窗口和。
+        结果与 calculate_sma_matrix 在该位置的值一致。
+
+        Args:
+            prices: pack_price_matrix 打包的价格矩阵 (实体数, 日期数)
+            lengths: 每个实体的有效序列长度
+            periods: 均线周期列表，默认使用 MA_PERIODS
+
+        Returns:
+            均线矩阵 (实体数, 周期数)，数据不足的位置为 NaN
+        """
+        periods = list(periods or MA_PERIODS)
+        prices = np.asarray(prices, dtype=float)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        n_entities = prices.shape[0]
+        result = np.full((n_entities, len(periods)), np.nan)
+        if prices.size == 0:
+            return result
+
+        value_sum, valid_count, offset = self._cumulative_sums(prices)
+        rows = np.arange(n_entities)
+
+        for idx, period in enumerate(periods):
+            start = lengths - period
+            has_window = start >= 0
+            start = np.where(has_window, start, 0)
+            window_sum = value_sum[rows, lengths] - value_sum[rows, start]
+            window_count = valid_count[rows, lengths] - valid_count[rows, start]
+            result[:, idx] = np.where(
+                has_window & (window_count == period),
+                window_sum / period + offset,
+                np.nan
+            )
+        return np.round(result, self.SMA_DECIMALS)
+
+    @staticmethod
+    def _cumulative_sums(prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        按行计算价格累加和与有效值计数
+
+        Args:
+            prices: 价格矩阵 (实体数, 日期数)
+
+        Returns:
+            (价格累加和, 有效值累加计数, 每行基准价)，累加矩阵首列为 0
+        """
+        n_entities, n_days = prices.shape
+        valid = np.isfinite(prices)
+        # 以每行第一个有效价格为基准再累加，减小长序列累加和的舍入误差
+        first_valid = np.where(valid.any(axis=1), valid.argmax(axis=1), 0)
+        offset = np.where(valid.any(axis=1), prices[np.arange(n_entities), first_valid], 0.0)
+        centered = np.where(valid, prices - offset[:, np.newaxis], 0.0)
+
+        value_sum = np.zeros((n_entities, n_days + 1))
+        np.cumsum(centered, axis=1, out=value_sum[:, 1:])
+        valid_count = np.zeros((n_entities, n_days + 1), dtype=np.int64)
+        np.cumsum(valid, axis=1, out=valid_count[:, 1:])
+        return value_sum, valid_count, offset
+
+    @staticmethod
+    def calculate_price_ratio_matrix(
+        prices: np.ndarray,
+        ma_matrix: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量计算价格比率和趋势（对应 calculate_price_ratio）
+
+        均线为 0、均线或价格为非有限值时比率取 0；趋势为比率的符号。
+
+        Args:
+            prices: 价格矩阵 (实体数, 日期数) 或一维向量
+            ma_matrix: calculate_sma_matrix 返回的均线矩阵
+
+        Returns:
+            (价格比率矩阵, 趋势矩阵)，形状与 ma_matrix 相同
+        """
+        prices = np.asarray(prices, dtype=float)
+        if prices.ndim == 1:
+            prices = prices[np.newaxis, :]
+        price = prices[:, :, np.newaxis]
+
+        usable = np.isfinite(ma_matrix) & (ma_matrix != 0) & np.isfinite(price)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratios = np.where(usable, (price - ma_matrix) / np.where(usable, ma_matrix, 1.0) * 100, 0.0)
+        return ratios, np.sign(ratios).astype(np.int8)
+
+    def calculate_all_periods(
+        self,
+        prices: np.ndarray,
+        periods: Optional[Sequence[int]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        计算所有周期的均线、价格比率和趋势
+
+        Args:
+            prices: 价格矩阵 (实体数, 日期数) 或一维向量
+            periods: 均线周期列表，默认使用 MA_PERIODS
+
+        Returns:
+            {"ma": 均线矩阵, "price_ratio": 价格比率矩阵, "trend": 趋势矩阵}，
+            形状均为 (实体数, 日期数, 周期数)
+        """
+        ma_matrix = self.calculate_sma_matrix(prices, periods)
+        ratios, trends = self.calculate_price_ratio_matrix(prices, ma_matrix)
+        return {"ma": ma_matrix, "price_ratio": ratios, "trend": trends}
+
+    @staticmethod
+    def latest_valid_values(ma_matrix: np.ndarray) -> np.ndarray:
+        """
+        取每个实体、每个周期最后一个有效均线值（对应 get_latest_ma_value）
+
+        Args:
+            ma_matrix: 均线矩阵 (实体数, 日期数, 周期数)
+
+        Returns:
+            最新均线矩阵 (实体数, 周期数)，没有有效值的位置为 NaN
+        """
+        n_entities, n_days, n_periods = ma_matrix.shape
+        if n_days == 0:
+            return np.full((n_entities, n_periods), np.nan)
+        valid = np.isfinite(ma_matrix)
+        last_index = n_days - 1 - valid[:, ::-1, :].argmax(axis=1)
+        latest = np.take_along_axis(ma_matrix, last_index[:, np.newaxis, :], axis=1)[:, 0, :]
+        return np.where(valid.any(axis=1), latest, np.nan)
 
     def get_latest_ma_value(
         self,
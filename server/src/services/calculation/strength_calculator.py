@@ -179,11 +179,8 @@ class StrengthCalculator(BaseCalculator):
                     "error": f"数据不足以计算任何周期（当前 {data_length} 天，最小需要 {min(pc['days'] for pc in period_configs)} 天）",
                 }
 
-            # 提取可用周期配置
-            periods = [pc["days"] for pc in available_configs]
-            weights = {pc["period"]: pc["weight"] for pc in period_configs}
-
             # 计算各周期均线
+            periods = [pc["days"] for pc in available_configs]
             ma_series_dict = self.ma_calculator.calculate_multiple_periods(prices, periods)
 
             # 获取最新均线值
@@ -193,51 +190,82 @@ class StrengthCalculator(BaseCalculator):
                 if latest_ma is not None:
                     latest_ma_values[period] = latest_ma
 
-            # 过滤无效均线值
-            valid_ma_values = {
-                k: v for k, v in latest_ma_values.items()
-                if v is not None and np.isfinite(v)
+            return self.calculate_strength_from_ma(
+                current_price=current_price,
+                latest_ma_values=latest_ma_values,
+                period_configs=period_configs,
+                partial_calculation=len(available_configs) < len(period_configs),
+            )
+
+        except Exception as e:
+            return {
+                "strength_score": None,
+                "trend_direction": TrendDirection.NEUTRAL,
+                "error": f"计算失败: {str(e)}",
             }
 
-            if not valid_ma_values:
-                return {
-                    "strength_score": None,
-                    "trend_direction": TrendDirection.NEUTRAL,
-                    "error": "无法计算有效的均线值",
-                }
+    def calculate_strength_from_ma(
+        self,
+        current_price: float,
+        latest_ma_values: Dict[int, float],
+        period_configs: List[Dict],
+        partial_calculation: bool = False,
+    ) -> Dict[str, any]:
+        """
+        根据已计算好的最新均线值计算强度数据
 
-            # 计算价格比率
-            price_ratios = {}
-            for period, ma_value in latest_ma_values.items():
-                if ma_value and ma_value > 0:
-                    ratio = self.ma_calculator.calculate_price_ratio(current_price, ma_value)
-                    price_ratios[f"{period}d"] = ratio
+        供批量计算使用：均线由 MovingAverageCalculator.calculate_sma_matrix 一次算出，
+        这里只做比率、得分和趋势的计算。
 
-            # 计算强度得分
-            strength_score = self.calculate_strength_score(price_ratios, weights)
+        Args:
+            current_price: 当前价格
+            latest_ma_values: 各周期（天数）的最新均线值
+            period_configs: 周期配置列表
+            partial_calculation: 是否只计算了部分周期
 
-            # 判定趋势方向
-            trend_direction = self.trend_analyzer.determine_trend(
-                current_price, latest_ma_values
-            )
+        Returns:
+            包含强度数据、趋势方向、均线值的字典
+        """
+        weights = {pc["period"]: pc["weight"] for pc in period_configs}
 
-            return {
-                "strength_score": strength_score,
-                "trend_direction": int(trend_direction),
-                "price_ratios": price_ratios,
-                "ma_values": latest_ma_values,
-                "current_price": current_price,
-                "available_periods": list(latest_ma_values.keys()),
-                "partial_calculation": len(available_configs) < len(period_configs),
-            }
+        # 过滤无效均线值
+        valid_ma_values = {
+            k: v for k, v in latest_ma_values.items()
+            if v is not None and np.isfinite(v)
+        }
 
-        except Exception as e:
+        if not valid_ma_values:
             return {
                 "strength_score": None,
                 "trend_direction": TrendDirection.NEUTRAL,
-                "error": f"计算失败: {str(e)}",
+                "error": "无法计算有效的均线值",
             }
 
+        # 计算价格比率
+        price_ratios = {}
+        for period, ma_value in latest_ma_values.items():
+            if ma_value and ma_value > 0:
+                ratio = self.ma_calculator.calculate_price_ratio(current_price, ma_value)
+                price_ratios[f"{period}d"] = ratio
+
+        # 计算强度得分
+        strength_score = self.calculate_strength_score(price_ratios, weights)
+
+        # 判定趋势方向
+        trend_direction = self.trend_analyzer.determine_trend(
+            current_price, latest_ma_values
+        )
+
+        return {
+            "strength_score": strength_score,
+            "trend_direction": int(trend_direction),
+            "price_ratios": price_ratios,
+            "ma_values": latest_ma_values,
+            "current_price": current_price,
+            "available_periods": list(latest_ma_values.keys()),
+            "partial_calculation": partial_calculation,
+        }
+
     def calculate_sector_strength_from_stocks(
         self,
         stock_strengths: Dict[str, float],
@@ -5,16 +5,22 @@
 """
 
 import logging
-from typing import Optional, Dict, Any
-from datetime import datetime, date
+from collections import defaultdict
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import date
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, update, and_, func, cast, Numeric
+from sqlalchemy.orm import aliased
 
 from src.db.database import AsyncSessionLocal
 from src.models.stock import Stock
 from src.models.sector import Sector
+from src.models.sector_stock import SectorStock
+from src.models.strength_score import StrengthScore
 from src.models.period_config import PeriodConfig
+from src.models.daily_market_data import DailyMarketData
 from src.services.calculation.strength_calculator import StrengthCalculator
 from src.services.calculation.moving_average_calculator import MovingAverageCalculator
 from src.services.calculation.trend_analyzer import TrendAnalyzer
@@ -30,6 +36,15 @@ class CalculationOrchestrator:
     协调均线计算和强度得分的批量计算。
     """
 
+    # 参与强度计算的最少交易日数
+    MIN_PRICE_DAYS = 60
+
+    # 强势个股的得分阈值（与板块强度接口的强势股统计一致）
+    STRONG_STOCK_SCORE = 60
+
+    # 量比基准：当日成交量 / 前 N 个交易日平均成交量
+    VOLUME_RATIO_DAYS = 5
+
     def __init__(self):
         """初始化计算协调器"""
         self.ma_calculator = MovingAverageCalculator()
@@ -53,8 +68,8 @@ class CalculationOrchestrator:
             stock_count = await self._calculate_all_stocks(period_configs)
             count += stock_count
 
-            # 3. 计算板块强度
-            sector_count = await self._calculate_all_sectors(period_configs)
+            # 3. 汇总成分股得到板块指标
+            sector_count = await self._calculate_all_sectors()
             count += sector_count
 
             logger.info(f"[计算协调] 完成所有计算: {count} 个实体")
@@ -104,19 +119,41 @@ class CalculationOrchestrator:
         finally:
             await session.close()
 
+        if not stocks or not period_configs:
+            return 0
+
+        # 一次查询全部股票的历史价格，左对齐打包为 (股票数, 交易日数) 矩阵
+        periods = [pc["days"] for pc in period_configs]
+        history_days = max(periods + [self.MIN_PRICE_DAYS])
+        histories = await self._load_price_histories(
+            "stock", [stock.id for stock in stocks], history_days
+        )
+        closes_list = [histories.get(stock.id, ([], []))[1] for stock in stocks]
+        price_matrix = self.ma_calculator.pack_price_matrix(closes_list)
+
+        # 一次累加计算全部股票、全部周期的均线，取每个周期的最新有效值
+        ma_matrix = self.ma_calculator.calculate_sma_matrix(price_matrix, periods)
+        latest_matrix = self.ma_calculator.latest_valid_values(ma_matrix)
+
         count = 0
-        for stock in stocks[:100]:  # 限制处理数量
+        for row, stock in enumerate(stocks):
             try:
-                # 获取历史价格数据
-                prices = await self._get_stock_prices(stock.symbol)
-                if prices is None or len(prices) < 60:
+                data_length = len(closes_list[row])
+                if data_length < self.MIN_PRICE_DAYS:
                     continue
 
+                latest_ma_values = {
+                    period: float(latest_matrix[row, idx])
+                    for idx, period in enumerate(periods)
+                    if period <= data_length and np.isfinite(latest_matrix[row, idx])
+                }
+
                 # 计算强度
-                result = self.strength_calculator.calculate_entity_strength(
-                    prices=prices,
-                    current_price=stock.current_price or prices.iloc[-1],
+                result = self.strength_calculator.calculate_strength_from_ma(
+                    current_price=float(stock.current_price or closes_list[row][-1]),
+                    latest_ma_values=latest_ma_values,
                     period_configs=period_configs,
+                    partial_calculation=any(p > data_length for p in periods),
                 )
 
                 if result.get('strength_score'):
@@ -128,87 +165,279 @@ class CalculationOrchestrator:
 
         return count
 
-    async def _calculate_all_sectors(self, period_configs: list) -> int:
+    async def _calculate_all_sectors(self, calc_date: Optional[date] = None) -> int:
         """
-        计算所有板块的强度
+        由成分股汇总所有板块的指标
+
+        一条 UPDATE ... FROM 语句把 sector_stocks 与当日个股强度、行情关联后按板块聚合，
+        写入板块强度记录的 avg_stock_score、strong_stock_ratio、up_stock_ratio、volume_ratio。
 
         Args:
-            period_configs: 周期配置列表
+            calc_date: 计算日期，None 表示个股强度的最新日期
 
         Returns:
-            计算的板块数量
+            更新的板块数量
         """
-        logger.info("[计算协调] 开始计算板块强度")
+        logger.info("[计算协调] 开始汇总板块成分股指标")
 
         session = AsyncSessionLocal()
         try:
-            stmt = select(Sector)
+            if calc_date is None:
+                calc_date = await self._get_latest_stock_score_date(session)
+                if calc_date is None:
+                    logger.warning("[计算协调] 没有个股强度数据，跳过板块汇总")
+                    return 0
+
+            previous_dates = await self._get_previous_trading_dates(session, calc_date)
+            agg = self._build_sector_aggregate_query(calc_date, previous_dates).subquery("agg")
+
+            stmt = update(StrengthScore).where(
+                and_(
+                    StrengthScore.entity_type == "sector",
+                    StrengthScore.entity_id == agg.c.sector_id,
+                    StrengthScore.date == calc_date,
+                    StrengthScore.period == "all",
+                )
+            ).values(
+                avg_stock_score=agg.c.avg_stock_score,
+                strong_stock_ratio=agg.c.strong_stock_ratio,
+                up_stock_ratio=agg.c.up_stock_ratio,
+                volume_ratio=agg.c.volume_ratio,
+            )
             result = await session.execute(stmt)
-            sectors = result.scalars().all()
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
         finally:
             await session.close()
 
-        count = 0
-        for sector in sectors[:20]:  # 限制处理数量
-            try:
-                # 获取成分股强度
-                sector_strength = await self._calculate_sector_from_stocks(sector.id, session)
+        count = result.rowcount or 0
+        logger.info(f"[计算协调] 板块汇总完成: {calc_date}, 更新 {count} 个板块")
+        return count
 
-                if sector_strength:
-                    # TODO: 更新数据库
-                    count += 1
+    def _build_sector_aggregate_query(
+        self,
+        calc_date: date,
+        previous_dates: List[date],
+        sector_ids: Optional[List[int]] = None
+    ):
+        """
+        构建按板块聚合成分股指标的查询
 
-            except Exception as e:
-                logger.warning(f"[计算协调] 板块 {sector.name} 计算失败: {e}")
+        - avg_stock_score: 成分股当日强度得分均值
+        - strong_stock_ratio: 得分高于 STRONG_STOCK_SCORE 的成分股占有得分成分股的比例
+        - up_stock_ratio: 收盘价高于上一交易日的成分股占两日都有收盘价成分股的比例
+        - volume_ratio: 成分股当日成交量之和 / 前 N 日平均成交量之和
 
-        return count
+        Args:
+            calc_date: 计算日期
+            previous_dates: 计算日期之前的交易日（降序，第一个为上一交易日）
+            sector_ids: 只聚合这些板块，None 表示全部
 
-    async def _get_stock_prices(self, symbol: str) -> Optional[list]:
+        Returns:
+            列为 sector_id 和四个指标的 SELECT
         """
-        获取股票历史价格
+        members = select(
+            Sector.id.label("sector_id"),
+            Stock.id.label("stock_id"),
+        ).join(
+            SectorStock, SectorStock.sector_code == Sector.code
+        ).join(
+            Stock, Stock.symbol == SectorStock.stock_code
+        )
+        if sector_ids is not None:
+            members = members.where(Sector.id.in_(sector_ids))
+        members = members.subquery("members")
+
+        today = aliased(DailyMarketData, name="today")
+        previous = aliased(DailyMarketData, name="previous")
+        previous_date = previous_dates[0] if previous_dates else None
+
+        base_volume = select(
+            DailyMarketData.entity_id,
+            func.avg(DailyMarketData.volume).label("avg_volume"),
+        ).where(
+            and_(
+                DailyMarketData.entity_type == "stock",
+                DailyMarketData.date.in_(previous_dates),
+            )
+        ).group_by(DailyMarketData.entity_id).subquery("base_volume")
+
+        scored = func.count(StrengthScore.score)
+        compared = func.count().filter(and_(today.close.isnot(None), previous.close.isnot(None)))
+        with_base = and_(today.volume.isnot(None), base_volume.c.avg_volume.isnot(None))
+
+        return select(
+            members.c.sector_id,
+            func.avg(StrengthScore.score).label("avg_stock_score"),
+            (
+                cast(func.count().filter(StrengthScore.score > self.STRONG_STOCK_SCORE), Numeric)
+                / func.nullif(scored, 0)
+            ).label("strong_stock_ratio"),
+            (
+                cast(func.count().filter(today.close > previous.close), Numeric)
+                / func.nullif(compared, 0)
+            ).label("up_stock_ratio"),
+            (
+                func.sum(today.volume).filter(with_base)
+                / func.nullif(func.sum(base_volume.c.avg_volume).filter(with_base), 0)
+            ).label("volume_ratio"),
+        ).select_from(members).outerjoin(
+            StrengthScore,
+            and_(
+                StrengthScore.entity_type == "stock",
+                StrengthScore.entity_id == members.c.stock_id,
+                StrengthScore.date == calc_date,
+                StrengthScore.period == "all",
+            ),
+        ).outerjoin(
+            today,
+            and_(
+                today.entity_type == "stock",
+                today.entity_id == members.c.stock_id,
+                today.date == calc_date,
+            ),
+        ).outerjoin(
+            previous,
+            and_(
+                previous.entity_type == "stock",
+                previous.entity_id == members.c.stock_id,
+                previous.date == previous_date,
+            ),
+        ).outerjoin(
+            base_volume, base_volume.c.entity_id == members.c.stock_id
+        ).group_by(members.c.sector_id)
+
+    async def _get_latest_stock_score_date(self, session) -> Optional[date]:
+        """获取个股强度数据的最新日期"""
+        stmt = select(func.max(StrengthScore.date)).where(StrengthScore.entity_type == "stock")
+        result = await session.execute(stmt)
+        return result.scalar()
+
+    async def _get_previous_trading_dates(self, session, calc_date: date) -> List[date]:
+        """获取计算日期之前最近 VOLUME_RATIO_DAYS 个交易日（降序）"""
+        stmt = select(DailyMarketData.date).where(
+            and_(
+                DailyMarketData.entity_type == "stock",
+                DailyMarketData.date < calc_date,
+            )
+        ).distinct().order_by(DailyMarketData.date.desc()).limit(self.VOLUME_RATIO_DAYS)
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def _load_price_histories(
+        self,
+        entity_type: str,
+        entity_ids: List[int],
+        max_days: int
+    ) -> Dict[int, Tuple[List[date], List[float]]]:
+        """
+        一次查询多个实体最近 max_days 个交易日的收盘价
 
         Args:
-            symbol: 股票代码
+            entity_type: 实体类型 (stock/sector)
+            entity_ids: 实体 ID 列表
+            max_days: 每个实体最多取的交易日数
 
         Returns:
-            价格列表
+            {实体ID: (日期列表, 收盘价列表)}，按日期升序
         """
+        if not entity_ids:
+            return {}
+
+        ranked = select(
+            DailyMarketData.entity_id,
+            DailyMarketData.date,
+            DailyMarketData.close,
+            func.row_number().over(
+                partition_by=DailyMarketData.entity_id,
+                order_by=DailyMarketData.date.desc()
+            ).label("rn")
+        ).where(
+            and_(
+                DailyMarketData.entity_type == entity_type,
+                DailyMarketData.entity_id.in_(entity_ids),
+                DailyMarketData.close.isnot(None)
+            )
+        ).subquery()
+
+        stmt = select(ranked.c.entity_id, ranked.c.date, ranked.c.close).where(
+            ranked.c.rn <= max_days
+        ).order_by(ranked.c.entity_id, ranked.c.date)
+
         session = AsyncSessionLocal()
         try:
-            # TODO: 从 DailyMarketData 表获取历史价格
-            # 这里返回模拟数据
-            import pandas as pd
-            import numpy as np
-
-            dates = pd.date_range(end=datetime.now(), periods=100, freq='D')
-            base_price = 100.0
-            prices = pd.Series([
-                base_price + i * 0.1 + np.random.randn() * 2
-                for i in range(100)
-            ], index=dates)
-
-            return prices
+            result = await session.execute(stmt)
+            rows = result.all()
         finally:
             await session.close()
 
+        histories: Dict[int, Tuple[List[date], List[float]]] = defaultdict(lambda: ([], []))
+        for entity_id, trade_date, close in rows:
+            dates, closes = histories[entity_id]
+            dates.append(trade_date)
+            closes.append(float(close))
+        return dict(histories)
+
+    async def _get_stock_prices(self, stock_id: int, history_days: int) -> Optional[pd.Series]:
+        """
+        获取股票历史价格
+
+        Args:
+            stock_id: 股票 ID
+            history_days: 最多取的交易日数
+
+        Returns:
+            价格序列（索引为日期），没有数据时返回 None
+        """
+        histories = await self._load_price_histories("stock", [stock_id], history_days)
+        if stock_id not in histories:
+            return None
+
+        dates, closes = histories[stock_id]
+        return pd.Series(closes, index=dates)
+
     async def _calculate_sector_from_stocks(
         self,
-        sector_id: str,
-        session: AsyncSession
-    ) -> Optional[float]:
+        sector_id: int,
+        calc_date: Optional[date] = None
+    ) -> Optional[Dict[str, Any]]:
         """
-        从成分股计算板块强度
+        从成分股计算单个板块的汇总指标
 
         Args:
             sector_id: 板块 ID
-            session: 数据库会话
+            calc_date: 计算日期，None 表示个股强度的最新日期
 
         Returns:
-            板块强度得分
+            {"date", "avg_stock_score", "strong_stock_ratio", "up_stock_ratio", "volume_ratio"}，
+            没有个股强度数据或板块没有成分股时返回 None
         """
-        # TODO: 查询成分股强度并计算加权平均
-        # 这里返回模拟值
-        return 50.0
+        session = AsyncSessionLocal()
+        try:
+            if calc_date is None:
+                calc_date = await self._get_latest_stock_score_date(session)
+                if calc_date is None:
+                    return None
+
+            previous_dates = await self._get_previous_trading_dates(session, calc_date)
+            stmt = self._build_sector_aggregate_query(calc_date, previous_dates, [sector_id])
+            result = await session.execute(stmt)
+            row = result.one_or_none()
+        finally:
+            await session.close()
+
+        if row is None:
+            return None
+
+        return {
+            "date": calc_date,
+            "avg_stock_score": float(row.avg_stock_score) if row.avg_stock_score is not None else None,
+            "strong_stock_ratio": float(row.strong_stock_ratio) if row.strong_stock_ratio is not None else None,
+            "up_stock_ratio": float(row.up_stock_ratio) if row.up_stock_ratio is not None else None,
+            "volume_ratio": float(row.volume_ratio) if row.volume_ratio is not None else None,
+        }
 
     async def calculate_single_stock(self, stock_id: str) -> Optional[Dict]:
         """
@@ -233,16 +462,19 @@ class CalculationOrchestrator:
             return None
 
         try:
+            # 获取周期配置
+            period_configs = await self._get_period_configs()
+
             # 获取历史价格
-            prices = await self._get_stock_prices(stock.symbol)
-            if prices is None or len(prices) < 60:
+            history_days = max(
+                [pc["days"] for pc in period_configs] + [self.MIN_PRICE_DAYS]
+            )
+            prices = await self._get_stock_prices(stock.id, history_days)
+            if prices is None or len(prices) < self.MIN_PRICE_DAYS:
                 return {
                     'error': '历史数据不足'
                 }
 
-            # 获取周期配置
-            period_configs = await self._get_period_configs()
-
             # 计算强度
             result = self.strength_calculator.calculate_entity_strength(
                 prices=prices,
@@ -282,7 +514,8 @@ class CalculationOrchestrator:
 
         try:
             # 从成分股计算板块强度
-            strength = await self._calculate_sector_from_stocks(sector_id, session)
+            aggregates = await self._calculate_sector_from_stocks(sector.id)
+            strength = aggregates["avg_stock_score"] if aggregates else None
 
             # 判定趋势
             trend = self.trend_analyzer.determine_trend(
@@ -293,6 +526,7 @@ class CalculationOrchestrator:
             return {
                 'strength_score': strength,
                 'trend_direction': int(trend),
+                'aggregates': aggregates,
             }
 
         except Exception as e:
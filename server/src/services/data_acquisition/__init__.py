@@ -5,6 +5,7 @@
 """
 
 from .akshare_client import AkShareDataSource
+from .async_client import AsyncAkShareDataSource, AsyncTokenBucket
 from .base import BaseDataSource
 from .exceptions import (
     DataFetchError,
@@ -27,6 +28,8 @@ __all__ = [
     # 数据源
     "BaseDataSource",
     "AkShareDataSource",
+    "AsyncAkShareDataSource",
+    "AsyncTokenBucket",
     # 异常
     "DataSourceError",
     "DataFetchError",
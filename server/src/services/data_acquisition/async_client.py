@@ -0,0 +1,327 @@
+"""
+异步数据源客户端
+
+将同步的 AkShare 调用放到有界线程池中执行，避免阻塞事件循环。
+
+设计说明:
+    - 线程池: 限制同时进行的下载数量
+    - 令牌桶: 在事件循环中按配置速率发放请求令牌，重试也会消耗令牌
+    - 退避: 使用 asyncio.sleep 实现指数退避，等待期间事件循环可继续调度其他任务
+    - 被包装的同步数据源应关闭自身的限速和重试，由本类统一负责
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Iterable, List, Optional, Tuple, TypeVar, Union
+
+from .akshare_client import AkShareDataSource
+from .base import BaseDataSource
+from .exceptions import DataSourceTimeoutError, RetryExhaustedError
+from .models import DailyQuote, SectorInfo, StockInfo
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+K = TypeVar("K")
+
+# 批量下载时每个条目的结果：数据或异常
+FetchOutcome = Union[List[DailyQuote], BaseException]
+
+# 迭代结束哨兵
+_EXHAUSTED = object()
+
+
+class AsyncTokenBucket:
+    """
+    异步令牌桶限速器
+
+    采用预约方式：获取令牌时立即扣减（允许为负），再异步等待欠下的时间，
+    因此令牌计算过程中不需要跨 await 持锁，可在不同事件循环中复用。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒发放的令牌数，<= 0 表示不限速
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        预约一个令牌
+
+        Returns:
+            需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        """获取一个令牌，必要时异步等待"""
+        if self.rate <= 0:
+            return
+
+        wait = self._reserve()
+        if wait > 0:
+            logger.debug(f"速率限制：等待 {wait:.2f} 秒")
+            await asyncio.sleep(wait)
+
+
+class AsyncAkShareDataSource:
+    """
+    异步 AkShare 数据源
+
+    对外提供与 BaseDataSource 相同的方法（协程版本），以及按输入顺序返回结果的
+    批量下载迭代器，使多个代码可以在速率限制内并发下载。
+    """
+
+    DEFAULT_MAX_WORKERS = 4  # 同时进行的下载数
+    DEFAULT_REQUESTS_PER_SECOND = 1 / AkShareDataSource.MIN_REQUEST_INTERVAL  # 与同步客户端一致：2 req/s
+    DEFAULT_BURST = 1  # 不允许突发
+    DEFAULT_MAX_RETRIES = AkShareDataSource.DEFAULT_MAX_RETRIES
+    DEFAULT_RETRY_DELAY = AkShareDataSource.DEFAULT_RETRY_DELAY
+    DEFAULT_BACKOFF_FACTOR = AkShareDataSource.DEFAULT_BACKOFF_FACTOR
+
+    def __init__(
+        self,
+        source: Optional[BaseDataSource] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_delay: float = DEFAULT_RETRY_DELAY,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    ):
+        """
+        初始化异步数据源
+
+        Args:
+            source: 被包装的同步数据源，None 时创建关闭了限速和重试的 AkShareDataSource
+            max_workers: 线程池大小（最大并发下载数）
+            requests_per_second: 请求速率上限
+            burst: 令牌桶容量
+            max_retries: 最大尝试次数
+            retry_delay: 初始重试延迟（秒）
+            backoff_factor: 退避因子
+        """
+        self.source = source if source is not None else AkShareDataSource(
+            max_retries=1, min_request_interval=0
+        )
+        self.source_name = getattr(self.source, "source_name", "AkShare")
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = AsyncTokenBucket(requests_per_second, burst)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """延迟创建线程池"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="akshare-fetch",
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """关闭线程池（不等待正在执行的下载）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _call(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        在线程池中执行同步调用，带限速和指数退避重试
+
+        只有数据源报告的重试耗尽或超时会重试；参数错误和数据解析错误直接抛出。
+
+        Args:
+            func: 同步函数
+            *args: 位置参数
+
+        Returns:
+            函数执行结果
+
+        Raises:
+            RetryExhaustedError: 重试次数耗尽
+        """
+        loop = asyncio.get_running_loop()
+        last_exception: Optional[Exception] = None
+        current_delay = self.retry_delay
+
+        for attempt in range(1, self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                return await loop.run_in_executor(
+                    self._get_executor(), functools.partial(func, *args)
+                )
+            except (RetryExhaustedError, DataSourceTimeoutError) as e:
+                last_exception = e.original_error or e
+                logger.warning(
+                    f"第 {attempt}/{self.max_retries} 次尝试失败: {last_exception}",
+                    extra={
+                        "source": self.source_name,
+                        "attempt": attempt,
+                        "max_retries": self.max_retries,
+                        "error_type": type(last_exception).__name__,
+                    },
+                )
+
+                if attempt >= self.max_retries:
+                    break
+
+                await asyncio.sleep(current_delay)
+                current_delay *= self.backoff_factor
+
+        raise RetryExhaustedError(
+            f"重试 {self.max_retries} 次后仍然失败",
+            source=self.source_name,
+            attempts=self.max_retries,
+            original_error=last_exception,
+        )
+
+    async def get_stock_list(self) -> List[StockInfo]:
+        """
+        获取 A 股股票列表
+
+        Returns:
+            股票信息列表
+        """
+        return await self._call(self.source.get_stock_list)
+
+    async def get_sector_list(self, sector_type: Optional[str] = None) -> List[SectorInfo]:
+        """
+        获取板块列表
+
+        Args:
+            sector_type: 板块类型过滤 (industry/concept)，None 表示获取所有
+
+        Returns:
+            板块信息列表
+        """
+        return await self._call(self.source.get_sector_list, sector_type)
+
+    async def get_daily_data(self, symbol: str, start_date: date, end_date: date) -> List[DailyQuote]:
+        """
+        获取日线行情数据
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            日线行情数据列表
+        """
+        return await self._call(self.source.get_daily_data, symbol, start_date, end_date)
+
+    async def get_sector_daily_data(
+        self,
+        sector_code: str,
+        sector_type: str,
+        start_date: date,
+        end_date: date,
+    ) -> List[DailyQuote]:
+        """
+        获取板块日线行情数据
+
+        Args:
+            sector_code: 板块代码
+            sector_type: 板块类型 (industry/concept)
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            日线行情数据列表
+        """
+        return await self._call(
+            self.source.get_sector_daily_data, sector_code, sector_type, start_date, end_date
+        )
+
+    async def iter_daily_data(
+        self,
+        symbols: Iterable[str],
+        start_date: date,
+        end_date: date,
+    ) -> AsyncIterator[Tuple[str, FetchOutcome]]:
+        """
+        并发下载多只股票的日线数据，按输入顺序逐个返回
+
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Yields:
+            (股票代码, 日线数据列表或下载异常)
+        """
+        async for item in self._iter_ordered(
+            symbols, lambda symbol: self.get_daily_data(symbol, start_date, end_date)
+        ):
+            yield item
+
+    async def _iter_ordered(
+        self,
+        keys: Iterable[K],
+        fetch: Callable[[K], Awaitable[List[DailyQuote]]],
+    ) -> AsyncIterator[Tuple[K, FetchOutcome]]:
+        """
+        有界预取：最多保持 2 * max_workers 个下载在途，按输入顺序产出结果
+
+        消费方提前退出（break、取消）时会取消尚未完成的下载。
+
+        Args:
+            keys: 下载条目
+            fetch: 下载协程工厂
+
+        Yields:
+            (条目, 数据或异常)
+        """
+        window = 2 * self.max_workers
+        pending: Deque[Tuple[K, "asyncio.Task[List[DailyQuote]]"]] = deque()
+        key_iter = iter(keys)
+
+        def _schedule() -> bool:
+            key = next(key_iter, _EXHAUSTED)
+            if key is _EXHAUSTED:
+                return False
+            pending.append((key, asyncio.ensure_future(fetch(key))))
+            return True
+
+        try:
+            while len(pending) < window and _schedule():
+                pass
+
+            while pending:
+                key, task = pending.popleft()
+                try:
+                    outcome: FetchOutcome = await task
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    outcome = e
+                _schedule()
+                yield key, outcome
+        finally:
+            for _, task in pending:
+                task.cancel()
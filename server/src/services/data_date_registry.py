@@ -0,0 +1,101 @@
+"""
+当前数据日期注册表
+
+记录每种实体类型最新的强度计算日期，供排名、统计、等级表格等"默认最新日期"的查询使用，
+避免每个请求都查询一次最新日期。
+
+设计说明:
+    - 数据来源: 最新强度得分读模型（latest_strength_scores），按实体类型取 max(date)，一条小查询
+    - 加载: 应用启动时加载；未加载时在首次读取时加载
+    - 本进程写入: 强度/快照写入提交后调用 invalidate()，下一次读取立即重新加载
+    - 跨进程: 刷新读模型时在同一事务中递增 data_versions 中的版本号；读取时按主键取版本号
+      与加载时比较，不同才重新加载。版本号最多每 VERSION_CHECK_INTERVAL 秒比较一次，
+      其他进程的写入最长延迟该间隔可见；被回滚的写入不会改变版本号
+"""
+
+import logging
+import time
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.data_version import LATEST_STRENGTH_VERSION, DataVersion
+from src.models.latest_strength_score import LatestStrengthScore
+
+logger = logging.getLogger(__name__)
+
+
+class DataDateRegistry:
+    """当前数据日期注册表（进程内）"""
+
+    VERSION_CHECK_INTERVAL = 1  # 版本号比较间隔（秒），合并并发请求的检查
+
+    def __init__(self):
+        """初始化注册表"""
+        self._dates: Dict[str, date] = {}
+        self._version: Optional[int] = None
+        self._loaded = False
+        self._checked_at = 0.0
+
+    async def _read_version(self, session: AsyncSession) -> Optional[int]:
+        """按主键读取最新强度得分读模型的版本号，没有写入过时返回 None"""
+        result = await session.execute(
+            select(DataVersion.version).where(DataVersion.name == LATEST_STRENGTH_VERSION)
+        )
+        return result.scalar_one_or_none()
+
+    async def load(self, session: AsyncSession) -> Dict[str, date]:
+        """
+        从最新强度得分读模型加载各实体类型的最新日期
+
+        Args:
+            session: 数据库会话
+
+        Returns:
+            {实体类型: 最新日期}
+        """
+        # 先读版本号：加载期间提交的写入会在下一次比较时发现
+        version = await self._read_version(session)
+        stmt = (
+            select(LatestStrengthScore.entity_type, func.max(LatestStrengthScore.date))
+            .group_by(LatestStrengthScore.entity_type)
+        )
+        result = await session.execute(stmt)
+        self._dates = {entity_type: latest for entity_type, latest in result.all() if latest is not None}
+        self._version = version
+        self._loaded = True
+        self._checked_at = time.monotonic()
+        logger.debug(f"数据日期已加载: {self._dates} (版本 {version})")
+        return dict(self._dates)
+
+    async def get_latest_date(self, session: AsyncSession, entity_type: str) -> Optional[date]:
+        """
+        获取实体类型的最新数据日期
+
+        未加载或已失效时先加载；否则超过比较间隔时比较版本号，版本变化才重新加载。
+
+        Args:
+            session: 数据库会话（仅在比较版本号或重载时使用）
+            entity_type: 实体类型 (stock/sector)
+
+        Returns:
+            最新日期，没有数据时返回 None
+        """
+        if not self._loaded:
+            await self.load(session)
+        elif time.monotonic() - self._checked_at >= self.VERSION_CHECK_INTERVAL:
+            version = await self._read_version(session)
+            self._checked_at = time.monotonic()
+            if version != self._version:
+                await self.load(session)
+        return self._dates.get(entity_type)
+
+    def invalidate(self) -> None:
+        """标记为失效，下一次读取时重新加载（写入提交后调用）"""
+        self._loaded = False
+
+
+# 全局数据日期注册表
+data_date_registry = DataDateRegistry()
@@ -18,7 +18,9 @@ from src.models.sector import Sector
 from src.models.stock import Stock
 from src.models.daily_market_data import DailyMarketData
 from src.services.data_acquisition.akshare_client import AkShareDataSource
+from src.services.data_acquisition.async_client import AsyncAkShareDataSource
 from src.services.data_acquisition.models import StockInfo, SectorInfo, DailyQuote
+from src.services.quote_ingest import IngestTarget, QuoteIngestPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -60,7 +62,9 @@ class DataInitService:
             session: 数据库会话
         """
         self.session = session
-        self.ak_source = AkShareDataSource()
+        # 限速和重试由异步数据源统一负责，同步客户端只执行单次请求
+        self.ak_source = AkShareDataSource(max_retries=1, min_request_interval=0)
+        self.async_source = AsyncAkShareDataSource(self.ak_source)
         self._progress_callback: Optional[callable] = None
         self._cancelled = False
 
@@ -121,7 +125,7 @@ class DataInitService:
 
         try:
             # 从 AkShare 获取板块列表
-            sectors = self.ak_source.get_sector_list(sector_type)
+            sectors = await self.async_source.get_sector_list(sector_type)
             self._check_cancelled()
 
             created = 0
@@ -196,7 +200,7 @@ class DataInitService:
 
         try:
             # 从 AkShare 获取股票列表
-            stocks = self.ak_source.get_stock_list()
+            stocks = await self.async_source.get_stock_list()
             self._check_cancelled()
 
             created = 0
@@ -299,63 +303,40 @@ class DataInitService:
             skipped = 0
             errors = []
 
-            for i, symbol in enumerate(symbols, 1):
-                self._check_cancelled()
-                await self._update_progress(i, len(symbols), f"正在获取历史数据: {symbol}")
+            # 先解析股票记录，只下载存在的股票
+            targets = []
+            for symbol in symbols:
+                result = await self.session.execute(
+                    select(Stock).where(Stock.symbol == symbol)
+                )
+                stock = result.scalar_one_or_none()
 
-                try:
-                    # 使用 savepoint 隔离每个股票的操作
-                    async with _safe_nested_tx(self.session):
-                        # 获取股票ID
-                        result = await self.session.execute(
-                            select(Stock).where(Stock.symbol == symbol)
-                        )
-                        stock = result.scalar_one_or_none()
+                if not stock:
+                    logger.warning(f"股票不存在，跳过: {symbol}")
+                    skipped += 1
+                    continue
+                targets.append(IngestTarget("stock", stock.id, stock.symbol))
 
-                        if not stock:
-                            logger.warning(f"股票不存在，跳过: {symbol}")
-                            skipped += 1
-                            continue
-
-                        # 从 AkShare 获取历史数据
-                        quotes = self.ak_source.get_daily_data(symbol, start_date, end_date)
-
-                        for quote in quotes:
-                            # 检查数据是否已存在
-                            result = await self.session.execute(
-                                select(DailyMarketData).where(
-                                    DailyMarketData.entity_type == "stock",
-                                    DailyMarketData.entity_id == stock.id,
-                                    DailyMarketData.date == quote.trade_date
-                                )
-                            )
-                            existing = result.scalar_one_or_none()
-
-                            if existing:
-                                continue
-
-                            # 创建新记录
-                            market_data = DailyMarketData(
-                                entity_type="stock",
-                                entity_id=stock.id,
-                                symbol=stock.symbol,
-                                date=quote.trade_date,
-                                open=quote.open,
-                                high=quote.high,
-                                low=quote.low,
-                                close=quote.close,
-                                volume=quote.volume,
-                                turnover=quote.turnover,
-                                change=None,
-                                change_percent=None
-                            )
-                            self.session.add(market_data)
-                            created += 1
+            self._check_cancelled()
 
-                except Exception as e:
-                    error_msg = f"获取历史数据失败 {symbol}: {e}"
-                    errors.append(error_msg)
-                    logger.error(error_msg)
+            # 下载与写入流水线执行，多只股票在速率限制内并发下载
+            pipeline = QuoteIngestPipeline(
+                self.session,
+                fetch=lambda t: self.async_source.get_daily_data(t.symbol, start_date, end_date),
+                workers=self.async_source.max_workers,
+            )
+            stats = await pipeline.run(
+                targets,
+                on_progress=lambda done, total, t: self._update_progress(
+                    done, total, f"正在获取历史数据: {t.symbol}"
+                ),
+                check_cancelled=self._check_cancelled,
+            )
+            created += stats.created
+            for target, e in stats.failures:
+                error_msg = f"获取历史数据失败 {target.symbol}: {e}"
+                errors.append(error_msg)
+                logger.error(error_msg)
 
             # 最终提交
             await self.session.commit()
@@ -431,10 +412,10 @@ class DataInitService:
             errors = []
             processed_symbols = []  # 记录已处理的股票
 
-            for i, symbol in enumerate(symbols, 1):
+            # 先筛选需要下载的股票（断点续传：日期范围内已有数据的股票跳过）
+            targets = []
+            for symbol in symbols:
                 self._check_cancelled()
-                await self._update_progress(i, len(symbols), f"正在获取历史数据: {symbol} ({start_date} - {end_date})")
-
                 try:
                     # 获取股票ID
                     result = await self.session.execute(
@@ -463,54 +444,33 @@ class DataInitService:
                         processed_symbols.append(symbol)
                         continue
 
-                    # 从 AkShare 获取历史数据
-                    quotes = self.ak_source.get_daily_data(symbol, start_date, end_date)
-
-                    symbol_created = 0
-                    for quote in quotes:
-                        # 检查数据是否已存在
-                        result = await self.session.execute(
-                            select(DailyMarketData).where(
-                                DailyMarketData.entity_type == "stock",
-                                DailyMarketData.entity_id == stock.id,
-                                DailyMarketData.date == quote.trade_date
-                            )
-                        )
-                        existing = result.scalar_one_or_none()
-
-                        if existing:
-                            continue
-
-                        # 创建新记录
-                        market_data = DailyMarketData(
-                            entity_type="stock",
-                            entity_id=stock.id,
-                            symbol=stock.symbol,
-                            date=quote.trade_date,
-                            open=quote.open,
-                            high=quote.high,
-                            low=quote.low,
-                            close=quote.close,
-                            volume=quote.volume,
-                            turnover=quote.turnover,
-                            change=None,
-                            change_percent=None
-                        )
-                        self.session.add(market_data)
-                        created += 1
-                        symbol_created += 1
-
-                    # 每只股票处理完后立即提交
-                    await self.session.commit()
-                    processed_symbols.append(symbol)
-                    logger.debug(f"股票 {symbol} 数据已保存: {symbol_created} 条记录")
+                    targets.append(IngestTarget("stock", stock.id, stock.symbol))
 
                 except Exception as e:
                     error_msg = f"获取历史数据失败 {symbol}: {e}"
                     errors.append(error_msg)
                     logger.error(error_msg)
-                    # 发生错误时回滚当前股票的更改
                     await self.session.rollback()
+
+            # 下载与写入流水线执行，同一只股票的数据总在同一批次中提交
+            pipeline = QuoteIngestPipeline(
+                self.session,
+                fetch=lambda t: self.async_source.get_daily_data(t.symbol, start_date, end_date),
+                workers=self.async_source.max_workers,
+            )
+            stats = await pipeline.run(
+                targets,
+                on_progress=lambda done, total, t: self._update_progress(
+                    done, total, f"正在获取历史数据: {t.symbol} ({start_date} - {end_date})"
+                ),
+                check_cancelled=self._check_cancelled,
+            )
+            created += stats.created
+            processed_symbols.extend(t.symbol for t in stats.completed + stats.empty)
+            for target, e in stats.failures:
+                error_msg = f"获取历史数据失败 {target.symbol}: {e}"
+                errors.append(error_msg)
+                logger.error(error_msg)
             # 不需要最终提交，因为每只股票都已提交
 
             result = {
@@ -593,66 +553,33 @@ class DataInitService:
             skipped = 0
             errors = []
 
-            for i, sector in enumerate(sectors, 1):
-                self._check_cancelled()
-                await self._update_progress(i, len(sectors), f"正在获取板块历史数据: {sector.name}")
-
-                try:
-                    # 使用 savepoint 隔离每个板块的操作
-                    async with _safe_nested_tx(self.session):
-                        # 从 AkShare 直接获取板块历史数据
-                        quotes = self.ak_source.get_sector_daily_data(
-                            sector.code,
-                            sector.type,
-                            start_date,
-                            end_date,
-                        )
-
-                        if not quotes:
-                            logger.warning(f"板块 {sector.code} 没有获取到历史数据，跳过")
-                            skipped += 1
-                            continue
-
-                        sector_created = 0
-                        for quote in quotes:
-                            # 检查数据是否已存在
-                            result = await self.session.execute(
-                                select(DailyMarketData).where(
-                                    DailyMarketData.entity_type == "sector",
-                                    DailyMarketData.entity_id == sector.id,
-                                    DailyMarketData.date == quote.trade_date
-                                )
-                            )
-                            existing = result.scalar_one_or_none()
-
-                            if existing:
-                                continue
-
-                            # 创建新记录
-                            market_data = DailyMarketData(
-                                entity_type="sector",
-                                entity_id=sector.id,
-                                symbol=sector.code,
-                                date=quote.trade_date,
-                                open=quote.open,
-                                high=quote.high,
-                                low=quote.low,
-                                close=quote.close,
-                                volume=quote.volume,
-                                turnover=quote.turnover,
-                                change=None,
-                                change_percent=None
-                            )
-                            self.session.add(market_data)
-                            created += 1
-                            sector_created += 1
-
-                        logger.debug(f"板块 {sector.code} 数据已保存: {sector_created} 条记录")
-
-                except Exception as e:
-                    error_msg = f"获取板块历史数据失败 {sector.code}: {e}"
-                    errors.append(error_msg)
-                    logger.error(error_msg)
+            # 下载与写入流水线执行，多个板块在速率限制内并发下载
+            targets = [
+                IngestTarget("sector", sector.id, sector.code, name=sector.name, sector_type=sector.type)
+                for sector in sectors
+            ]
+            pipeline = QuoteIngestPipeline(
+                self.session,
+                fetch=lambda t: self.async_source.get_sector_daily_data(
+                    t.symbol, t.sector_type, start_date, end_date
+                ),
+                workers=self.async_source.max_workers,
+            )
+            stats = await pipeline.run(
+                targets,
+                on_progress=lambda done, total, t: self._update_progress(
+                    done, total, f"正在获取板块历史数据: {t.name}"
+                ),
+                check_cancelled=self._check_cancelled,
+            )
+            created += stats.created
+            for target in stats.empty:
+                logger.warning(f"板块 {target.symbol} 没有获取到历史数据，跳过")
+            skipped += len(stats.empty)
+            for target, e in stats.failures:
+                error_msg = f"获取板块历史数据失败 {target.symbol}: {e}"
+                errors.append(error_msg)
+                logger.error(error_msg)
 
             # 最终提交
             await self.session.commit()
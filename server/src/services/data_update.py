@@ -9,7 +9,7 @@ import logging
 import inspect
 from datetime import date, datetime, timedelta, timezone
 from typing import Optional, Callable, List
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
 from unittest.mock import AsyncMock, Mock
 
 from sqlalchemy import select, or_, and_
@@ -21,7 +21,9 @@ from src.models.sector_stock import SectorStock
 from src.models.daily_market_data import DailyMarketData
 from src.models.update_history import UpdateHistory
 from src.services.data_acquisition.akshare_client import AkShareDataSource
+from src.services.data_acquisition.async_client import AsyncAkShareDataSource
 from src.services.data_acquisition.models import DailyQuote
+from src.services.quote_ingest import IngestTarget, QuoteIngestPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -69,7 +71,9 @@ class DataUpdateService:
             session: 数据库会话
         """
         self.session = session
-        self.ak_source = AkShareDataSource()
+        # 限速和重试由异步数据源统一负责，同步客户端只执行单次请求
+        self.ak_source = AkShareDataSource(max_retries=1, min_request_interval=0)
+        self.async_source = AsyncAkShareDataSource(self.ak_source)
         self._progress_callback: Optional[Callable] = None
         self._cancelled = False
 
@@ -189,71 +193,87 @@ class DataUpdateService:
             failed = 0
             errors = []
 
-            for i, symbol in enumerate(symbols, 1):
-                self._check_cancelled()
-                await self._update_progress(i, len(symbols), f"正在更新: {symbol} ({target_date})")
-
-                try:
-                    # 使用 savepoint 隔离每个股票的操作
-                    async with _safe_nested_tx(self.session):
-                        # 获取股票记录
-                        result = await self.session.execute(
-                            select(Stock).where(Stock.symbol == symbol)
+            # 一次查询解析全部股票ID
+            result = await self.session.execute(
+                select(Stock.symbol, Stock.id).where(Stock.symbol.in_(symbols))
+            )
+            stock_ids = {symbol: stock_id for symbol, stock_id in result.all()}
+
+            # 一次查询获取目标日期已存在的记录
+            existing_records = {}
+            existing_ids = set()
+            if stock_ids:
+                if overwrite:
+                    result = await self.session.execute(
+                        select(DailyMarketData).where(
+                            DailyMarketData.entity_type == "stock",
+                            DailyMarketData.entity_id.in_(list(stock_ids.values())),
+                            DailyMarketData.date == target_date
                         )
-                        stock = result.scalar_one_or_none()
-
-                        if not stock:
-                            logger.warning(f"股票不存在，跳过: {symbol}")
-                            skipped += 1
-                            continue
+                    )
+                    existing_records = {record.entity_id: record for record in result.scalars().all()}
+                else:
+                    result = await self.session.execute(
+                        select(DailyMarketData.entity_id).where(
+                            DailyMarketData.entity_type == "stock",
+                            DailyMarketData.entity_id.in_(list(stock_ids.values())),
+                            DailyMarketData.date == target_date
+                        )
+                    )
+                    existing_ids = {row[0] for row in result.all()}
 
-                        # 检查数据是否已存在
-                        if not overwrite:
-                            existing = await self.session.execute(
-                                select(DailyMarketData).where(
-                                    DailyMarketData.entity_type == "stock",
-                                    DailyMarketData.entity_id == stock.id,
-                                    DailyMarketData.date == target_date
-                                )
-                            )
-                            existing_record = existing.scalar_one_or_none()
-                            if existing_record is stock:
-                                existing_record = None
-                            if existing_record:
-                                skipped += 1
-                                continue
+            # 只下载缺失的股票（覆盖模式下下载全部）
+            targets = []
+            for symbol in symbols:
+                stock_id = stock_ids.get(symbol)
+                if stock_id is None:
+                    logger.warning(f"股票不存在，跳过: {symbol}")
+                    skipped += 1
+                elif stock_id in existing_ids:
+                    skipped += 1
+                else:
+                    targets.append((symbol, stock_id))
 
-                        # 从 AkShare 获取数据
-                        quotes = self.ak_source.get_daily_data(symbol, target_date, target_date)
+            self._check_cancelled()
+            logger.info(f"按日期补齐: {len(symbols)} 只股票中 {len(targets)} 只需要下载")
+
+            # 多只股票在速率限制内并发下载，按顺序逐只写入
+            fetches = self.async_source.iter_daily_data(
+                [symbol for symbol, _ in targets], target_date, target_date
+            )
+            async with aclosing(fetches):
+                i = 0
+                async for symbol, quotes in fetches:
+                    stock_id = targets[i][1]
+                    i += 1
+                    self._check_cancelled()
+                    await self._update_progress(i, len(targets), f"正在更新: {symbol} ({target_date})")
+
+                    try:
+                        if isinstance(quotes, BaseException):
+                            raise quotes
 
                         if not quotes:
                             logger.warning(f"未获取到数据: {symbol} @ {target_date}")
                             skipped += 1
                             continue
 
-                        for quote in quotes:
-                            # 验证数据
-                            is_valid, error_msg = self._validate_daily_quote(quote)
-                            if not is_valid:
-                                logger.warning(f"数据验证失败 {symbol}: {error_msg}")
-                                failed += 1
-                                errors.append(f"{symbol}: {error_msg}")
-                                continue
-
-                            # overwrite=False 在进入循环前已做过存在性检查。
-                            existing_record = None
-                            if overwrite:
-                                existing = await self.session.execute(
-                                    select(DailyMarketData).where(
-                                        DailyMarketData.entity_type == "stock",
-                                        DailyMarketData.entity_id == stock.id,
-                                        DailyMarketData.date == quote.trade_date
-                                    )
-                                )
-                                existing_record = existing.scalar_one_or_none()
+                        # 使用 savepoint 隔离每个股票的操作
+                        async with _safe_nested_tx(self.session):
+                            for quote in quotes:
+                                # 验证数据
+                                is_valid, error_msg = self._validate_daily_quote(quote)
+                                if not is_valid:
+                                    logger.warning(f"数据验证失败 {symbol}: {error_msg}")
+                                    failed += 1
+                                    errors.append(f"{symbol}: {error_msg}")
+                                    continue
+
+                                existing_record = None
+                                if quote.trade_date == target_date:
+                                    existing_record = existing_records.get(stock_id)
 
-                            if existing_record:
-                                if overwrite:
+                                if existing_record:
                                     # 更新已有数据
                                     existing_record.open = quote.open
                                     existing_record.high = quote.high
@@ -263,31 +283,29 @@ class DataUpdateService:
                                     existing_record.turnover = quote.turnover
                                     updated += 1
                                 else:
-                                    skipped += 1
-                            else:
-                                # 创建新记录
-                                market_data = DailyMarketData(
-                                    entity_type="stock",
-                                    entity_id=stock.id,
-                                    symbol=stock.symbol,
-                                    date=quote.trade_date,
-                                    open=quote.open,
-                                    high=quote.high,
-                                    low=quote.low,
-                                    close=quote.close,
-                                    volume=quote.volume,
-                                    turnover=quote.turnover,
-                                    change=None,
-                                    change_percent=None
-                                )
-                                self.session.add(market_data)
-                                created += 1
+                                    # 创建新记录
+                                    market_data = DailyMarketData(
+                                        entity_type="stock",
+                                        entity_id=stock_id,
+                                        symbol=symbol,
+                                        date=quote.trade_date,
+                                        open=quote.open,
+                                        high=quote.high,
+                                        low=quote.low,
+                                        close=quote.close,
+                                        volume=quote.volume,
+                                        turnover=quote.turnover,
+                                        change=None,
+                                        change_percent=None
+                                    )
+                                    self.session.add(market_data)
+                                    created += 1
 
-                except Exception as e:
-                    error_msg = f"更新失败 {symbol}: {e}"
-                    errors.append(error_msg)
-                    failed += 1
-                    logger.error(error_msg)
+                    except Exception as e:
+                        error_msg = f"更新失败 {symbol}: {e}"
+                        errors.append(error_msg)
+                        failed += 1
+                        logger.error(error_msg)
 
             # 最终提交
             await self.session.commit()
@@ -376,83 +394,24 @@ class DataUpdateService:
             failed = 0
             errors = []
 
+            # 先解析股票记录，只下载存在的股票
+            targets = []
             for symbol in symbols:
                 self._check_cancelled()
-
                 try:
-                    # 使用 savepoint 隔离每个股票的操作
-                    async with _safe_nested_tx(self.session):
-                        # 获取股票记录
-                        result = await self.session.execute(
-                            select(Stock).where(Stock.symbol == symbol)
-                        )
-                        stock = result.scalar_one_or_none()
+                    # 获取股票记录
+                    result = await self.session.execute(
+                        select(Stock).where(Stock.symbol == symbol)
+                    )
+                    stock = result.scalar_one_or_none()
 
-                        if not stock:
-                            logger.warning(f"股票不存在，跳过: {symbol}")
-                            skipped += days
-                            current_operation += days
-                            continue
-
-                        # 从 AkShare 获取数据
-                        quotes = self.ak_source.get_daily_data(symbol, start_date, end_date)
-
-                        if not quotes:
-                            logger.warning(f"未获取到数据: {symbol} ({start_date} - {end_date})")
-                            skipped += days
-                            current_operation += days
-                            continue
+                    if not stock:
+                        logger.warning(f"股票不存在，跳过: {symbol}")
+                        skipped += days
+                        current_operation += days
+                        continue
 
-                        for quote in quotes:
-                            current_operation += 1
-                            await self._update_progress(current_operation, total_operations, f"正在更新: {symbol} ({quote.trade_date})")
-
-                            # 验证数据
-                            is_valid, error_msg = self._validate_daily_quote(quote)
-                            if not is_valid:
-                                logger.warning(f"数据验证失败 {symbol}: {error_msg}")
-                                failed += 1
-                                errors.append(f"{symbol} @ {quote.trade_date}: {error_msg}")
-                                continue
-
-                            # 检查是否需要更新或创建
-                            existing = await self.session.execute(
-                                select(DailyMarketData).where(
-                                    DailyMarketData.entity_type == "stock",
-                                    DailyMarketData.entity_id == stock.id,
-                                    DailyMarketData.date == quote.trade_date
-                                )
-                            )
-                            existing_record = existing.scalar_one_or_none()
-
-                            if existing_record:
-                                if overwrite:
-                                    existing_record.open = quote.open
-                                    existing_record.high = quote.high
-                                    existing_record.low = quote.low
-                                    existing_record.close = quote.close
-                                    existing_record.volume = quote.volume
-                                    existing_record.turnover = quote.turnover
-                                    updated += 1
-                                else:
-                                    skipped += 1
-                            else:
-                                market_data = DailyMarketData(
-                                    entity_type="stock",
-                                    entity_id=stock.id,
-                                    symbol=stock.symbol,
-                                    date=quote.trade_date,
-                                    open=quote.open,
-                                    high=quote.high,
-                                    low=quote.low,
-                                    close=quote.close,
-                                    volume=quote.volume,
-                                    turnover=quote.turnover,
-                                    change=None,
-                                    change_percent=None
-                                )
-                                self.session.add(market_data)
-                                created += 1
+                    targets.append(IngestTarget("stock", stock.id, stock.symbol))
 
                 except Exception as e:
                     error_msg = f"更新失败 {symbol}: {e}"
@@ -460,6 +419,42 @@ class DataUpdateService:
                     failed += 1
                     logger.error(error_msg)
 
+            # 下载、校验与写入流水线执行，冲突行按 overwrite 更新或跳过
+            pipeline = QuoteIngestPipeline(
+                self.session,
+                fetch=lambda t: self.async_source.get_daily_data(t.symbol, start_date, end_date),
+                workers=self.async_source.max_workers,
+                overwrite=overwrite,
+                validator=self._validate_daily_quote,
+            )
+            base_operation = current_operation
+            stats = await pipeline.run(
+                targets,
+                on_progress=lambda done, total, t: self._update_progress(
+                    base_operation + done * days, total_operations, f"正在更新: {t.symbol} ({start_date} - {end_date})"
+                ),
+                check_cancelled=self._check_cancelled,
+            )
+
+            created += stats.created
+            updated += stats.updated
+            skipped += stats.skipped
+
+            for target in stats.empty:
+                logger.warning(f"未获取到数据: {target.symbol} ({start_date} - {end_date})")
+            skipped += days * len(stats.empty)
+
+            for target, quote, error_msg in stats.invalid:
+                logger.warning(f"数据验证失败 {target.symbol}: {error_msg}")
+                errors.append(f"{target.symbol} @ {quote.trade_date}: {error_msg}")
+            failed += len(stats.invalid)
+
+            for target, e in stats.failures:
+                error_msg = f"更新失败 {target.symbol}: {e}"
+                errors.append(error_msg)
+                logger.error(error_msg)
+            failed += len(stats.failures)
+
             result = {
                 "success": failed == 0,
                 "created": created,
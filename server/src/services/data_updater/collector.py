@@ -19,6 +19,8 @@ from src.models.update_log import DataUpdateLog
 from src.models.period_config import PeriodConfig
 from src.services.data_acquisition.akshare_client import AkShareDataSource
 from src.services.cache.cache_manager import get_cache_manager
+from src.services.data_date_registry import data_date_registry
+from src.services.strength_scatter_service import StrengthScatterService
 
 try:
     from src.services.calculator_updater.orchestrator import CalculationOrchestrator
@@ -74,6 +76,7 @@ class DataCollector:
             'market_data_updated': 0,
             'calculations_performed': 0,
             'cache_cleared': 0,
+            'scatter_precomputed': 0,
             'errors': []
         }
 
@@ -102,6 +105,9 @@ class DataCollector:
             # 6. 清除缓存
             results['cache_cleared'] = await self._clear_cache()
 
+            # 7. 预计算散点图数据
+            results['scatter_precomputed'] = await self._precompute_scatter()
+
             # 更新日志状态为完成
             log_entry.status = 'completed'
             log_entry.end_time = datetime.now()
@@ -275,6 +281,22 @@ class DataCollector:
             logger.error(f"[数据更新] 清除缓存失败: {e}")
             return 0
 
+    async def _precompute_scatter(self) -> int:
+        """
+        预计算最新日期的板块散点图数据
+
+        Returns:
+            预计算的板块数量
+        """
+        try:
+            async with get_session() as session:
+                # 强度计算刚完成，重新读取最新数据日期
+                data_date_registry.invalidate()
+                return await StrengthScatterService(session).precompute()
+        except Exception as e:
+            logger.error(f"[数据更新] 预计算散点图数据失败: {e}")
+            return 0
+
     async def _save_update_log(self, log_entry: DataUpdateLog):
         """保存更新日志到数据库"""
         async with get_session() as session:
@@ -0,0 +1,280 @@
+"""
+日线行情流水线写入
+
+下载、校验和数据库写入重叠执行：
+    - 多个下载协程并发获取行情，按实体把 DailyQuote 批次放入有界队列
+    - 单个写入协程从队列取出批次，校验后累积到缓冲区
+    - 缓冲区达到阈值时通过 INSERT ... ON CONFLICT 批量写入并提交
+
+内存占用受队列长度、下载并发数和缓冲区行数共同限制。
+同一实体的所有行总是在同一批次中提交，因此每个实体的写入是原子的。
+"""
+
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repositories.market_data_repository import MarketDataRepository
+from src.services.data_acquisition.models import DailyQuote
+
+logger = logging.getLogger(__name__)
+
+# 下载结束哨兵
+_DONE = object()
+
+
+@dataclass
+class IngestTarget:
+    """待下载的实体"""
+
+    entity_type: str  # stock/sector
+    entity_id: int
+    symbol: str  # 股票代码或板块代码
+    name: str = ""  # 进度消息中显示的名称
+    sector_type: Optional[str] = None  # 板块类型 (industry/concept)，仅板块使用
+
+
+@dataclass
+class IngestStats:
+    """流水线写入统计"""
+
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    completed: List[IngestTarget] = field(default_factory=list)  # 已写入（含无新增行）的实体
+    empty: List[IngestTarget] = field(default_factory=list)  # 未获取到数据的实体
+    failures: List[Tuple[IngestTarget, Exception]] = field(default_factory=list)  # 下载或写入失败
+    invalid: List[Tuple[IngestTarget, DailyQuote, str]] = field(default_factory=list)  # 校验失败的行情
+
+
+class QuoteIngestPipeline:
+    """
+    日线行情生产者/消费者流水线
+    """
+
+    DEFAULT_QUEUE_SIZE = 16  # 队列中最多缓存的实体批次数
+    DEFAULT_FLUSH_ROWS = MarketDataRepository.UPSERT_CHUNK_SIZE  # 缓冲区达到该行数时写入
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        fetch: Callable[[IngestTarget], Awaitable[List[DailyQuote]]],
+        workers: int,
+        overwrite: bool = False,
+        validator: Optional[Callable[[DailyQuote], Tuple[bool, Optional[str]]]] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        flush_rows: int = DEFAULT_FLUSH_ROWS,
+    ):
+        """
+        初始化流水线
+
+        Args:
+            session: 数据库会话（只由写入协程使用）
+            fetch: 下载一个实体日线数据的协程函数
+            workers: 下载协程数
+            overwrite: 是否覆盖已有数据
+            validator: 行情校验函数，返回 (is_valid, error_message)
+            queue_size: 有界队列长度
+            flush_rows: 缓冲区写入阈值（行数）
+        """
+        self.session = session
+        self.repo = MarketDataRepository(session)
+        self.fetch = fetch
+        self.workers = max(1, workers)
+        self.overwrite = overwrite
+        self.validator = validator
+        self.queue_size = max(1, queue_size)
+        self.flush_rows = max(1, flush_rows)
+
+    async def run(
+        self,
+        targets: List[IngestTarget],
+        on_progress: Optional[Callable[[int, int, IngestTarget], Any]] = None,
+        check_cancelled: Optional[Callable[[], None]] = None,
+    ) -> IngestStats:
+        """
+        执行流水线
+
+        Args:
+            targets: 待下载的实体列表
+            on_progress: 每处理完一个实体调用 (done, total, target)，可为协程函数
+            check_cancelled: 取消检查函数，已取消时应抛出 InterruptedError
+
+        Returns:
+            写入统计
+
+        Raises:
+            InterruptedError: 任务被取消（已提交的批次保留，缓冲区内未写入的数据丢弃）
+        """
+        stats = IngestStats()
+        if not targets:
+            return stats
+
+        queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=self.queue_size)
+        producer = asyncio.ensure_future(self._produce(iter(targets), queue))
+
+        buffer: List[Tuple[IngestTarget, List[Dict[str, Any]]]] = []
+        buffered_rows = 0
+        done = 0
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+
+                if check_cancelled is not None:
+                    check_cancelled()
+
+                target, outcome = item
+                done += 1
+
+                if isinstance(outcome, Exception):
+                    stats.failures.append((target, outcome))
+                elif not outcome:
+                    stats.empty.append(target)
+                else:
+                    rows = self._build_rows(target, outcome, stats)
+                    buffer.append((target, rows))
+                    buffered_rows += len(rows)
+                    if buffered_rows >= self.flush_rows:
+                        await self._flush(buffer, stats)
+                        buffer, buffered_rows = [], 0
+
+                if on_progress is not None:
+                    await self._notify(on_progress, done, len(targets), target)
+
+            await self._flush(buffer, stats)
+            await producer
+            return stats
+
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    async def _produce(self, targets: Iterable[IngestTarget], queue: "asyncio.Queue[Any]") -> None:
+        """启动下载协程，全部结束后放入结束哨兵"""
+        fetchers = [
+            asyncio.ensure_future(self._fetch_worker(targets, queue))
+            for _ in range(self.workers)
+        ]
+        try:
+            await asyncio.gather(*fetchers)
+        finally:
+            for fetcher in fetchers:
+                fetcher.cancel()
+        await queue.put(_DONE)
+
+    async def _fetch_worker(self, targets: Iterable[IngestTarget], queue: "asyncio.Queue[Any]") -> None:
+        """
+        下载协程：从共享迭代器领取实体，把下载结果放入队列
+
+        队列满时阻塞，从而限制在途数据量。
+        """
+        for target in targets:
+            try:
+                outcome: Any = await self.fetch(target)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                outcome = e
+            await queue.put((target, outcome))
+
+    def _build_rows(
+        self,
+        target: IngestTarget,
+        quotes: List[DailyQuote],
+        stats: IngestStats,
+    ) -> List[Dict[str, Any]]:
+        """校验行情并转换为行字典"""
+        if self.validator is not None:
+            valid_quotes = []
+            for quote in quotes:
+                is_valid, error_msg = self.validator(quote)
+                if is_valid:
+                    valid_quotes.append(quote)
+                else:
+                    stats.invalid.append((target, quote, error_msg or ""))
+            quotes = valid_quotes
+
+        return MarketDataRepository.build_rows(
+            target.entity_type,
+            target.entity_id,
+            target.symbol,
+            [
+                {
+                    "date": quote.trade_date,
+                    "open": quote.open,
+                    "high": quote.high,
+                    "low": quote.low,
+                    "close": quote.close,
+                    "volume": quote.volume,
+                    "turnover": quote.turnover,
+                }
+                for quote in quotes
+            ],
+        )
+
+    async def _flush(
+        self,
+        buffer: List[Tuple[IngestTarget, List[Dict[str, Any]]]],
+        stats: IngestStats,
+    ) -> None:
+        """
+        批量写入缓冲区并提交
+
+        整批写入失败时回滚，再逐个实体重试，使失败只影响出错的实体。
+        """
+        if not buffer:
+            return
+
+        rows = [row for _, target_rows in buffer for row in target_rows]
+        try:
+            counts = await self._write(rows)
+        except Exception as e:
+            if len(buffer) == 1:
+                logger.error(f"行情写入失败 {buffer[0][0].symbol}: {e}")
+                stats.failures.append((buffer[0][0], e))
+                return
+
+            logger.warning(f"行情批量写入失败（{len(buffer)} 个实体, {len(rows)} 行），逐个重试: {e}")
+            for item in buffer:
+                await self._flush([item], stats)
+            return
+
+        stats.created += counts["created"]
+        stats.updated += counts["updated"]
+        stats.skipped += counts["skipped"]
+        stats.completed.extend(target for target, _ in buffer)
+        logger.debug(
+            f"行情批量写入: {len(buffer)} 个实体, 新增 {counts['created']}, "
+            f"更新 {counts['updated']}, 跳过 {counts['skipped']}"
+        )
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """写入并提交，失败时回滚后重新抛出"""
+        try:
+            counts = await self.repo.bulk_upsert(rows, overwrite=self.overwrite)
+            await self.session.commit()
+            return counts
+        except Exception:
+            await self.session.rollback()
+            raise
+
+    @staticmethod
+    async def _notify(
+        callback: Callable[[int, int, IngestTarget], Any],
+        done: int,
+        total: int,
+        target: IngestTarget,
+    ) -> None:
+        """调用进度回调（支持同步和协程函数）"""
+        result = callback(done, total, target)
+        if inspect.isawaitable(result):
+            await result
+
@@ -6,16 +6,18 @@
 
 import logging
 from typing import Dict, Any, Optional, List, Callable
-from datetime import date, timedelta
+from datetime import date
 from dataclasses import dataclass
 from functools import wraps
 import time
-from sqlalchemy import select, and_, func
+import numpy as np
+from sqlalchemy import select, and_, func, literal_column, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.sector import Sector
 from src.models.daily_market_data import DailyMarketData
-from src.models.moving_average_data import MovingAverageData
+from src.models.moving_average_daily import MovingAverageDaily, MA_DAILY_COLUMNS
 from src.models.sector_classification import SectorClassification
 
 # 导入自定义异常类
@@ -173,6 +175,34 @@ def calculate_state(current_price: float, price_5_days_ago: float) -> str:
         return '调整'
 
 
+def calculate_classification_levels(prices: np.ndarray, ma_matrix: np.ndarray) -> np.ndarray:
+    """批量计算分类级别（calculate_classification_level 的数组版本）
+
+    条件与 calculate_classification_level 逐条对应，np.select 取第一个成立的条件，
+    与 if/elif 链的判断顺序一致，因此结果完全相同。
+
+    Args:
+        prices: 当前价格数组，形状 (n,)
+        ma_matrix: 均线矩阵，形状 (n, 8)，列顺序为 ma_5, ma_10, ..., ma_240
+
+    Returns:
+        分类级别数组 (1-9)，形状 (n,)
+    """
+    ma_5, ma_10, ma_20, ma_30, ma_60, ma_90, ma_120, ma_240 = ma_matrix.T
+
+    conditions = [
+        np.all(prices[:, None] > ma_matrix, axis=1),
+        (prices <= ma_5) & (prices > ma_240),
+        (prices <= ma_240) & (prices > ma_120),
+        (prices <= ma_120) & (prices > ma_90),
+        (prices <= ma_90) & (prices > ma_60),
+        (prices <= ma_60) & (prices > ma_30),
+        (prices <= ma_30) & (prices > ma_20),
+        (prices <= ma_20) & (prices > ma_10),
+    ]
+    return np.select(conditions, [9, 8, 7, 6, 5, 4, 3, 2], default=1)
+
+
 # ===============================
 # 服务类
 # ===============================
@@ -186,6 +216,19 @@ class SectorClassificationService:
     # 所需的均线周期
     MA_PERIODS = [5, 10, 20, 30, 60, 90, 120, 240]
 
+    # 唯一约束名称（sector_id, classification_date）
+    CONFLICT_CONSTRAINT = "uq_sector_classification_sector_date"
+
+    # 每条 INSERT 的行数上限（每行 17 个绑定参数，asyncpg 单条语句最多 32767 个）
+    UPSERT_CHUNK_SIZE = 1000
+
+    # 覆盖模式下冲突行更新的列
+    OVERWRITE_COLUMNS = (
+        "symbol", "classification_level", "state", "current_price", "change_percent",
+        "ma_5", "ma_10", "ma_20", "ma_30", "ma_60", "ma_90", "ma_120", "ma_240",
+        "price_5_days_ago",
+    )
+
     def __init__(self, session: AsyncSession):
         """初始化板块分类服务
 
@@ -225,31 +268,27 @@ class SectorClassificationService:
         Raises:
             MissingMADataError: 当均线数据缺失时
         """
-        ma_values = {}
-
-        for period in self.MA_PERIODS:
-            period_str = f"{period}d"
-
-            # 查询该周期的最新均线数据（<= target_date）
-            stmt = select(MovingAverageData).where(
-                and_(
-                    MovingAverageData.entity_type == "sector",
-                    MovingAverageData.entity_id == sector_id,
-                    MovingAverageData.period == period_str,
-                    MovingAverageData.date <= target_date
-                )
-            ).order_by(MovingAverageData.date.desc()).limit(1)
+        # 一次查询均线日表中日期 <= target_date 的最近一行
+        stmt = select(MovingAverageDaily).where(
+            and_(
+                MovingAverageDaily.entity_type == "sector",
+                MovingAverageDaily.entity_id == sector_id,
+                MovingAverageDaily.date <= target_date
+            )
+        ).order_by(MovingAverageDaily.date.desc()).limit(1)
 
-            result = await self.session.execute(stmt)
-            ma_data = result.scalar_one_or_none()
+        result = await self.session.execute(stmt)
+        daily = result.scalar_one_or_none()
 
-            if ma_data is None or ma_data.ma_value is None:
-                raise MissingMADataError(
-                    sector_id=sector_id,
-                    missing_fields=[f"ma_{period}"]
-                )
+        available = daily.ma_values() if daily is not None else {}
+        missing_fields = [f"ma_{period}" for period in self.MA_PERIODS if period not in available]
+        if missing_fields:
+            raise MissingMADataError(
+                sector_id=sector_id,
+                missing_fields=missing_fields
+            )
 
-            ma_values[f'ma_{period}'] = float(ma_data.ma_value)
+        ma_values = {f"ma_{period}": available[period] for period in self.MA_PERIODS}
 
         return ma_values
 
@@ -369,6 +408,9 @@ class SectorClassificationService:
     ) -> List[ClassificationResult]:
         """批量计算所有板块的分类
 
+        所有板块的均线和收盘价各用一次查询取出，在内存中逐板块分类。
+        均线缺失或价格不足 6 天的板块跳过（记录日志）。
+
         Args:
             classification_date: 分类日期，None 表示使用最新日期
 
@@ -389,124 +431,158 @@ class SectorClassificationService:
         if not sectors:
             raise InvalidPriceError("没有找到任何板块")
 
+        ma_by_sector = await self._load_latest_ma_values(classification_date)
+        prices_by_sector = await self._load_recent_closes(classification_date)
+
         total = len(sectors)
         results = []
         errors = []
 
         for idx, sector in enumerate(sectors):
-            try:
-                await self._report_progress(
-                    idx + 1,
-                    total,
-                    f"计算板块分类: {sector.name} ({sector.code})"
-                )
+            await self._report_progress(
+                idx + 1,
+                total,
+                f"计算板块分类: {sector.name} ({sector.code})"
+            )
+
+            ma_values = ma_by_sector.get(sector.id, {})
+            closes = prices_by_sector.get(sector.id, [])
+            missing_fields = [f"ma_{period}" for period in self.MA_PERIODS if f"ma_{period}" not in ma_values]
 
-                classification_result = await self.calculate_classification(
-                    sector.id,
-                    classification_date
+            if missing_fields:
+                error = MissingMADataError(sector_id=sector.id, missing_fields=missing_fields)
+            elif len(closes) < 6:
+                error = InvalidPriceError(
+                    sector_id=sector.id,
+                    reason=f"在 {classification_date} 附近的价格数据不足（需要至少6天数据，当前{len(closes)}天）"
                 )
-                results.append(classification_result)
-
-            except (MissingMADataError, InvalidPriceError) as e:
-                # 已知异常，数据不足是预期情况
-                logger.info(f"板块 {sector.name} 数据不足，跳过: {e}")
-                errors.append({
-                    'sector_id': sector.id,
-                    'sector_name': sector.name,
-                    'error': str(e)
-                })
-            except Exception as e:
-                # 非预期异常使用 error 级别
-                logger.error(f"处理板块 {sector.name} 时出错: {e}", exc_info=True)
-                errors.append({
-                    'sector_id': sector.id,
-                    'sector_name': sector.name,
-                    'error': str(e)
-                })
+            else:
+                # 最新一天为当前价格，第 6 天为 5 天前价格
+                current_price, price_5_days_ago = closes[0], closes[5]
+                results.append(ClassificationResult(
+                    sector_id=sector.id,
+                    sector_name=sector.name,
+                    symbol=sector.code,
+                    classification_level=calculate_classification_level(current_price, ma_values),
+                    state=calculate_state(current_price, price_5_days_ago),
+                    current_price=current_price,
+                    ma_values=ma_values,
+                    price_5_days_ago=price_5_days_ago,
+                    classification_date=classification_date
+                ))
+                continue
+
+            # 已知异常，数据不足是预期情况
+            logger.info(f"板块 {sector.name} 数据不足，跳过: {error}")
+            errors.append({
+                'sector_id': sector.id,
+                'sector_name': sector.name,
+                'error': str(error)
+            })
 
         if errors:
             logger.info(f"批量计算完成，{len(errors)} 个板块失败")
 
         return results
 
-    # ===============================
-    # 数据持久化方法
-    # ===============================
-
-    def _update_ma_fields(self, target: Any, ma_values: Dict[str, float], change_percent: Optional[float]) -> None:
-        """更新均线字段到目标对象
+    async def _load_latest_ma_values(self, target_date: date) -> Dict[int, Dict[str, float]]:
+        """一次查询所有板块在目标日期的最新均线行（均线日表 DISTINCT ON）
 
         Args:
-            target: 目标对象（SectorClassification 实例）
-            ma_values: 均线值字典
-            change_percent: 涨跌幅
+            target_date: 目标日期
+
+        Returns:
+            板块ID -> 均线值字典；为空的周期不包含在内
         """
-        target.ma_5 = ma_values.get('ma_5')
-        target.ma_10 = ma_values.get('ma_10')
-        target.ma_20 = ma_values.get('ma_20')
-        target.ma_30 = ma_values.get('ma_30')
-        target.ma_60 = ma_values.get('ma_60')
-        target.ma_90 = ma_values.get('ma_90')
-        target.ma_120 = ma_values.get('ma_120')
-        target.ma_240 = ma_values.get('ma_240')
-
-    async def _save_classification_result(
-        self,
-        result: ClassificationResult,
-        overwrite: bool = False
-    ) -> Dict[str, Any]:
-        """保存单个分类结果到数据库
+        ma_columns = [getattr(MovingAverageDaily, MA_DAILY_COLUMNS[period]) for period in self.MA_PERIODS]
+        stmt = select(
+            MovingAverageDaily.entity_id,
+            *ma_columns
+        ).where(
+            and_(
+                MovingAverageDaily.entity_type == "sector",
+                MovingAverageDaily.date <= target_date
+            )
+        ).distinct(
+            MovingAverageDaily.entity_id
+        ).order_by(
+            MovingAverageDaily.entity_id,
+            MovingAverageDaily.date.desc()
+        )
+        rows = (await self.session.execute(stmt)).all()
+
+        ma_by_sector: Dict[int, Dict[str, float]] = {}
+        for sector_id, *values in rows:
+            ma_by_sector[sector_id] = {
+                f"ma_{period}": float(value)
+                for period, value in zip(self.MA_PERIODS, values)
+                if value is not None
+            }
+        return ma_by_sector
+
+    async def _load_recent_closes(self, target_date: date) -> Dict[int, List[float]]:
+        """一次查询所有板块在目标日期及之前最近 6 个收盘价（LATERAL + LIMIT）
+
+        每个板块沿 (entity_type, entity_id, date) 索引倒序读取自己的最近 6 个收盘价，
+        与单板块 get_price_data 口径一致，扫描量与历史长度无关。
 
         Args:
-            result: 分类计算结果
-            overwrite: 是否覆盖已有数据
+            target_date: 目标日期
 
         Returns:
-            操作结果字典 {"action": "created" | "skipped" | "updated", "record": SectorClassification}
+            板块ID -> 按日期降序的收盘价列表（最多 6 个）
         """
-        # 检查是否已存在
-        stmt = select(SectorClassification).where(
+        recent = select(DailyMarketData.date, DailyMarketData.close).where(
             and_(
-                SectorClassification.sector_id == result.sector_id,
-                SectorClassification.classification_date == result.classification_date
+                DailyMarketData.entity_type == "sector",
+                DailyMarketData.entity_id == Sector.id,
+                DailyMarketData.date <= target_date,
+                DailyMarketData.close.isnot(None)
             )
+        ).order_by(DailyMarketData.date.desc()).limit(6).lateral("recent")
+
+        stmt = (
+            select(Sector.id, recent.c.close)
+            .select_from(Sector)
+            .join(recent, true())
+            .order_by(Sector.id, recent.c.date.desc())
         )
-        db_result = await self.session.execute(stmt)
-        existing = db_result.scalar_one_or_none()
+        rows = (await self.session.execute(stmt)).all()
+
+        closes_by_sector: Dict[int, List[float]] = {}
+        for sector_id, close in rows:
+            closes_by_sector.setdefault(sector_id, []).append(float(close))
+        return closes_by_sector
 
-        if existing and not overwrite:
-            return {"action": "skipped", "record": existing}
+    # ===============================
+    # 数据持久化方法
+    # ===============================
+
+    def _result_to_row(self, result: ClassificationResult) -> Dict[str, Any]:
+        """将分类结果转换为写入行字典
+
+        Args:
+            result: 分类计算结果
 
-        # 计算涨跌幅
+        Returns:
+            与 _bulk_upsert_classifications 一致的行字典
+        """
         change_percent = None
         if result.price_5_days_ago and result.price_5_days_ago > 0:
             change_percent = ((result.current_price - result.price_5_days_ago) / result.price_5_days_ago) * 100
 
-        if existing:
-            # 更新现有记录
-            existing.symbol = result.symbol
-            existing.classification_level = result.classification_level
-            existing.state = result.state
-            existing.current_price = result.current_price
-            existing.change_percent = change_percent
-            existing.price_5_days_ago = result.price_5_days_ago
-            self._update_ma_fields(existing, result.ma_values, change_percent)
-            return {"action": "updated", "record": existing}
-        else:
-            # 创建新记录
-            new_classification = SectorClassification(
-                sector_id=result.sector_id,
-                symbol=result.symbol,
-                classification_date=result.classification_date,
-                classification_level=result.classification_level,
-                state=result.state,
-                current_price=result.current_price,
-                change_percent=change_percent,
-                price_5_days_ago=result.price_5_days_ago
-            )
-            self._update_ma_fields(new_classification, result.ma_values, change_percent)
-            self.session.add(new_classification)
-            return {"action": "created", "record": new_classification}
+        row = {
+            "sector_id": result.sector_id,
+            "symbol": result.symbol,
+            "classification_date": result.classification_date,
+            "classification_level": result.classification_level,
+            "state": result.state,
+            "current_price": result.current_price,
+            "change_percent": change_percent,
+            "price_5_days_ago": result.price_5_days_ago,
+        }
+        row.update({f"ma_{period}": result.ma_values.get(f"ma_{period}") for period in self.MA_PERIODS})
+        return row
 
     async def initialize_classifications(
         self,
@@ -516,6 +592,10 @@ class SectorClassificationService:
     ) -> Dict[str, Any]:
         """初始化所有板块的分类数据
 
+        历史模式：每个板块只加载一次收盘价序列和均线矩阵，用数组比较计算所有交易日的
+        分类级别和 5 日反弹/调整状态，再批量写入。计算结果与逐日调用
+        calculate_classification 相同，但只为有收盘价的交易日生成记录。
+
         Args:
             start_date: 起始日期，None 表示从每个板块最早日期开始
             overwrite: 是否覆盖已有数据
@@ -532,9 +612,9 @@ class SectorClassificationService:
         )
 
         # 获取所有板块
-        stmt = select(Sector).order_by(Sector.id)
+        stmt = select(Sector.id, Sector.name, Sector.code).order_by(Sector.id)
         result = await self.session.execute(stmt)
-        sectors = result.scalars().all()
+        sectors = result.all()
 
         if not sectors:
             return {"success": False, "error": "未找到板块数据"}
@@ -545,115 +625,45 @@ class SectorClassificationService:
         skipped_count = 0
         error_count = 0
 
-        for idx, sector in enumerate(sectors):
+        for idx, (sector_id, sector_name, sector_code) in enumerate(sectors):
             try:
                 await self._report_progress(
                     idx + 1,
                     total,
-                    f"初始化板块分类: {sector.name} ({sector.code})"
+                    f"初始化板块分类: {sector_name} ({sector_code})"
                 )
 
-                # 获取该板块的日期范围
-                if start_date:
-                    # 使用指定起始日期
-                    date_stmt = select(func.min(DailyMarketData.date)).where(
-                        and_(
-                            DailyMarketData.entity_type == "sector",
-                            DailyMarketData.entity_id == sector.id,
-                            DailyMarketData.date >= start_date
-                        )
-                    )
-                else:
-                    # 从最早日期开始
-                    date_stmt = select(func.min(DailyMarketData.date)).where(
-                        and_(
-                            DailyMarketData.entity_type == "sector",
-                            DailyMarketData.entity_id == sector.id
-                        )
-                    )
-
-                date_result = await self.session.execute(date_stmt)
-                min_date = date_result.scalar()
-
-                if min_date is None:
-                    logger.warning(f"板块 {sector.name} 无市场数据，跳过")
+                rows = await self._build_history_rows(sector_id, sector_code, start_date)
+                if rows is None:
+                    logger.warning(f"板块 {sector_name} 无市场数据，跳过")
                     skipped_count += 1
                     continue
 
-                # 获取最大日期
-                max_date_stmt = select(func.max(DailyMarketData.date)).where(
-                    and_(
-                        DailyMarketData.entity_type == "sector",
-                        DailyMarketData.entity_id == sector.id
-                    )
-                )
-                max_date_result = await self.session.execute(max_date_stmt)
-                max_date = max_date_result.scalar()
-
-                # 生成日期列表
-                current = min_date
-                date_count = 0
-
-                # 批量预加载已存在的分类数据（性能优化）
-                if not overwrite:
-                    existing_stmt = select(SectorClassification).where(
+                if not overwrite and rows:
+                    existing_stmt = select(SectorClassification.classification_date).where(
                         and_(
-                            SectorClassification.sector_id == sector.id,
-                            SectorClassification.classification_date >= min_date,
-                            SectorClassification.classification_date <= max_date
+                            SectorClassification.sector_id == sector_id,
+                            SectorClassification.classification_date >= rows[0]["classification_date"],
+                            SectorClassification.classification_date <= rows[-1]["classification_date"]
                         )
                     )
                     existing_result = await self.session.execute(existing_stmt)
-                    existing_records = existing_result.scalars().all()
-                    existing_dates = {record.classification_date for record in existing_records}
-                else:
-                    existing_dates = set()
-
-                while current <= max_date:
-                    try:
-                        # 检查数据是否已存在（使用预加载的数据）
-                        if current in existing_dates and not overwrite:
-                            date_count += 1
-                            skipped_count += 1
-                            current += timedelta(days=1)
-                            continue
-
-                        # 计算分类
-                        classification_result = await self.calculate_classification(
-                            sector.id, current
-                        )
-                        save_result = await self._save_classification_result(
-                            classification_result, overwrite
-                        )
-
-                        if save_result["action"] == "created":
-                            created_count += 1
-                        elif save_result["action"] == "updated":
-                            updated_count += 1
-                        else:
-                            skipped_count += 1
-
-                        date_count += 1
-
-                        # 每处理 10 个日期 flush 一次
-                        if date_count % 10 == 0:
-                            await self.session.flush()
-
-                    except (MissingMADataError, InvalidPriceError) as e:
-                        # 数据不足是预期情况，使用 debug 级别
-                        logger.debug(f"日期 {current} 数据不足，跳过: {e}")
-                    except Exception as e:
-                        # 非预期异常使用 warning 级别
-                        logger.warning(f"处理日期 {current} 失败: {e}", exc_info=True)
+                    existing_dates = set(existing_result.scalars().all())
+                    if existing_dates:
+                        skipped_count += sum(1 for row in rows if row["classification_date"] in existing_dates)
+                        rows = [row for row in rows if row["classification_date"] not in existing_dates]
 
-                    current += timedelta(days=1)
+                # 每个板块在独立的保存点中写入，失败只影响该板块
+                async with self.session.begin_nested():
+                    counts = await self._bulk_upsert_classifications(rows, overwrite)
 
-                # 完成一个板块后 flush
-                await self.session.flush()
+                created_count += counts["created"]
+                updated_count += counts["updated"]
+                skipped_count += counts["skipped"]
 
             except Exception as e:
                 error_count += 1
-                logger.error(f"处理板块 {sector.name} 时出错: {e}")
+                logger.error(f"处理板块 {sector_name} 时出错: {e}")
 
         return {
             "success": True,
@@ -664,6 +674,160 @@ class SectorClassificationService:
             "errors": error_count
         }
 
+    async def _build_history_rows(
+        self,
+        sector_id: int,
+        symbol: str,
+        start_date: Optional[date] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """计算单个板块所有交易日的分类行
+
+        与逐日计算的对应关系：
+            - 当前价格: 当日收盘价；5 天前价格: 向前第 5 个有收盘价的交易日
+            - 均线: 取均线日表中日期 <= 当日的最近一行（该行周期值为空视为缺失）
+            - 均线缺失或之前不足 5 个交易日的日期跳过
+
+        Args:
+            sector_id: 板块ID
+            symbol: 板块代码
+            start_date: 起始日期（更早的收盘价仍用于 5 日回看）
+
+        Returns:
+            按日期升序的行字典列表；板块在起始日期后没有市场数据时返回 None
+        """
+        price_stmt = select(DailyMarketData.date, DailyMarketData.close).where(
+            and_(
+                DailyMarketData.entity_type == "sector",
+                DailyMarketData.entity_id == sector_id,
+                DailyMarketData.close.isnot(None)
+            )
+        ).order_by(DailyMarketData.date)
+        price_rows = (await self.session.execute(price_stmt)).all()
+
+        trade_dates = np.array([row[0] for row in price_rows], dtype="datetime64[D]")
+        if len(trade_dates) == 0 or (start_date is not None and trade_dates[-1] < np.datetime64(start_date)):
+            return None
+        prices = np.array([float(row[1]) for row in price_rows])
+
+        # 当前日期需要之前有 5 个交易日，且不早于起始日期
+        first = 5
+        if start_date is not None:
+            first = max(first, int(np.searchsorted(trade_dates, np.datetime64(start_date), side="left")))
+        if first >= len(trade_dates):
+            return []
+
+        calc_dates = trade_dates[first:]
+        current_prices = prices[first:]
+        prices_5_days_ago = prices[first - 5:len(prices) - 5]
+
+        ma_matrix = await self._load_ma_matrix(sector_id, calc_dates)
+
+        valid = ~np.isnan(ma_matrix).any(axis=1)
+        if not valid.any():
+            return []
+        calc_dates = calc_dates[valid]
+        current_prices = current_prices[valid]
+        prices_5_days_ago = prices_5_days_ago[valid]
+        ma_matrix = ma_matrix[valid]
+
+        levels = calculate_classification_levels(current_prices, ma_matrix)
+        rebound = current_prices > prices_5_days_ago
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_percents = (current_prices - prices_5_days_ago) / prices_5_days_ago * 100
+
+        ma_columns = [f"ma_{period}" for period in self.MA_PERIODS]
+        rows = []
+        for i in range(len(calc_dates)):
+            price_5 = float(prices_5_days_ago[i])
+            row = {
+                "sector_id": sector_id,
+                "symbol": symbol,
+                "classification_date": calc_dates[i].item(),
+                "classification_level": int(levels[i]),
+                "state": "反弹" if rebound[i] else "调整",
+                "current_price": float(current_prices[i]),
+                "change_percent": float(change_percents[i]) if price_5 > 0 else None,
+                "price_5_days_ago": price_5,
+            }
+            row.update(zip(ma_columns, ma_matrix[i].tolist()))
+            rows.append(row)
+        return rows
+
+    async def _load_ma_matrix(self, sector_id: int, calc_dates: np.ndarray) -> np.ndarray:
+        """从均线日表加载板块 8 个周期的均线，按日期取最近一行对齐为矩阵
+
+        Args:
+            sector_id: 板块ID
+            calc_dates: 计算日期数组 (datetime64[D])
+
+        Returns:
+            形状 (len(calc_dates), 8) 的矩阵，缺失为 NaN
+        """
+        ma_columns = [getattr(MovingAverageDaily, MA_DAILY_COLUMNS[period]) for period in self.MA_PERIODS]
+        ma_stmt = select(
+            MovingAverageDaily.date,
+            *ma_columns
+        ).where(
+            and_(
+                MovingAverageDaily.entity_type == "sector",
+                MovingAverageDaily.entity_id == sector_id,
+                MovingAverageDaily.date <= calc_dates[-1].item()
+            )
+        ).order_by(MovingAverageDaily.date)
+        ma_rows = (await self.session.execute(ma_stmt)).all()
+
+        matrix = np.full((len(calc_dates), len(self.MA_PERIODS)), np.nan)
+        if not ma_rows:
+            return matrix
+
+        ma_dates = np.array([row[0] for row in ma_rows], dtype="datetime64[D]")
+        values = np.array(
+            [[np.nan if value is None else float(value) for value in row[1:]] for row in ma_rows]
+        )
+        # 日期 <= 当日的最近一行
+        pos = np.searchsorted(ma_dates, calc_dates, side="right") - 1
+        found = pos >= 0
+        matrix[found] = values[pos[found]]
+        return matrix
+
+    async def _bulk_upsert_classifications(
+        self,
+        rows: List[Dict[str, Any]],
+        overwrite: bool = False
+    ) -> Dict[str, int]:
+        """批量写入分类行（INSERT ... ON CONFLICT）
+
+        Args:
+            rows: 分类行字典列表
+            overwrite: 是否覆盖已有数据
+
+        Returns:
+            {"created": 新增数, "updated": 更新数, "skipped": 跳过数}
+        """
+        counts = {"created": 0, "updated": 0, "skipped": 0}
+
+        for start in range(0, len(rows), self.UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + self.UPSERT_CHUNK_SIZE]
+            stmt = pg_insert(SectorClassification).values(chunk)
+            if overwrite:
+                stmt = stmt.on_conflict_do_update(
+                    constraint=self.CONFLICT_CONSTRAINT,
+                    set_={column: stmt.excluded[column] for column in self.OVERWRITE_COLUMNS},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(constraint=self.CONFLICT_CONSTRAINT)
+            stmt = stmt.returning(literal_column("(xmax = 0)").label("inserted"))
+
+            result = await self.session.execute(stmt)
+            inserted_flags = result.scalars().all()
+            created = sum(1 for flag in inserted_flags if flag)
+
+            counts["created"] += created
+            counts["updated"] += len(inserted_flags) - created
+            counts["skipped"] += len(chunk) - len(inserted_flags)
+
+        return counts
+
     async def update_daily_classification(
         self,
         target_date: Optional[date] = None,
@@ -707,18 +871,11 @@ class SectorClassificationService:
         # 批量计算当天所有板块分类
         results = await self.batch_calculate_all_sectors(target_date)
 
-        created_count = 0
-        updated_count = 0
-        skipped_count = 0
-
-        for result in results:
-            save_result = await self._save_classification_result(result, overwrite)
-            if save_result["action"] == "created":
-                created_count += 1
-            elif save_result["action"] == "updated":
-                updated_count += 1
-            else:
-                skipped_count += 1
+        # 所有板块一次写入
+        counts = await self._bulk_upsert_classifications(
+            [self._result_to_row(result) for result in results],
+            overwrite
+        )
 
         # 完成后清除缓存
         try:
@@ -732,9 +889,9 @@ class SectorClassificationService:
             "success": True,
             "target_date": target_date.isoformat(),
             "total_sectors": len(results),
-            "created": created_count,
-            "updated": updated_count,
-            "skipped": skipped_count
+            "created": counts["created"],
+            "updated": counts["updated"],
+            "skipped": counts["skipped"]
         }
 
     async def get_classification_status(self) -> Dict[str, Any]:
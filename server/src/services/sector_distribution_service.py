@@ -6,11 +6,10 @@
 
 import logging
 from datetime import date
-from sqlalchemy import select, and_, func, case
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models.sector import Sector
-from src.models.strength_score import StrengthScore
+from src.repositories.strength_score_repository import StrengthScoreRepository
+from src.services.data_date_registry import data_date_registry
 from src.api.schemas.grade_table import SectorDistributionResponse
 
 logger = logging.getLogger(__name__)
@@ -32,51 +31,25 @@ class SectorDistributionService:
         """
         获取板块类型分布统计
 
-        返回最新日期的板块类型分布数据，不受筛选条件影响。
+        返回最新日期的板块类型分布数据，不受筛选条件影响。数据取自每日强度汇总，
+        汇总行缺失时现场统计。
 
         Returns:
             SectorDistributionResponse
         """
         try:
-            # 子查询获取最新日期
-            latest_date_stmt = (
-                select(StrengthScore.date)
-                .where(StrengthScore.period == 'all')
-                .order_by(StrengthScore.date.desc())
-                .limit(1)
-                .scalar_subquery()
-            )
-
-            # 统计各类型板块数量
-            stmt = (
-                select(
-                    StrengthScore.date,
-                    func.sum(
-                        case(
-                            (Sector.type == 'industry', 1),
-                            else_=0
-                        )
-                    ).label('industry_count'),
-                    func.sum(
-                        case(
-                            (Sector.type == 'concept', 1),
-                            else_=0
-                        )
-                    ).label('concept_count'),
+            # 板块最新数据日期
+            latest_date = await data_date_registry.get_latest_date(self.session, 'sector')
+
+            # 当日板块按类型拆分的汇总行
+            counts = {}
+            if latest_date is not None:
+                aggregates = await StrengthScoreRepository(self.session).get_daily_aggregates(
+                    latest_date, 'sector', ('industry', 'concept')
                 )
-                .join(Sector, and_(
-                    StrengthScore.entity_type == 'sector',
-                    StrengthScore.entity_id == Sector.id,
-                    StrengthScore.period == 'all',
-                    StrengthScore.date == latest_date_stmt,
-                ))
-                .group_by(StrengthScore.date)
-            )
-
-            result = await self.session.execute(stmt)
-            row = result.first()
+                counts = {sector_type: row['total_count'] for sector_type, row in aggregates.items()}
 
-            if not row:
+            if not counts:
                 # 无数据时返回空结构
                 return SectorDistributionResponse(
                     date=date.today(),
@@ -85,13 +58,14 @@ class SectorDistributionService:
                     total_count=0,
                 )
 
-            data_date, industry_count, concept_count = row
+            industry_count = counts.get('industry', 0)
+            concept_count = counts.get('concept', 0)
 
             return SectorDistributionResponse(
-                date=data_date,
-                industry_count=int(industry_count or 0),
-                concept_count=int(concept_count or 0),
-                total_count=int((industry_count or 0) + (concept_count or 0)),
+                date=latest_date,
+                industry_count=industry_count,
+                concept_count=concept_count,
+                total_count=industry_count + concept_count,
             )
 
         except Exception as e:
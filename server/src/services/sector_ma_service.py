@@ -9,13 +9,20 @@ from typing import Dict, Any, Optional, List, Callable
 from datetime import date, datetime, timedelta
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
-import pandas as pd
+import numpy as np
 
 from src.models.sector import Sector
 from src.models.daily_market_data import DailyMarketData
 from src.models.moving_average_data import MovingAverageData
 from src.services.calculation.moving_average_calculator import MovingAverageCalculator
+from src.repositories.market_data_repository import MovingAverageRepository
+from src.services.calculation.ma_system.ma_cache import ma_data_cache
 from src.models.period_config import PeriodConfig
+from src.services.sharded_calculation import (
+    JOB_SECTOR_MA_FULL_HISTORY,
+    ShardedCalculationRunner,
+    resolve_shard_count,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +42,7 @@ class SectorMAService:
         """
         self.session = session
         self.ma_calculator = MovingAverageCalculator()
+        self.ma_repo = MovingAverageRepository(session)
         self._progress_callback: Optional[Callable] = None
 
     def set_progress_callback(self, callback: Callable[[int, int, str], None]):
@@ -155,7 +163,7 @@ class SectorMAService:
         overwrite: bool
     ) -> Dict[str, Any]:
         """
-        计算单个板块的均线（支持断点续传和分批保存）
+        计算单个板块的均线（支持断点续传和批量写入）
 
         Args:
             sector: 板块对象
@@ -178,8 +186,8 @@ class SectorMAService:
             max_period = max(periods)
             logger.info(f"[板块均线] 最长均线周期: {max_period}日")
 
-            # 构建查询语句：使用 LIMIT 和日期过滤来高效获取数据
-            stmt = select(DailyMarketData).where(
+            # 构建查询语句：使用 LIMIT 和日期过滤来高效获取数据（只查询日期和收盘价两列）
+            stmt = select(DailyMarketData.date, DailyMarketData.close).where(
                 and_(
                     DailyMarketData.entity_type == "sector",
                     DailyMarketData.entity_id == sector.id,
@@ -227,7 +235,7 @@ class SectorMAService:
             stmt = stmt.limit(limit_count)
 
             result = await self.session.execute(stmt)
-            market_data_list = result.scalars().all()
+            market_data_list = result.all()
 
             if not market_data_list:
                 logger.warning(f"[板块均线] 板块 {sector.name} 在指定范围内没有市场数据")
@@ -258,163 +266,82 @@ class SectorMAService:
                 )
 
             # ========================================
-            # 步骤2: 转换为 pandas DataFrame
+            # 步骤2: 一次计算全部周期的均线、价格比率和趋势（始终使用完整数据）
             # ========================================
-            data = {
-                "date": [md.date for md in market_data_list],
-                "close": [float(md.close) for md in market_data_list]
-            }
-            df = pd.DataFrame(data)
-            df.set_index("date", inplace=True)
-            df = df.sort_index()
-
-            total_created = 0
-            total_updated = 0
-            total_skipped = 0
+            dates = [md.date for md in market_data_list]
+            closes = np.array([md.close for md in market_data_list], dtype=float)
+            ma_result = self.ma_calculator.calculate_all_periods(closes, periods)
 
             # ========================================
-            # 步骤3: 按周期计算均线（每计算完一个周期就保存）
+            # 步骤3: 查询各周期的断点（已有数据的最大日期），一次查询覆盖全部周期
             # ========================================
-            for period_idx, period in enumerate(periods, 1):
-                period_str = f"{period}d"
-
-                logger.info(f"[板块均线] 开始计算 {sector.name} 的 {period} 日均线 [{period_idx}/{len(periods)}]")
-
-                if len(df) < period:
-                    logger.warning(f"[板块均线] 板块 {sector.name} 数据不足，无法计算 {period} 日均线（需要 {period} 天，实际 {len(df)} 天）")
-                    continue
-
-                # ========================================
-                # 步骤3.1: 检查该周期的断点（已有数据的最大日期）
-                # ========================================
-                # 用于计算均线的数据集：始终使用完整数据，确保均线计算正确
-                calc_df = df
-
-                # 用于保存的数据集：根据断点续传逻辑确定
-                save_df = df
-                save_start_date_limit = None
-
-                if not overwrite:
-                    # 查询该周期已有数据的最大日期
-                    latest_period_stmt = select(func.max(MovingAverageData.date)).where(
-                        and_(
-                            MovingAverageData.entity_type == "sector",
-                            MovingAverageData.entity_id == sector.id,
-                            MovingAverageData.symbol == sector.code,
-                            MovingAverageData.period == period_str
-                        )
+            latest_by_period: Dict[str, date] = {}
+            if not overwrite:
+                latest_stmt = select(
+                    MovingAverageData.period,
+                    func.max(MovingAverageData.date)
+                ).where(
+                    and_(
+                        MovingAverageData.entity_type == "sector",
+                        MovingAverageData.entity_id == sector.id,
+                        MovingAverageData.symbol == sector.code,
+                        MovingAverageData.period.in_([f"{p}d" for p in periods])
                     )
-                    latest_period_result = await self.session.execute(latest_period_stmt)
-                    latest_period_date = latest_period_result.scalar()
+                ).group_by(MovingAverageData.period)
+                latest_result = await self.session.execute(latest_stmt)
+                latest_by_period = {row[0]: row[1] for row in latest_result.all()}
 
-                    if latest_period_date:
-                        logger.info(f"[板块均线] {sector.name} {period}日均线已有数据，最新日期: {latest_period_date}，将从该日期后继续保存")
-                        # 过滤出需要保存的数据（从最新日期的下一天开始）
-                        save_df = df[df.index > latest_period_date]
-                        save_start_date_limit = latest_period_date
-
-                        if len(save_df) == 0:
-                            logger.info(f"[板块均线] {sector.name} {period}日均线数据已是最新，跳过该周期")
-                            total_skipped += 0  # 本周期没有处理任何数据
-                            continue
-
-                        logger.info(f"[板块均线] {sector.name} {period}日均线需要保存 {len(save_df)} 天的新数据（使用全部 {len(df)} 天数据计算均线）")
-                    else:
-                        logger.info(f"[板块均线] {sector.name} {period}日均线无历史数据，将计算并保存全部数据")
-
-                # 计算均线：使用完整数据集计算
-                ma_series = self.ma_calculator.calculate_sma(calc_df["close"], period)
-
-                # 统计本周期的处理情况
-                period_created = 0
-                period_updated = 0
-                period_skipped = 0
-                batch_records = []
-                batch_size = 500  # 每500条记录提交一次
+            # ========================================
+            # 步骤4: 按断点和保存范围筛选各周期的行，汇总后批量写入
+            # ========================================
+            date_index = np.array(dates)
+            in_range = np.ones(len(dates), dtype=bool)
+            if start_date:
+                in_range &= date_index >= start_date
+            if end_date:
+                in_range &= date_index <= end_date
+            records = []
 
-                # 遍历均线数据，只保存 save_df 中的数据
-                for idx, ma_value in ma_series.items():
-                    if pd.isna(ma_value):
-                        continue
+            for period_idx, period in enumerate(periods):
+                period_str = f"{period}d"
 
-                    # 只保存 save_df 中的数据（断点之后的数据）
-                    if idx not in save_df.index:
-                        continue
+                if len(dates) < period:
+                    logger.warning(f"[板块均线] 板块 {sector.name} 数据不足，无法计算 {period} 日均线（需要 {period} 天，实际 {len(dates)} 天）")
+                    continue
 
-                    # 应用日期过滤：只保存指定时间范围内的均线数据
-                    if start_date and idx < start_date:
+                # 只保存断点之后、且在指定时间范围内的数据
+                save_mask = in_range.copy()
+                latest_period_date = latest_by_period.get(period_str)
+                if latest_period_date:
+                    save_mask &= date_index > latest_period_date
+                    if not save_mask.any():
+                        logger.info(f"[板块均线] {sector.name} {period}日均线数据已是最新，跳过该周期")
                         continue
-                    if end_date and idx > end_date:
-                        continue
-
-                    current_price = save_df.loc[idx, "close"]
 
-                    # 计算价格比率和趋势
-                    price_ratio = self.ma_calculator.calculate_price_ratio(current_price, ma_value)
-                    trend = 1 if price_ratio > 0 else (-1 if price_ratio < 0 else 0)
-
-                    # 检查是否已存在
-                    existing_stmt = select(MovingAverageData).where(
-                        and_(
-                            MovingAverageData.entity_type == "sector",
-                            MovingAverageData.entity_id == sector.id,
-                            MovingAverageData.symbol == sector.code,
-                            MovingAverageData.date == idx,
-                            MovingAverageData.period == period_str
-                        )
+                # 不需要保存的日期置为 NaN，build_rows 不会为其生成行
+                ma_values = np.where(save_mask, ma_result["ma"][0, :, period_idx], np.nan)
+                records.extend(
+                    MovingAverageRepository.build_rows(
+                        "sector", sector.id, sector.code, period, dates,
+                        ma_values,
+                        ma_result["price_ratio"][0, :, period_idx],
+                        ma_result["trend"][0, :, period_idx],
                     )
-                    existing_result = await self.session.execute(existing_stmt)
-                    existing_ma = existing_result.scalar_one_or_none()
-
-                    if existing_ma:
-                        if overwrite:
-                            # 更新已有数据
-                            existing_ma.ma_value = ma_value
-                            existing_ma.price_ratio = price_ratio
-                            existing_ma.trend = trend
-                            existing_ma.symbol = sector.code
-                            period_updated += 1
-                        else:
-                            period_skipped += 1
-                    else:
-                        # 创建新记录对象
-                        ma_record = MovingAverageData(
-                            entity_type="sector",
-                            entity_id=sector.id,
-                            symbol=sector.code,
-                            date=idx,
-                            period=period_str,
-                            ma_value=ma_value,
-                            price_ratio=price_ratio,
-                            trend=trend
-                        )
-                        batch_records.append(ma_record)
-                        period_created += 1
-
-                    # 分批保存
-                    if len(batch_records) >= batch_size:
-                        for record in batch_records:
-                            self.session.add(record)
-                        await self.session.commit()
-                        logger.info(f"[板块均线] {sector.name} {period}日均线 - 已保存 {len(batch_records)} 条记录（总计创建: {period_created}）")
-                        batch_records = []
-
-                # 保存剩余记录
-                if batch_records:
-                    for record in batch_records:
-                        self.session.add(record)
-                    await self.session.commit()
-                    logger.info(f"[板块均线] {sector.name} {period}日均线 - 已保存最后 {len(batch_records)} 条记录")
-
-                total_created += period_created
-                total_updated += period_updated
-                total_skipped += period_skipped
+                )
 
-                logger.info(
-                    f"[板块均线] {sector.name} {period}日均线计算完成 - "
-                    f"创建: {period_created}, 更新: {period_updated}, 跳过: {period_skipped}"
+            counts = await self.ma_repo.bulk_upsert(records, overwrite=overwrite)
+            await self.session.commit()
+
+            # 写入完成后失效受影响日期之后的均线缓存
+            if counts["created"] or counts["updated"]:
+                ma_data_cache.invalidate(
+                    "sector", min(record["date"] for record in records), [sector.id]
                 )
 
+            total_created = counts["created"]
+            total_updated = counts["updated"]
+            total_skipped = counts["skipped"]
+
             logger.info(
                 f"[板块均线] 板块 {sector.name} 全部周期计算完成 - "
                 f"总计创建: {total_created}, 更新: {total_updated}, 跳过: {total_skipped}"
@@ -613,19 +540,41 @@ class SectorMAService:
         self,
         sector_id: Optional[int] = None,
         periods: Optional[List[int]] = None,
-        overwrite: bool = False
+        overwrite: bool = False,
+        shards: Optional[int] = None,
+        sector_ids: Optional[List[int]] = None
     ) -> Dict[str, Any]:
         """
         计算板块完整历史均线（从最早数据日期到最新日期）
 
+        分片数大于 1 且计算所有板块时，板块列表拆分到多个工作进程并行计算。
+
         Args:
             sector_id: 板块ID，None表示计算所有板块
             periods: 均线周期列表
             overwrite: 是否覆盖已有数据
+            shards: 工作进程数，None 表示使用 settings.FULL_HISTORY_SHARDS
+            sector_ids: 限定计算的板块ID列表（分片工作进程使用）
 
         Returns:
             计算结果
         """
+        shard_count = resolve_shard_count(shards)
+        if shard_count > 1 and not sector_id and sector_ids is None:
+            result = await self.session.execute(select(Sector.id).order_by(Sector.id))
+            all_ids = list(result.scalars().all())
+            if len(all_ids) > 1:
+                runner = ShardedCalculationRunner(shard_count, self._progress_callback)
+                summary = await runner.run(
+                    JOB_SECTOR_MA_FULL_HISTORY,
+                    all_ids,
+                    {"periods": periods, "overwrite": overwrite},
+                )
+                # 均线由工作进程写入，本进程的均线缓存需全部失效
+                ma_data_cache.invalidate("sector", date.min)
+                summary["total_sectors"] = summary.pop("total")
+                return summary
+
         try:
             # 获取周期配置
             if periods is None:
@@ -634,6 +583,8 @@ class SectorMAService:
             # 获取板块列表
             if sector_id:
                 stmt = select(Sector).where(Sector.id == sector_id)
+            elif sector_ids is not None:
+                stmt = select(Sector).where(Sector.id.in_(sector_ids)).order_by(Sector.id)
             else:
                 stmt = select(Sector)
 
@@ -689,6 +640,8 @@ class SectorMAService:
                         error_count += 1
                         logger.warning(f"板块 {sector.name} 均线计算失败: {result.get('error')}")
 
+                except InterruptedError:
+                    raise
                 except Exception as e:
                     error_count += 1
                     logger.error(f"处理板块 {sector.name} 时出错: {e}")
@@ -704,6 +657,10 @@ class SectorMAService:
                 "errors": error_count
             }
 
+        except InterruptedError:
+            await self.session.rollback()
+            logger.warning("板块完整历史均线计算任务被取消")
+            raise
         except Exception as e:
             logger.error(f"板块完整历史均线计算失败: {e}")
             await self.session.rollback()
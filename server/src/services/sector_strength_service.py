@@ -9,13 +9,24 @@ from typing import Dict, Any, Optional, List, Callable
 from datetime import date, datetime
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
+import numpy as np
 
 from src.models.sector import Sector
 from src.models.daily_market_data import DailyMarketData
+from src.models.moving_average_data import MovingAverageData
 from src.models.strength_score import StrengthScore
+from src.repositories.strength_score_repository import StrengthScoreRepository
+from src.services.cache.strength_cache import StrengthCache
+from src.services.data_date_registry import data_date_registry
 from src.services.calculation.ma_system.strength_calculator_v2 import StrengthCalculatorV2
+from src.services.calculation.ma_system.vectorized_strength import VectorizedStrengthCalculator
 from src.services.calculation.ma_system.ma_data_loader import MADataLoader
-from src.config.ma_system import MIN_DATA_DAYS, FULL_DATA_DAYS
+from src.services.sharded_calculation import (
+    JOB_SECTOR_STRENGTH_FULL_HISTORY,
+    ShardedCalculationRunner,
+    resolve_shard_count,
+)
+from src.config.ma_system import MA_PERIODS, MIN_DATA_DAYS, FULL_DATA_DAYS
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +43,9 @@ class SectorStrengthService:
         """
         self.session = session
         self.calculator = StrengthCalculatorV2()
+        self.vectorized_calculator = VectorizedStrengthCalculator()
         self.data_loader = MADataLoader(session)
+        self.score_repo = StrengthScoreRepository(session)
         self._progress_callback: Optional[Callable] = None
         self._cancelled: bool = False
 
@@ -60,7 +73,8 @@ class SectorStrengthService:
         sector_id: Optional[int] = None,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
-        overwrite: bool = False
+        overwrite: bool = False,
+        vectorized: bool = False
     ) -> Dict[str, Any]:
         """
         按日期范围计算板块强度
@@ -70,6 +84,7 @@ class SectorStrengthService:
             start_date: 计算开始日期
             end_date: 计算结束日期
             overwrite: 是否覆盖已有数据
+            vectorized: 是否使用列式（向量化）计算模式
 
         Returns:
             计算结果
@@ -121,7 +136,12 @@ class SectorStrengthService:
                     )
 
                     # 计算单个板块的强度
-                    result = await self._calculate_single_sector_strength_by_range(
+                    calculate_single = (
+                        self._calculate_single_sector_strength_vectorized
+                        if vectorized
+                        else self._calculate_single_sector_strength_by_range
+                    )
+                    result = await calculate_single(
                         sector=sector,
                         start_date=start_date,
                         end_date=end_date,
@@ -151,6 +171,9 @@ class SectorStrengthService:
                     logger.error(f"处理板块 {sector.name} 时出错: {e}")
 
             await self.session.commit()
+            change_rates_updated = await self._update_change_rates(
+                start_date, end_date, [sector_id] if sector_id else None
+            )
 
             logger.info(
                 f"板块强度按范围计算完成: "
@@ -164,7 +187,8 @@ class SectorStrengthService:
                 "created": created_count,
                 "updated": updated_count,
                 "skipped": skipped_count,
-                "errors": error_count
+                "errors": error_count,
+                "change_rates_updated": change_rates_updated
             }
 
         except InterruptedError:
@@ -183,7 +207,8 @@ class SectorStrengthService:
         self,
         target_date: date,
         sector_id: Optional[int] = None,
-        overwrite: bool = False
+        overwrite: bool = False,
+        vectorized: bool = False
     ) -> Dict[str, Any]:
         """
         按指定日期计算板块强度
@@ -192,6 +217,7 @@ class SectorStrengthService:
             target_date: 目标日期
             sector_id: 板块ID，None表示计算所有板块
             overwrite: 是否覆盖已有数据
+            vectorized: 是否使用列式（向量化）计算模式
 
         Returns:
             计算结果
@@ -200,33 +226,58 @@ class SectorStrengthService:
             sector_id=sector_id,
             start_date=target_date,
             end_date=target_date,
-            overwrite=overwrite
+            overwrite=overwrite,
+            vectorized=vectorized
         )
 
     async def calculate_sector_strength_full_history(
         self,
         sector_id: Optional[int] = None,
-        overwrite: bool = False
+        overwrite: bool = False,
+        vectorized: bool = False,
+        shards: Optional[int] = None,
+        sector_ids: Optional[List[int]] = None
     ) -> Dict[str, Any]:
         """
         计算板块完整历史强度
 
         从每个板块的最早数据日期开始，计算到最新日期的所有强度数据。
+        分片数大于 1 且计算所有板块时，板块列表拆分到多个工作进程并行计算。
 
         Args:
             sector_id: 板块ID，None表示计算所有板块
             overwrite: 是否覆盖已有数据
+            vectorized: 是否使用列式（向量化）计算模式
+            shards: 工作进程数，None 表示使用 settings.FULL_HISTORY_SHARDS
+            sector_ids: 限定计算的板块ID列表（分片工作进程使用）
 
         Returns:
             计算结果
         """
         logger.info(f"开始计算板块完整历史强度: sector_id={sector_id or 'all'}, overwrite={overwrite}")
 
+        shard_count = resolve_shard_count(shards)
+        if shard_count > 1 and not sector_id and sector_ids is None:
+            result = await self.session.execute(select(Sector.id).order_by(Sector.id))
+            all_ids = list(result.scalars().all())
+            if len(all_ids) > 1:
+                runner = ShardedCalculationRunner(shard_count, self._progress_callback)
+                summary = await runner.run(
+                    JOB_SECTOR_STRENGTH_FULL_HISTORY,
+                    all_ids,
+                    {"overwrite": overwrite, "vectorized": vectorized},
+                )
+                summary["total_sectors"] = summary.pop("total")
+                summary["change_rates_updated"] = await self._update_change_rates()
+                return summary
+
         try:
             # 获取板块列表
             if sector_id:
                 stmt = select(Sector).where(Sector.id == sector_id)
                 logger.info(f"查询单个板块: sector_id={sector_id}")
+            elif sector_ids is not None:
+                stmt = select(Sector).where(Sector.id.in_(sector_ids)).order_by(Sector.id)
             else:
                 stmt = select(Sector).order_by(Sector.id)
                 logger.info("查询所有板块")
@@ -275,7 +326,12 @@ class SectorStrengthService:
                     )
 
                     # 计算该板块的完整历史强度
-                    result = await self._calculate_single_sector_strength_by_range(
+                    calculate_single = (
+                        self._calculate_single_sector_strength_vectorized
+                        if vectorized
+                        else self._calculate_single_sector_strength_by_range
+                    )
+                    result = await calculate_single(
                         sector=sector,
                         start_date=sector_start,
                         end_date=sector_end,
@@ -306,6 +362,13 @@ class SectorStrengthService:
 
             await self.session.commit()
 
+            # 分片工作进程只负责强度计算，变化率由父进程在全部分片完成后统一回填
+            change_rates_updated = 0
+            if sector_ids is None:
+                change_rates_updated = await self._update_change_rates(
+                    sector_ids=[sector_id] if sector_id else None
+                )
+
             logger.info(
                 f"板块完整历史强度计算完成: "
                 f"总数={total}, 新增={created_count}, 更新={updated_count}, "
@@ -318,7 +381,8 @@ class SectorStrengthService:
                 "created": created_count,
                 "updated": updated_count,
                 "skipped": skipped_count,
-                "errors": error_count
+                "errors": error_count,
+                "change_rates_updated": change_rates_updated
             }
 
         except InterruptedError:
@@ -333,6 +397,45 @@ class SectorStrengthService:
                 "error": str(e)
             }
 
+    async def _update_change_rates(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        sector_ids: Optional[List[int]] = None
+    ) -> int:
+        """
+        一次回填日期范围内板块的变化率，并刷新最新强度得分读模型和每日强度汇总，
+        提交后失效范围内的散点图缓存
+
+        Args:
+            start_date: 开始日期，None 表示从最早日期开始
+            end_date: 结束日期，None 表示与 start_date 相同
+            sector_ids: 限定的板块ID列表，None 表示所有板块
+
+        Returns:
+            更新的行数，失败时为 0
+        """
+        try:
+            updated = await self.score_repo.update_change_rates(
+                start_date, end_date, entity_type="sector", entity_ids=sector_ids
+            )
+            await self.score_repo.refresh_latest(
+                start_date, end_date, entity_type="sector", entity_ids=sector_ids
+            )
+            await self.score_repo.refresh_daily_aggregates(start_date, end_date, entity_type="sector")
+            await self.session.commit()
+            data_date_registry.invalidate()
+        except Exception as e:
+            logger.error(f"板块变化率回填失败: {e}")
+            await self.session.rollback()
+            return 0
+
+        try:
+            await StrengthCache().invalidate_scatter(start_date, end_date)
+        except Exception as e:
+            logger.warning(f"失效散点图缓存失败: {e}")
+        return updated
+
     async def _calculate_single_sector_strength_by_range(
         self,
         sector: Sector,
@@ -537,6 +640,190 @@ class SectorStrengthService:
                 "error": str(e)
             }
 
+    async def _calculate_single_sector_strength_vectorized(
+        self,
+        sector: Sector,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        overwrite: bool = False
+    ) -> Dict[str, Any]:
+        """
+        列式计算单个板块在指定日期范围内的强度
+
+        一次查询加载收盘价序列、一次查询加载全部周期的均线序列，
+        用数组计算所有日期的强度，再批量 upsert 到 strength_scores。
+        跳过规则和计算结果与逐日模式完全一致。
+
+        Args:
+            sector: 板块对象
+            start_date: 开始日期
+            end_date: 结束日期
+            overwrite: 是否覆盖已有数据
+
+        Returns:
+            计算结果
+        """
+        logger.debug(
+            f"开始列式计算板块 {sector.name} 强度: "
+            f"{start_date} 至 {end_date}, overwrite={overwrite}"
+        )
+
+        try:
+            # 1. 收盘价序列（截至 end_date 的全部历史，用于可用天数统计）
+            price_stmt = select(DailyMarketData.date, DailyMarketData.close).where(
+                and_(
+                    DailyMarketData.entity_type == "sector",
+                    DailyMarketData.entity_id == sector.id,
+                    DailyMarketData.close.isnot(None)
+                )
+            ).order_by(DailyMarketData.date)
+            if end_date is not None:
+                price_stmt = price_stmt.where(DailyMarketData.date <= end_date)
+
+            price_rows = (await self.session.execute(price_stmt)).all()
+            if not price_rows:
+                return {
+                    "success": False,
+                    "error": "该板块没有市场数据"
+                }
+
+            dates = [row[0] for row in price_rows]
+            closes = np.array([float(row[1]) for row in price_rows])
+            date_index = np.array(dates, dtype="datetime64[D]")
+
+            start_date = max(start_date, dates[0]) if start_date else dates[0]
+            end_date = dates[-1]
+
+            # 2. 全部周期的均线序列，按“截至当日的最新值”对齐到交易日
+            ma_matrix = await self._load_ma_matrix(sector.id, date_index, end_date)
+
+            # 3. 范围内已有的强度记录日期
+            existing_stmt = select(StrengthScore.date).where(
+                and_(
+                    StrengthScore.entity_type == "sector",
+                    StrengthScore.entity_id == sector.id,
+                    StrengthScore.date >= start_date,
+                    StrengthScore.date <= end_date,
+                    StrengthScore.period == "all"
+                )
+            )
+            existing_dates = set((await self.session.execute(existing_stmt)).scalars().all())
+
+            in_range = date_index >= np.datetime64(start_date, "D")
+            # 可用天数 = 截至当日的收盘价条数
+            available_days = np.arange(1, len(dates) + 1)
+            is_existing = np.array([d in existing_dates for d in dates], dtype=bool)
+            has_ma = np.isfinite(ma_matrix).any(axis=1)
+
+            skip_existing = in_range & is_existing & (not overwrite)
+            candidates = in_range & ~skip_existing
+            calculable = candidates & has_ma & (available_days >= MIN_DATA_DAYS)
+
+            skipped = int(skip_existing.sum()) + int((candidates & ~calculable).sum())
+            calc_idx = np.nonzero(calculable)[0]
+
+            if len(calc_idx) == 0:
+                return {
+                    "success": True,
+                    "created": 0,
+                    "updated": 0,
+                    "skipped": skipped
+                }
+
+            self._check_cancelled()
+
+            # 4. 向量化计算
+            results = self.vectorized_calculator.build_results(
+                closes[calc_idx], ma_matrix[calc_idx]
+            )
+            rows = [
+                StrengthScoreRepository.result_to_row(
+                    "sector", sector.id, sector.code, dates[i], result
+                )
+                for i, result in zip(calc_idx, results)
+            ]
+
+            # 5. 批量 upsert
+            await self.score_repo.bulk_upsert(rows)
+
+            updated = int(is_existing[calc_idx].sum())
+            created = len(calc_idx) - updated
+
+            logger.debug(
+                f"板块 {sector.name} 列式强度计算完成: "
+                f"新增={created}, 更新={updated}, 跳过={skipped}"
+            )
+
+            return {
+                "success": True,
+                "created": created,
+                "updated": updated,
+                "skipped": skipped
+            }
+
+        except InterruptedError:
+            raise
+        except Exception as e:
+            logger.error(f"列式计算板块 {sector.name} 强度失败: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def _load_ma_matrix(
+        self,
+        sector_id: int,
+        date_index: np.ndarray,
+        end_date: date
+    ) -> np.ndarray:
+        """
+        一次查询加载板块全部周期均线，并对齐为 (交易日 × 周期) 矩阵
+
+        每个交易日取该周期在当日或之前最近的一条均线值，缺失为 NaN，
+        与 MADataLoader.load_ma_values 的取值规则一致。
+
+        Args:
+            sector_id: 板块ID
+            date_index: 交易日数组 (datetime64[D])，升序
+            end_date: 结束日期
+
+        Returns:
+            均线矩阵 (len(date_index), len(MA_PERIODS))
+        """
+        period_strs = [f"{p}d" for p in MA_PERIODS]
+        stmt = select(
+            MovingAverageData.date,
+            MovingAverageData.period,
+            MovingAverageData.ma_value
+        ).where(
+            and_(
+                MovingAverageData.entity_type == "sector",
+                MovingAverageData.entity_id == sector_id,
+                MovingAverageData.period.in_(period_strs),
+                MovingAverageData.date <= end_date,
+                MovingAverageData.ma_value.isnot(None)
+            )
+        ).order_by(MovingAverageData.date)
+
+        rows = (await self.session.execute(stmt)).all()
+
+        series: Dict[str, tuple] = {p: ([], []) for p in period_strs}
+        for ma_date, period, ma_value in rows:
+            series[period][0].append(ma_date)
+            series[period][1].append(float(ma_value))
+
+        matrix = np.full((len(date_index), len(MA_PERIODS)), np.nan)
+        for col, period in enumerate(period_strs):
+            ma_dates, ma_values = series[period]
+            if not ma_dates:
+                continue
+            ma_dates = np.array(ma_dates, dtype="datetime64[D]")
+            pos = np.searchsorted(ma_dates, date_index, side="right") - 1
+            found = pos >= 0
+            matrix[found, col] = np.asarray(ma_values)[pos[found]]
+
+        return matrix
+
     async def _get_dates_to_calculate(
         self,
         sector_id: int,
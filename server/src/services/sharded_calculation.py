@@ -0,0 +1,238 @@
+"""
+分片多进程计算
+
+将完整历史计算（板块强度、板块均线、股票均线）的实体列表拆分到进程池中执行。
+
+设计说明:
+    - 分片: 实体 ID 按轮转方式拆分为 shards * CHUNKS_PER_SHARD 个块，
+      块数多于进程数，处理较快的进程会继续领取剩余的块，避免负载不均
+    - 工作进程: 以 spawn 方式启动，每个进程有自己的数据库引擎，每个块使用独立会话，
+      调用服务的完整历史方法（限定为块内实体、顺序执行），数值计算不占用父进程的 event loop
+    - 进度: 工作进程通过共享队列上报每个实体的进度消息，父进程汇总后调用进度回调
+    - 取消: 父协程被取消时设置共享事件，工作进程在下一次上报进度时抛出 InterruptedError
+"""
+
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import queue as queue_module
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 作业名称
+JOB_SECTOR_STRENGTH_FULL_HISTORY = "sector_strength_full_history"
+JOB_SECTOR_MA_FULL_HISTORY = "sector_ma_full_history"
+JOB_STOCK_MA_FULL_HISTORY = "stock_ma_full_history"
+
+
+def resolve_shard_count(shards: Optional[int] = None) -> int:
+    """
+    解析分片数
+
+    Args:
+        shards: 调用方指定的分片数，None 时使用 settings.FULL_HISTORY_SHARDS
+
+    Returns:
+        分片数（至少为 1）
+    """
+    if shards is None:
+        shards = settings.FULL_HISTORY_SHARDS
+    return max(1, int(shards))
+
+
+def split_round_robin(entity_ids: List[int], chunks: int) -> List[List[int]]:
+    """
+    按轮转方式拆分实体 ID
+
+    Args:
+        entity_ids: 实体 ID 列表
+        chunks: 块数
+
+    Returns:
+        非空块列表
+    """
+    chunks = max(1, min(chunks, len(entity_ids)))
+    return [entity_ids[i::chunks] for i in range(chunks) if entity_ids[i::chunks]]
+
+
+class ShardedCalculationRunner:
+    """
+    分片计算执行器
+
+    父进程侧：拆分实体、提交到进程池、汇总进度和计数。
+    """
+
+    CHUNKS_PER_SHARD = 4  # 每个进程平均处理的块数
+    POLL_INTERVAL = 0.2  # 进度队列轮询间隔（秒）
+
+    def __init__(
+        self,
+        shards: int,
+        progress_callback: Optional[Callable[[int, int, str], Awaitable[None]]] = None,
+    ):
+        """
+        初始化执行器
+
+        Args:
+            shards: 工作进程数
+            progress_callback: 进度回调 (current, total, message)
+        """
+        self.shards = max(1, shards)
+        self.progress_callback = progress_callback
+
+    async def run(self, job: str, entity_ids: List[int], params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        执行分片计算
+
+        Args:
+            job: 作业名称（JOB_* 常量）
+            entity_ids: 实体 ID 列表
+            params: 传给服务方法的参数（必须可 pickle）
+
+        Returns:
+            {"success", "total", "created", "updated", "skipped", "errors", "shards"}
+
+        Raises:
+            InterruptedError: 工作进程报告任务被取消
+        """
+        total = len(entity_ids)
+        chunks = split_round_robin(entity_ids, self.shards * self.CHUNKS_PER_SHARD)
+        workers = min(self.shards, len(chunks))
+        logger.info(f"分片计算开始: job={job}, 实体数={total}, 进程数={workers}, 块数={len(chunks)}")
+
+        summary = {"success": True, "total": total, "created": 0, "updated": 0, "skipped": 0, "errors": 0, "shards": workers}
+        if not chunks:
+            return summary
+
+        ctx = multiprocessing.get_context("spawn")
+        loop = asyncio.get_running_loop()
+        done = 0
+
+        with ctx.Manager() as mp_manager:
+            events = mp_manager.Queue()
+            cancel_event = mp_manager.Event()
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+            )
+            futures = {
+                loop.run_in_executor(executor, _run_chunk, job, chunk, params, events, cancel_event): chunk
+                for chunk in chunks
+            }
+
+            try:
+                pending = set(futures)
+                while pending:
+                    _, pending = await asyncio.wait(pending, timeout=self.POLL_INTERVAL)
+                    done = await self._drain_progress(events, done, total)
+                await self._drain_progress(events, done, total)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                raise
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        interrupted = None
+        for future, chunk in futures.items():
+            if future.cancelled():
+                summary["errors"] += len(chunk)
+                continue
+            error = future.exception()
+            if isinstance(error, InterruptedError):
+                interrupted = error
+                continue
+
+            result = future.result() if error is None else {"success": False, "error": str(error)}
+            if result.get("success"):
+                for key in ("created", "updated", "skipped", "errors"):
+                    summary[key] += result.get(key, 0)
+            else:
+                logger.error(f"分片计算块失败 ({len(chunk)} 个实体): {result.get('error')}")
+                summary["errors"] += len(chunk)
+
+        if interrupted is not None:
+            raise interrupted
+
+        logger.info(
+            f"分片计算完成: job={job}, 新增={summary['created']}, 更新={summary['updated']}, "
+            f"跳过={summary['skipped']}, 错误={summary['errors']}"
+        )
+        return summary
+
+    async def _drain_progress(self, events: Any, done: int, total: int) -> int:
+        """取出队列中所有进度消息并转发，返回累计完成数"""
+        while True:
+            try:
+                message = events.get_nowait()
+            except queue_module.Empty:
+                return done
+            done = min(done + 1, total)
+            if self.progress_callback is not None:
+                result = self.progress_callback(done, total, message)
+                if inspect.isawaitable(result):
+                    await result
+
+
+# ============== 工作进程侧 ==============
+
+# 工作进程内的会话工厂（由 _init_worker 创建）
+_worker_session_factory = None
+
+
+def _init_worker() -> None:
+    """工作进程初始化：创建本进程的数据库引擎"""
+    global _worker_session_factory
+    from src.db.database import create_worker_session_factory
+
+    _, _worker_session_factory = create_worker_session_factory()
+
+
+def _run_chunk(job: str, entity_ids: List[int], params: Dict[str, Any], events: Any, cancel_event: Any) -> Dict[str, Any]:
+    """工作进程入口：在新的 event loop 中计算一个块"""
+    return asyncio.run(_run_chunk_async(job, entity_ids, params, events, cancel_event))
+
+
+async def _run_chunk_async(
+    job: str,
+    entity_ids: List[int],
+    params: Dict[str, Any],
+    events: Any,
+    cancel_event: Any,
+) -> Dict[str, Any]:
+    """使用独立会话，以顺序模式调用服务方法计算块内实体"""
+    async def progress(current: int, total: int, message: str) -> None:
+        if cancel_event.is_set():
+            raise InterruptedError("任务已取消")
+        events.put(message)
+
+    async with _worker_session_factory() as session:
+        if job == JOB_SECTOR_STRENGTH_FULL_HISTORY:
+            from src.services.sector_strength_service import SectorStrengthService
+
+            service = SectorStrengthService(session)
+            service.set_progress_callback(progress)
+            return await service.calculate_sector_strength_full_history(
+                sector_ids=entity_ids, shards=1, **params
+            )
+
+        if job == JOB_SECTOR_MA_FULL_HISTORY:
+            from src.services.sector_ma_service import SectorMAService
+
+            service = SectorMAService(session)
+            service.set_progress_callback(progress)
+            return await service.calculate_full_history_ma(sector_ids=entity_ids, shards=1, **params)
+
+        if job == JOB_STOCK_MA_FULL_HISTORY:
+            from src.services.stock_ma_service import StockMAService
+
+            service = StockMAService(session)
+            service.set_progress_callback(progress)
+            return await service.calculate_full_history_ma(stock_ids=entity_ids, shards=1, **params)
+
+    raise ValueError(f"未知的分片作业: {job}")
@@ -0,0 +1,193 @@
+"""
+并发强度快照构建
+
+将一个或多个快照日期的股票、板块拆分为块，由有限数量的会话并发计算。
+
+设计说明:
+    - 分块: 每个 (日期, 实体类型) 的实体 ID 按 CHUNK_SIZE 切分，所有块放入同一个队列
+    - 会话: 启动 concurrency 个工作协程，每个协程从连接池取一个会话并持有到队列取空，
+      同时占用的连接数不超过 concurrency，I/O 等待在会话之间重叠
+    - 计算: 每个块调用 StrengthServiceV2.batch_calculate（一次加载块内全部实体的均线），
+      变化率和排名不在块内更新，由调用方在全部块完成后统一执行一次
+    - 进度: 每计算完一个实体转发一次进度回调，current 为所有工作协程的累计完成数
+"""
+
+import asyncio
+import inspect
+import logging
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.settings import settings
+from src.services.strength_service_v2 import StrengthServiceV2
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_snapshot_concurrency(concurrency: Optional[int] = None) -> int:
+    """
+    解析快照并发会话数
+
+    Args:
+        concurrency: 调用方指定的并发数，None 时使用 settings.SNAPSHOT_CONCURRENCY
+
+    Returns:
+        并发数（至少为 1）
+    """
+    if concurrency is None:
+        concurrency = settings.SNAPSHOT_CONCURRENCY
+    return max(1, int(concurrency))
+
+
+def empty_day_result(snapshot_date: date) -> Dict[str, Any]:
+    """
+    创建单日快照结果的初始结构
+
+    Args:
+        snapshot_date: 快照日期
+
+    Returns:
+        {"date", "stocks", "sectors"} 结果字典
+    """
+    return {
+        "date": snapshot_date,
+        "stocks": {"success": 0, "error": 0, "details": []},
+        "sectors": {"success": 0, "error": 0, "details": []},
+    }
+
+
+class ConcurrentSnapshotBuilder:
+    """
+    并发快照构建器
+
+    使用会话工厂创建的多个会话并发计算强度，只负责强度得分的写入。
+    """
+
+    CHUNK_SIZE = 200  # 每个块的实体数
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any],
+        concurrency: int,
+        progress_callback: Optional[Callable[[int, int, str], Awaitable[None]]] = None,
+    ):
+        """
+        初始化构建器
+
+        Args:
+            session_factory: 会话工厂（如 AsyncSessionLocal）
+            concurrency: 同时使用的会话数
+            progress_callback: 进度回调 (current, total, message)
+        """
+        self.session_factory = session_factory
+        self.concurrency = max(1, concurrency)
+        self.progress_callback = progress_callback
+        self._done = 0
+        self._total = 0
+
+    def _make_chunks(
+        self,
+        dates: Sequence[date],
+        stock_ids: List[int],
+        sector_ids: List[int],
+    ) -> List[Tuple[date, str, List[int]]]:
+        """按 (日期, 实体类型) 切分实体 ID"""
+        chunks = []
+        for snapshot_date in dates:
+            for entity_type, ids in (("stock", stock_ids), ("sector", sector_ids)):
+                for start in range(0, len(ids), self.CHUNK_SIZE):
+                    chunks.append((snapshot_date, entity_type, ids[start:start + self.CHUNK_SIZE]))
+        return chunks
+
+    async def build(
+        self,
+        dates: Sequence[date],
+        stock_ids: List[int],
+        sector_ids: List[int],
+    ) -> Dict[date, Dict[str, Any]]:
+        """
+        并发计算所有日期的股票和板块强度
+
+        Args:
+            dates: 快照日期列表
+            stock_ids: 股票ID列表
+            sector_ids: 板块ID列表
+
+        Returns:
+            {日期: 单日结果}，单日结果结构同 empty_day_result
+        """
+        results = {snapshot_date: empty_day_result(snapshot_date) for snapshot_date in dates}
+        chunks = self._make_chunks(dates, stock_ids, sector_ids)
+        self._done = 0
+        self._total = len(dates) * (len(stock_ids) + len(sector_ids))
+        if not chunks:
+            return results
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for chunk in chunks:
+            queue.put_nowait(chunk)
+
+        workers = min(self.concurrency, len(chunks))
+        logger.info(
+            f"并发快照开始: 日期数={len(dates)}, 实体数={self._total}, "
+            f"会话数={workers}, 块数={len(chunks)}"
+        )
+        await asyncio.gather(*(self._worker(queue, results) for _ in range(workers)))
+        return results
+
+    async def _worker(self, queue: asyncio.Queue, results: Dict[date, Dict[str, Any]]) -> None:
+        """持有一个会话，依次处理队列中的块直到取空"""
+        async with self.session_factory() as session:
+            service = StrengthServiceV2(session)
+            service.set_progress_callback(self._on_entity_done)
+
+            while True:
+                try:
+                    snapshot_date, entity_type, entity_ids = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                bucket = results[snapshot_date]["stocks" if entity_type == "stock" else "sectors"]
+                try:
+                    batch = await service.batch_calculate(
+                        entity_type, entity_ids, snapshot_date, update_change_rates=False
+                    )
+                    self._merge_batch(bucket, entity_type, batch)
+                except Exception as e:
+                    logger.error(
+                        f"快照块失败 (date={snapshot_date}, entity_type={entity_type}, "
+                        f"{len(entity_ids)} 个实体): {e}"
+                    )
+                    await session.rollback()
+                    bucket["error"] += len(entity_ids)
+                    bucket["details"].extend(
+                        {"id": entity_id, "success": False, "error": str(e)} for entity_id in entity_ids
+                    )
+
+    @staticmethod
+    def _merge_batch(bucket: Dict[str, Any], entity_type: str, batch: Dict[str, Any]) -> None:
+        """将 batch_calculate 的结果合并到单日结果"""
+        id_key = "stock_id" if entity_type == "stock" else "sector_id"
+        for result in batch.get("results", []):
+            if result.get("success"):
+                bucket["details"].append({
+                    "id": result.get(id_key),
+                    "success": True,
+                    "score": result.get("result", {}).get("composite_score"),
+                })
+            else:
+                bucket["details"].append({
+                    "id": result.get(id_key),
+                    "success": False,
+                    "error": result.get("error"),
+                })
+        bucket["success"] += batch.get("success_count", 0)
+        bucket["error"] += batch.get("error_count", 0)
+
+    async def _on_entity_done(self, current: int, total: int, message: str) -> None:
+        """块内进度 -> 全局进度"""
+        self._done = min(self._done + 1, self._total)
+        if self.progress_callback is not None:
+            result = self.progress_callback(self._done, self._total, message)
+            if inspect.isawaitable(result):
+                await result
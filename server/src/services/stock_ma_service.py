@@ -7,15 +7,24 @@
 import logging
 from typing import Dict, Any, Optional, List, Callable
 from datetime import date, datetime
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, func, true
 from sqlalchemy.ext.asyncio import AsyncSession
-import pandas as pd
+from sqlalchemy.orm import aliased
+import numpy as np
 
 from src.models.stock import Stock
 from src.models.daily_market_data import DailyMarketData
 from src.models.moving_average_data import MovingAverageData
 from src.services.calculation.moving_average_calculator import MovingAverageCalculator
+from src.repositories.market_data_repository import MovingAverageRepository
+from src.services.calculation.ma_system.ma_cache import ma_data_cache
 from src.models.period_config import PeriodConfig
+from src.services.sharded_calculation import (
+    JOB_STOCK_MA_FULL_HISTORY,
+    ShardedCalculationRunner,
+    resolve_shard_count,
+)
+from src.config.ma_system import MA_PERIODS
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +44,7 @@ class StockMAService:
         """
         self.session = session
         self.ma_calculator = MovingAverageCalculator()
+        self.ma_repo = MovingAverageRepository(session)
         self._progress_callback: Optional[Callable] = None
 
     def set_progress_callback(self, callback: Callable[[int, int, str], None]):
@@ -146,6 +156,202 @@ class StockMAService:
                 "error": str(e)
             }
 
+    async def calculate_incremental_ma(
+        self,
+        end_date: Optional[date] = None,
+        periods: Optional[List[int]] = None,
+        overwrite: bool = False
+    ) -> Dict[str, Any]:
+        """
+        增量计算全市场股票均线（每日更新使用）
+
+        只计算已有均线最新日期之后的交易日。每个交易日只读取全市场最近
+        max(periods) 个收盘价窗口，一次累加后各周期均线只需一次相减，
+        当日全部股票的结果合并为一批写入。
+
+        Args:
+            end_date: 计算截止日期，None 表示到最新数据
+            periods: 均线周期列表，默认计算全部 MA_PERIODS
+            overwrite: 是否覆盖已有数据
+
+        Returns:
+            计算结果
+        """
+        try:
+            periods = list(periods or MA_PERIODS)
+            window = max(periods)
+
+            # ========================================
+            # 步骤1: 确定需要计算的交易日
+            # ========================================
+            latest_result = await self.session.execute(
+                select(func.max(MovingAverageData.date)).where(
+                    MovingAverageData.entity_type == "stock"
+                )
+            )
+            latest_ma_date = latest_result.scalar()
+            if latest_ma_date is None:
+                return {
+                    "success": False,
+                    "error": "没有已有的股票均线数据，请先执行完整计算"
+                }
+
+            dates_stmt = select(DailyMarketData.date).where(
+                and_(
+                    DailyMarketData.entity_type == "stock",
+                    DailyMarketData.close.isnot(None),
+                    DailyMarketData.date > latest_ma_date
+                )
+            )
+            if end_date:
+                dates_stmt = dates_stmt.where(DailyMarketData.date <= end_date)
+            dates_result = await self.session.execute(
+                dates_stmt.distinct().order_by(DailyMarketData.date)
+            )
+            trade_dates = list(dates_result.scalars().all())
+
+            if not trade_dates:
+                logger.info(f"[股票均线] 增量计算：均线已更新到 {latest_ma_date}，无需计算")
+                return {
+                    "success": True,
+                    "trade_dates": 0,
+                    "created": 0,
+                    "updated": 0,
+                    "skipped": 0
+                }
+
+            logger.info(
+                f"[股票均线] 增量计算：从 {trade_dates[0]} 到 {trade_dates[-1]}，"
+                f"共 {len(trade_dates)} 个交易日，窗口 {window} 天"
+            )
+
+            # ========================================
+            # 步骤2: 逐个交易日计算全市场均线并批量写入
+            # ========================================
+            total_created = 0
+            total_updated = 0
+            total_skipped = 0
+
+            for idx, trade_date in enumerate(trade_dates):
+                await self._report_progress(
+                    idx + 1,
+                    len(trade_dates),
+                    f"增量计算股票均线: {trade_date}"
+                )
+
+                records = await self._build_incremental_records(trade_date, periods, window)
+                counts = await self.ma_repo.bulk_upsert(records, overwrite=overwrite)
+                await self.session.commit()
+
+                if counts["created"] or counts["updated"]:
+                    ma_data_cache.invalidate("stock", trade_date)
+
+                total_created += counts["created"]
+                total_updated += counts["updated"]
+                total_skipped += counts["skipped"]
+
+                logger.info(
+                    f"[股票均线] {trade_date} 增量计算完成 - "
+                    f"创建: {counts['created']}, 更新: {counts['updated']}, 跳过: {counts['skipped']}"
+                )
+
+            return {
+                "success": True,
+                "trade_dates": len(trade_dates),
+                "created": total_created,
+                "updated": total_updated,
+                "skipped": total_skipped
+            }
+
+        except Exception as e:
+            logger.error(f"[股票均线] 增量计算失败: {e}")
+            await self.session.rollback()
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def _build_incremental_records(
+        self,
+        trade_date: date,
+        periods: List[int],
+        window: int
+    ) -> List[Dict[str, Any]]:
+        """
+        计算某个交易日全市场股票的均线行
+
+        Args:
+            trade_date: 交易日
+            periods: 均线周期列表
+            window: 读取的收盘价窗口长度
+
+        Returns:
+            moving_average_data 行字典列表
+        """
+        # 当天有行情的股票（停牌股票当天不生成均线）
+        today = select(DailyMarketData.entity_id, DailyMarketData.symbol).where(
+            and_(
+                DailyMarketData.entity_type == "stock",
+                DailyMarketData.close.isnot(None),
+                DailyMarketData.date == trade_date
+            )
+        ).subquery("today")
+
+        # 每只股票截至该交易日的最近 window 个收盘价：LATERAL + LIMIT 沿
+        # (entity_type, entity_id, date) 索引倒序读取，扫描量与历史长度无关
+        history = aliased(DailyMarketData)
+        recent = select(history.date, history.close).where(
+            and_(
+                history.entity_type == "stock",
+                history.entity_id == today.c.entity_id,
+                history.close.isnot(None),
+                history.date <= trade_date
+            )
+        ).order_by(history.date.desc()).limit(window).lateral("recent")
+
+        result = await self.session.execute(
+            select(today.c.entity_id, today.c.symbol, recent.c.date, recent.c.close)
+            .select_from(today.join(recent, true()))
+            .order_by(today.c.entity_id, recent.c.date)
+        )
+
+        # 按股票分组
+        entities = []
+        sequences = []
+        for entity_id, symbol, row_date, close in result.all():
+            if not entities or entities[-1][0] != entity_id:
+                entities.append([entity_id, symbol, row_date])
+                sequences.append([])
+            entities[-1][2] = row_date
+            sequences[-1].append(close)
+
+        if not entities:
+            return []
+
+        prices = self.ma_calculator.pack_price_matrix(sequences)
+        lengths = np.array([len(seq) for seq in sequences])
+        latest_ma = self.ma_calculator.calculate_latest_sma(prices, lengths, periods)
+        current_prices = prices[np.arange(len(sequences)), lengths - 1]
+        ratios, trends = self.ma_calculator.calculate_price_ratio_matrix(
+            current_prices[:, np.newaxis], latest_ma[:, np.newaxis, :]
+        )
+
+        records = []
+        for period_idx, period in enumerate(periods):
+            for row in np.nonzero(np.isfinite(latest_ma[:, period_idx]))[0]:
+                entity_id, symbol, _ = entities[row]
+                records.append({
+                    "entity_type": "stock",
+                    "entity_id": entity_id,
+                    "symbol": symbol,
+                    "date": trade_date,
+                    "period": f"{period}d",
+                    "ma_value": float(latest_ma[row, period_idx]),
+                    "price_ratio": float(ratios[row, 0, period_idx]),
+                    "trend": int(trends[row, 0, period_idx]),
+                })
+        return records
+
     async def _calculate_single_stock_ma(
         self,
         stock: Stock,
@@ -155,7 +361,7 @@ class StockMAService:
         overwrite: bool
     ) -> Dict[str, Any]:
         """
-        计算单个股票的均线（支持断点续传和分批保存）
+        计算单个股票的均线（支持断点续传和批量写入）
 
         Args:
             stock: 股票对象
@@ -173,7 +379,8 @@ class StockMAService:
             # ========================================
             # 步骤1: 获取股票历史数据
             # ========================================
-            stmt = select(DailyMarketData).where(
+            # 只查询日期和收盘价两列，避免构造 ORM 对象
+            stmt = select(DailyMarketData.date, DailyMarketData.close).where(
                 and_(
                     DailyMarketData.entity_type == "stock",
                     DailyMarketData.entity_id == stock.id,
@@ -189,7 +396,7 @@ class StockMAService:
             stmt = stmt.order_by(DailyMarketData.date)
 
             result = await self.session.execute(stmt)
-            market_data_list = result.scalars().all()
+            market_data_list = result.all()
 
             if not market_data_list:
                 logger.warning(f"[股票均线] 股票 {stock.name} 没有市场数据")
@@ -241,118 +448,43 @@ class StockMAService:
                     logger.info(f"[股票均线] 股票 {stock.name} 需要计算 {len(market_data_list)} 天的新数据")
 
             # ========================================
-            # 步骤3: 转换为 pandas DataFrame
+            # 步骤3: 一次计算全部周期的均线、价格比率和趋势
             # ========================================
-            data = {
-                "date": [md.date for md in market_data_list],
-                "close": [float(md.close) for md in market_data_list]
-            }
-            df = pd.DataFrame(data)
-            df.set_index("date", inplace=True)
-            df = df.sort_index()
-
-            total_created = 0
-            total_updated = 0
-            total_skipped = 0
+            dates = [md.date for md in market_data_list]
+            closes = np.array([md.close for md in market_data_list], dtype=float)
+            ma_result = self.ma_calculator.calculate_all_periods(closes, periods)
 
             # ========================================
-            # 步骤4: 按周期计算均线（每计算完一个周期就保存）
+            # 步骤4: 汇总各周期的行后批量写入
             # ========================================
-            for period_idx, period in enumerate(periods, 1):
-                period_str = f"{period}d"
-
-                logger.info(f"[股票均线] 开始计算 {stock.name} 的 {period} 日均线 [{period_idx}/{len(periods)}]")
-
-                if len(df) < period:
-                    logger.warning(f"[股票均线] 股票 {stock.name} 数据不足，无法计算 {period} 日均线（需要 {period} 天，实际 {len(df)} 天）")
+            records = []
+            for period_idx, period in enumerate(periods):
+                if len(dates) < period:
+                    logger.warning(f"[股票均线] 股票 {stock.name} 数据不足，无法计算 {period} 日均线（需要 {period} 天，实际 {len(dates)} 天）")
                     continue
 
-                # 计算均线
-                ma_series = self.ma_calculator.calculate_sma(df["close"], period)
-
-                # 统计本周期的处理情况
-                period_created = 0
-                period_updated = 0
-                period_skipped = 0
-                batch_records = []
-                batch_size = 500  # 每500条记录提交一次
-
-                # 遍历均线数据
-                for idx, ma_value in ma_series.items():
-                    if pd.isna(ma_value):
-                        continue
-
-                    if idx not in df.index:
-                        continue
-
-                    current_price = df.loc[idx, "close"]
-
-                    # 计算价格比率和趋势
-                    price_ratio = self.ma_calculator.calculate_price_ratio(current_price, ma_value)
-                    trend = 1 if price_ratio > 0 else (-1 if price_ratio < 0 else 0)
-
-                    # 检查是否已存在
-                    existing_stmt = select(MovingAverageData).where(
-                        and_(
-                            MovingAverageData.entity_type == "stock",
-                            MovingAverageData.entity_id == stock.id,
-                            MovingAverageData.symbol == stock.symbol,
-                            MovingAverageData.date == idx,
-                            MovingAverageData.period == period_str
-                        )
+                records.extend(
+                    MovingAverageRepository.build_rows(
+                        "stock", stock.id, stock.symbol, period, dates,
+                        ma_result["ma"][0, :, period_idx],
+                        ma_result["price_ratio"][0, :, period_idx],
+                        ma_result["trend"][0, :, period_idx],
                     )
-                    existing_result = await self.session.execute(existing_stmt)
-                    existing_ma = existing_result.scalar_one_or_none()
-
-                    if existing_ma:
-                        if overwrite:
-                            # 更新已有数据
-                            existing_ma.ma_value = ma_value
-                            existing_ma.price_ratio = price_ratio
-                            existing_ma.trend = trend
-                            existing_ma.symbol = stock.symbol
-                            period_updated += 1
-                        else:
-                            period_skipped += 1
-                    else:
-                        # 创建新记录对象
-                        ma_record = MovingAverageData(
-                            entity_type="stock",
-                            entity_id=stock.id,
-                            symbol=stock.symbol,
-                            date=idx,
-                            period=period_str,
-                            ma_value=ma_value,
-                            price_ratio=price_ratio,
-                            trend=trend
-                        )
-                        batch_records.append(ma_record)
-                        period_created += 1
-
-                    # 分批保存
-                    if len(batch_records) >= batch_size:
-                        for record in batch_records:
-                            self.session.add(record)
-                        await self.session.commit()
-                        logger.info(f"[股票均线] {stock.name} {period}日均线 - 已保存 {len(batch_records)} 条记录（总计创建: {period_created}）")
-                        batch_records = []
-
-                # 保存剩余记录
-                if batch_records:
-                    for record in batch_records:
-                        self.session.add(record)
-                    await self.session.commit()
-                    logger.info(f"[股票均线] {stock.name} {period}日均线 - 已保存最后 {len(batch_records)} 条记录")
-
-                total_created += period_created
-                total_updated += period_updated
-                total_skipped += period_skipped
+                )
 
-                logger.info(
-                    f"[股票均线] {stock.name} {period}日均线计算完成 - "
-                    f"创建: {period_created}, 更新: {period_updated}, 跳过: {period_skipped}"
+            counts = await self.ma_repo.bulk_upsert(records, overwrite=overwrite)
+            await self.session.commit()
+
+            # 写入完成后失效受影响日期之后的均线缓存
+            if counts["created"] or counts["updated"]:
+                ma_data_cache.invalidate(
+                    "stock", min(record["date"] for record in records), [stock.id]
                 )
 
+            total_created = counts["created"]
+            total_updated = counts["updated"]
+            total_skipped = counts["skipped"]
+
             logger.info(
                 f"[股票均线] 股票 {stock.name} 全部周期计算完成 - "
                 f"总计创建: {total_created}, 更新: {total_updated}, 跳过: {total_skipped}"
@@ -551,19 +683,41 @@ class StockMAService:
         self,
         stock_id: Optional[int] = None,
         periods: Optional[List[int]] = None,
-        overwrite: bool = False
+        overwrite: bool = False,
+        shards: Optional[int] = None,
+        stock_ids: Optional[List[int]] = None
     ) -> Dict[str, Any]:
         """
         计算股票完整历史均线（从最早数据日期到最新日期）
 
+        分片数大于 1 且计算所有股票时，股票列表拆分到多个工作进程并行计算。
+
         Args:
             stock_id: 股票ID，None表示计算所有股票
             periods: 均线周期列表
             overwrite: 是否覆盖已有数据
+            shards: 工作进程数，None 表示使用 settings.FULL_HISTORY_SHARDS
+            stock_ids: 限定计算的股票ID列表（分片工作进程使用）
 
         Returns:
             计算结果
         """
+        shard_count = resolve_shard_count(shards)
+        if shard_count > 1 and not stock_id and stock_ids is None:
+            result = await self.session.execute(select(Stock.id).order_by(Stock.id))
+            all_ids = list(result.scalars().all())
+            if len(all_ids) > 1:
+                runner = ShardedCalculationRunner(shard_count, self._progress_callback)
+                summary = await runner.run(
+                    JOB_STOCK_MA_FULL_HISTORY,
+                    all_ids,
+                    {"periods": periods, "overwrite": overwrite},
+                )
+                # 均线由工作进程写入，本进程的均线缓存需全部失效
+                ma_data_cache.invalidate("stock", date.min)
+                summary["total_stocks"] = summary.pop("total")
+                return summary
+
         try:
             # 获取周期配置
             if periods is None:
@@ -572,6 +726,8 @@ class StockMAService:
             # 获取股票列表
             if stock_id:
                 stmt = select(Stock).where(Stock.id == stock_id)
+            elif stock_ids is not None:
+                stmt = select(Stock).where(Stock.id.in_(stock_ids)).order_by(Stock.id)
             else:
                 stmt = select(Stock)
 
@@ -627,6 +783,8 @@ class StockMAService:
                         error_count += 1
                         logger.warning(f"股票 {stock.name} 均线计算失败: {result.get('error')}")
 
+                except InterruptedError:
+                    raise
                 except Exception as e:
                     error_count += 1
                     logger.error(f"处理股票 {stock.name} 时出错: {e}")
@@ -642,6 +800,10 @@ class StockMAService:
                 "errors": error_count
             }
 
+        except InterruptedError:
+            await self.session.rollback()
+            logger.warning("股票完整历史均线计算任务被取消")
+            raise
         except Exception as e:
             logger.error(f"股票完整历史均线计算失败: {e}")
             await self.session.rollback()
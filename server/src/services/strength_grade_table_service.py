@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.sector import Sector
 from src.models.strength_score import StrengthScore
+from src.services.data_date_registry import data_date_registry
 from src.api.schemas.grade_table import (
     SectorGradeTableResponse,
     GradeSectorStats,
@@ -94,19 +95,9 @@ class StrengthGradeTableService:
             if sector_type and sector_type in ('industry', 'concept'):
                 filters.append(Sector.type == sector_type)
 
-            # 日期筛选：如果指定日期则使用该日期，否则只查询最新日期
-            if calc_date:
-                filters.append(StrengthScore.date == calc_date)
-            else:
-                # 子查询获取最新日期
-                latest_date_stmt = (
-                    select(StrengthScore.date)
-                    .where(StrengthScore.period == 'all')
-                    .order_by(StrengthScore.date.desc())
-                    .limit(1)
-                    .scalar_subquery()
-                )
-                stmt = stmt.where(StrengthScore.date == latest_date_stmt)
+            # 日期筛选：如果指定日期则使用该日期，否则使用板块最新数据日期
+            query_date = calc_date or await data_date_registry.get_latest_date(self.session, 'sector')
+            filters.append(StrengthScore.date == query_date)
 
             if filters:
                 stmt = stmt.where(and_(*filters))
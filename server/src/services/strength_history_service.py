@@ -8,9 +8,11 @@ import logging
 from datetime import date, timedelta
 from typing import Dict, List, Optional
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config.ma_system import STRENGTH_GRADES
 from src.models.strength_score import StrengthScore
 
 logger = logging.getLogger(__name__)
@@ -23,6 +25,9 @@ class StrengthHistoryService:
     查询和分析历史强度数据。
     """
 
+    # 等级分布统计的等级（无等级的记录计为 Unknown）
+    GRADE_BUCKETS = (*STRENGTH_GRADES.keys(), 'Unknown')
+
     def __init__(self, session: AsyncSession):
         """
         初始化历史数据服务
@@ -163,86 +168,155 @@ class StrengthHistoryService:
         Returns:
             统计数据字典
         """
+        stats = await self.get_batch_history_stats(entity_type, [entity_id], days, end_date)
+        return stats[entity_id]
+
+    async def get_batch_history_stats(
+        self,
+        entity_type: str,
+        entity_ids: List[int],
+        days: int = 30,
+        end_date: Optional[date] = None
+    ) -> Dict[int, Dict]:
+        """
+        批量获取历史统计数据
+
+        一条聚合查询同时统计所有实体：最高/最低/平均分由聚合函数计算，
+        涨跌天数由 LAG 取前一交易日得分后 FILTER 计数，等级分布按 STRENGTH_GRADES 逐级 FILTER 计数。
+
+        Args:
+            entity_type: 实体类型
+            entity_ids: 实体ID列表
+            days: 统计天数
+            end_date: 结束日期
+
+        Returns:
+            {实体ID: 统计数据字典}，格式与 get_history_stats 相同
+        """
         if end_date is None:
             end_date = date.today()
 
         start_date = end_date - timedelta(days=days - 1)
 
         try:
-            stmt = select(StrengthScore).where(
-                and_(
-                    StrengthScore.entity_type == entity_type,
-                    StrengthScore.entity_id == entity_id,
-                    StrengthScore.period == 'all',
-                    StrengthScore.date >= start_date,
-                    StrengthScore.date <= end_date,
-                    StrengthScore.score.isnot(None)
-                )
-            )
-
+            stmt = self._history_stats_stmt(entity_type, entity_ids, start_date, end_date)
             result = await self.session.execute(stmt)
-            scores = result.scalars().all()
+            rows = {row.entity_id: row for row in result.all()}
+        except Exception as e:
+            logger.error(f"获取历史统计失败 (entity_type={entity_type}, entity_ids={len(entity_ids)}个): {e}")
+            return {
+                entity_id: {
+                    'entity_id': entity_id,
+                    'entity_type': entity_type,
+                    'days': days,
+                    'error': str(e)
+                }
+                for entity_id in entity_ids
+            }
 
-            if not scores:
-                return {
+        stats = {}
+        for entity_id in entity_ids:
+            row = rows.get(entity_id)
+            if row is None:
+                stats[entity_id] = {
                     'entity_id': entity_id,
                     'entity_type': entity_type,
                     'days': days,
                     'data_count': 0,
                     'error': '无历史数据'
                 }
+                continue
 
-            # 计算统计数据（WHERE已过滤NULL，直接提取即可）
-            score_values = [s.score for s in scores]
-
-            # 最高/最低/平均
-            max_score = max(score_values) if score_values else None
-            min_score = min(score_values) if score_values else None
-            avg_score = sum(score_values) / len(score_values) if score_values else None
-
-            # 涨跌天数统计
-            up_days = sum(1 for i in range(1, len(scores))
-                        if scores[i].score and scores[i-1].score
-                        and scores[i].score > scores[i-1].score)
-            down_days = sum(1 for i in range(1, len(scores))
-                          if scores[i].score and scores[i-1].score
-                          and scores[i].score < scores[i-1].score)
-            flat_days = len(scores) - 1 - up_days - down_days
-
-            # 等级分布
+            # 等级分布（只保留出现过的等级）
             grade_counts = {}
-            for score in scores:
-                grade = score.strength_grade or 'Unknown'
-                grade_counts[grade] = grade_counts.get(grade, 0) + 1
-
-            # 最新得分
-            latest_score = scores[-1].score if scores else None
+            for index, grade in enumerate(self.GRADE_BUCKETS):
+                count = row._mapping[f'grade_{index}']
+                if count:
+                    grade_counts[grade] = count
 
-            return {
+            avg_score = row.avg_score
+            stats[entity_id] = {
                 'entity_id': entity_id,
                 'entity_type': entity_type,
                 'days': days,
-                'data_count': len(scores),
-                'latest_score': latest_score,
-                'max_score': max_score,
-                'min_score': min_score,
+                'data_count': row.data_count,
+                'latest_score': row.latest_score,
+                'max_score': row.max_score,
+                'min_score': row.min_score,
                 'avg_score': round(avg_score, 2) if avg_score else None,
-                'up_days': up_days,
-                'down_days': down_days,
-                'flat_days': flat_days,
+                'up_days': row.up_days,
+                'down_days': row.down_days,
+                'flat_days': row.data_count - 1 - row.up_days - row.down_days,
                 'grade_distribution': grade_counts,
                 'start_date': start_date,
                 'end_date': end_date,
             }
 
-        except Exception as e:
-            logger.error(f"获取历史统计失败 (entity_type={entity_type}, entity_id={entity_id}): {e}")
-            return {
-                'entity_id': entity_id,
-                'entity_type': entity_type,
-                'days': days,
-                'error': str(e)
-            }
+        return stats
+
+    def _history_stats_stmt(
+        self,
+        entity_type: str,
+        entity_ids: List[int],
+        start_date: date,
+        end_date: date
+    ):
+        """
+        构建历史统计聚合查询
+
+        Args:
+            entity_type: 实体类型
+            entity_ids: 实体ID列表
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            每个实体一行的聚合查询
+        """
+        windowed = select(
+            StrengthScore.entity_id,
+            StrengthScore.date,
+            StrengthScore.score,
+            StrengthScore.strength_grade,
+            func.lag(StrengthScore.score).over(
+                partition_by=StrengthScore.entity_id,
+                order_by=StrengthScore.date
+            ).label('prev_score'),
+        ).where(
+            and_(
+                StrengthScore.entity_type == entity_type,
+                StrengthScore.entity_id.in_(entity_ids),
+                StrengthScore.period == 'all',
+                StrengthScore.date >= start_date,
+                StrengthScore.date <= end_date,
+                StrengthScore.score.isnot(None)
+            )
+        ).subquery('windowed')
+
+        # 与前一交易日比较；得分为 0 视为无效，不计入涨跌
+        comparable = and_(windowed.c.prev_score != 0, windowed.c.score != 0)
+        grade = func.coalesce(windowed.c.strength_grade, 'Unknown')
+
+        return select(
+            windowed.c.entity_id,
+            func.count().label('data_count'),
+            func.max(windowed.c.score).label('max_score'),
+            func.min(windowed.c.score).label('min_score'),
+            func.avg(windowed.c.score).label('avg_score'),
+            func.array_agg(
+                aggregate_order_by(windowed.c.score, windowed.c.date.desc())
+            )[1].label('latest_score'),
+            func.count().filter(
+                and_(comparable, windowed.c.score > windowed.c.prev_score)
+            ).label('up_days'),
+            func.count().filter(
+                and_(comparable, windowed.c.score < windowed.c.prev_score)
+            ).label('down_days'),
+            *[
+                func.count().filter(grade == grade_code).label(f'grade_{index}')
+                for index, grade_code in enumerate(self.GRADE_BUCKETS)
+            ],
+        ).group_by(windowed.c.entity_id)
 
     async def get_latest_score(
         self,
@@ -2,16 +2,25 @@
 板块强度散点图数据聚合服务
 
 提供板块散点图分析所需的数据聚合功能。
+
+缓存设计说明:
+    - 数据集: 某一日期所有板块的散点原始数据，按行业/概念分组，组内按 (得分, 记录ID) 降序
+    - 预计算: 每日数据更新完成后为最新日期构建并写入缓存
+    - 读取: 命中时在数据集上筛选和分页（cache_status='hit'），未命中时查询当日数据并回填缓存
+    - 未指定日期时使用板块最新数据日期，不扫描历史
 """
 
 import logging
-from typing import Dict, Any, Optional, List, Tuple
-from datetime import date, datetime
-from sqlalchemy import select, and_, func, or_
+from typing import Dict, Any, Callable, Optional, Tuple
+from datetime import date
+from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.pagination import decode_cursor, split_page
 from src.models.sector import Sector
 from src.models.strength_score import StrengthScore
+from src.services.cache.strength_cache import SCATTER_MISS_CACHE_TTL, StrengthCache
+from src.services.data_date_registry import data_date_registry
 from src.api.schemas.strength import (
     SectorScatterResponse,
     SectorScatterDataset,
@@ -45,18 +54,31 @@ GRADE_RANGE_MAP = {
     'D': (0, 29),
 }
 
+# 散点数据集中的板块类型分组
+SCATTER_SECTOR_TYPES = ('industry', 'concept')
+
+# 游标排序键对应的列（用于还原游标值类型）
+CURSOR_COLUMNS = (StrengthScore.score, StrengthScore.id)
+
+
+def _point_key(point: Dict[str, Any]) -> Tuple[Any, int]:
+    """数据点的排序键 (得分, 记录ID)"""
+    return (point['score'], point['score_id'])
+
 
 class StrengthScatterService:
     """板块强度散点图数据聚合服务"""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: Optional[StrengthCache] = None):
         """
         初始化散点图服务
 
         Args:
             session: 数据库会话
+            cache: 强度缓存，None 时使用默认缓存后端
         """
         self.session = session
+        self.cache = cache or StrengthCache()
 
     async def get_scatter_data(
         self,
@@ -68,19 +90,23 @@ class StrengthScatterService:
         offset: int = 0,
         limit: int = 200,
         calc_date: Optional[date] = None,
+        cursor: Optional[str] = None,
     ) -> SectorScatterResponse:
         """
         获取散点图数据
 
+        数据取自当日散点数据集（优先读缓存），按 (得分, 记录ID) 降序做 keyset 翻页。
+
         Args:
             x_axis: X轴维度 (short/medium/long/composite)
             y_axis: Y轴维度 (short/medium/long/composite)
             sector_type: 板块类型筛选 (industry/concept)
             min_grade: 最低等级 (D/C/B/A/A+/S/S+)
             max_grade: 最高等级
-            offset: 分页偏移
+            offset: 分页偏移（传入 cursor 时忽略）
             limit: 每页数量
             calc_date: 计算日期，None 表示最新
+            cursor: 上一页返回的 next_cursor
 
         Returns:
             SectorScatterResponse
@@ -90,86 +116,46 @@ class StrengthScatterService:
             x_field = AXIS_FIELD_MAP.get(x_axis, 'short_term_score')
             y_field = AXIS_FIELD_MAP.get(y_axis, 'medium_term_score')
 
-            # 构建查询
-            stmt = (
-                select(
-                    Sector.id,
-                    Sector.code,
-                    Sector.name,
-                    Sector.type,
-                    StrengthScore.score,
-                    StrengthScore.short_term_score,
-                    StrengthScore.medium_term_score,
-                    StrengthScore.long_term_score,
-                    StrengthScore.strong_stock_ratio,
-                    StrengthScore.strength_grade,
-                )
-                .join(StrengthScore, and_(
-                    StrengthScore.entity_type == 'sector',
-                    StrengthScore.entity_id == Sector.id,
-                    StrengthScore.period == 'all',
-                ))
-                .order_by(StrengthScore.date.desc())
-            )
-
-            # 筛选条件
-            filters = []
+            # 当日散点数据集
+            query_date = calc_date or await data_date_registry.get_latest_date(self.session, 'sector')
+            dataset, cache_status = await self._get_dataset(query_date)
 
             # 板块类型筛选
-            if sector_type and sector_type in ('industry', 'concept'):
-                filters.append(Sector.type == sector_type)
+            if sector_type and sector_type in SCATTER_SECTOR_TYPES:
+                points = list(dataset[sector_type])
+            else:
+                points = sorted(
+                    (point for group in SCATTER_SECTOR_TYPES for point in dataset[group]),
+                    key=_point_key,
+                    reverse=True,
+                )
 
             # 强度等级筛选
-            if min_grade or max_grade:
-                score_filter = self._build_grade_filter(min_grade, max_grade)
-                if score_filter is not None:
-                    filters.append(score_filter)
-
-            # 日期筛选
-            if calc_date:
-                filters.append(StrengthScore.date == calc_date)
-
-            if filters:
-                stmt = stmt.where(and_(*filters))
-
-            # 先获取所有符合条件的数据（用于分页前计数）
-            # 创建一个计数语句
-            count_stmt = select(func.count()).select_from(stmt.subquery().alias('sub'))
-            try:
-                count_result = await self.session.execute(count_stmt)
-                total_count = count_result.scalar() or 0
-            except Exception:
-                # 如果计数失败，使用 0
-                total_count = 0
-
-            # 应用分页
-            stmt = stmt.offset(offset).limit(limit)
-
-            # 执行查询
-            result = await self.session.execute(stmt)
-            rows = result.all()
+            grade_filter = self._build_grade_filter(min_grade, max_grade)
+            if grade_filter is not None:
+                points = [point for point in points if grade_filter(point)]
+
+            total_count = len(points)
+
+            # 翻页（多取一行判断是否有下一页）
+            if cursor:
+                after = tuple(decode_cursor(cursor, CURSOR_COLUMNS))
+                points = [point for point in points if _point_key(point) < after]
+            else:
+                points = points[offset:]
+            rows, next_cursor = split_page(points[:limit + 1], limit, _point_key)
 
             # 处理数据
             industry_data = []
             concept_data = []
 
-            for row in rows:
-                (
-                    sector_id,
-                    code,
-                    name,
-                    sector_type,
-                    score,
-                    short_score,
-                    medium_score,
-                    long_score,
-                    strong_ratio,
-                    grade,
-                ) = row
+            for point in rows:
+                strong_ratio = point['strong_stock_ratio']
+                long_score = point['long_term_score']
 
                 # 获取 X/Y 轴数值
-                x_value = self._get_axis_value(row, x_field)
-                y_value = self._get_axis_value(row, y_field)
+                x_value = self._get_axis_value(point, x_field)
+                y_value = self._get_axis_value(point, y_field)
 
                 # 数据缺失处理
                 size = self._calculate_size(strong_ratio)
@@ -180,26 +166,26 @@ class StrengthScatterService:
 
                 # 构建数据点
                 scatter_data = SectorScatterData(
-                    symbol=code,
-                    name=name,
-                    sector_type=sector_type,
+                    symbol=point['code'],
+                    name=point['name'],
+                    sector_type=point['sector_type'],
                     x=x_value,
                     y=y_value,
                     size=size,
                     color_value=color_value,
                     data_completeness=completeness,
                     full_data=SectorFullData(
-                        score=score,
-                        short_term_score=short_score,
-                        medium_term_score=medium_score,
+                        score=point['score'],
+                        short_term_score=point['short_term_score'],
+                        medium_term_score=point['medium_term_score'],
                         long_term_score=long_score,
                         strong_stock_ratio=strong_ratio,
-                        strength_grade=grade,
+                        strength_grade=point['strength_grade'],
                     ),
                 )
 
                 # 按类型分组
-                if sector_type == 'industry':
+                if point['sector_type'] == 'industry':
                     industry_data.append(scatter_data)
                 else:
                     concept_data.append(scatter_data)
@@ -216,39 +202,124 @@ class StrengthScatterService:
                     sector_type=sector_type,
                     grade_range=[min_grade, max_grade] if min_grade or max_grade else None,
                     axes=[x_axis, y_axis],
-                    pagination=PaginationInfo(offset=offset, limit=limit),
+                    pagination=PaginationInfo(offset=offset, limit=limit, cursor=cursor),
                 ),
-                cache_status='miss',  # TODO: 添加缓存支持
+                cache_status=cache_status,
+                next_cursor=next_cursor,
             )
 
         except Exception as e:
             logger.error(f"获取散点图数据失败: {e}")
             raise
 
-    def _get_axis_value(self, row: Tuple, field_name: str) -> float:
+    async def precompute(self, calc_date: Optional[date] = None) -> int:
         """
-        从查询结果中获取轴数值
+        预计算并缓存某一日期的散点数据集（每日数据更新完成后调用）
 
         Args:
-            row: 查询结果行
+            calc_date: 计算日期，None 表示板块最新数据日期
+
+        Returns:
+            数据集中的板块数量，没有数据时为 0
+        """
+        query_date = calc_date or await data_date_registry.get_latest_date(self.session, 'sector')
+        if query_date is None:
+            return 0
+
+        dataset = await self.build_dataset(query_date)
+        await self.cache.set_scatter(query_date, dataset)
+        count = sum(len(dataset[group]) for group in SCATTER_SECTOR_TYPES)
+        logger.info(f"散点图数据已预计算: 日期={query_date}, 板块={count}")
+        return count
+
+    async def build_dataset(self, calc_date: date) -> Dict[str, Any]:
+        """
+        查询某一日期所有板块的散点数据集
+
+        Args:
+            calc_date: 计算日期
+
+        Returns:
+            {'date': 日期, 'industry': [数据点], 'concept': [数据点]}，
+            组内按 (得分, 记录ID) 降序
+        """
+        stmt = (
+            select(
+                Sector.code,
+                Sector.name,
+                Sector.type.label('sector_type'),
+                StrengthScore.id.label('score_id'),
+                StrengthScore.score,
+                StrengthScore.short_term_score,
+                StrengthScore.medium_term_score,
+                StrengthScore.long_term_score,
+                StrengthScore.strong_stock_ratio,
+                StrengthScore.strength_grade,
+            )
+            .join(StrengthScore, and_(
+                StrengthScore.entity_type == 'sector',
+                StrengthScore.entity_id == Sector.id,
+                StrengthScore.period == 'all',
+                StrengthScore.date == calc_date,
+            ))
+            .where(Sector.type.in_(SCATTER_SECTOR_TYPES))
+            .order_by(StrengthScore.score.desc(), StrengthScore.id.desc())
+        )
+
+        result = await self.session.execute(stmt)
+        dataset: Dict[str, Any] = {'date': calc_date}
+        for group in SCATTER_SECTOR_TYPES:
+            dataset[group] = []
+        for row in result.all():
+            point = dict(row._mapping)
+            dataset[point['sector_type']].append(point)
+        return dataset
+
+    async def _get_dataset(self, calc_date: Optional[date]) -> Tuple[Dict[str, Any], str]:
+        """
+        获取散点数据集，未命中缓存时查询并以短有效期回填
+
+        读取时该日期可能仍在计算，回填只保留 SCATTER_MISS_CACHE_TTL；
+        完整数据集由每日更新收尾时 precompute 写入。
+
+        Args:
+            calc_date: 计算日期，None 表示没有数据
+
+        Returns:
+            (数据集, 缓存状态 hit/miss)
+        """
+        if calc_date is None:
+            return {group: [] for group in SCATTER_SECTOR_TYPES}, 'miss'
+
+        try:
+            dataset = await self.cache.get_scatter(calc_date)
+        except Exception as e:
+            logger.warning(f"读取散点图缓存失败: {e}")
+            dataset = None
+        if dataset is not None:
+            return dataset, 'hit'
+
+        dataset = await self.build_dataset(calc_date)
+        try:
+            await self.cache.set_scatter(calc_date, dataset, ttl=SCATTER_MISS_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"写入散点图缓存失败: {e}")
+        return dataset, 'miss'
+
+    def _get_axis_value(self, point: Dict[str, Any], field_name: str) -> float:
+        """
+        从数据点中获取轴数值
+
+        Args:
+            point: 散点数据点
             field_name: 字段名
 
         Returns:
             轴数值，默认 0
         """
-        # 字段索引映射（与 select() 中的字段顺序对应）
-        field_index_map = {
-            'score': 4,
-            'short_term_score': 5,
-            'medium_term_score': 6,
-            'long_term_score': 7,
-        }
-
-        index = field_index_map.get(field_name)
-        if index is not None:
-            value = row[index]
-            if value is not None:
-                return float(value)
+        value = point.get(field_name)
+        if value is not None:
+            return float(value)
 
         return 0.0
 
@@ -301,7 +372,7 @@ class StrengthScatterService:
         self,
         min_grade: Optional[str],
         max_grade: Optional[str],
-    ) -> Optional[Any]:
+    ) -> Optional[Callable[[Dict[str, Any]], bool]]:
         """
         构建强度等级筛选条件
 
@@ -310,21 +381,21 @@ class StrengthScatterService:
             max_grade: 最高等级
 
         Returns:
-            SQLAlchemy 筛选表达式
+            数据点筛选函数，无筛选时返回 None
         """
-        filters = []
-
-        # 最低等级筛选
-        if min_grade:
-            min_score = GRADE_RANGE_MAP.get(min_grade, (0, 100))[0]
-            filters.append(StrengthScore.score >= min_score)
-
-        # 最高等级筛选
-        if max_grade:
-            max_score = GRADE_RANGE_MAP.get(max_grade, (0, 100))[1]
-            filters.append(StrengthScore.score <= max_score)
-
-        if filters:
-            return and_(*filters)
-
-        return None
+        if not min_grade and not max_grade:
+            return None
+
+        # 最低等级取区间下限，最高等级取区间上限
+        min_score = GRADE_RANGE_MAP.get(min_grade, (0, 100))[0] if min_grade else None
+        max_score = GRADE_RANGE_MAP.get(max_grade, (0, 100))[1] if max_grade else None
+
+        def _filter(point: Dict[str, Any]) -> bool:
+            score = point['score']
+            if min_score is not None and score < min_score:
+                return False
+            if max_score is not None and score > max_score:
+                return False
+            return True
+
+        return _filter
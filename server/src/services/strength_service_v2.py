@@ -5,8 +5,8 @@
 """
 
 import logging
-from datetime import date, timedelta
-from typing import Dict, List, Optional, Callable
+from datetime import date
+from typing import Any, Dict, List, Optional, Callable
 
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,6 +14,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.models.strength_score import StrengthScore
 from src.models.stock import Stock
 from src.models.sector import Sector
+from src.models.daily_strength_aggregate import ALL_SECTOR_TYPES
+from src.repositories.strength_score_repository import StrengthScoreRepository
+from src.services.data_date_registry import data_date_registry
+from src.services.cache.strength_cache import StrengthCache
 from src.services.calculation.ma_system.ma_data_loader import MADataLoader
 from src.services.calculation.ma_system.strength_calculator_v2 import StrengthCalculatorV2
 from src.config.ma_system import MA_PERIODS, get_available_periods, MIN_DATA_DAYS, FULL_DATA_DAYS
@@ -37,6 +41,7 @@ class StrengthServiceV2:
         """
         self.session = session
         self.calculator = StrengthCalculatorV2()
+        self.score_repo = StrengthScoreRepository(session)
         self._progress_callback: Optional[Callable] = None
 
     def set_progress_callback(self, callback: Callable[[int, int, str], None]):
@@ -56,7 +61,9 @@ class StrengthServiceV2:
     async def calculate_stock_strength(
         self,
         stock_id: int,
-        calc_date: Optional[date] = None
+        calc_date: Optional[date] = None,
+        data: Optional[Dict] = None,
+        update_change_rate: bool = True
     ) -> Dict:
         """
         计算个股强度
@@ -64,6 +71,8 @@ class StrengthServiceV2:
         Args:
             stock_id: 股票ID
             calc_date: 计算日期，None 表示使用最新日期
+            data: 已加载的计算数据（批量计算时传入），None 表示从数据库加载
+            update_change_rate: 是否立即更新该实体的变化率（批量计算时由日终阶段统一更新）
 
         Returns:
             计算结果字典
@@ -72,11 +81,10 @@ class StrengthServiceV2:
             calc_date = date.today()
 
         try:
-            # 创建数据加载器
-            loader = MADataLoader(self.session)
-
             # 加载数据
-            data = await loader.load_data_for_calculation("stock", stock_id, calc_date)
+            if data is None:
+                loader = MADataLoader(self.session)
+                data = await loader.load_data_for_calculation("stock", stock_id, calc_date)
 
             if not data["has_data"]:
                 return {
@@ -115,7 +123,8 @@ class StrengthServiceV2:
             )
 
             # 自动计算并更新变化率
-            await self.calculate_and_update_change_rate("stock", stock_id, calc_date)
+            if update_change_rate:
+                await self.calculate_and_update_change_rate("stock", stock_id, calc_date)
 
             return {
                 "success": True,
@@ -135,7 +144,9 @@ class StrengthServiceV2:
     async def calculate_sector_strength(
         self,
         sector_id: int,
-        calc_date: Optional[date] = None
+        calc_date: Optional[date] = None,
+        data: Optional[Dict] = None,
+        update_change_rate: bool = True
     ) -> Dict:
         """
         计算板块强度
@@ -143,6 +154,8 @@ class StrengthServiceV2:
         Args:
             sector_id: 板块ID
             calc_date: 计算日期，None 表示使用最新日期
+            data: 已加载的计算数据（批量计算时传入），None 表示从数据库加载
+            update_change_rate: 是否立即更新该实体的变化率（批量计算时由日终阶段统一更新）
 
         Returns:
             计算结果字典
@@ -153,12 +166,11 @@ class StrengthServiceV2:
         logger.info(f"开始计算板块强度: sector_id={sector_id}, date={calc_date}")
 
         try:
-            # 创建数据加载器
-            loader = MADataLoader(self.session)
-
             # 加载数据
-            logger.debug(f"正在加载板块数据: sector_id={sector_id}")
-            data = await loader.load_data_for_calculation("sector", sector_id, calc_date)
+            if data is None:
+                logger.debug(f"正在加载板块数据: sector_id={sector_id}")
+                loader = MADataLoader(self.session)
+                data = await loader.load_data_for_calculation("sector", sector_id, calc_date)
 
             if not data["has_data"]:
                 logger.warning(f"板块数据不足或无效: sector_id={sector_id}, date={calc_date}")
@@ -205,8 +217,9 @@ class StrengthServiceV2:
             )
 
             # 自动计算并更新变化率
-            logger.debug(f"正在计算板块变化率: sector_id={sector_id}")
-            await self.calculate_and_update_change_rate("sector", sector_id, calc_date)
+            if update_change_rate:
+                logger.debug(f"正在计算板块变化率: sector_id={sector_id}")
+                await self.calculate_and_update_change_rate("sector", sector_id, calc_date)
 
             logger.info(
                 f"板块强度计算完成: sector_id={sector_id}, "
@@ -233,7 +246,8 @@ class StrengthServiceV2:
         self,
         entity_type: str,
         entity_ids: List[int],
-        calc_date: Optional[date] = None
+        calc_date: Optional[date] = None,
+        update_change_rates: bool = True
     ) -> Dict:
         """
         批量计算强度
@@ -242,6 +256,7 @@ class StrengthServiceV2:
             entity_type: 实体类型 ('stock' 或 'sector')
             entity_ids: 实体ID列表
             calc_date: 计算日期
+            update_change_rates: 是否在本批结束后更新变化率（由调用方统一更新时传 False）
 
         Returns:
             批量计算结果
@@ -254,6 +269,10 @@ class StrengthServiceV2:
         error_count = 0
         results = []
 
+        # 一次性加载全部实体的均线、价格和可用天数
+        loader = MADataLoader(self.session)
+        universe = await loader.load_universe(entity_type, calc_date, entity_ids)
+
         for idx, entity_id in enumerate(entity_ids):
             try:
                 await self._report_progress(
@@ -262,10 +281,15 @@ class StrengthServiceV2:
                     f"计算 {entity_type} ID: {entity_id}"
                 )
 
+                data = universe.get(entity_id)
                 if entity_type == "stock":
-                    result = await self.calculate_stock_strength(entity_id, calc_date)
+                    result = await self.calculate_stock_strength(
+                        entity_id, calc_date, data=data, update_change_rate=False
+                    )
                 else:
-                    result = await self.calculate_sector_strength(entity_id, calc_date)
+                    result = await self.calculate_sector_strength(
+                        entity_id, calc_date, data=data, update_change_rate=False
+                    )
 
                 results.append(result)
 
@@ -278,6 +302,10 @@ class StrengthServiceV2:
                 logger.error(f"批量计算失败 (entity_type={entity_type}, entity_id={entity_id}): {e}")
                 error_count += 1
 
+        # 日终阶段：一条语句更新本批实体当日的变化率
+        if update_change_rates:
+            await self.update_change_rates(calc_date, entity_type=entity_type, entity_ids=entity_ids)
+
         return {
             "success": True,
             "total": total,
@@ -486,6 +514,65 @@ class StrengthServiceV2:
 
         return round(((current_score - avg_5d) / avg_5d) * 100, 2)
 
+    async def get_daily_aggregate(self, calc_date: date, entity_type: str) -> Optional[Dict[str, Any]]:
+        """
+        获取某日该实体类型全部实体的强度汇总（汇总行缺失时现场统计）
+
+        Args:
+            calc_date: 日期
+            entity_type: 实体类型 (stock/sector)
+
+        Returns:
+            汇总行字典，当日没有得分时返回 None
+        """
+        aggregates = await self.score_repo.get_daily_aggregates(calc_date, entity_type)
+        return aggregates.get(ALL_SECTOR_TYPES)
+
+    async def update_change_rates(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        entity_type: Optional[str] = None,
+        entity_ids: Optional[List[int]] = None
+    ) -> int:
+        """
+        按交易日批量更新变化率（日终阶段）
+
+        一条 SQL 语句为日期范围内的所有实体计算 change_rate_1d 和 change_rate_5d，
+        完整历史回填时传入整个日期范围即可一次完成。随后刷新最新强度得分读模型和每日强度汇总。
+
+        Args:
+            start_date: 开始日期，None 表示从最早日期开始
+            end_date: 结束日期，None 表示与 start_date 相同
+            entity_type: 实体类型，None 表示股票和板块
+            entity_ids: 限定的实体ID列表，None 表示全部实体
+
+        Returns:
+            更新的行数，失败时为 0
+        """
+        try:
+            updated = await self.score_repo.update_change_rates(
+                start_date, end_date, entity_type=entity_type, entity_ids=entity_ids
+            )
+            await self.score_repo.refresh_latest(
+                start_date, end_date, entity_type=entity_type, entity_ids=entity_ids
+            )
+            await self.score_repo.refresh_daily_aggregates(start_date, end_date, entity_type=entity_type)
+            await self.session.commit()
+            data_date_registry.invalidate()
+            logger.info(
+                f"变化率更新完成: entity_type={entity_type or 'all'}, "
+                f"{start_date} 至 {end_date or start_date}, 行数={updated}"
+            )
+
+        except Exception as e:
+            logger.error(f"批量更新变化率失败 ({start_date} 至 {end_date or start_date}): {e}")
+            await self.session.rollback()
+            return 0
+
+        await self._invalidate_scatter(start_date, end_date, entity_type)
+        return updated
+
     async def calculate_and_update_change_rate(
         self,
         entity_type: str,
@@ -493,7 +580,7 @@ class StrengthServiceV2:
         calc_date: Optional[date] = None
     ) -> Optional[Dict]:
         """
-        计算并更新变化率
+        计算并更新单个实体的变化率，并刷新当日的最新得分读模型和每日强度汇总
 
         Args:
             entity_type: 实体类型
@@ -507,79 +594,64 @@ class StrengthServiceV2:
             calc_date = date.today()
 
         try:
-            # 获取当前得分
-            current_stmt = select(StrengthScore).where(
-                and_(
-                    StrengthScore.entity_type == entity_type,
-                    StrengthScore.entity_id == entity_id,
-                    StrengthScore.date == calc_date,
-                    StrengthScore.period == 'all'
-                )
+            await self.score_repo.update_change_rates(
+                calc_date, entity_type=entity_type, entity_ids=[entity_id]
             )
-            current_result = await self.session.execute(current_stmt)
-            current_score = current_result.scalar_one_or_none()
-
-            if not current_score:
-                return None
-
-            # 获取前一日得分
-            prev_date = calc_date - timedelta(days=1)
-            prev_stmt = select(StrengthScore).where(
-                and_(
-                    StrengthScore.entity_type == entity_type,
-                    StrengthScore.entity_id == entity_id,
-                    StrengthScore.date == prev_date,
-                    StrengthScore.period == 'all'
-                )
-            )
-            prev_result = await self.session.execute(prev_stmt)
-            prev_score = prev_result.scalar_one_or_none()
-
-            # 计算1日变化率
-            change_rate_1d = self.calculate_change_rate_1d(
-                current_score.score,
-                prev_score.score if prev_score else None
+            await self.score_repo.refresh_latest(
+                calc_date, entity_type=entity_type, entity_ids=[entity_id]
             )
+            await self.score_repo.refresh_daily_aggregates(calc_date, entity_type=entity_type)
 
-            # 获取前5天得分（不含今天）- 使用单个查询避免N+1问题
-            start_date_5d = calc_date - timedelta(days=5)
-            end_date_5d = calc_date - timedelta(days=1)
-
-            stmt_5d = select(StrengthScore.score).where(
+            stmt = select(StrengthScore).where(
                 and_(
                     StrengthScore.entity_type == entity_type,
                     StrengthScore.entity_id == entity_id,
-                    StrengthScore.date >= start_date_5d,
-                    StrengthScore.date <= end_date_5d,
+                    StrengthScore.date == calc_date,
                     StrengthScore.period == 'all'
                 )
-            ).order_by(StrengthScore.date.asc())
-
-            result_5d = await self.session.execute(stmt_5d)
-            scores_5d = [s for s in result_5d.scalars().all() if s is not None]
-
-            # 计算5日变化率
-            change_rate_5d = self.calculate_change_rate_5d(
-                current_score.score,
-                scores_5d
-            )
-
-            # 更新数据库
-            current_score.change_rate_1d = change_rate_1d
-            current_score.change_rate_5d = change_rate_5d
+            ).execution_options(populate_existing=True)
+            result = await self.session.execute(stmt)
+            current_score = result.scalar_one_or_none()
+
+            change_rates = None
+            if current_score:
+                change_rates = {
+                    'entity_type': entity_type,
+                    'entity_id': entity_id,
+                    'calc_date': calc_date,
+                    'current_score': current_score.score,
+                    'change_rate_1d': current_score.change_rate_1d,
+                    'change_rate_5d': current_score.change_rate_5d,
+                }
 
             await self.session.commit()
-
-            return {
-                'entity_type': entity_type,
-                'entity_id': entity_id,
-                'calc_date': calc_date,
-                'current_score': current_score.score,
-                'change_rate_1d': change_rate_1d,
-                'change_rate_5d': change_rate_5d,
-            }
+            data_date_registry.invalidate()
 
         except Exception as e:
             logger.error(f"计算变化率失败 (entity_type={entity_type}, entity_id={entity_id}): {e}")
             await self.session.rollback()
             return None
+
+        await self._invalidate_scatter(calc_date, calc_date, entity_type)
+        return change_rates
+
+    async def _invalidate_scatter(
+        self,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        entity_type: Optional[str]
+    ) -> None:
+        """
+        板块得分写入后失效散点图缓存（散点图只包含板块，股票写入无需失效）
+
+        Args:
+            start_date: 开始日期，None 表示不限
+            end_date: 结束日期，None 表示与 start_date 相同
+            entity_type: 写入的实体类型，None 表示股票和板块
+        """
+        if entity_type not in (None, 'sector'):
+            return
+        try:
+            await StrengthCache().invalidate_scatter(start_date, end_date)
+        except Exception as e:
+            logger.warning(f"失效散点图缓存失败: {e}")
@@ -15,6 +15,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.models.stock import Stock
 from src.models.sector import Sector
 from src.models.strength_score import StrengthScore
+from src.repositories.strength_score_repository import StrengthScoreRepository
+from src.services.cache.strength_cache import StrengthCache
+from src.services.data_date_registry import data_date_registry
+from src.services.snapshot_builder import (
+    ConcurrentSnapshotBuilder,
+    empty_day_result,
+    resolve_snapshot_concurrency,
+)
 from src.services.strength_service_v2 import StrengthServiceV2
 
 logger = logging.getLogger(__name__)
@@ -27,15 +35,18 @@ class StrengthSnapshotService:
     负责创建每日强度快照，用于历史趋势分析。
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, session_factory: Optional[Callable] = None):
         """
         初始化快照服务
 
         Args:
             session: 数据库会话
+            session_factory: 并发计算使用的会话工厂，None 表示使用 AsyncSessionLocal
         """
         self.session = session
+        self.session_factory = session_factory
         self.strength_service = StrengthServiceV2(session)
+        self.score_repo = StrengthScoreRepository(session)
         self._progress_callback: Optional[Callable] = None
 
     def set_progress_callback(self, callback: Callable[[int, int, str], None]):
@@ -47,6 +58,14 @@ class StrengthSnapshotService:
         """
         self._progress_callback = callback
 
+    def _get_session_factory(self) -> Callable:
+        """返回并发计算使用的会话工厂"""
+        if self.session_factory is None:
+            from src.db.database import AsyncSessionLocal
+
+            self.session_factory = AsyncSessionLocal
+        return self.session_factory
+
     async def _report_progress(self, current: int, total: int, message: str):
         """报告进度"""
         if self._progress_callback:
@@ -56,16 +75,21 @@ class StrengthSnapshotService:
     async def create_daily_snapshot(
         self,
         snapshot_date: Optional[date] = None,
-        update_ranks: bool = True
+        update_ranks: bool = True,
+        update_change_rates: bool = True,
+        concurrency: Optional[int] = None
     ) -> Dict:
         """
         创建单日快照
 
         遍历所有股票和板块，计算当日强度并保存到数据库。
+        并发数大于 1 时，实体分块后由多个会话并发计算。
 
         Args:
             snapshot_date: 快照日期，None 表示使用今天
             update_ranks: 是否更新排名和百分位
+            update_change_rates: 是否在全部实体计算完成后统一更新当日变化率
+            concurrency: 并发会话数，None 表示使用 settings.SNAPSHOT_CONCURRENCY
 
         Returns:
             快照结果字典
@@ -75,13 +99,7 @@ class StrengthSnapshotService:
 
         logger.info(f"开始创建 {snapshot_date} 的强度快照")
 
-        total_success = 0
-        total_error = 0
-        results = {
-            "date": snapshot_date,
-            "stocks": {"success": 0, "error": 0, "details": []},
-            "sectors": {"success": 0, "error": 0, "details": []}
-        }
+        results = empty_day_result(snapshot_date)
 
         # 获取所有股票ID
         stock_stmt = select(Stock.id).order_by(Stock.id)
@@ -93,6 +111,73 @@ class StrengthSnapshotService:
         sector_result = await self.session.execute(sector_stmt)
         sector_ids = [row[0] for row in sector_result.all()]
 
+        total_entities = len(stock_ids) + len(sector_ids)
+
+        concurrency = resolve_snapshot_concurrency(concurrency)
+        if concurrency > 1:
+            builder = ConcurrentSnapshotBuilder(
+                self._get_session_factory(), concurrency, self._report_progress
+            )
+            day_results = await builder.build([snapshot_date], stock_ids, sector_ids)
+            results = day_results[snapshot_date]
+        else:
+            await self._build_sequential(snapshot_date, stock_ids, sector_ids, results)
+
+        # 统一更新当日所有实体的变化率
+        if update_change_rates:
+            await self.strength_service.update_change_rates(snapshot_date)
+
+        # 更新排名和百分位
+        if update_ranks:
+            logger.info(f"开始更新排名和百分位: date={snapshot_date}")
+            await self._update_ranks_and_percentiles(snapshot_date)
+
+        results["summary"] = self._summarize(results, total_entities)
+        logger.info(
+            f"快照完成: 日期={snapshot_date}, "
+            f"成功={results['summary']['total_success']}, 失败={results['summary']['total_error']}"
+        )
+
+        return results
+
+    @staticmethod
+    def _summarize(day_result: Dict, total_entities: int) -> Dict:
+        """
+        汇总单日快照的成功/失败数
+
+        Args:
+            day_result: 单日结果字典
+            total_entities: 实体总数
+
+        Returns:
+            summary 字典
+        """
+        total_success = day_result["stocks"]["success"] + day_result["sectors"]["success"]
+        total_error = day_result["stocks"]["error"] + day_result["sectors"]["error"]
+        return {
+            "total_entities": total_entities,
+            "total_success": total_success,
+            "total_error": total_error,
+            "success_rate": round(total_success / total_entities * 100, 2)
+            if total_entities > 0 else 0
+        }
+
+    async def _build_sequential(
+        self,
+        snapshot_date: date,
+        stock_ids: List[int],
+        sector_ids: List[int],
+        results: Dict
+    ) -> None:
+        """
+        在当前会话中依次计算股票和板块强度
+
+        Args:
+            snapshot_date: 快照日期
+            stock_ids: 股票ID列表
+            sector_ids: 板块ID列表
+            results: 单日结果字典（原地累加）
+        """
         total_entities = len(stock_ids) + len(sector_ids)
         current_count = 0
 
@@ -108,11 +193,11 @@ class StrengthSnapshotService:
 
                 result = await self.strength_service.calculate_stock_strength(
                     stock_id,
-                    snapshot_date
+                    snapshot_date,
+                    update_change_rate=False
                 )
 
                 if result.get("success"):
-                    total_success += 1
                     results["stocks"]["success"] += 1
                     results["stocks"]["details"].append({
                         "id": stock_id,
@@ -120,7 +205,6 @@ class StrengthSnapshotService:
                         "score": result.get("result", {}).get("composite_score")
                     })
                 else:
-                    total_error += 1
                     results["stocks"]["error"] += 1
                     results["stocks"]["details"].append({
                         "id": stock_id,
@@ -130,7 +214,6 @@ class StrengthSnapshotService:
 
             except Exception as e:
                 logger.error(f"股票快照失败 (stock_id={stock_id}): {e}")
-                total_error += 1
                 results["stocks"]["error"] += 1
                 results["stocks"]["details"].append({
                     "id": stock_id,
@@ -151,11 +234,11 @@ class StrengthSnapshotService:
 
                 result = await self.strength_service.calculate_sector_strength(
                     sector_id,
-                    snapshot_date
+                    snapshot_date,
+                    update_change_rate=False
                 )
 
                 if result.get("success"):
-                    total_success += 1
                     results["sectors"]["success"] += 1
                     results["sectors"]["details"].append({
                         "id": sector_id,
@@ -163,7 +246,6 @@ class StrengthSnapshotService:
                         "score": result.get("result", {}).get("composite_score")
                     })
                 else:
-                    total_error += 1
                     results["sectors"]["error"] += 1
                     results["sectors"]["details"].append({
                         "id": sector_id,
@@ -173,7 +255,6 @@ class StrengthSnapshotService:
 
             except Exception as e:
                 logger.error(f"板块快照失败 (sector_id={sector_id}): {e}")
-                total_error += 1
                 results["sectors"]["error"] += 1
                 results["sectors"]["details"].append({
                     "id": sector_id,
@@ -187,41 +268,24 @@ class StrengthSnapshotService:
             f"总数={len(sector_ids)}"
         )
 
-        # 更新排名和百分位
-        if update_ranks:
-            logger.info(f"开始更新排名和百分位: date={snapshot_date}")
-            await self._update_ranks_and_percentiles(snapshot_date)
-
-        logger.info(
-            f"快照完成: 日期={snapshot_date}, "
-            f"成功={total_success}, 失败={total_error}"
-        )
-
-        results["summary"] = {
-            "total_entities": total_entities,
-            "total_success": total_success,
-            "total_error": total_error,
-            "success_rate": round(total_success / total_entities * 100, 2)
-            if total_entities > 0 else 0
-        }
-
-        return results
-
     async def batch_create_snapshots(
         self,
         start_date: date,
         end_date: date,
         update_ranks: bool = True,
-        concurrent_limit: int = 1
+        concurrent_limit: Optional[int] = None
     ) -> Dict:
         """
         批量创建多日快照
 
+        并发数大于 1 时，所有日期的实体块由多个会话并发计算；
+        变化率和排名在全部日期完成后对整个范围各执行一次。
+
         Args:
             start_date: 开始日期
             end_date: 结束日期
             update_ranks: 是否更新排名和百分位
-            concurrent_limit: 并发数限制
+            concurrent_limit: 并发会话数，None 表示使用 settings.SNAPSHOT_CONCURRENCY
 
         Returns:
             批量快照结果
@@ -255,63 +319,91 @@ class StrengthSnapshotService:
             }
         }
 
-        # 获取股票和板块总数用于进度展示
-        stock_stmt = select(Stock.id)
+        # 获取股票和板块列表（同时用于进度展示）
+        stock_stmt = select(Stock.id).order_by(Stock.id)
         stock_result = await self.session.execute(stock_stmt)
-        total_stocks = len(stock_result.all())
+        stock_ids = [row[0] for row in stock_result.all()]
+        total_stocks = len(stock_ids)
 
-        sector_stmt = select(Sector.id)
+        sector_stmt = select(Sector.id).order_by(Sector.id)
         sector_result = await self.session.execute(sector_stmt)
-        total_sectors = len(sector_result.all())
+        sector_ids = [row[0] for row in sector_result.all()]
+        total_sectors = len(sector_ids)
 
         logger.info(f"待处理实体总数: 股票={total_stocks}个, 板块={total_sectors}个")
         logger.info(f"预计总处理量: {days}天 × (股票{total_stocks} + 板块{total_sectors}) = {days * (total_stocks + total_sectors)}个计算任务")
 
-        # 按顺序创建每日快照（避免并发导致的数据一致性问题）
-        current_date = start_date
-        day_count = 0
-
-        while current_date <= end_date:
-            day_count += 1
-            try:
-                logger.info(f"处理第 {day_count}/{days} 天: {current_date}")
-
-                day_result = await self.create_daily_snapshot(
-                    current_date,
-                    update_ranks
-                )
-
+        concurrency = resolve_snapshot_concurrency(concurrent_limit)
+        if concurrency > 1:
+            # 所有日期的实体块放入同一队列，由多个会话并发计算
+            snapshot_dates = [start_date + timedelta(days=i) for i in range(days)]
+            builder = ConcurrentSnapshotBuilder(
+                self._get_session_factory(), concurrency, self._report_progress
+            )
+            day_results = await builder.build(snapshot_dates, stock_ids, sector_ids)
+            for snapshot_date in snapshot_dates:
+                day_result = day_results[snapshot_date]
+                day_result["summary"] = self._summarize(day_result, total_stocks + total_sectors)
                 results["daily_results"].append(day_result)
                 results["summary"]["total_success"] += day_result["summary"]["total_success"]
                 results["summary"]["total_error"] += day_result["summary"]["total_error"]
                 results["summary"]["total_entities_processed"] += day_result["summary"]["total_entities"]
+        else:
+            # 按顺序创建每日快照（避免并发导致的数据一致性问题）
+            current_date = start_date
+            day_count = 0
+
+            while current_date <= end_date:
+                day_count += 1
+                try:
+                    logger.info(f"处理第 {day_count}/{days} 天: {current_date}")
+
+                    day_result = await self.create_daily_snapshot(
+                        current_date,
+                        update_ranks=False,
+                        update_change_rates=False,
+                        concurrency=1
+                    )
+
+                    results["daily_results"].append(day_result)
+                    results["summary"]["total_success"] += day_result["summary"]["total_success"]
+                    results["summary"]["total_error"] += day_result["summary"]["total_error"]
+                    results["summary"]["total_entities_processed"] += day_result["summary"]["total_entities"]
+
+                    # 每日完成后输出进度摘要
+                    cumulative_success_rate = (
+                        results["summary"]["total_success"] /
+                        (results["summary"]["total_success"] + results["summary"]["total_error"]) * 100
+                        if (results["summary"]["total_success"] + results["summary"]["total_error"]) > 0
+                        else 0
+                    )
+                    logger.info(
+                        f"第 {day_count}/{days} 天完成 - "
+                        f"当日: 成功={day_result['summary']['total_success']}, "
+                        f"失败={day_result['summary']['total_error']} | "
+                        f"累计: 成功={results['summary']['total_success']}, "
+                        f"失败={results['summary']['total_error']}, "
+                        f"成功率={cumulative_success_rate:.1f}%"
+                    )
+
+                except Exception as e:
+                    logger.error(f"日期 {current_date} 快照失败: {e}")
+                    results["daily_results"].append({
+                        "date": current_date,
+                        "success": False,
+                        "error": str(e)
+                    })
+                    results["summary"]["total_error"] += 1
 
-                # 每日完成后输出进度摘要
-                cumulative_success_rate = (
-                    results["summary"]["total_success"] /
-                    (results["summary"]["total_success"] + results["summary"]["total_error"]) * 100
-                    if (results["summary"]["total_success"] + results["summary"]["total_error"]) > 0
-                    else 0
-                )
-                logger.info(
-                    f"第 {day_count}/{days} 天完成 - "
-                    f"当日: 成功={day_result['summary']['total_success']}, "
-                    f"失败={day_result['summary']['total_error']} | "
-                    f"累计: 成功={results['summary']['total_success']}, "
-                    f"失败={results['summary']['total_error']}, "
-                    f"成功率={cumulative_success_rate:.1f}%"
-                )
+                current_date += timedelta(days=1)
 
+        # 整个日期范围的变化率和排名一次回填
+        await self.strength_service.update_change_rates(start_date, end_date)
+        if update_ranks:
+            try:
+                await self._update_ranks_and_percentiles(start_date, end_date)
             except Exception as e:
-                logger.error(f"日期 {current_date} 快照失败: {e}")
-                results["daily_results"].append({
-                    "date": current_date,
-                    "success": False,
-                    "error": str(e)
-                })
-                results["summary"]["total_error"] += 1
-
-            current_date += timedelta(days=1)
+                logger.error(f"批量更新排名失败 ({start_date} 至 {end_date}): {e}")
 
         logger.info(f"批量快照完成: 总成功={results['summary']['total_success']}, "
                    f"总失败={results['summary']['total_error']}")
@@ -319,63 +411,47 @@ class StrengthSnapshotService:
         results["success"] = True
         return results
 
-    async def _update_ranks_and_percentiles(self, calc_date: date) -> None:
+    async def _update_ranks_and_percentiles(
+        self,
+        calc_date: date,
+        end_date: Optional[date] = None
+    ) -> None:
         """
-        更新指定日期的排名和百分位
+        更新指定日期（或日期范围）的排名和百分位
 
-        分别为股票和板块计算排名和百分位。
+        股票和板块各执行一条 UPDATE ... FROM 窗口查询，范围内每个交易日独立排名，
+        然后刷新最新强度得分读模型中的排名和百分位，以及每日强度汇总；提交后失效范围内的散点图缓存。
 
         Args:
-            calc_date: 计算日期
+            calc_date: 计算日期（范围的开始日期）
+            end_date: 结束日期，None 表示只更新 calc_date 当日
         """
-        try:
-            # 更新股票排名
-            stock_stmt = select(StrengthScore).where(
-                StrengthScore.entity_type == "stock",
-                StrengthScore.date == calc_date,
-                StrengthScore.period == "all",
-                StrengthScore.score.isnot(None)
-            ).order_by(StrengthScore.score.desc())
+        if end_date is None:
+            end_date = calc_date
 
-            stock_result = await self.session.execute(stock_stmt)
-            stock_scores = stock_result.scalars().all()
-
-            total_stocks = len(stock_scores)
-            for idx, score in enumerate(stock_scores):
-                score.rank = idx + 1
-                score.percentile = round(
-                    ((total_stocks - idx) / total_stocks) * 100, 2
-                ) if total_stocks > 0 else 0
-
-            # 更新板块排名
-            sector_stmt = select(StrengthScore).where(
-                StrengthScore.entity_type == "sector",
-                StrengthScore.date == calc_date,
-                StrengthScore.period == "all",
-                StrengthScore.score.isnot(None)
-            ).order_by(StrengthScore.score.desc())
-
-            sector_result = await self.session.execute(sector_stmt)
-            sector_scores = sector_result.scalars().all()
-
-            total_sectors = len(sector_scores)
-            for idx, score in enumerate(sector_scores):
-                score.rank = idx + 1
-                score.percentile = round(
-                    ((total_sectors - idx) / total_sectors) * 100, 2
-                ) if total_sectors > 0 else 0
+        try:
+            total_stocks = await self.score_repo.update_ranks(calc_date, end_date, entity_type="stock")
+            total_sectors = await self.score_repo.update_ranks(calc_date, end_date, entity_type="sector")
+            await self.score_repo.refresh_latest(calc_date, end_date)
+            await self.score_repo.refresh_daily_aggregates(calc_date, end_date)
 
             await self.session.commit()
+            data_date_registry.invalidate()
             logger.info(
-                f"排名更新完成: 股票={total_stocks}个, "
-                f"板块={total_sectors}个, 日期={calc_date}"
+                f"排名更新完成: 股票={total_stocks}条, "
+                f"板块={total_sectors}条, 日期={calc_date} 至 {end_date}"
             )
 
         except Exception as e:
-            logger.error(f"更新排名失败 (date={calc_date}): {e}")
+            logger.error(f"更新排名失败 (date={calc_date} 至 {end_date}): {e}")
             await self.session.rollback()
             raise
 
+        try:
+            await StrengthCache().invalidate_scatter(calc_date, end_date)
+        except Exception as e:
+            logger.warning(f"失效散点图缓存失败: {e}")
+
     async def get_snapshot_status(self, snapshot_date: date) -> Dict:
         """
         获取指定日期的快照状态
@@ -16,8 +16,10 @@ from src.services.task_manager import TaskManager
 from src.services.data_init import DataInitService
 from src.services.data_update import DataUpdateService
 from src.services.sector_ma_service import SectorMAService
+from src.services.stock_ma_service import StockMAService
 from src.services.sector_strength_service import SectorStrengthService
 from src.services.sector_classification_service import SectorClassificationService
+from src.services.trend_analysis_service import TrendAnalysisService
 
 logger = logging.getLogger(__name__)
 
@@ -41,11 +43,14 @@ class TaskType(str, Enum):
     CALCULATE_SECTOR_MA = "calculate_sector_ma"
     BACKFILL_SECTOR_MA_BY_DATE = "backfill_sector_ma_by_date"
     CALCULATE_SECTOR_MA_FULL_HISTORY = "calculate_sector_ma_full_history"
+    CALCULATE_STOCK_MA_INCREMENTAL = "calculate_stock_ma_incremental"
+    CALCULATE_STOCK_MA_FULL_HISTORY = "calculate_stock_ma_full_history"
 
     # 强度计算任务
     CALCULATE_SECTOR_STRENGTH_BY_DATE = "calculate_sector_strength_by_date"
     CALCULATE_SECTOR_STRENGTH_BY_RANGE = "calculate_sector_strength_by_range"
     CALCULATE_SECTOR_STRENGTH_FULL_HISTORY = "calculate_sector_strength_full_history"
+    UPDATE_STRENGTH_TRENDS = "update_strength_trends"
 
     # 板块分类任务
     INIT_SECTOR_CLASSIFICATIONS = "init_sector_classifications"
@@ -537,7 +542,8 @@ async def calculate_sector_ma_full_history_task(
         params: 任务参数 {
             "sector_id": int | None,  # 板块ID，None表示所有板块
             "periods": [5, 10, 20, ...] | None,  # 均线周期列表
-            "overwrite": false  # 是否覆盖已有数据
+            "overwrite": false,  # 是否覆盖已有数据
+            "shards": int | None  # 工作进程数，None 表示使用配置默认值
         }
         manager: 任务管理器
     """
@@ -547,6 +553,7 @@ async def calculate_sector_ma_full_history_task(
     sector_id = params.get("sector_id")
     periods = params.get("periods")
     overwrite = params.get("overwrite", False)
+    shards = params.get("shards")
 
     # 设置进度回调
     callback = await _make_progress_callback(manager, task_id)
@@ -563,7 +570,8 @@ async def calculate_sector_ma_full_history_task(
     result = await service.calculate_full_history_ma(
         sector_id=sector_id,
         periods=periods,
-        overwrite=overwrite
+        overwrite=overwrite,
+        shards=shards
     )
 
     if result.get("success"):
@@ -585,6 +593,126 @@ async def calculate_sector_ma_full_history_task(
         raise Exception(error_msg)
 
 
+@TaskRegistry.register(TaskType.CALCULATE_STOCK_MA_INCREMENTAL)
+async def calculate_stock_ma_incremental_task(
+    task_id: str,
+    params: Dict[str, Any],
+    manager: TaskManager,
+) -> None:
+    """
+    股票均线增量计算任务
+
+    每日数据更新后执行，只计算已有均线之后的新交易日。
+
+    Args:
+        task_id: 任务ID
+        params: 任务参数 {
+            "end_date": "YYYY-MM-DD" | None,  # 计算截止日期
+            "periods": [5, 10, 20, ...] | None,  # 均线周期列表
+            "overwrite": false  # 是否覆盖已有数据
+        }
+        manager: 任务管理器
+    """
+    service = StockMAService(manager.db)
+
+    # 解析参数
+    end_date_str = params.get("end_date")
+    periods = params.get("periods")
+    overwrite = params.get("overwrite", False)
+
+    end_date = date.fromisoformat(end_date_str) if end_date_str else None
+
+    # 设置进度回调
+    callback = await _make_progress_callback(manager, task_id)
+    service.set_progress_callback(callback)
+
+    await manager.log_message(
+        task_id,
+        "INFO",
+        f"Starting incremental stock MA calculation (end_date={end_date}, overwrite={overwrite})"
+    )
+
+    result = await service.calculate_incremental_ma(
+        end_date=end_date,
+        periods=periods,
+        overwrite=overwrite
+    )
+
+    if result.get("success"):
+        await manager.log_message(
+            task_id,
+            "INFO",
+            f"Incremental stock MA calculation completed: {result.get('trade_dates', 0)} trading days, "
+            f"{result.get('created', 0)} created, {result.get('updated', 0)} updated, "
+            f"{result.get('skipped', 0)} skipped"
+        )
+    else:
+        error_msg = result.get("error", "Unknown error")
+        await manager.log_message(task_id, "ERROR", f"Incremental stock MA calculation failed: {error_msg}")
+        raise Exception(error_msg)
+
+
+@TaskRegistry.register(TaskType.CALCULATE_STOCK_MA_FULL_HISTORY)
+async def calculate_stock_ma_full_history_task(
+    task_id: str,
+    params: Dict[str, Any],
+    manager: TaskManager,
+) -> None:
+    """
+    股票完整历史均线计算任务
+
+    从股票最早的数据日期开始，计算到最新数据的所有均线数据。
+
+    Args:
+        task_id: 任务ID
+        params: 任务参数 {
+            "stock_id": int | None,  # 股票ID，None表示所有股票
+            "periods": [5, 10, 20, ...] | None,  # 均线周期列表
+            "overwrite": false,  # 是否覆盖已有数据
+            "shards": int | None  # 工作进程数，None 表示使用配置默认值
+        }
+        manager: 任务管理器
+    """
+    service = StockMAService(manager.db)
+
+    # 解析参数
+    stock_id = params.get("stock_id")
+    periods = params.get("periods")
+    overwrite = params.get("overwrite", False)
+    shards = params.get("shards")
+
+    # 设置进度回调
+    callback = await _make_progress_callback(manager, task_id)
+    service.set_progress_callback(callback)
+
+    stock_desc = f"stock {stock_id}" if stock_id else "all stocks"
+    await manager.log_message(
+        task_id,
+        "INFO",
+        f"Starting stock MA full history calculation: {stock_desc} (overwrite={overwrite})"
+    )
+
+    result = await service.calculate_full_history_ma(
+        stock_id=stock_id,
+        periods=periods,
+        overwrite=overwrite,
+        shards=shards
+    )
+
+    if result.get("success"):
+        await manager.log_message(
+            task_id,
+            "INFO",
+            f"Stock MA full history calculation completed: {result.get('total_stocks', 0)} stocks processed, "
+            f"{result.get('created', 0)} created, {result.get('updated', 0)} updated, "
+            f"{result.get('skipped', 0)} skipped, {result.get('errors', 0)} errors"
+        )
+    else:
+        error_msg = result.get("error", "Unknown error")
+        await manager.log_message(task_id, "ERROR", f"Stock MA full history calculation failed: {error_msg}")
+        raise Exception(error_msg)
+
+
 # 导出任务注册表和注册的任务类型
 __all__ = [
     "TaskRegistry",
@@ -597,9 +725,12 @@ __all__ = [
     "calculate_sector_ma_task",
     "backfill_sector_ma_by_date_task",
     "calculate_sector_ma_full_history_task",
+    "calculate_stock_ma_incremental_task",
+    "calculate_stock_ma_full_history_task",
     "calculate_sector_strength_by_date_task",
     "calculate_sector_strength_by_range_task",
     "calculate_sector_strength_full_history_task",
+    "update_strength_trends_task",
     "init_sector_classifications_task",
     "update_sector_classification_daily_task",
 ]
@@ -685,7 +816,8 @@ async def calculate_sector_strength_by_range_task(
             "start_date": "YYYY-MM-DD",  # 开始日期
             "end_date": "YYYY-MM-DD",    # 结束日期
             "sector_id": int | None,  # 板块ID，None表示所有板块
-            "overwrite": false  # 是否覆盖已有数据
+            "overwrite": false,  # 是否覆盖已有数据
+            "vectorized": true  # 是否使用列式（向量化）计算模式
         }
         manager: 任务管理器
     """
@@ -698,6 +830,7 @@ async def calculate_sector_strength_by_range_task(
     end_date = date.fromisoformat(end_date_str) if end_date_str else None
     sector_id = params.get("sector_id")
     overwrite = params.get("overwrite", False)
+    vectorized = params.get("vectorized", True)
 
     # 设置进度回调
     callback = await _make_progress_callback(manager, task_id)
@@ -716,7 +849,8 @@ async def calculate_sector_strength_by_range_task(
         sector_id=sector_id,
         start_date=start_date,
         end_date=end_date,
-        overwrite=overwrite
+        overwrite=overwrite,
+        vectorized=vectorized
     )
 
     if result.get("success"):
@@ -753,7 +887,9 @@ async def calculate_sector_strength_full_history_task(
         task_id: 任务ID
         params: 任务参数 {
             "sector_id": int | None,  # 板块ID，None表示所有板块
-            "overwrite": false  # 是否覆盖已有数据
+            "overwrite": false,  # 是否覆盖已有数据
+            "vectorized": true,  # 是否使用列式（向量化）计算模式
+            "shards": int | None  # 工作进程数，None 表示使用配置默认值
         }
         manager: 任务管理器
     """
@@ -762,6 +898,8 @@ async def calculate_sector_strength_full_history_task(
     # 解析参数
     sector_id = params.get("sector_id")
     overwrite = params.get("overwrite", False)
+    vectorized = params.get("vectorized", True)
+    shards = params.get("shards")
 
     # 设置进度回调
     callback = await _make_progress_callback(manager, task_id)
@@ -777,7 +915,9 @@ async def calculate_sector_strength_full_history_task(
     # 执行完整历史计算
     result = await service.calculate_sector_strength_full_history(
         sector_id=sector_id,
-        overwrite=overwrite
+        overwrite=overwrite,
+        vectorized=vectorized,
+        shards=shards
     )
 
     if result.get("success"):
@@ -801,6 +941,49 @@ async def calculate_sector_strength_full_history_task(
 
 # ============== 板块分类数据初始化任务 ==============
 
+@TaskRegistry.register(TaskType.UPDATE_STRENGTH_TRENDS)
+async def update_strength_trends_task(
+    task_id: str,
+    params: Dict[str, Any],
+    manager: TaskManager,
+) -> None:
+    """
+    批量识别并写入趋势标签任务
+
+    Args:
+        task_id: 任务ID
+        params: 任务参数 {
+            "target_date": "YYYY-MM-DD" | None,  # 窗口结束日期，None表示今天
+            "days": 30,  # 回看天数
+            "entity_types": ["stock", "sector"]  # 实体类型
+        }
+        manager: 任务管理器
+    """
+    service = TrendAnalysisService(manager.db)
+
+    target_date_str = params.get("target_date")
+    target_date = date.fromisoformat(target_date_str) if target_date_str else date.today()
+    days = params.get("days", 30)
+    entity_types = params.get("entity_types", ["stock", "sector"])
+
+    await manager.log_message(
+        task_id,
+        "INFO",
+        f"Starting trend identification: {target_date}, window {days} days, types {entity_types}"
+    )
+
+    for idx, entity_type in enumerate(entity_types):
+        trends = await service.batch_identify_trends(entity_type, days=days, end_date=target_date)
+        labelled = sum(1 for trend in trends.values() if "error" not in trend)
+        await manager.update_progress(task_id, idx + 1, len(entity_types))
+        await manager.log_message(
+            task_id,
+            "INFO",
+            f"Trend identification for {entity_type}: {labelled} labelled, "
+            f"{len(trends) - labelled} with insufficient data"
+        )
+
+
 @TaskRegistry.register(TaskType.INIT_SECTOR_CLASSIFICATIONS)
 async def init_sector_classifications_task(
     task_id: str,
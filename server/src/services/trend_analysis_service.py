@@ -2,15 +2,20 @@
 趋势分析服务
 
 提供趋势特征识别功能，包括趋势方向判断、移动平均线趋势、横盘检测等。
+批量识别一次加载 (实体 × 日期) 得分矩阵，以闭式回归对所有实体同时计算，结果写入 strength_trends。
 """
 
 import logging
 import numpy as np
-from datetime import date
-from typing import Dict, List, Optional
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
 
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.models.strength_score import StrengthScore
+from src.models.strength_trend import StrengthTrend
 from src.services.strength_history_service import StrengthHistoryService
 
 logger = logging.getLogger(__name__)
@@ -25,6 +30,130 @@ TREND_TYPES = {
     "strong_down": "强势下跌"    # 斜率 < -0.5
 }
 
+# 均线趋势窗口
+MA_TREND_WINDOWS = (5, 10, 20)
+
+# 趋势识别最少数据点
+MIN_TREND_POINTS = 3
+
+# 横盘检测最少数据点
+MIN_CONSOLIDATION_POINTS = 5
+
+
+def _classify_slope(slope: np.ndarray, labels: Sequence[str]) -> np.ndarray:
+    """
+    按斜率阈值 (0.5, 0.1, -0.1, -0.5) 分类
+
+    Args:
+        slope: 斜率数组
+        labels: 从强到弱的 5 个标签
+
+    Returns:
+        标签数组
+    """
+    return np.select(
+        [slope > 0.5, slope > 0.1, slope > -0.1, slope > -0.5],
+        list(labels[:4]),
+        default=labels[4],
+    )
+
+
+def right_align_scores(
+    entity_index: np.ndarray,
+    scores: np.ndarray,
+    entity_count: int,
+) -> np.ndarray:
+    """
+    将按 (实体, 日期) 排序的得分排成右对齐的 (实体 × 位置) 矩阵
+
+    每个实体的得分按日期顺序连续放在行尾，前面补 NaN，
+    这样最后一列是每个实体的最新得分，与逐实体计算时的列表下标一致。
+
+    Args:
+        entity_index: 每个得分所属实体的行号（已按实体、日期排序）
+        scores: 得分
+        entity_count: 实体数
+
+    Returns:
+        (entity_count, 最大数据点数) 矩阵
+    """
+    counts = np.bincount(entity_index, minlength=entity_count)
+    width = int(counts.max()) if counts.size else 0
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    position = np.arange(len(scores)) - starts[entity_index]
+    matrix = np.full((entity_count, width), np.nan)
+    matrix[entity_index, width - counts[entity_index] + position] = scores
+    return matrix
+
+
+def compute_trend_matrix(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    对右对齐的得分矩阵逐行计算趋势特征
+
+    与 identify_trend 的逐实体计算一致：自变量为数据点序号，
+    斜率和 R² 使用中心化的最小二乘闭式解，横盘检测使用总体标准差。
+
+    Args:
+        matrix: right_align_scores 返回的矩阵
+
+    Returns:
+        各特征的一维数组（按行），数据点不足时对应值为 NaN
+    """
+    mask = ~np.isnan(matrix)
+    n = mask.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+    x = np.broadcast_to(np.arange(matrix.shape[1], dtype=float), matrix.shape)
+    y = np.where(mask, matrix, 0.0)
+
+    x_bar = np.where(mask, x, 0.0).sum(axis=1) / safe_n
+    y_bar = y.sum(axis=1) / safe_n
+    dx = np.where(mask, x - x_bar[:, None], 0.0)
+    dy = np.where(mask, y - y_bar[:, None], 0.0)
+
+    sxx = (dx * dx).sum(axis=1)
+    sxy = (dx * dy).sum(axis=1)
+    ss_tot = (dy * dy).sum(axis=1)
+
+    has_trend = n >= MIN_TREND_POINTS
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(has_trend, sxy / np.where(sxx > 0, sxx, 1.0), np.nan)
+        ss_res = ((dy - slope[:, None] * dx) ** 2).sum(axis=1)
+        r_squared = np.where(ss_tot > 0, 1 - ss_res / np.where(ss_tot > 0, ss_tot, 1.0), 0.0)
+    r_squared = np.where(has_trend, r_squared, np.nan)
+
+    has_consolidation = n >= MIN_CONSOLIDATION_POINTS
+    with np.errstate(invalid="ignore"):
+        std_dev = np.sqrt(ss_tot / safe_n)
+    low = np.where(mask, matrix, np.inf).min(axis=1)
+    high = np.where(mask, matrix, -np.inf).max(axis=1)
+    price_range = high - low
+
+    features = {
+        "n": n,
+        "slope": slope,
+        "r_squared": r_squared,
+        "has_consolidation": has_consolidation,
+        "std_dev": np.where(has_consolidation, std_dev, np.nan),
+        "price_range": np.where(has_consolidation, price_range, np.nan),
+        "support_level": np.where(has_consolidation, low, np.nan),
+        "resistance_level": np.where(has_consolidation, high, np.nan),
+    }
+
+    # 均线趋势：当前均线为最后 window 个点的均值，前一均线向前错一位
+    width = matrix.shape[1]
+    for window in MA_TREND_WINDOWS:
+        valid = n >= window + 1
+        if width >= window + 1:
+            current_ma = matrix[:, width - window:].mean(axis=1)
+            previous_ma = matrix[:, width - window - 1:width - 1].mean(axis=1)
+        else:
+            current_ma = previous_ma = np.full(matrix.shape[0], np.nan)
+        features[f"ma{window}_current"] = np.where(valid, current_ma, np.nan)
+        features[f"ma{window}_previous"] = np.where(valid, previous_ma, np.nan)
+        features[f"ma{window}_slope"] = np.where(valid, current_ma - previous_ma, np.nan)
+
+    return features
+
 
 class TrendAnalysisService:
     """
@@ -33,6 +162,9 @@ class TrendAnalysisService:
     提供趋势特征识别、移动平均线趋势分析、横盘检测等功能。
     """
 
+    # 批量写入每条 INSERT 的行数（每行 23 列，asyncpg 单条语句最多 32767 个绑定参数）
+    UPSERT_CHUNK_SIZE = 1000
+
     def __init__(self, session: AsyncSession):
         """
         初始化趋势分析服务
@@ -363,3 +495,265 @@ class TrendAnalysisService:
             "start_date": trend_result.get("start_date"),
             "end_date": trend_result.get("end_date")
         }
+
+    # ========== 批量趋势识别 ==========
+
+    async def batch_identify_trends(
+        self,
+        entity_type: str,
+        days: int = 30,
+        end_date: Optional[date] = None,
+        persist: bool = True
+    ) -> Dict[int, Dict]:
+        """
+        批量识别同类全部实体的趋势特征
+
+        一次查询加载窗口内所有实体的得分，向量化计算后按 identify_trend 的结果格式返回，
+        并写入 strength_trends。
+
+        Args:
+            entity_type: 实体类型 ('stock' 或 'sector')
+            days: 查询天数
+            end_date: 结束日期
+            persist: 是否写入 strength_trends
+
+        Returns:
+            {实体ID: 趋势分析结果}
+        """
+        if end_date is None:
+            end_date = date.today()
+        start_date = end_date - timedelta(days=days - 1)
+
+        stmt = select(
+            StrengthScore.entity_id,
+            StrengthScore.date,
+            StrengthScore.score,
+        ).where(
+            StrengthScore.entity_type == entity_type,
+            StrengthScore.period == "all",
+            StrengthScore.date >= start_date,
+            StrengthScore.date <= end_date,
+            StrengthScore.score.isnot(None),
+        ).order_by(StrengthScore.entity_id, StrengthScore.date)
+
+        result = await self.session.execute(stmt)
+        rows = result.all()
+        if not rows:
+            return {}
+
+        entity_ids_col = np.array([row[0] for row in rows])
+        dates = [row[1] for row in rows]
+        scores = np.array([float(row[2]) for row in rows])
+
+        entity_ids, entity_index = np.unique(entity_ids_col, return_inverse=True)
+        matrix = right_align_scores(entity_index, scores, len(entity_ids))
+        features = compute_trend_matrix(matrix)
+
+        # 每个实体的首末日期
+        last_row = np.flatnonzero(np.r_[entity_index[1:] != entity_index[:-1], True])
+        first_row = np.r_[0, last_row[:-1] + 1]
+
+        trend_types = _classify_slope(features["slope"], list(TREND_TYPES.keys()))
+        ma_directions = {
+            window: _classify_slope(
+                features[f"ma{window}_slope"], ["strong_up", "up", "flat", "down", "strong_down"]
+            )
+            for window in MA_TREND_WINDOWS
+        }
+
+        results: Dict[int, Dict] = {}
+        for row, entity_id in enumerate(entity_ids.tolist()):
+            n = int(features["n"][row])
+            if n < MIN_TREND_POINTS:
+                results[entity_id] = {
+                    "trend_type": "unknown",
+                    "confidence": "low",
+                    "error": "数据不足（至少需要3天数据）"
+                }
+                continue
+
+            slope = float(features["slope"][row])
+            r_squared = float(features["r_squared"][row])
+            trend_type = str(trend_types[row])
+
+            if n < MIN_CONSOLIDATION_POINTS:
+                consolidation = {
+                    "is_consolidating": False,
+                    "reason": "数据不足（需要至少5天数据）"
+                }
+            else:
+                std_dev = float(features["std_dev"][row])
+                price_range = float(features["price_range"][row])
+                consolidation = {
+                    "is_consolidating": bool(std_dev < 2.0 and price_range < 2.0 * 3),
+                    "std_dev": round(std_dev, 2),
+                    "price_range": round(price_range, 2),
+                    "support_level": round(float(features["support_level"][row]), 2),
+                    "resistance_level": round(float(features["resistance_level"][row]), 2),
+                    "threshold": 2.0
+                }
+
+            ma_trends = {}
+            for window in MA_TREND_WINDOWS:
+                if n < window:
+                    continue
+                if n == window:
+                    ma_trends[f"ma{window}"] = {"window": window, "status": "insufficient_data"}
+                    continue
+                ma_trends[f"ma{window}"] = {
+                    "window": window,
+                    "current_ma": round(float(features[f"ma{window}_current"][row]), 2),
+                    "previous_ma": round(float(features[f"ma{window}_previous"][row]), 2),
+                    "ma_slope": round(float(features[f"ma{window}_slope"][row]), 4),
+                    "direction": str(ma_directions[window][row]),
+                    "status": "calculated"
+                }
+
+            if r_squared > 0.7:
+                confidence = "high"
+            elif r_squared > 0.4:
+                confidence = "medium"
+            else:
+                confidence = "low"
+
+            results[entity_id] = {
+                "trend_type": trend_type,
+                "trend_direction": TREND_TYPES[trend_type],
+                "trend_strength": round(abs(slope), 4),
+                "slope": round(slope, 4),
+                "r_squared": round(r_squared, 4),
+                "confidence": confidence,
+                "is_consolidating": consolidation["is_consolidating"],
+                "consolidation_info": consolidation,
+                "ma_trends": ma_trends,
+                "start_date": dates[first_row[row]].isoformat(),
+                "end_date": dates[last_row[row]].isoformat(),
+                "data_points": n
+            }
+
+        if persist:
+            await self._save_trends(entity_type, end_date, days, results)
+
+        logger.info(
+            f"批量趋势识别完成: entity_type={entity_type}, 日期={end_date}, "
+            f"窗口={days}天, 实体数={len(results)}"
+        )
+        return results
+
+    async def _save_trends(
+        self,
+        entity_type: str,
+        end_date: date,
+        days: int,
+        results: Dict[int, Dict]
+    ) -> int:
+        """
+        写入批量识别结果（INSERT ... ON CONFLICT DO UPDATE）
+
+        Args:
+            entity_type: 实体类型
+            end_date: 窗口结束日期
+            days: 窗口天数
+            results: batch_identify_trends 的结果
+
+        Returns:
+            写入的行数
+        """
+        rows = [
+            self._trend_to_row(entity_type, entity_id, end_date, days, trend)
+            for entity_id, trend in results.items()
+            if "error" not in trend
+        ]
+        if not rows:
+            return 0
+
+        key_columns = {"entity_type", "entity_id", "date", "window_days"}
+        for start in range(0, len(rows), self.UPSERT_CHUNK_SIZE):
+            stmt = pg_insert(StrengthTrend).values(rows[start:start + self.UPSERT_CHUNK_SIZE])
+            set_ = {col: stmt.excluded[col] for col in rows[0] if col not in key_columns}
+            set_["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["entity_type", "entity_id", "date", "window_days"],
+                set_=set_,
+            )
+            await self.session.execute(stmt)
+
+        await self.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def _trend_to_row(
+        entity_type: str,
+        entity_id: int,
+        end_date: date,
+        days: int,
+        trend: Dict
+    ) -> Dict[str, Any]:
+        """将趋势分析结果转换为 strength_trends 行字典"""
+        consolidation = trend.get("consolidation_info", {})
+        row: Dict[str, Any] = {
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "date": end_date,
+            "window_days": days,
+            "start_date": date.fromisoformat(trend["start_date"]) if trend.get("start_date") else None,
+            "end_date": date.fromisoformat(trend["end_date"]) if trend.get("end_date") else None,
+            "data_points": trend["data_points"],
+            "trend_type": trend["trend_type"],
+            "slope": trend["slope"],
+            "r_squared": trend["r_squared"],
+            "confidence": trend["confidence"],
+            "is_consolidating": trend["is_consolidating"],
+            "std_dev": consolidation.get("std_dev"),
+            "price_range": consolidation.get("price_range"),
+            "support_level": consolidation.get("support_level"),
+            "resistance_level": consolidation.get("resistance_level"),
+        }
+        for window in MA_TREND_WINDOWS:
+            ma_trend = trend.get("ma_trends", {}).get(f"ma{window}", {})
+            row[f"ma{window}_direction"] = ma_trend.get("direction")
+            row[f"ma{window}_slope"] = ma_trend.get("ma_slope")
+        return row
+
+    async def get_persisted_trends(
+        self,
+        entity_type: str,
+        end_date: Optional[date] = None,
+        days: int = 30,
+        entity_ids: Optional[List[int]] = None,
+        trend_type: Optional[str] = None
+    ) -> List[StrengthTrend]:
+        """
+        读取已写入的趋势标签
+
+        Args:
+            entity_type: 实体类型
+            end_date: 窗口结束日期，None 表示最新一次批量识别的日期
+            days: 窗口天数
+            entity_ids: 限定的实体ID列表
+            trend_type: 只返回指定趋势类型
+
+        Returns:
+            StrengthTrend 列表，按实体ID排序
+        """
+        if end_date is None:
+            latest_stmt = select(func.max(StrengthTrend.date)).where(
+                StrengthTrend.entity_type == entity_type,
+                StrengthTrend.window_days == days,
+            )
+            end_date = (await self.session.execute(latest_stmt)).scalar()
+            if end_date is None:
+                return []
+
+        stmt = select(StrengthTrend).where(
+            StrengthTrend.entity_type == entity_type,
+            StrengthTrend.date == end_date,
+            StrengthTrend.window_days == days,
+        )
+        if entity_ids is not None:
+            stmt = stmt.where(StrengthTrend.entity_id.in_(entity_ids))
+        if trend_type is not None:
+            stmt = stmt.where(StrengthTrend.trend_type == trend_type)
+
+        result = await self.session.execute(stmt.order_by(StrengthTrend.entity_id))
+        return list(result.scalars().all())
@@ -142,6 +142,10 @@ async def test_session():
     if hasattr(core_db_module, "AsyncSessionLocal"):
         core_db_module.AsyncSessionLocal = async_session
 
+    # 数据日期注册表是进程级的，每个测试 schema 重新加载
+    from src.services.data_date_registry import data_date_registry
+    data_date_registry.invalidate()
+
     session = async_session()
     try:
         yield session
@@ -177,6 +181,16 @@ async def db(test_session: AsyncSession):
     yield test_session
 
 
+async def _refresh_latest_scores(session: AsyncSession):
+    """像强度写入一样刷新最新强度得分读模型，并让数据日期注册表重新加载"""
+    from src.repositories.strength_score_repository import StrengthScoreRepository
+    from src.services.data_date_registry import data_date_registry
+
+    await StrengthScoreRepository(session).refresh_latest()
+    await session.commit()
+    data_date_registry.invalidate()
+
+
 # Sample 数据 fixtures
 @pytest_asyncio.fixture
 async def sample_sectors(test_session: AsyncSession):
@@ -277,6 +291,7 @@ async def sample_strength_scores(test_session: AsyncSession, sample_sectors):
 
     test_session.add_all(scores)
     await test_session.commit()
+    await _refresh_latest_scores(test_session)
 
     return scores
 
@@ -326,5 +341,6 @@ async def sample_strength_scores_missing(test_session: AsyncSession, sample_sect
 
     test_session.add(score)
     await test_session.commit()
+    await _refresh_latest_scores(test_session)
 
     return [score]
@@ -13,6 +13,7 @@ from src.services.sector_classification_service import (
     SectorClassificationService,
     ClassificationResult,
     calculate_classification_level,
+    calculate_classification_levels,
     calculate_state,
 )
 from src.exceptions.classification import (
@@ -60,6 +61,32 @@ class TestCalculateClassificationLevel:
             calculate_classification_level(110, ma_values)
 
 
+class TestCalculateClassificationLevels:
+    """测试分类级别数组计算函数"""
+
+    MA_KEYS = ['ma_5', 'ma_10', 'ma_20', 'ma_30', 'ma_60', 'ma_90', 'ma_120', 'ma_240']
+
+    def test_matches_scalar_function(self):
+        """测试与逐条计算结果完全一致（含价格等于均线的边界）"""
+        import numpy as np
+
+        rng = np.random.default_rng(42)
+        ma_matrix = np.round(rng.uniform(90, 110, size=(2000, 8)), 2)
+        prices = np.round(rng.uniform(88, 112, size=2000), 2)
+        # 部分价格恰好等于某条均线
+        edge = rng.integers(0, 8, size=500)
+        prices[:500] = ma_matrix[np.arange(500), edge]
+
+        levels = calculate_classification_levels(prices, ma_matrix)
+
+        expected = [
+            calculate_classification_level(float(price), dict(zip(self.MA_KEYS, row.tolist())))
+            for price, row in zip(prices, ma_matrix)
+        ]
+        assert levels.tolist() == expected
+        assert set(expected) == set(range(1, 10))
+
+
 class TestCalculateState:
     """测试状态计算函数"""
 
@@ -101,14 +128,15 @@ class TestSectorClassificationService:
     @pytest.mark.asyncio
     async def test_get_ma_data_success(self, service, mock_session):
         """测试成功获取均线数据"""
-        from src.models.moving_average_data import MovingAverageData
-        from sqlalchemy import select
+        from src.models.moving_average_daily import MovingAverageDaily
 
-        # 创建mock结果
+        # 创建mock结果：均线日表中的一行
         mock_result = MagicMock()
-        mock_ma = MagicMock()
-        mock_ma.ma_value = 100.0
-        mock_result.scalar_one_or_none.return_value = mock_ma
+        mock_result.scalar_one_or_none.return_value = MovingAverageDaily(
+            entity_type="sector", entity_id=1, symbol="1", date=date.today(),
+            ma5=100.0, ma10=95.0, ma20=90.0, ma30=85.0,
+            ma60=80.0, ma90=75.0, ma120=70.0, ma240=65.0
+        )
 
         mock_session.execute.return_value = mock_result
 
@@ -207,6 +235,38 @@ async def test_initialize_classifications_basic():
     assert service._progress_callback == progress_mock
 
 
+@pytest.mark.asyncio
+async def test_initialize_classifications_history_mode():
+    """测试历史模式：每个板块一次计算、跳过已存在日期并批量写入"""
+    mock_session = AsyncMock(spec=AsyncSession)
+    service = SectorClassificationService(mock_session)
+
+    sectors_result = MagicMock()
+    sectors_result.all.return_value = [(1, "银行", "881001"), (2, "券商", "881002")]
+    existing_result = MagicMock()
+    existing_result.scalars.return_value.all.return_value = [date(2024, 1, 2)]
+    mock_session.execute.side_effect = [sectors_result, existing_result]
+    mock_session.begin_nested = MagicMock(return_value=AsyncMock())
+
+    rows = [
+        {"sector_id": 1, "classification_date": date(2024, 1, d)}
+        for d in (2, 3, 4)
+    ]
+    with patch.object(service, "_build_history_rows", AsyncMock(side_effect=[rows, None])), \
+         patch.object(
+             service, "_bulk_upsert_classifications",
+             AsyncMock(return_value={"created": 2, "updated": 0, "skipped": 0})
+         ) as mock_upsert:
+        result = await service.initialize_classifications()
+
+    written = mock_upsert.await_args.args[0]
+    assert [row["classification_date"] for row in written] == [date(2024, 1, 3), date(2024, 1, 4)]
+    assert result["created"] == 2
+    # 1 个已存在日期 + 1 个无数据板块
+    assert result["skipped"] == 2
+    assert result["errors"] == 0
+
+
 class TestClassificationResult:
     """测试分类结果数据类"""
 
@@ -4,6 +4,7 @@
 测试 SectorMAService 的智能查询范围和均线计算功能。
 """
 
+import numpy as np
 import pytest
 from datetime import date, timedelta
 from unittest.mock import Mock, AsyncMock, patch, call
@@ -439,3 +440,96 @@ class TestSectorMAServiceIntegration:
 
         assert query_end_date == actual_max_date
         assert query_start_date == date(2024, 12, 31) - timedelta(days=480)
+
+
+class TestSectorMABulkWrite:
+    """测试均线批量写入"""
+
+    @pytest.mark.asyncio
+    async def test_rows_written_in_single_bulk_upsert(self, mock_session, sample_sector, sample_market_data):
+        """测试各周期汇总后一次批量写入，并遵守断点和保存范围"""
+        service = SectorMAService(mock_session)
+
+        data_result = Mock()
+        data_result.all.return_value = list(reversed(sample_market_data))
+        latest_result = Mock()
+        latest_result.all.return_value = [("5d", date(2024, 9, 1))]
+        mock_session.execute.side_effect = [data_result, latest_result]
+
+        start_date = date(2024, 8, 1)
+        end_date = date(2024, 9, 30)
+        with patch.object(
+            service.ma_repo, "bulk_upsert",
+            AsyncMock(return_value={"created": 7, "updated": 0, "skipped": 0})
+        ) as mock_upsert:
+            result = await service._calculate_single_sector_ma(
+                sector=sample_sector,
+                start_date=start_date,
+                end_date=end_date,
+                periods=[5, 20],
+                overwrite=False
+            )
+
+        assert result == {"success": True, "created": 7, "updated": 0, "skipped": 0}
+        mock_upsert.assert_awaited_once()
+        rows = mock_upsert.await_args.args[0]
+        assert mock_upsert.await_args.kwargs == {"overwrite": False}
+        mock_session.commit.assert_awaited_once()
+
+        rows_5d = [r for r in rows if r["period"] == "5d"]
+        rows_20d = [r for r in rows if r["period"] == "20d"]
+        # 5 日均线从断点之后开始保存，20 日均线保存整个范围
+        assert min(r["date"] for r in rows_5d) == date(2024, 9, 2)
+        assert min(r["date"] for r in rows_20d) == start_date
+        assert max(r["date"] for r in rows) == end_date
+        assert len(rows_20d) == (end_date - start_date).days + 1
+
+        closes = {md.date: md.close for md in sample_market_data}
+        window = [closes[end_date - timedelta(days=i)] for i in range(5)]
+        last_5d = next(r for r in rows_5d if r["date"] == end_date)
+        assert last_5d["ma_value"] == pytest.approx(sum(window) / 5)
+        assert last_5d["entity_type"] == "sector"
+        assert last_5d["symbol"] == sample_sector.code
+
+    def test_build_rows_skips_nan(self):
+        """测试行构建：NaN 均线不生成行"""
+        from src.repositories.market_data_repository import MovingAverageRepository
+
+        dates = [date(2024, 1, d) for d in range(1, 4)]
+        rows = MovingAverageRepository.build_rows(
+            "sector", 1, "TEST001", 5, dates,
+            np.array([np.nan, 10.0, 0.0]),
+            np.array([0.0, 10.0, 0.0]),
+            np.array([0, 1, 0], dtype=np.int8)
+        )
+
+        assert [r["date"] for r in rows] == dates[1:]
+        assert [r["period"] for r in rows] == ["5d", "5d"]
+        assert rows[0]["price_ratio"] == pytest.approx(10.0)
+        assert rows[0]["trend"] == 1
+        assert isinstance(rows[0]["trend"], int)
+
+    @pytest.mark.asyncio
+    async def test_bulk_upsert_refreshes_daily_rows(self, mock_session):
+        """测试批量写入后只刷新实际写入的 (实体, 日期) 的均线日表行"""
+        from src.repositories.market_data_repository import MovingAverageRepository
+
+        repo = MovingAverageRepository(mock_session)
+        upsert_result = Mock()
+        upsert_result.all.return_value = [
+            (True, "sector", 1, date(2024, 1, 2)),
+            (False, "sector", 1, date(2024, 1, 3)),
+        ]
+        mock_session.execute.return_value = upsert_result
+
+        rows = [
+            {"entity_type": "sector", "entity_id": 1, "symbol": "TEST001", "date": date(2024, 1, d),
+             "period": "5d", "ma_value": 10.0, "price_ratio": 0.0, "trend": 0}
+            for d in (2, 3, 4)
+        ]
+        with patch.object(repo, "refresh_daily", AsyncMock(return_value=2)) as mock_refresh:
+            counts = await repo.bulk_upsert(rows, overwrite=True)
+
+        assert counts == {"created": 1, "updated": 1, "skipped": 1}
+        keys = mock_refresh.await_args.args[0]
+        assert sorted(keys) == [("sector", 1, date(2024, 1, 2)), ("sector", 1, date(2024, 1, 3))]
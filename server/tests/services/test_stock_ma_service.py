@@ -0,0 +1,111 @@
+"""
+股票均线服务单元测试
+
+测试 StockMAService 的增量均线计算功能。
+"""
+
+import pytest
+from datetime import date, timedelta
+from unittest.mock import Mock, AsyncMock, patch
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.services.stock_ma_service import StockMAService
+
+
+@pytest.fixture
+def mock_session():
+    """模拟数据库会话"""
+    session = Mock(spec=AsyncSession)
+    session.execute = AsyncMock()
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+    return session
+
+
+def _scalar_result(value):
+    result = Mock()
+    result.scalar.return_value = value
+    return result
+
+
+def _scalars_result(values):
+    result = Mock()
+    result.scalars.return_value.all.return_value = values
+    return result
+
+
+def _rows_result(rows):
+    result = Mock()
+    result.all.return_value = rows
+    return result
+
+
+class TestStockMAIncremental:
+    """测试增量均线计算"""
+
+    @pytest.mark.asyncio
+    async def test_requires_existing_ma(self, mock_session):
+        """测试没有已有均线时提示先执行完整计算"""
+        service = StockMAService(mock_session)
+        mock_session.execute.return_value = _scalar_result(None)
+
+        result = await service.calculate_incremental_ma()
+
+        assert result["success"] is False
+        assert "完整计算" in result["error"]
+
+    @pytest.mark.asyncio
+    async def test_up_to_date(self, mock_session):
+        """测试均线已是最新时不写入"""
+        service = StockMAService(mock_session)
+        mock_session.execute.side_effect = [
+            _scalar_result(date(2024, 6, 28)),
+            _scalars_result([]),
+        ]
+
+        with patch.object(service.ma_repo, "bulk_upsert", AsyncMock()) as mock_upsert:
+            result = await service.calculate_incremental_ma()
+
+        assert result == {"success": True, "trade_dates": 0, "created": 0, "updated": 0, "skipped": 0}
+        mock_upsert.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_one_batch_per_trading_day(self, mock_session):
+        """测试每个交易日为全市场写入一批，停牌股票不生成均线"""
+        service = StockMAService(mock_session)
+        trade_date = date(2024, 7, 1)
+        base = trade_date - timedelta(days=9)
+
+        # 股票1: 10 个交易日，当天有行情；当天停牌的股票不在查询结果中
+        window_rows = [(1, "600000", base + timedelta(days=i), 10.0 + i) for i in range(10)]
+
+        mock_session.execute.side_effect = [
+            _scalar_result(date(2024, 6, 28)),
+            _scalars_result([trade_date]),
+            _rows_result(window_rows),
+        ]
+
+        with patch.object(
+            service.ma_repo, "bulk_upsert",
+            AsyncMock(return_value={"created": 2, "updated": 0, "skipped": 0})
+        ) as mock_upsert:
+            result = await service.calculate_incremental_ma(periods=[5, 10, 20])
+
+        assert result == {"success": True, "trade_dates": 1, "created": 2, "updated": 0, "skipped": 0}
+        mock_upsert.assert_awaited_once()
+        mock_session.commit.assert_awaited_once()
+
+        # 只读取当天有行情的股票，每只股票按索引倒序取最近 window 个收盘价
+        sql = str(mock_session.execute.await_args_list[2].args[0].compile(dialect=postgresql.dialect()))
+        assert "JOIN LATERAL (SELECT" in sql
+        assert "ORDER BY daily_market_data_1.date DESC" in sql
+        assert "row_number()" not in sql
+
+        rows = mock_upsert.await_args.args[0]
+        assert [(r["entity_id"], r["period"]) for r in rows] == [(1, "5d"), (1, "10d")]
+        assert all(r["date"] == trade_date for r in rows)
+        assert rows[0]["ma_value"] == pytest.approx((15 + 16 + 17 + 18 + 19) / 5)
+        assert rows[1]["ma_value"] == pytest.approx(14.5)
+        assert rows[0]["price_ratio"] == pytest.approx((19 - 17) / 17 * 100)
+        assert rows[0]["trend"] == 1
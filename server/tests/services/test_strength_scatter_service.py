@@ -4,8 +4,13 @@
 
 import pytest
 from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.services.cache.strength_cache import SCATTER_MISS_CACHE_TTL
 from src.services.strength_scatter_service import StrengthScatterService
 from src.models.sector import Sector
 from src.models.strength_score import StrengthScore
@@ -240,3 +245,93 @@ async def test_build_grade_filter(db_session: AsyncSession):
     # 测试无筛选
     filter_none = service._build_grade_filter(None, None)
     assert filter_none is None
+
+
+def _point(score_id, sector_type, score):
+    """构造散点数据集中的数据点"""
+    return {
+        'code': f'BK{score_id:04d}',
+        'name': f'板块{score_id}',
+        'sector_type': sector_type,
+        'score_id': score_id,
+        'score': Decimal(str(score)),
+        'short_term_score': Decimal('50.00'),
+        'medium_term_score': Decimal('60.00'),
+        'long_term_score': None,
+        'strong_stock_ratio': None,
+        'strength_grade': 'B',
+    }
+
+
+def _cached_service(dataset):
+    """返回缓存中已有数据集的服务"""
+    session = AsyncMock()
+    cache = MagicMock()
+    cache.get_scatter = AsyncMock(return_value=dataset)
+    cache.set_scatter = AsyncMock(return_value=True)
+    return StrengthScatterService(session, cache=cache), session, cache
+
+
+@pytest.mark.asyncio
+class TestPrecomputedScatter:
+    """预计算散点数据集测试"""
+
+    DATASET = {
+        'date': date(2024, 6, 10),
+        'industry': [_point(5, 'industry', 91), _point(3, 'industry', 72), _point(1, 'industry', 40)],
+        'concept': [_point(4, 'concept', 85), _point(2, 'concept', 72), _point(6, 'concept', 30)],
+    }
+
+    async def test_cache_hit_serves_without_query(self):
+        """测试命中缓存时不查询数据库，并在数据集上筛选"""
+        service, session, cache = _cached_service(self.DATASET)
+
+        result = await service.get_scatter_data(
+            calc_date=date(2024, 6, 10), min_grade='A+', max_grade='S+', sector_type='industry'
+        )
+
+        assert result.cache_status == 'hit'
+        assert result.total_count == 2
+        assert [p.symbol for p in result.scatter_data.industry] == ['BK0005', 'BK0003']
+        assert result.scatter_data.concept == []
+        session.execute.assert_not_awaited()
+        cache.get_scatter.assert_awaited_once_with(date(2024, 6, 10))
+
+    async def test_cursor_walk_covers_all_points(self):
+        """测试游标翻页按 (得分, 记录ID) 降序覆盖所有数据点且不重复"""
+        service, _, _ = _cached_service(self.DATASET)
+
+        symbols, cursor = [], None
+        while True:
+            result = await service.get_scatter_data(calc_date=date(2024, 6, 10), limit=2, cursor=cursor)
+            page = result.scatter_data.industry + result.scatter_data.concept
+            symbols.extend(sorted(page, key=lambda p: -p.full_data.score))
+            cursor = result.next_cursor
+            if cursor is None:
+                break
+
+        assert [p.symbol for p in symbols] == ['BK0005', 'BK0004', 'BK0003', 'BK0002', 'BK0001', 'BK0006']
+
+    async def test_cache_miss_builds_and_stores(self):
+        """测试未命中缓存时查询当日数据并回填"""
+        service, session, cache = _cached_service(None)
+        rows = [SimpleNamespace(_mapping=_point(7, 'concept', 66))]
+        result_mock = MagicMock()
+        result_mock.all.return_value = rows
+        session.execute.return_value = result_mock
+
+        result = await service.get_scatter_data(calc_date=date(2024, 6, 10))
+
+        assert result.cache_status == 'miss'
+        assert result.total_count == 1
+        assert session.execute.await_count == 1
+        sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "strength_scores.date = %(date_1)s" in sql
+        assert "count(" not in sql
+        stored_date, stored = cache.set_scatter.await_args.args
+        assert stored_date == date(2024, 6, 10)
+        # 该日期可能仍在计算，只短期缓存
+        assert cache.set_scatter.await_args.kwargs == {'ttl': SCATTER_MISS_CACHE_TTL}
+        assert [p['score_id'] for p in stored['concept']] == [7]
+        assert stored['industry'] == []
+
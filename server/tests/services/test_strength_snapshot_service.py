@@ -126,7 +126,7 @@ class TestCreateDailySnapshot:
         # 模拟第一个成功，第二个失败，第三个成功
         call_count = [0]
 
-        async def mock_calculate(stock_id, calc_date):
+        async def mock_calculate(stock_id, calc_date, update_change_rate=True):
             call_count[0] += 1
             if call_count[0] == 2:
                 return {"success": False, "error": "数据不足"}
@@ -241,41 +241,57 @@ class TestUpdateRanksAndPercentiles:
 
     @pytest.mark.asyncio
     async def test_update_stock_ranks(self, snapshot_service):
-        """测试更新股票排名"""
-        test_date = date.today()
-
-        # 模拟股票分数数据
-        mock_scores = [
-            MagicMock(id=1, score=95),
-            MagicMock(id=2, score=85),
-            MagicMock(id=3, score=75),
-        ]
+        """测试股票和板块各用一条 UPDATE ... FROM 窗口查询赋予排名和百分位"""
+        from sqlalchemy.dialects import postgresql
 
-        stock_result = MagicMock()
-        stock_result.scalars.return_value.all.return_value = mock_scores
-
-        sector_result = MagicMock()
-        sector_result.scalars.return_value.all.return_value = []
-
-        # 模拟 session.execute
-        execute_results = [stock_result, sector_result]
-
-        async def mock_execute(stmt):
-            return execute_results.pop(0) if execute_results else MagicMock()
+        test_date = date.today()
+        snapshot_service.session.execute = AsyncMock(
+            side_effect=[
+                MagicMock(rowcount=3), MagicMock(rowcount=0), MagicMock(rowcount=3),
+                MagicMock(), MagicMock(rowcount=2),
+            ]
+        )
 
-        snapshot_service.session.execute = mock_execute
+        with patch("src.services.strength_snapshot_service.StrengthCache") as mock_cache:
+            mock_cache.return_value.invalidate_scatter = AsyncMock(return_value=1)
+            await snapshot_service._update_ranks_and_percentiles(test_date)
+
+        # 提交后失效当日散点图缓存
+        mock_cache.return_value.invalidate_scatter.assert_awaited_once_with(test_date, test_date)
+        statements = [c.args[0] for c in snapshot_service.session.execute.await_args_list]
+        assert len(statements) == 5
+        sql = str(statements[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE strength_scores SET rank=ranked.rank, percentile=")
+        assert "row_number() OVER (PARTITION BY strength_scores.entity_type, strength_scores.date" in sql
+        # 排名更新后刷新最新得分读模型
+        sql = str(statements[2].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO latest_strength_scores")
+        sql = str(statements[3].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO data_versions")
+        # 以及每日强度汇总
+        sql = str(statements[4].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO daily_strength_aggregates")
+        snapshot_service.session.commit.assert_awaited_once()
 
-        await snapshot_service._update_ranks_and_percentiles(test_date)
+    @pytest.mark.asyncio
+    async def test_batch_snapshots_rank_range_once(self, snapshot_service):
+        """测试批量快照在所有日期完成后一次性为整个范围排名"""
+        start = date(2024, 1, 1)
+        end = date(2024, 1, 3)
+        snapshot_service.create_daily_snapshot = AsyncMock(
+            return_value={"summary": {"total_entities": 1, "total_success": 1, "total_error": 0}}
+        )
+        snapshot_service.strength_service.update_change_rates = AsyncMock(return_value=0)
+        snapshot_service._update_ranks_and_percentiles = AsyncMock()
+        snapshot_service.session.execute = AsyncMock(return_value=MagicMock())
 
-        # 验证排名设置
-        assert mock_scores[0].rank == 1
-        assert mock_scores[1].rank == 2
-        assert mock_scores[2].rank == 3
+        await snapshot_service.batch_create_snapshots(start, end)
 
-        # 验证百分位设置
-        assert mock_scores[0].percentile == 100.0
-        assert mock_scores[1].percentile == pytest.approx(66.67, rel=1e-2)
-        assert mock_scores[2].percentile == pytest.approx(33.33, rel=1e-2)
+        assert all(
+            c.kwargs["update_ranks"] is False
+            for c in snapshot_service.create_daily_snapshot.await_args_list
+        )
+        snapshot_service._update_ranks_and_percentiles.assert_awaited_once_with(start, end)
 
 
 class TestGetSnapshotStatus:
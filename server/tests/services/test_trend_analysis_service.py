@@ -392,3 +392,82 @@ class TestTrendAnalysisIntegration:
 
         # 性能检查：应该在合理时间内完成
         print(f"横盘检测 (100天数据) 耗时: {elapsed:.2f}ms")
+
+
+class TestBatchIdentifyTrends:
+    """批量趋势识别测试"""
+
+    @staticmethod
+    def _score_rows(series):
+        """{实体ID: 得分列表} -> 按 (entity_id, date) 排序的查询行"""
+        end = date(2024, 6, 28)
+        rows = []
+        for entity_id, scores in sorted(series.items()):
+            for offset, score in enumerate(scores):
+                rows.append((entity_id, end - timedelta(days=len(scores) - 1 - offset), score))
+        return rows
+
+    @pytest.mark.asyncio
+    async def test_matches_single_entity_identification(self, trend_service, mock_session):
+        """测试批量结果与逐个实体识别一致"""
+        series = {
+            1: [60.0 + i * 0.8 for i in range(25)],
+            2: [80.0 - i * 0.3 + (i % 3) * 0.2 for i in range(12)],
+            3: [50.0, 50.5, 49.8, 50.2, 50.1, 49.9],
+            4: [70.0, 71.0],
+        }
+        rows = self._score_rows(series)
+        query_result = MagicMock()
+        query_result.all.return_value = rows
+        mock_session.execute.return_value = query_result
+
+        batch = await trend_service.batch_identify_trends(
+            "stock", days=30, end_date=date(2024, 6, 28), persist=False
+        )
+
+        # 一次查询加载全部实体
+        assert mock_session.execute.await_count == 1
+        assert set(batch) == {1, 2, 3, 4}
+
+        for entity_id in series:
+            history = [
+                {"date": row[1], "score": row[2]}
+                for row in rows if row[0] == entity_id
+            ]
+            trend_service.history_service.get_stock_history = AsyncMock(return_value=history)
+            single = await trend_service.identify_trend("stock", entity_id, days=30, end_date=date(2024, 6, 28))
+            assert batch[entity_id] == single
+
+    @pytest.mark.asyncio
+    async def test_no_scores_returns_empty(self, trend_service, mock_session):
+        """测试窗口内无数据时返回空结果且不写入"""
+        query_result = MagicMock()
+        query_result.all.return_value = []
+        mock_session.execute.return_value = query_result
+
+        assert await trend_service.batch_identify_trends("sector", end_date=date(2024, 6, 28)) == {}
+        mock_session.commit.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_persist_upserts_labelled_entities(self, trend_service, mock_session):
+        """测试只写入识别成功的实体，使用 ON CONFLICT 更新"""
+        from sqlalchemy.dialects import postgresql
+
+        query_result = MagicMock()
+        query_result.all.return_value = self._score_rows({
+            1: [60.0 + i for i in range(10)],
+            2: [70.0, 71.0],
+        })
+        mock_session.execute.return_value = query_result
+
+        await trend_service.batch_identify_trends("stock", days=10, end_date=date(2024, 6, 28))
+
+        assert mock_session.execute.await_count == 2
+        mock_session.commit.assert_awaited_once()
+        stmt = mock_session.execute.await_args_list[1].args[0]
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO strength_trends")
+        assert "ON CONFLICT (entity_type, entity_id, date, window_days) DO UPDATE" in sql
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        assert params["entity_id_m0"] == 1
+        assert "entity_id_m1" not in params
@@ -11,6 +11,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.services.cache.backends.db_cache import DatabaseCache
+from src.services.cache.backends.memory_cache import MemoryCache
 from src.services.cache.cache_manager import CacheManager, get_cache_manager
 from src.models.cache import CacheEntry
 
@@ -168,6 +169,130 @@ class TestDatabaseCache:
 
             assert count == 3
 
+    @pytest.mark.asyncio
+    async def test_get_many_single_query(self, db_cache):
+        """测试批量获取只执行一次 IN 查询"""
+        import pickle
+
+        with patch('src.services.cache.backends.db_cache.get_session') as mock_session_getter:
+            mock_session = AsyncMock()
+            mock_session_getter.return_value.__aenter__.return_value = mock_session
+
+            mock_result = MagicMock()
+            mock_result.all.return_value = [
+                ("k1", pickle.dumps({"v": 1})),
+                ("k3", pickle.dumps([3])),
+            ]
+            mock_session.execute.return_value = mock_result
+
+            result = await db_cache.get_many(["k1", "k2", "k3", "k1"])
+
+            assert result == {"k1": {"v": 1}, "k3": [3]}
+            mock_session.execute.assert_awaited_once()
+            assert "IN" in str(mock_session.execute.await_args.args[0])
+
+    @pytest.mark.asyncio
+    async def test_set_many_single_upsert(self, db_cache):
+        """测试批量设置使用一条 upsert 并提交一次"""
+        with patch('src.services.cache.backends.db_cache.get_session') as mock_session_getter:
+            mock_session = AsyncMock()
+            mock_session_getter.return_value.__aenter__.return_value = mock_session
+
+            count = await db_cache.set_many({"k1": 1, "k2": {"v": 2}}, ttl=60)
+
+            assert count == 2
+            mock_session.execute.assert_awaited_once()
+            mock_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+class TestMemoryCache:
+    """进程内缓存测试"""
+
+    async def test_set_get_and_ttl(self):
+        """测试设置、获取和剩余 TTL"""
+        cache = MemoryCache()
+
+        assert await cache.set("sectors:detail:1", {"name": "银行"}, ttl=300)
+        assert await cache.get("sectors:detail:1") == {"name": "银行"}
+        assert 295 <= await cache.ttl("sectors:detail:1") <= 300
+        assert await cache.get("missing") is None
+
+    async def test_expired_entries(self):
+        """测试过期条目不返回并可被清理"""
+        cache = MemoryCache()
+        await cache.set_many({"a": 1, "b": 2}, ttl=-1)
+        await cache.set("c", 3, ttl=60)
+
+        assert await cache.get_many(["a", "b", "c"]) == {"c": 3}
+        assert not await cache.exists("a")
+        await cache.set("d", 4, ttl=-1)
+        assert await cache.cleanup_expired() == 1
+
+    async def test_get_many_set_many(self):
+        """测试批量读写"""
+        cache = MemoryCache(shards=4)
+        mapping = {f"strength:stock:{i}": i for i in range(100)}
+
+        assert await cache.set_many(mapping, ttl=60) == 100
+        result = await cache.get_many(list(mapping) + ["strength:stock:missing"])
+
+        assert result == mapping
+        stats = cache.get_stats()
+        assert stats["hits"] == 100
+        assert stats["misses"] == 1
+
+    async def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未访问的条目"""
+        cache = MemoryCache(shards=1, max_entries=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+
+        assert await cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+    async def test_clear_pattern_uses_like_syntax(self):
+        """测试按 SQL LIKE 模式清除"""
+        cache = MemoryCache()
+        await cache.set_many({"sectors:list:industry": 1, "sectors:detail:1": 2, "stocks:detail:1": 3})
+
+        assert await cache.clear_pattern("sectors:%") == 2
+        assert await cache.clear_pattern("stocks:detail:_") == 1
+        assert await cache.clear_all() == 0
+
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        """测试磁盘层在重新打开后仍可读取，删除也会保留"""
+        path = str(tmp_path / "cache.bin")
+        cache = MemoryCache(disk_path=path)
+        await cache.set_many({"a": {"v": 1}, "b": [2], "c": "3"}, ttl=300)
+        await cache.delete("b")
+        cache.close()
+
+        reopened = MemoryCache(disk_path=path)
+        assert await reopened.get_many(["a", "b", "c"]) == {"a": {"v": 1}, "c": "3"}
+        assert reopened.get_stats()["disk_hits"] == 2
+        assert await reopened.ttl("a") > 0
+        reopened.close()
+
+    async def test_disk_tier_truncates_partial_record(self, tmp_path):
+        """测试磁盘文件末尾不完整的记录被丢弃"""
+        path = tmp_path / "cache.bin"
+        cache = MemoryCache(disk_path=str(path))
+        await cache.set("a", 1)
+        cache.close()
+        with open(path, "ab") as f:
+            f.write(b"\x00\x01\x02")
+
+        reopened = MemoryCache(disk_path=str(path))
+        assert await reopened.get("a") == 1
+        await reopened.set("b", 2)
+        reopened.close()
+
+        again = MemoryCache(disk_path=str(path))
+        assert await again.get_many(["a", "b"]) == {"a": 1, "b": 2}
+        again.close()
+
 
 class TestCacheManager:
     """缓存管理器测试"""
@@ -177,6 +302,11 @@ class TestCacheManager:
         manager = CacheManager(backend="database")
         assert isinstance(manager._backend, DatabaseCache)
 
+    def test_init_memory_backend(self):
+        """测试初始化进程内后端"""
+        manager = CacheManager(backend="memory", shards=4)
+        assert isinstance(manager._backend, MemoryCache)
+
     def test_singleton(self):
         """测试单例模式"""
         # Reset singleton
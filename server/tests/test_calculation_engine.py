@@ -173,6 +173,72 @@ class TestMovingAverageCalculator:
         assert abs(ratios[10] - 7.14) < 0.1
         assert abs(ratios[20] - 10.53) < 0.1
 
+    def test_calculate_sma_matrix_matches_rolling(self, calculator):
+        """测试矩阵均线与逐实体 rolling 结果一致（长度不一、含 NaN 缺口）"""
+        rng = np.random.default_rng(42)
+        sequences = [rng.uniform(5, 500, n) for n in (0, 3, 30, 130, 260)]
+        sequences[3][[10, 11, 70]] = np.nan
+        periods = [5, 10, 20, 30, 60, 90, 120, 240]
+
+        prices = calculator.pack_price_matrix(sequences)
+        ma_matrix = calculator.calculate_sma_matrix(prices, periods)
+
+        assert ma_matrix.shape == (5, 260, 8)
+        for row, seq in enumerate(sequences):
+            for idx, period in enumerate(periods):
+                expected = pd.Series(seq, dtype=float).rolling(period, min_periods=period).mean()
+                np.testing.assert_allclose(ma_matrix[row, :len(seq), idx], expected, rtol=1e-12)
+                # 补齐位置没有均线
+                assert np.isnan(ma_matrix[row, len(seq):, idx]).all()
+
+    def test_calculate_all_periods_ratio_and_trend(self, calculator):
+        """测试矩阵价格比率、趋势与逐点计算一致"""
+        prices = np.array([[10.0, 10.0, 10.0, 12.0, 8.0, np.nan]])
+        result = calculator.calculate_all_periods(prices, [3])
+
+        ma = result["ma"][0, :, 0]
+        ratios = result["price_ratio"][0, :, 0]
+        trends = result["trend"][0, :, 0]
+
+        assert np.isnan(ma[:2]).all()
+        # 价格与均线相等：比率为 0，趋势持平
+        assert ma[2] == 10.0 and ratios[2] == 0.0 and trends[2] == 0
+        assert ratios[3] == pytest.approx(calculator.calculate_price_ratio(12.0, ma[3]))
+        assert trends[3] == 1
+        assert trends[4] == -1
+        # 窗口内含 NaN 时没有均线，比率取 0
+        assert np.isnan(ma[5]) and ratios[5] == 0.0
+
+    def test_calculate_latest_sma_matches_matrix(self, calculator):
+        """测试只计算最后一个交易日的均线与矩阵结果一致"""
+        rng = np.random.default_rng(7)
+        sequences = [rng.uniform(5, 500, n) for n in (3, 20, 61, 240)]
+        sequences[2][-11] = np.nan
+        periods = [5, 10, 20, 60, 240]
+
+        prices = calculator.pack_price_matrix(sequences)
+        lengths = np.array([len(seq) for seq in sequences])
+        latest = calculator.calculate_latest_sma(prices, lengths, periods)
+        ma_matrix = calculator.calculate_sma_matrix(prices, periods)
+
+        expected = ma_matrix[np.arange(len(sequences)), lengths - 1, :]
+        np.testing.assert_array_equal(np.isnan(latest), np.isnan(expected))
+        np.testing.assert_allclose(latest, expected, rtol=1e-12)
+        # 窗口内含 NaN 的 20/60 日均线无值，5/10 日均线正常
+        assert np.isnan(latest[2, 2:]).all()
+        assert np.isfinite(latest[2, :2]).all()
+
+    def test_latest_valid_values(self, calculator):
+        """测试批量获取最新有效均线值"""
+        prices = calculator.pack_price_matrix([[1, 2, 3, 4, 5, 6], [1, 2], []])
+        ma_matrix = calculator.calculate_sma_matrix(prices, [2, 5])
+        latest = calculator.latest_valid_values(ma_matrix)
+
+        assert latest[0].tolist() == [5.5, 4.0]
+        assert latest[1, 0] == 1.5
+        assert np.isnan(latest[1, 1])
+        assert np.isnan(latest[2]).all()
+
 
 class TestTrendAnalyzer:
     """趋势分析器测试"""
@@ -324,6 +390,24 @@ class TestStrengthCalculator:
         assert result["strength_score"] is not None
         assert 0 <= result["strength_score"] <= 100
 
+    def test_calculate_strength_from_ma_matches_entity_strength(self, calculator, sample_prices):
+        """测试由最新均线值计算强度与完整计算结果一致"""
+        current_price = 109.9
+        expected = calculator.calculate_entity_strength(
+            prices=sample_prices,
+            current_price=current_price,
+            period_configs=DEFAULT_PERIOD_CONFIGS,
+        )
+
+        result = calculator.calculate_strength_from_ma(
+            current_price=current_price,
+            latest_ma_values=expected["ma_values"],
+            period_configs=DEFAULT_PERIOD_CONFIGS,
+            partial_calculation=expected["partial_calculation"],
+        )
+
+        assert result == expected
+
     def test_calculate_entity_strength_insufficient_data(self, calculator):
         """测试数据不足的情况"""
         short_prices = pd.Series([100, 101, 102])
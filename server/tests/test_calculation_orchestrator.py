@@ -0,0 +1,94 @@
+"""
+计算流程协调器测试
+
+测试板块成分股汇总阶段的查询组织与结果映射。
+"""
+
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import src.services.calculator_updater.orchestrator as orchestrator_module
+from src.services.calculator_updater.orchestrator import CalculationOrchestrator
+
+
+def _session_factory(*results):
+    """返回依次产出给定查询结果的会话工厂"""
+    session = AsyncMock()
+    session.execute.side_effect = list(results)
+    return MagicMock(return_value=session), session
+
+
+def _scalar(value):
+    result = MagicMock()
+    result.scalar.return_value = value
+    return result
+
+
+def _dates(values):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = values
+    return result
+
+
+@pytest.mark.asyncio
+class TestSectorAggregation:
+    """板块成分股汇总测试"""
+
+    async def test_all_sectors_updated_in_one_statement(self):
+        """测试所有板块通过一条 UPDATE ... FROM 语句更新"""
+        update_result = MagicMock(rowcount=412)
+        factory, session = _session_factory(
+            _scalar(date(2024, 6, 10)),
+            _dates([date(2024, 6, 7), date(2024, 6, 6)]),
+            update_result,
+        )
+
+        with patch.object(orchestrator_module, "AsyncSessionLocal", factory):
+            count = await CalculationOrchestrator()._calculate_all_sectors()
+
+        assert count == 412
+        assert session.execute.await_count == 3
+        session.commit.assert_awaited_once()
+
+        sql = str(session.execute.await_args_list[2].args[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE strength_scores SET avg_stock_score=")
+        assert "FROM (SELECT members.sector_id" in sql
+        assert "sector_stocks" in sql
+
+    async def test_no_stock_scores_skips_update(self):
+        """测试没有个股强度数据时不执行汇总"""
+        factory, session = _session_factory(_scalar(None))
+
+        with patch.object(orchestrator_module, "AsyncSessionLocal", factory):
+            count = await CalculationOrchestrator()._calculate_all_sectors()
+
+        assert count == 0
+        assert session.execute.await_count == 1
+        session.commit.assert_not_awaited()
+
+    async def test_single_sector_aggregates(self):
+        """测试单个板块的汇总指标映射"""
+        row = SimpleNamespace(
+            avg_stock_score=62.5,
+            strong_stock_ratio=0.5,
+            up_stock_ratio=0.75,
+            volume_ratio=1.2,
+        )
+        aggregate_result = MagicMock()
+        aggregate_result.one_or_none.return_value = row
+        factory, _ = _session_factory(_dates([date(2024, 6, 7)]), aggregate_result)
+
+        with patch.object(orchestrator_module, "AsyncSessionLocal", factory):
+            aggregates = await CalculationOrchestrator()._calculate_sector_from_stocks(1, date(2024, 6, 10))
+
+        assert aggregates == {
+            "date": date(2024, 6, 10),
+            "avg_stock_score": 62.5,
+            "strong_stock_ratio": 0.5,
+            "up_stock_ratio": 0.75,
+            "volume_ratio": 1.2,
+        }
@@ -0,0 +1,131 @@
+"""异步 AkShare 数据源测试。"""
+
+import asyncio
+import threading
+import time
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.services.data_acquisition.async_client import AsyncAkShareDataSource, AsyncTokenBucket
+from src.services.data_acquisition.exceptions import RetryExhaustedError
+from src.services.data_acquisition.models import DailyQuote
+
+
+def _quote(symbol: str) -> DailyQuote:
+    return DailyQuote(
+        symbol=symbol,
+        trade_date=date(2026, 1, 2),
+        open=10.0,
+        high=11.0,
+        low=9.5,
+        close=10.5,
+        volume=1000,
+    )
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_requests():
+    bucket = AsyncTokenBucket(rate=50, capacity=1)
+
+    started = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+
+    # 第一个令牌立即可用，其余三个各需 20ms
+    assert time.monotonic() - started >= 0.055
+
+
+@pytest.mark.asyncio
+async def test_daily_data_downloads_run_concurrently_off_loop():
+    barrier = threading.Barrier(3, timeout=2)
+    source = MagicMock()
+
+    def _fetch(symbol, start_date, end_date):
+        # 三个下载必须同时在线程池中才能通过屏障
+        barrier.wait()
+        return [_quote(symbol)]
+
+    source.get_daily_data.side_effect = _fetch
+    client = AsyncAkShareDataSource(source, max_workers=3, requests_per_second=0)
+
+    results = await asyncio.gather(
+        *(client.get_daily_data(s, date(2026, 1, 1), date(2026, 1, 2)) for s in ["000001", "000002", "000003"])
+    )
+
+    assert [r[0].symbol for r in results] == ["000001", "000002", "000003"]
+    client.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_iter_daily_data_keeps_input_order_and_reports_errors():
+    source = MagicMock()
+
+    def _fetch(symbol, start_date, end_date):
+        if symbol == "000002":
+            raise ValueError("股票代码无效")
+        # 越靠前的代码越慢，验证结果仍按输入顺序返回
+        time.sleep(0.02 * (3 - int(symbol[-1])))
+        return [_quote(symbol)]
+
+    source.get_daily_data.side_effect = _fetch
+    client = AsyncAkShareDataSource(source, max_workers=2, requests_per_second=0)
+
+    items = [
+        item async for item in client.iter_daily_data(["000001", "000002", "000003"], date(2026, 1, 1), date(2026, 1, 2))
+    ]
+
+    assert [symbol for symbol, _ in items] == ["000001", "000002", "000003"]
+    assert items[0][1][0].symbol == "000001"
+    assert isinstance(items[1][1], ValueError)
+    assert items[2][1][0].symbol == "000003"
+    client.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_failures_with_backoff():
+    source = MagicMock()
+    source.source_name = "AkShare"
+    source.get_daily_data.side_effect = [
+        RetryExhaustedError("失败", source="AkShare", attempts=1, original_error=ConnectionError("reset")),
+        [_quote("000001")],
+    ]
+    client = AsyncAkShareDataSource(source, requests_per_second=0, retry_delay=0.01)
+
+    quotes = await client.get_daily_data("000001", date(2026, 1, 1), date(2026, 1, 2))
+
+    assert len(quotes) == 1
+    assert source.get_daily_data.call_count == 2
+    client.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_raises_retry_exhausted_after_max_retries():
+    source = MagicMock()
+    source.source_name = "AkShare"
+    source.get_daily_data.side_effect = RetryExhaustedError(
+        "失败", source="AkShare", attempts=1, original_error=ConnectionError("reset")
+    )
+    client = AsyncAkShareDataSource(source, max_retries=2, requests_per_second=0, retry_delay=0.01)
+
+    with pytest.raises(RetryExhaustedError) as exc_info:
+        await client.get_daily_data("000001", date(2026, 1, 1), date(2026, 1, 2))
+
+    assert exc_info.value.attempts == 2
+    assert isinstance(exc_info.value.original_error, ConnectionError)
+    assert source.get_daily_data.call_count == 2
+    client.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_validation_errors():
+    source = MagicMock()
+    source.get_daily_data.side_effect = ValueError("开始日期不能晚于结束日期")
+    client = AsyncAkShareDataSource(source, requests_per_second=0, retry_delay=0.01)
+
+    with pytest.raises(ValueError):
+        await client.get_daily_data("000001", date(2026, 1, 2), date(2026, 1, 1))
+
+    assert source.get_daily_data.call_count == 1
+    client.shutdown()
@@ -0,0 +1,91 @@
+"""
+数据日期注册表测试
+
+测试最新日期的加载、缓存、失效与按版本号重载。
+"""
+
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import src.services.data_date_registry as registry_module
+from src.services.data_date_registry import DataDateRegistry
+
+
+def _result(version=None, rows=None):
+    """返回版本号查询或日期查询的结果"""
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = version
+    result.all.return_value = rows or []
+    return result
+
+
+def _session(*results):
+    """返回依次产出给定结果的会话"""
+    session = AsyncMock()
+    session.execute.side_effect = list(results)
+    return session
+
+
+def _sql(session, index):
+    """第 index 次查询的 SQL"""
+    stmt = session.execute.await_args_list[index].args[0]
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+class TestDataDateRegistry:
+    """数据日期注册表测试"""
+
+    async def test_load_once_and_serve_from_memory(self):
+        """测试首次读取加载一次，比较间隔内的读取不再查询"""
+        session = _session(
+            _result(version=3),
+            _result(rows=[("stock", date(2024, 6, 10)), ("sector", date(2024, 6, 7))]),
+        )
+        registry = DataDateRegistry()
+
+        with patch.object(registry_module.time, "monotonic", return_value=100.0):
+            assert await registry.get_latest_date(session, "stock") == date(2024, 6, 10)
+            assert await registry.get_latest_date(session, "sector") == date(2024, 6, 7)
+            assert await registry.get_latest_date(session, "index") is None
+
+        assert session.execute.await_count == 2
+        assert "FROM data_versions \nWHERE data_versions.name = " in _sql(session, 0)
+        assert "FROM latest_strength_scores GROUP BY latest_strength_scores.entity_type" in _sql(session, 1)
+
+    async def test_invalidate_reloads(self):
+        """测试本进程写入后失效，下一次读取重新加载"""
+        session = _session(
+            _result(version=1), _result(rows=[("stock", date(2024, 6, 7))]),
+            _result(version=2), _result(rows=[("stock", date(2024, 6, 10))]),
+        )
+        registry = DataDateRegistry()
+
+        with patch.object(registry_module.time, "monotonic", return_value=100.0):
+            assert await registry.get_latest_date(session, "stock") == date(2024, 6, 7)
+            registry.invalidate()
+            assert await registry.get_latest_date(session, "stock") == date(2024, 6, 10)
+
+        assert session.execute.await_count == 4
+
+    async def test_reload_only_when_version_changes(self):
+        """测试超过比较间隔后只读版本号，其他进程递增版本后才重新加载"""
+        session = _session(
+            _result(version=1), _result(rows=[("sector", date(2024, 6, 7))]),
+            _result(version=1),
+            _result(version=2), _result(version=2), _result(rows=[("sector", date(2024, 6, 10))]),
+        )
+        registry = DataDateRegistry()
+
+        with patch.object(registry_module.time, "monotonic", return_value=100.0):
+            assert await registry.get_latest_date(session, "sector") == date(2024, 6, 7)
+        with patch.object(registry_module.time, "monotonic", return_value=102.0):
+            assert await registry.get_latest_date(session, "sector") == date(2024, 6, 7)
+        assert session.execute.await_count == 3
+
+        with patch.object(registry_module.time, "monotonic", return_value=104.0):
+            assert await registry.get_latest_date(session, "sector") == date(2024, 6, 10)
+        assert session.execute.await_count == 6
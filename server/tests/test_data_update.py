@@ -55,15 +55,12 @@ class TestDataUpdateService:
             )
         ]
 
-        # 模拟股票存在且数据不存在
-        mock_stock = MagicMock()
-        mock_stock.id = "stock-id-1"
-
+        # 模拟股票存在且数据不存在：一次解析股票ID，一次查询已存在记录
         mock_result1 = MagicMock()
-        mock_result1.scalar_one_or_none.return_value = mock_stock
+        mock_result1.all.return_value = [("000001", 1)]
 
         mock_result2 = MagicMock()
-        mock_result2.scalar_one_or_none.return_value = None
+        mock_result2.all.return_value = []
 
         mock_session.execute.side_effect = [mock_result1, mock_result2]
 
@@ -73,6 +70,7 @@ class TestDataUpdateService:
         assert result["success"] is True
         assert result["created"] == 1
         assert result["updated"] == 0
+        assert mock_session.execute.await_count == 2
         mock_session.add.assert_called_once()
 
     async def test_backfill_by_date_skip_existing(self, mock_session, mock_ak_share):
@@ -90,17 +88,12 @@ class TestDataUpdateService:
             )
         ]
 
-        mock_stock = MagicMock()
-        mock_stock.id = "stock-id-1"
-
-        # 数据已存在
-        mock_existing = MagicMock()
-
         mock_result1 = MagicMock()
-        mock_result1.scalar_one_or_none.return_value = mock_stock
+        mock_result1.all.return_value = [("000001", 1)]
 
+        # 数据已存在
         mock_result2 = MagicMock()
-        mock_result2.scalar_one_or_none.return_value = mock_existing
+        mock_result2.all.return_value = [(1,)]
 
         mock_session.execute.side_effect = [mock_result1, mock_result2]
 
@@ -110,6 +103,8 @@ class TestDataUpdateService:
         assert result["success"] is True
         assert result["skipped"] == 1
         mock_session.add.assert_not_called()
+        # 已存在的股票不再下载
+        mock_ak_share.get_daily_data.assert_not_called()
 
     async def test_backfill_by_date_overwrite(self, mock_session, mock_ak_share):
         """测试覆盖已有数据"""
@@ -126,17 +121,15 @@ class TestDataUpdateService:
             )
         ]
 
-        mock_stock = MagicMock()
-        mock_stock.id = "stock-id-1"
+        mock_result1 = MagicMock()
+        mock_result1.all.return_value = [("000001", 1)]
 
         # 数据已存在
         mock_existing = MagicMock()
-
-        mock_result1 = MagicMock()
-        mock_result1.scalar_one_or_none.return_value = mock_stock
+        mock_existing.entity_id = 1
 
         mock_result2 = MagicMock()
-        mock_result2.scalar_one_or_none.return_value = mock_existing
+        mock_result2.scalars.return_value.all.return_value = [mock_existing]
 
         mock_session.execute.side_effect = [mock_result1, mock_result2]
 
@@ -172,8 +165,9 @@ class TestDataUpdateService:
         mock_result1 = MagicMock()
         mock_result1.scalar_one_or_none.return_value = mock_stock
 
+        # 批量写入 RETURNING (xmax = 0)：一行新插入
         mock_result2 = MagicMock()
-        mock_result2.scalar_one_or_none.return_value = None
+        mock_result2.scalars.return_value.all.return_value = [True]
 
         mock_session.execute.side_effect = [mock_result1, mock_result2]
 
@@ -329,9 +323,11 @@ class TestDataUpdateService:
         """测试进度回调"""
         mock_ak_share.get_daily_data.return_value = []
 
-        mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = MagicMock(id="stock-1")
-        mock_session.execute.return_value = mock_result
+        mock_result1 = MagicMock()
+        mock_result1.all.return_value = [("000001", 1), ("000002", 2)]
+        mock_result2 = MagicMock()
+        mock_result2.all.return_value = []
+        mock_session.execute.side_effect = [mock_result1, mock_result2]
 
         progress_updates = []
 
@@ -483,9 +479,11 @@ class TestDataUpdateService:
         # 模拟 AkShare API 抛出异常
         mock_ak_share.get_daily_data.side_effect = Exception("API connection failed")
 
-        mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = MagicMock(id="stock-1")
-        mock_session.execute.return_value = mock_result
+        mock_result1 = MagicMock()
+        mock_result1.all.return_value = [("000001", 1)]
+        mock_result2 = MagicMock()
+        mock_result2.all.return_value = []
+        mock_session.execute.side_effect = [mock_result1, mock_result2]
 
         service = DataUpdateService(mock_session)
         result = await service.backfill_by_date(target_date=date.today(), overwrite=False)
@@ -0,0 +1,127 @@
+"""
+均线数据缓存测试
+
+测试 MADataLoader 使用的进程级 LRU 缓存。
+"""
+
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.services.calculation.ma_system.ma_cache import MADataCache, _estimate_size
+from src.services.calculation.ma_system.ma_data_loader import MADataLoader
+from src.models.moving_average_daily import MovingAverageDaily
+
+
+@pytest.fixture
+def cache():
+    """创建新的缓存实例用于测试"""
+    return MADataCache(max_bytes=1024 * 1024)
+
+
+def _entry_size(entity_id: int) -> int:
+    """单条测试条目的估算字节数"""
+    key = ("sector", entity_id, date(2024, 6, 3))
+    return _estimate_size(key, frozenset([5, 10]), {5: 1.0, 10: 2.0})
+
+
+class TestMADataCache:
+    """均线数据缓存测试"""
+
+    def test_set_and_get(self, cache):
+        """测试缓存设置和获取"""
+        key = ("sector", 1, date(2024, 6, 3))
+        cache.set(key, [5, 10], {5: 14.8, 10: 14.5})
+
+        assert cache.get(key, [5, 10]) == {5: 14.8, 10: 14.5}
+        assert cache.get(key, [5]) == {5: 14.8}
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 0
+        assert stats["bytes"] > 0
+
+    def test_miss_when_periods_not_covered(self, cache):
+        """测试请求周期超出已加载周期时视为未命中"""
+        key = ("sector", 1, date(2024, 6, 3))
+        cache.set(key, [5], {5: 14.8})
+
+        assert cache.get(key, [5, 10]) is None
+        assert cache.get(("sector", 2, date(2024, 6, 3)), [5]) is None
+        assert cache.get_stats()["misses"] == 2
+
+    def test_returns_copy(self, cache):
+        """测试返回值修改不影响缓存"""
+        key = ("stock", 1, date(2024, 6, 3))
+        values = {5: 10.0}
+        cache.set(key, [5], values)
+        values[5] = 99.0
+
+        result = cache.get(key, [5])
+        result[5] = 0.0
+        assert cache.get(key, [5]) == {5: 10.0}
+
+    def test_lru_eviction_by_bytes(self):
+        """测试超出字节预算时淘汰最近最少使用的条目"""
+        cache = MADataCache(max_bytes=_entry_size(1) * 3)
+        keys = [("sector", i, date(2024, 6, 3)) for i in range(1, 4)]
+        for key in keys:
+            cache.set(key, [5, 10], {5: 1.0, 10: 2.0})
+
+        # 访问第一个条目，使第二个条目成为最久未使用
+        assert cache.get(keys[0], [5]) is not None
+        cache.set(("sector", 4, date(2024, 6, 3)), [5, 10], {5: 1.0, 10: 2.0})
+
+        assert cache.get(keys[1], [5]) is None
+        assert cache.get(keys[0], [5]) is not None
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["size"] == 3
+        assert stats["bytes"] <= stats["max_bytes"]
+
+    def test_invalidate_from_date(self, cache):
+        """测试写入某日期后失效该日期及之后的条目"""
+        cache.set(("sector", 1, date(2024, 6, 3)), [5], {5: 1.0})
+        cache.set(("sector", 1, date(2024, 6, 4)), [5], {5: 1.0})
+        cache.set(("sector", 2, date(2024, 6, 4)), [5], {5: 1.0})
+        cache.set(("stock", 1, date(2024, 6, 4)), [5], {5: 1.0})
+
+        assert cache.invalidate("sector", date(2024, 6, 4), [1]) == 1
+        assert cache.get(("sector", 1, date(2024, 6, 3)), [5]) is not None
+        assert cache.get(("sector", 2, date(2024, 6, 4)), [5]) is not None
+
+        assert cache.invalidate("sector", date(2024, 6, 1)) == 2
+        assert cache.get(("stock", 1, date(2024, 6, 4)), [5]) is not None
+        assert cache.get_stats()["invalidations"] == 3
+
+    def test_clear_resets_bytes(self, cache):
+        """测试清空缓存"""
+        cache.set(("sector", 1, date(2024, 6, 3)), [5], {5: 1.0})
+
+        assert cache.clear() == 1
+        assert cache.get_stats()["bytes"] == 0
+
+
+class TestMADataLoaderCache:
+    """均线数据加载器缓存集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_cache_shared_across_loaders(self, cache):
+        """测试不同加载器实例共享同一缓存"""
+        session = AsyncMock(spec=AsyncSession)
+        calc_date = date(2024, 6, 3)
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = MovingAverageDaily(
+            entity_type="sector", entity_id=1, symbol="1", date=calc_date, ma5=14.8, ma10=14.5
+        )
+        session.execute.return_value = mock_result
+
+        first = MADataLoader(session, cache=cache)
+        assert await first.load_ma_values("sector", 1, calc_date, [5, 10]) == {5: 14.8, 10: 14.5}
+
+        second = MADataLoader(session, cache=cache)
+        assert await second.load_ma_values("sector", 1, calc_date, [5]) == {5: 14.8}
+
+        assert session.execute.await_count == 1
+        assert cache.get_stats()["hits"] == 1
@@ -3,6 +3,7 @@
 """
 
 import pytest
+import numpy as np
 from datetime import date
 
 from src.config.ma_system import (
@@ -13,6 +14,7 @@ from src.config.ma_system import (
 from src.services.calculation.ma_system.price_position_scorer import PricePositionScorer
 from src.services.calculation.ma_system.ma_alignment_scorer import MAAlignmentScorer
 from src.services.calculation.ma_system.strength_calculator_v2 import StrengthCalculatorV2
+from src.services.calculation.ma_system.vectorized_strength import VectorizedStrengthCalculator
 
 
 class TestPricePositionScorer:
@@ -406,3 +408,62 @@ class TestBoundaryConditions:
         ma_values = {p: 100.0 for p in [5, 10, 20, 30, 60, 90, 120, 240]}
         result = self.calculator.calculate_composite_strength(price, ma_values)
         assert 0.0 <= result["composite_score"] <= 100.0
+
+
+class TestVectorizedStrengthCalculator:
+    """向量化强度计算器测试（与 StrengthCalculatorV2 逐行对比）"""
+
+    PERIODS = [5, 10, 20, 30, 60, 90, 120, 240]
+
+    def setup_method(self):
+        """测试前置设置"""
+        self.vectorized = VectorizedStrengthCalculator()
+        self.calculator = StrengthCalculatorV2()
+
+    def _assert_rows_match(self, prices, ma_matrix):
+        results = self.vectorized.build_results(prices, ma_matrix)
+        for i, result in enumerate(results):
+            ma_values = {
+                p: float(ma_matrix[i, k])
+                for k, p in enumerate(self.PERIODS)
+                if np.isfinite(ma_matrix[i, k])
+            }
+            if not ma_values:
+                continue
+            expected = self.calculator.calculate_composite_strength(float(prices[i]), ma_values)
+            assert result == expected, f"row {i} mismatch"
+
+    def test_matches_scalar_calculator_random(self):
+        """测试随机数据与逐行计算完全一致"""
+        rng = np.random.default_rng(42)
+        n = 2000
+        prices = np.round(rng.uniform(5, 50, n), 2)
+        ma_matrix = np.round(prices[:, None] * rng.uniform(0.9, 1.1, (n, 8)), 2)
+        self._assert_rows_match(prices, ma_matrix)
+
+    def test_matches_scalar_calculator_with_gaps(self):
+        """测试均线缺失（渐近式数据）和零值均线"""
+        rng = np.random.default_rng(7)
+        n = 1000
+        prices = np.round(rng.uniform(5, 50, n), 2)
+        ma_matrix = np.round(prices[:, None] * rng.uniform(0.95, 1.05, (n, 8)), 2)
+        ma_matrix[rng.random((n, 8)) < 0.3] = np.nan
+        ma_matrix[rng.random((n, 8)) < 0.02] = 0.0
+        self._assert_rows_match(prices, ma_matrix)
+
+    def test_boundary_ratios(self):
+        """测试分段边界比率与价格等于均线"""
+        prices = np.array([100.0, 105.0, 103.0, 101.0, 100.5, 99.5, 99.0, 97.0, 95.0])
+        ma_matrix = np.full((len(prices), 8), 100.0)
+        self._assert_rows_match(prices, ma_matrix)
+
+    def test_alignment_states(self):
+        """测试完美多头和完美空头排列"""
+        bull = np.array([[10.0, 9.0, 8.0, 7.0, 6.0, 5.0, 4.0, 3.0]])
+        bear = bull[:, ::-1].copy()
+        result_bull = self.vectorized.build_results(np.array([11.0]), bull)[0]
+        result_bear = self.vectorized.build_results(np.array([2.0]), bear)[0]
+        assert result_bull["ma_alignment_state"] == "perfect_bull"
+        assert result_bull["ma_alignment_score"] == 100.0
+        assert result_bear["ma_alignment_state"] == "perfect_bear"
+        assert result_bear["ma_alignment_score"] == 0.0
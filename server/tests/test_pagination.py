@@ -0,0 +1,133 @@
+"""
+游标分页测试
+
+测试游标编解码、keyset 条件构造、分页截取和总数缓存。
+"""
+
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+import src.core.pagination as pagination
+from src.api.exceptions import invalid_cursor_handler
+from src.core.pagination import (
+    CountCache,
+    InvalidCursorError,
+    apply_keyset,
+    decode_cursor,
+    encode_cursor,
+    sort_keys,
+    split_page,
+)
+from src.models.sector import Sector
+from src.models.strength_score import StrengthScore
+
+
+class TestCursor:
+    """游标编解码测试"""
+
+    def test_round_trip_restores_column_types(self):
+        """测试游标按列类型还原 Decimal 和日期"""
+        columns = (StrengthScore.date, StrengthScore.score, StrengthScore.id)
+        cursor = encode_cursor([date(2024, 6, 28), Decimal("87.1234"), 42])
+
+        assert "=" not in cursor
+        assert decode_cursor(cursor, columns) == [date(2024, 6, 28), Decimal("87.1234"), 42]
+
+    def test_invalid_cursor_raises(self):
+        """测试格式错误或长度不符的游标抛出游标错误"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor("not-a-cursor", (StrengthScore.score, StrengthScore.id))
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(encode_cursor([1]), (StrengthScore.score, StrengthScore.id))
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor_handler_returns_validation_error(self):
+        """测试 API 层将游标错误转换为 422 校验错误响应"""
+        response = await invalid_cursor_handler(None, InvalidCursorError("abc", "bad"))
+
+        assert response.status_code == 422
+        assert b'"VALIDATION_ERROR"' in response.body
+
+
+class TestKeyset:
+    """keyset 条件与分页截取测试"""
+
+    def test_apply_keyset_uses_row_comparison(self):
+        """测试游标条件使用行值比较，排序方向一致"""
+        stmt = select(StrengthScore.id)
+        cursor = encode_cursor([Decimal("50.5"), 7])
+
+        sql = str(
+            apply_keyset(stmt, (StrengthScore.score, StrengthScore.entity_id), cursor)
+            .compile(dialect=postgresql.dialect())
+        )
+        assert "(strength_scores.score, strength_scores.entity_id) < (" in sql
+        assert "ORDER BY strength_scores.score DESC, strength_scores.entity_id DESC" in sql
+
+        sql = str(
+            apply_keyset(stmt, (StrengthScore.score, StrengthScore.entity_id), None, descending=False)
+            .compile(dialect=postgresql.dialect())
+        )
+        assert "WHERE" not in sql
+        assert "ORDER BY strength_scores.score ASC, strength_scores.entity_id ASC" in sql
+
+    def test_sort_keys_put_nulls_last(self):
+        """测试可空列前置 NULL 标记键并用 coalesce 包装，非空列原样返回"""
+        assert sort_keys(Sector.name) == (Sector.name,)
+
+        flag, value = sort_keys(Sector.strength_score)
+        assert str(flag) == "sectors.strength_score IS NOT NULL"
+        assert "coalesce(sectors.strength_score" in str(value)
+
+        flag, value = sort_keys(Sector.description, descending=False)
+        assert str(flag) == "sectors.description IS NULL"
+        assert "coalesce(sectors.description" in str(value)
+
+        # 标记键的游标值还原为布尔值
+        cursor = encode_cursor([True, Decimal("-3.5"), 7])
+        keys = (*sort_keys(Sector.strength_score), Sector.id)
+        assert decode_cursor(cursor, keys) == [True, Decimal("-3.5"), 7]
+
+    def test_split_page(self):
+        """测试多取的一行用于生成下一页游标"""
+        rows = [(90, 1), (80, 2), (70, 3)]
+
+        page, cursor = split_page(rows, 2, lambda row: row)
+        assert page == [(90, 1), (80, 2)]
+        assert cursor == encode_cursor([80, 2])
+
+        page, cursor = split_page(rows[:2], 2, lambda row: row)
+        assert page == rows[:2]
+        assert cursor is None
+
+    def test_ranking_item_rank_fallback(self):
+        """测试排名缺失时偏移翻页按位置补位，游标翻页保持为空"""
+        from src.api.v1.rankings import _item_rank
+
+        assert _item_rank(7, encode_cursor([80, 2]), 0, 0) == 7
+        assert _item_rank(None, None, 40, 2) == 43
+        assert _item_rank(None, encode_cursor([80, 2]), 40, 2) is None
+
+
+class TestCountCache:
+    """总数缓存测试"""
+
+    def test_expiry_and_capacity(self):
+        """测试条目过期和容量淘汰"""
+        cache = CountCache()
+        cache.MAX_ENTRIES = 2
+
+        with patch.object(pagination.time, "monotonic", return_value=100.0):
+            cache.set(("rankings_v2", "stock", date(2024, 6, 28)), 5000)
+            cache.set("b", 1)
+            cache.set("c", 2)
+            assert cache.get(("rankings_v2", "stock", date(2024, 6, 28))) is None
+            assert cache.get("c") == 2
+
+        with patch.object(pagination.time, "monotonic", return_value=100.0 + cache.TTL):
+            assert cache.get("c") is None
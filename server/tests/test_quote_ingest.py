@@ -0,0 +1,190 @@
+"""
+日线行情流水线测试
+
+测试 QuoteIngestPipeline 的下载/写入重叠、批量写入和失败隔离。
+"""
+
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.repositories.market_data_repository import MarketDataRepository
+from src.services.data_acquisition.models import DailyQuote
+from src.services.quote_ingest import IngestTarget, QuoteIngestPipeline
+
+
+def _quotes(symbol: str, days: int = 3):
+    start = date(2024, 6, 3)
+    return [
+        DailyQuote(
+            symbol=symbol,
+            trade_date=start + timedelta(days=i),
+            open=10.0,
+            high=11.0,
+            low=9.5,
+            close=10.5,
+            volume=1000,
+        )
+        for i in range(days)
+    ]
+
+
+@pytest.fixture
+def mock_session():
+    """模拟数据库会话"""
+    session = AsyncMock()
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+    return session
+
+
+def _targets(count: int):
+    return [IngestTarget("stock", i, f"{i:06d}") for i in range(1, count + 1)]
+
+
+class TestMarketDataRepositoryRows:
+    """行情行构造测试"""
+
+    def test_build_rows_deduplicates_dates(self):
+        """测试同一日期只保留最后一条"""
+        quotes = [
+            {"date": q.trade_date, "open": q.open, "high": q.high, "low": q.low, "close": q.close, "volume": q.volume}
+            for q in _quotes("000001", days=2)
+        ]
+        duplicate = {**quotes[1], "close": 10.9}
+
+        rows = MarketDataRepository.build_rows("stock", 1, "000001", quotes + [duplicate])
+
+        assert len(rows) == 2
+        assert rows[1]["close"] == 10.9
+        assert rows[0]["entity_type"] == "stock"
+        assert rows[0]["change"] is None
+        assert rows[0]["turnover"] is None
+
+
+@pytest.mark.asyncio
+class TestQuoteIngestPipeline:
+    """行情流水线测试"""
+
+    async def test_batches_rows_across_entities(self, mock_session):
+        """测试多个实体的行合并为一次写入"""
+        pipeline = QuoteIngestPipeline(
+            mock_session,
+            fetch=AsyncMock(side_effect=lambda t: _quotes(t.symbol)),
+            workers=2,
+        )
+        pipeline.repo.bulk_upsert = AsyncMock(return_value={"created": 9, "updated": 0, "skipped": 0})
+
+        progress = []
+        stats = await pipeline.run(_targets(3), on_progress=lambda done, total, t: progress.append((done, total)))
+
+        pipeline.repo.bulk_upsert.assert_awaited_once()
+        assert len(pipeline.repo.bulk_upsert.await_args.args[0]) == 9
+        assert stats.created == 9
+        assert len(stats.completed) == 3
+        assert progress[-1] == (3, 3)
+        mock_session.commit.assert_awaited_once()
+
+    async def test_flushes_when_buffer_full(self, mock_session):
+        """测试缓冲区达到阈值时分批写入"""
+        pipeline = QuoteIngestPipeline(
+            mock_session,
+            fetch=AsyncMock(side_effect=lambda t: _quotes(t.symbol)),
+            workers=1,
+            flush_rows=5,
+        )
+        pipeline.repo.bulk_upsert = AsyncMock(return_value={"created": 3, "updated": 0, "skipped": 0})
+
+        stats = await pipeline.run(_targets(4))
+
+        # 每两个实体（6 行）写入一次
+        assert pipeline.repo.bulk_upsert.await_count == 2
+        assert stats.created == 6
+
+    async def test_queue_bounds_in_flight_batches(self, mock_session):
+        """测试写入阻塞时下载不会无限领先"""
+        fetched = []
+
+        async def fetch(target):
+            fetched.append(target.symbol)
+            return _quotes(target.symbol)
+
+        release = asyncio.Event()
+
+        async def slow_upsert(rows, overwrite=False):
+            await release.wait()
+            return {"created": len(rows), "updated": 0, "skipped": 0}
+
+        pipeline = QuoteIngestPipeline(mock_session, fetch=fetch, workers=2, queue_size=2, flush_rows=1)
+        pipeline.repo.bulk_upsert = slow_upsert
+
+        task = asyncio.create_task(pipeline.run(_targets(20)))
+        await asyncio.sleep(0.05)
+
+        # 写入协程持有 1 个批次，队列 2 个，每个下载协程各持有 1 个
+        assert len(fetched) <= 1 + 2 + 2
+        release.set()
+        stats = await task
+        assert len(stats.completed) == 20
+
+    async def test_failed_batch_is_retried_per_entity(self, mock_session):
+        """测试整批写入失败时逐个实体重试，只有出错的实体失败"""
+        async def upsert(rows, overwrite=False):
+            if any(row["symbol"] == "000002" for row in rows):
+                raise ValueError("check_high_low")
+            return {"created": len(rows), "updated": 0, "skipped": 0}
+
+        pipeline = QuoteIngestPipeline(
+            mock_session,
+            fetch=AsyncMock(side_effect=lambda t: _quotes(t.symbol)),
+            workers=1,
+        )
+        pipeline.repo.bulk_upsert = upsert
+
+        stats = await pipeline.run(_targets(3))
+
+        assert [t.symbol for t in stats.completed] == ["000001", "000003"]
+        assert [t.symbol for t, _ in stats.failures] == ["000002"]
+        assert stats.created == 6
+        assert mock_session.rollback.await_count == 2
+
+    async def test_fetch_errors_empty_and_invalid_quotes(self, mock_session):
+        """测试下载失败、空数据和校验失败的统计"""
+        async def fetch(target):
+            if target.symbol == "000001":
+                raise RuntimeError("API connection failed")
+            if target.symbol == "000002":
+                return []
+            return _quotes(target.symbol)
+
+        def validator(quote):
+            if quote.trade_date == date(2024, 6, 3):
+                return False, "开盘价超出范围"
+            return True, None
+
+        pipeline = QuoteIngestPipeline(mock_session, fetch=fetch, workers=2, validator=validator)
+        pipeline.repo.bulk_upsert = AsyncMock(return_value={"created": 2, "updated": 0, "skipped": 0})
+
+        stats = await pipeline.run(_targets(3))
+
+        assert [t.symbol for t, _ in stats.failures] == ["000001"]
+        assert [t.symbol for t in stats.empty] == ["000002"]
+        assert len(stats.invalid) == 1
+        assert len(pipeline.repo.bulk_upsert.await_args.args[0]) == 2
+
+    async def test_cancel_stops_fetchers(self, mock_session):
+        """测试取消时停止下载"""
+        fetch = AsyncMock(side_effect=lambda t: _quotes(t.symbol))
+        pipeline = QuoteIngestPipeline(mock_session, fetch=fetch, workers=2, queue_size=1)
+        pipeline.repo.bulk_upsert = AsyncMock(return_value={"created": 0, "updated": 0, "skipped": 0})
+
+        def check_cancelled():
+            raise InterruptedError("已取消")
+
+        with pytest.raises(InterruptedError):
+            await pipeline.run(_targets(50), check_cancelled=check_cancelled)
+
+        assert fetch.await_count < 50
+        pipeline.repo.bulk_upsert.assert_not_awaited()
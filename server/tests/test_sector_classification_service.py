@@ -6,7 +6,9 @@
 
 import pytest
 from datetime import date, timedelta
+from decimal import Decimal
 from unittest.mock import Mock, AsyncMock
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.services.sector_classification_service import (
@@ -21,6 +23,18 @@ from src.services.sector_classification_service import (
 from src.models.sector import Sector
 from src.models.daily_market_data import DailyMarketData
 from src.models.moving_average_data import MovingAverageData
+from src.models.moving_average_daily import MovingAverageDaily, MA_DAILY_COLUMNS
+
+
+def _ma_daily_row(value: float, sector_id: int = 1) -> MovingAverageDaily:
+    """构造所有周期均线相同的均线日表行"""
+    return MovingAverageDaily(
+        entity_type="sector",
+        entity_id=sector_id,
+        symbol=str(sector_id),
+        date=date(2024, 1, 1),
+        **{f"ma{period}": value for period in SectorClassificationService.MA_PERIODS}
+    )
 
 
 # ===============================
@@ -371,11 +385,9 @@ class TestSectorClassificationService:
         """测试成功获取均线数据"""
         service = SectorClassificationService(mock_session)
 
-        # 模拟返回的均线数据
-        mock_ma_data = Mock()
-        mock_ma_data.ma_value = 100.0
+        # 模拟均线日表中的一行
         mock_result = Mock()
-        mock_result.scalar_one_or_none.return_value = mock_ma_data
+        mock_result.scalar_one_or_none.return_value = _ma_daily_row(100.0)
         mock_session.execute.return_value = mock_result
 
         ma_values = await service.get_ma_data(1, date(2024, 1, 1))
@@ -383,8 +395,8 @@ class TestSectorClassificationService:
         assert len(ma_values) == 8
         assert 'ma_5' in ma_values
         assert 'ma_240' in ma_values
-        # 验证 execute 被调用了正确的次数（8次，每个周期一次）
-        assert mock_session.execute.call_count == 8
+        # 8 个周期来自均线日表的同一行，只查询一次
+        assert mock_session.execute.call_count == 1
 
     @pytest.mark.asyncio
     async def test_get_ma_data_missing(self, mock_session):
@@ -452,9 +464,7 @@ class TestSectorClassificationService:
 
         # 模拟均线查询
         ma_result = Mock()
-        mock_ma_data = Mock()
-        mock_ma_data.ma_value = 100.0
-        ma_result.scalar_one_or_none.return_value = mock_ma_data
+        ma_result.scalar_one_or_none.return_value = _ma_daily_row(100.0)
 
         # 模拟价格查询
         price_list = []
@@ -466,8 +476,7 @@ class TestSectorClassificationService:
         price_result.scalars.return_value.all.return_value = price_list
 
         # 设置返回顺序
-        mock_session.execute.side_effect = [sector_result, ma_result, ma_result, ma_result, ma_result,
-                                            ma_result, ma_result, ma_result, ma_result, price_result]
+        mock_session.execute.side_effect = [sector_result, ma_result, price_result]
 
         result = await service.calculate_classification(1, date(2024, 1, 1))
 
@@ -538,6 +547,93 @@ class TestBatchCalculation:
 
         assert "没有找到任何板块" in str(exc_info.value)
 
+    @pytest.mark.asyncio
+    async def test_batch_calculate_cross_sectional(self, mock_session):
+        """测试批量计算只用三次查询（板块、最新均线、最近收盘价）完成所有板块"""
+        service = SectorClassificationService(mock_session)
+
+        sectors = []
+        for i in range(3):
+            sector = Mock(spec=Sector)
+            sector.id = i + 1
+            sector.name = f"板块{i+1}"
+            sector.code = f"SECTOR{i+1:03d}"
+            sectors.append(sector)
+        sectors_result = Mock()
+        sectors_result.scalars.return_value.all.return_value = sectors
+
+        # 均线日表最新行：板块1、2 均线齐全；板块3 缺少 240 日均线
+        full = [Decimal("10.00")] * 8
+        ma_rows = [(1, *full), (2, *full), (3, *full[:7], None)]
+        ma_result = Mock()
+        ma_result.all.return_value = ma_rows
+
+        # 板块1 上涨到 12（全部均线之上），板块2 只有 5 天数据
+        price_rows = [(1, Decimal(str(p))) for p in (12, 11, 11, 10, 10, 9)]
+        price_rows += [(2, Decimal("10")) for _ in range(5)]
+        price_rows += [(3, Decimal("10")) for _ in range(6)]
+        price_result = Mock()
+        price_result.all.return_value = price_rows
+
+        mock_session.execute.side_effect = [sectors_result, ma_result, price_result]
+
+        results = await service.batch_calculate_all_sectors(date(2024, 1, 15))
+
+        assert mock_session.execute.await_count == 3
+        price_sql = str(
+            mock_session.execute.await_args_list[2].args[0].compile(dialect=postgresql.dialect())
+        )
+        # 每个板块各自的最近 6 个收盘价，没有全市场日期下界
+        assert "JOIN LATERAL (SELECT daily_market_data.date" in price_sql
+        assert "daily_market_data.entity_id = sectors.id" in price_sql
+        assert "LIMIT %(param_1)s" in price_sql
+        assert "OFFSET" not in price_sql
+        assert len(results) == 1
+        assert results[0].sector_id == 1
+        assert results[0].classification_level == 9
+        assert results[0].state == "反弹"
+        assert results[0].current_price == 12.0
+        assert results[0].price_5_days_ago == 9.0
+
+    @pytest.mark.asyncio
+    async def test_update_daily_classification_single_upsert(self, mock_session):
+        """测试每日更新通过一次批量写入保存所有结果"""
+        service = SectorClassificationService(mock_session)
+
+        count_result = Mock()
+        count_result.scalar.return_value = 2
+        mock_session.execute.return_value = count_result
+
+        results = [
+            ClassificationResult(
+                sector_id=i,
+                sector_name=f"板块{i}",
+                symbol=f"SECTOR{i:03d}",
+                classification_level=5,
+                state="调整",
+                current_price=9.0,
+                ma_values={f"ma_{p}": 10.0 for p in SectorClassificationService.MA_PERIODS},
+                price_5_days_ago=10.0,
+                classification_date=date(2024, 1, 15)
+            )
+            for i in (1, 2)
+        ]
+        service.batch_calculate_all_sectors = AsyncMock(return_value=results)
+        service._bulk_upsert_classifications = AsyncMock(
+            return_value={"created": 1, "updated": 0, "skipped": 1}
+        )
+
+        summary = await service.update_daily_classification(date(2024, 1, 15))
+
+        service._bulk_upsert_classifications.assert_awaited_once()
+        rows, overwrite = service._bulk_upsert_classifications.await_args.args
+        assert overwrite is False
+        assert [row["sector_id"] for row in rows] == [1, 2]
+        assert rows[0]["change_percent"] == pytest.approx(-10.0)
+        assert rows[0]["ma_240"] == 10.0
+        assert summary["created"] == 1
+        assert summary["skipped"] == 1
+
 
 # ===============================
 # 测试性能
@@ -766,3 +862,40 @@ class TestBatchCalculationErrors:
         # 由于没有板块，进度报告不应该被调用
         # 但回调函数已经设置，验证设置成功
         assert service._progress_callback is not None
+
+
+@pytest.mark.asyncio
+async def test_batch_classifies_sector_missing_a_day(db_session: AsyncSession):
+    """测试最近几天中缺少一天行情的板块仍取自己的最近 6 个收盘价并完成分类"""
+    target_date = date(2024, 6, 10)
+    days = [target_date - timedelta(days=offset) for offset in range(8)]
+    sectors = [
+        Sector(name=f"板块{i}", code=f"IND00{i}", type="industry")
+        for i in range(1, 4)
+    ]
+    db_session.add_all(sectors)
+    await db_session.flush()
+    gapped = sectors[0]
+
+    for sector in sectors:
+        for idx, day in enumerate(days):
+            if sector.id == gapped.id and idx == 2:
+                continue  # 窗口内缺少一天
+            close = Decimal(str(20 - idx))
+            db_session.add(DailyMarketData(
+                entity_type="sector", entity_id=sector.id, symbol=sector.code, date=day,
+                open=close, high=close, low=close, close=close, volume=1000,
+            ))
+        db_session.add(MovingAverageDaily(
+            entity_type="sector", entity_id=sector.id, symbol=sector.code, date=target_date, close=Decimal("20"),
+            **{column: Decimal("10.00") for column in MA_DAILY_COLUMNS.values()},
+        ))
+    await db_session.commit()
+
+    service = SectorClassificationService(db_session)
+    closes = await service._load_recent_closes(target_date)
+    results = {result.sector_id: result for result in await service.batch_calculate_all_sectors(target_date)}
+
+    assert closes[gapped.id] == [20.0, 19.0, 17.0, 16.0, 15.0, 14.0]
+    assert set(results) == {sector.id for sector in sectors}
+    assert results[gapped.id].price_5_days_ago == 14.0
@@ -40,22 +40,21 @@ class TestMADataLoader:
         # Mock 数据库查询结果
         from src.models.moving_average_data import MovingAverageData
 
-        mock_rows = [
-            ("5d", 14.8),
-            ("10d", 14.5),
-            ("20d", 14.0),
-            ("30d", 13.5),
-        ]
+        from src.models.moving_average_daily import MovingAverageDaily
 
-        # 模拟查询返回
+        # 均线日表最新一行（60 日均线不在请求的周期内）
         mock_result = MagicMock()
-        mock_result.all.return_value = mock_rows
+        mock_result.scalar_one_or_none.return_value = MovingAverageDaily(
+            entity_type=entity_type, entity_id=entity_id, symbol="1", date=calc_date,
+            ma5=14.8, ma10=14.5, ma20=14.0, ma30=13.5, ma60=13.0
+        )
         session.execute.return_value = mock_result
 
         # 加载均线数据
         ma_values = await loader.load_ma_values(entity_type, entity_id, calc_date, [5, 10, 20, 30])
 
-        # 验证结果
+        # 验证结果：一次查询取得所有周期
+        assert session.execute.await_count == 1
         assert len(ma_values) == 4
         assert ma_values[5] == 14.8
         assert ma_values[10] == 14.5
@@ -70,9 +69,11 @@ class TestMADataLoader:
         entity_id = 1
 
         # 第一次调用 - 从数据库加载
-        mock_rows = [("5d", 14.8)]
+        from src.models.moving_average_daily import MovingAverageDaily
         mock_result = MagicMock()
-        mock_result.all.return_value = mock_rows
+        mock_result.scalar_one_or_none.return_value = MovingAverageDaily(
+            entity_type=entity_type, entity_id=entity_id, symbol="1", date=calc_date, ma5=14.8
+        )
         session.execute.return_value = mock_result
 
         ma_values1 = await loader.load_ma_values(entity_type, entity_id, calc_date, [5])
@@ -110,10 +111,12 @@ class TestMADataLoader:
         """测试加载计算所需的全部数据"""
         calc_date = date.today()
 
-        # Mock 均线数据
-        mock_ma_rows = [("5d", 14.8), ("10d", 14.5)]
+        # Mock 均线日表数据
+        from src.models.moving_average_daily import MovingAverageDaily
         mock_ma_result = MagicMock()
-        mock_ma_result.all.return_value = mock_ma_rows
+        mock_ma_result.scalar_one_or_none.return_value = MovingAverageDaily(
+            entity_type="sector", entity_id=1, symbol="1", date=calc_date, ma5=14.8, ma10=14.5
+        )
 
         # Mock 价格数据
         mock_market_data = MagicMock()
@@ -136,6 +139,50 @@ class TestMADataLoader:
         assert data["available_days"] == 100
 
 
+    @pytest.mark.asyncio
+    async def test_load_universe(self, loader, session):
+        """测试批量加载：两条查询，结果按实体ID对齐为数组"""
+        calc_date = date.today()
+
+        mock_ma_result = MagicMock()
+        mock_ma_result.all.return_value = [
+            (1, "5d", 14.8), (1, "10d", 14.5),
+            (3, "5d", 20.0),
+        ]
+        mock_price_result = MagicMock()
+        mock_price_result.all.return_value = [
+            (1, 15.5, 100),
+            (2, 9.0, 3),
+            (3, 21.0, 300),
+        ]
+        session.execute.side_effect = [mock_ma_result, mock_price_result]
+
+        universe = await loader.load_universe("sector", calc_date, [3, 2, 1, 4], periods=[5, 10])
+
+        assert session.execute.await_count == 2
+        assert universe.entity_ids.tolist() == [1, 2, 3, 4]
+        assert universe.ma_matrix.shape == (4, 2)
+        assert universe.available_days.tolist() == [100, 3, 300, 0]
+
+        assert universe.get(1) == {
+            "current_price": 15.5,
+            "ma_values": {5: 14.8, 10: 14.5},
+            "available_days": 100,
+            "has_data": True
+        }
+        # 有价格但没有均线
+        assert universe.get(2)["has_data"] is False
+        assert universe.get(3)["ma_values"] == {5: 20.0}
+        # 没有任何数据以及不在列表中的实体
+        assert universe.get(4)["current_price"] is None
+        assert universe.get(99) == {
+            "current_price": None,
+            "ma_values": {},
+            "available_days": 0,
+            "has_data": False
+        }
+
+
 class TestSectorStrengthService:
     """板块强度计算服务测试"""
 
@@ -936,6 +983,76 @@ class TestSectorStrengthService:
         assert result["success"] is True
         assert result["created"] == 1
 
+    # ========== 列式（向量化）计算测试 ==========
+
+    @pytest.mark.asyncio
+    async def test_vectorized_single_sector(self, service, session, mock_sector):
+        """测试列式计算：跳过已有/数据不足的日期并批量写入"""
+        base_date = date(2024, 1, 1)
+        dates = [base_date + timedelta(days=i) for i in range(8)]
+
+        # 收盘价查询
+        price_result = MagicMock()
+        price_result.all.return_value = [(d, 10.0 + i * 0.1) for i, d in enumerate(dates)]
+
+        # 均线查询：仅 5 日均线，从第 5 个交易日开始
+        ma_result = MagicMock()
+        ma_result.all.return_value = [(d, "5d", 10.0) for d in dates[4:]]
+
+        # 已有强度记录：最后一天
+        existing_result = MagicMock()
+        existing_result.scalars.return_value.all.return_value = [dates[-1]]
+
+        session.execute.side_effect = [price_result, ma_result, existing_result]
+
+        with patch.object(service.score_repo, 'bulk_upsert', new=AsyncMock(return_value=3)) as mock_upsert:
+            result = await service._calculate_single_sector_strength_vectorized(
+                sector=mock_sector,
+                start_date=dates[0],
+                end_date=dates[-1],
+                overwrite=False
+            )
+
+        assert result["success"] is True
+        # 前 4 天无均线，最后 1 天已存在
+        assert result["created"] == 3
+        assert result["updated"] == 0
+        assert result["skipped"] == 5
+
+        rows = mock_upsert.call_args[0][0]
+        assert [row["date"] for row in rows] == dates[4:7]
+        expected = service.calculator.calculate_composite_strength(float(10.0 + 4 * 0.1), {5: 10.0})
+        assert rows[0]["score"] == expected["composite_score"]
+        assert rows[0]["ma5"] == 10.0
+        assert rows[0]["ma10"] is None
+        assert rows[0]["symbol"] == mock_sector.code
+
+    @pytest.mark.asyncio
+    async def test_vectorized_overwrite_counts_updates(self, service, session, mock_sector):
+        """测试列式计算覆盖模式下统计更新数量"""
+        base_date = date(2024, 1, 1)
+        dates = [base_date + timedelta(days=i) for i in range(6)]
+
+        price_result = MagicMock()
+        price_result.all.return_value = [(d, 20.0) for d in dates]
+        ma_result = MagicMock()
+        ma_result.all.return_value = [(d, "5d", 19.5) for d in dates]
+        existing_result = MagicMock()
+        existing_result.scalars.return_value.all.return_value = dates[4:]
+
+        session.execute.side_effect = [price_result, ma_result, existing_result]
+
+        with patch.object(service.score_repo, 'bulk_upsert', new=AsyncMock(return_value=2)):
+            result = await service._calculate_single_sector_strength_vectorized(
+                sector=mock_sector,
+                overwrite=True
+            )
+
+        # 前 4 天可用天数不足 MIN_DATA_DAYS
+        assert result["created"] == 0
+        assert result["updated"] == 2
+        assert result["skipped"] == 4
+
 
 class TestSectorStrengthServiceIntegration:
     """板块强度服务集成测试"""
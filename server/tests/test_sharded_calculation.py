@@ -0,0 +1,157 @@
+"""
+分片多进程计算测试
+
+测试实体拆分、计数与进度汇总，以及服务在分片模式下的委托。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import src.services.sharded_calculation as sharded
+from src.services.sharded_calculation import (
+    JOB_SECTOR_MA_FULL_HISTORY,
+    JOB_SECTOR_STRENGTH_FULL_HISTORY,
+    ShardedCalculationRunner,
+    resolve_shard_count,
+    split_round_robin,
+)
+
+
+def _thread_pool(max_workers, mp_context=None, initializer=None):
+    """用线程池代替进程池，使测试可以替换工作函数"""
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+class TestShardHelpers:
+    """拆分与配置测试"""
+
+    def test_split_round_robin(self):
+        """测试轮转拆分覆盖所有实体且不产生空块"""
+        chunks = split_round_robin(list(range(1, 11)), 4)
+
+        assert chunks == [[1, 5, 9], [2, 6, 10], [3, 7], [4, 8]]
+        assert split_round_robin([1, 2], 8) == [[1], [2]]
+        assert split_round_robin([], 4) == []
+
+    def test_resolve_shard_count(self):
+        """测试分片数默认取配置，且至少为 1"""
+        with patch.object(sharded.settings, "FULL_HISTORY_SHARDS", 6):
+            assert resolve_shard_count() == 6
+        assert resolve_shard_count(0) == 1
+        assert resolve_shard_count(3) == 3
+
+
+@pytest.mark.asyncio
+class TestShardedCalculationRunner:
+    """分片执行器测试"""
+
+    async def test_merges_counts_and_progress(self):
+        """测试汇总各块的计数和进度"""
+        def run_chunk(job, entity_ids, params, events, cancel_event):
+            for entity_id in entity_ids:
+                events.put(f"实体 {entity_id}")
+            if 3 in entity_ids:
+                raise RuntimeError("worker crashed")
+            return {"success": True, "created": len(entity_ids), "updated": 1, "skipped": 0, "errors": 0}
+
+        progress = []
+
+        async def callback(current, total, message):
+            progress.append((current, total))
+
+        runner = ShardedCalculationRunner(2, callback)
+        runner.CHUNKS_PER_SHARD = 2
+        with patch.object(sharded, "ProcessPoolExecutor", _thread_pool), \
+             patch.object(sharded, "_run_chunk", run_chunk):
+            result = await runner.run(JOB_SECTOR_MA_FULL_HISTORY, list(range(1, 9)), {"overwrite": False})
+
+        # 4 个块: [1,5] [2,6] [3,7] [4,8]，其中 [3,7] 失败
+        assert result["created"] == 6
+        assert result["updated"] == 3
+        assert result["errors"] == 2
+        assert result["total"] == 8
+        assert result["shards"] == 2
+        assert len(progress) == 8
+        assert progress[-1] == (8, 8)
+
+    async def test_worker_interruption_is_raised(self):
+        """测试工作进程报告取消时父任务抛出 InterruptedError"""
+        def run_chunk(job, entity_ids, params, events, cancel_event):
+            raise InterruptedError("任务已取消")
+
+        runner = ShardedCalculationRunner(2)
+        with patch.object(sharded, "ProcessPoolExecutor", _thread_pool), \
+             patch.object(sharded, "_run_chunk", run_chunk):
+            with pytest.raises(InterruptedError):
+                await runner.run(JOB_SECTOR_MA_FULL_HISTORY, [1, 2, 3], {})
+
+
+@pytest.mark.asyncio
+class TestServiceDelegation:
+    """服务分片模式委托测试"""
+
+    async def test_sector_strength_full_history_uses_runner(self):
+        """测试分片数大于 1 时板块强度完整历史交给执行器"""
+        from src.services.sector_strength_service import SectorStrengthService
+
+        session = AsyncMock(spec=AsyncSession)
+        id_result = MagicMock()
+        id_result.scalars.return_value.all.return_value = [1, 2, 3]
+        session.execute.return_value = id_result
+        service = SectorStrengthService(session)
+
+        summary = {"success": True, "total": 3, "created": 9, "updated": 0, "skipped": 0, "errors": 0, "shards": 2}
+        with patch(
+            "src.services.sector_strength_service.ShardedCalculationRunner.run",
+            new_callable=AsyncMock,
+            return_value=summary,
+        ) as mock_run:
+            result = await service.calculate_sector_strength_full_history(vectorized=True, shards=2)
+
+        mock_run.assert_awaited_once_with(
+            JOB_SECTOR_STRENGTH_FULL_HISTORY, [1, 2, 3], {"overwrite": False, "vectorized": True}
+        )
+        assert result["total_sectors"] == 3
+        assert result["created"] == 9
+
+    async def test_sector_ma_full_history_invalidates_parent_cache(self):
+        """测试分片写入均线后，父进程的均线缓存被失效"""
+        from datetime import date
+
+        from src.services.sector_ma_service import SectorMAService
+
+        session = AsyncMock(spec=AsyncSession)
+        id_result = MagicMock()
+        id_result.scalars.return_value.all.return_value = [1, 2]
+        session.execute.return_value = id_result
+        service = SectorMAService(session)
+
+        summary = {"success": True, "total": 2, "created": 4, "updated": 0, "skipped": 0, "errors": 0, "shards": 2}
+        with patch(
+            "src.services.sector_ma_service.ShardedCalculationRunner.run",
+            new_callable=AsyncMock,
+            return_value=summary,
+        ), patch("src.services.sector_ma_service.ma_data_cache") as mock_cache:
+            result = await service.calculate_full_history_ma(shards=2)
+
+        mock_cache.invalidate.assert_called_once_with("sector", date.min)
+        assert result["total_sectors"] == 2
+
+    async def test_single_sector_stays_in_process(self):
+        """测试指定单个板块时不启用分片"""
+        from src.services.sector_ma_service import SectorMAService
+
+        session = AsyncMock(spec=AsyncSession)
+        empty = MagicMock()
+        empty.scalars.return_value.all.return_value = []
+        session.execute.return_value = empty
+        service = SectorMAService(session)
+
+        with patch("src.services.sector_ma_service.ShardedCalculationRunner.run", new_callable=AsyncMock) as mock_run:
+            result = await service.calculate_full_history_ma(sector_id=1, shards=4)
+
+        mock_run.assert_not_awaited()
+        assert result["success"] is False
@@ -0,0 +1,150 @@
+"""
+并发快照构建测试
+
+测试分块、会话数上限、结果合并与进度汇总。
+"""
+
+import asyncio
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.services.snapshot_builder import ConcurrentSnapshotBuilder, resolve_snapshot_concurrency
+
+
+class _SessionFactory:
+    """记录同时打开的会话数的会话工厂"""
+
+    def __init__(self):
+        self.open = 0
+        self.max_open = 0
+        self.created = 0
+
+    def __call__(self):
+        factory = self
+
+        class _Ctx:
+            async def __aenter__(self):
+                factory.open += 1
+                factory.created += 1
+                factory.max_open = max(factory.max_open, factory.open)
+                return AsyncMock()
+
+            async def __aexit__(self, *exc):
+                factory.open -= 1
+
+        return _Ctx()
+
+
+async def _fake_batch_calculate(self, entity_type, entity_ids, calc_date, update_change_rates=True):
+    """模拟批量计算：ID 为 7 的实体失败，其余成功"""
+    id_key = "stock_id" if entity_type == "stock" else "sector_id"
+    results = []
+    for idx, entity_id in enumerate(entity_ids):
+        await self._report_progress(idx + 1, len(entity_ids), f"计算 {entity_type} ID: {entity_id}")
+        await asyncio.sleep(0)
+        if entity_id == 7:
+            results.append({"success": False, "error": "数据不足", id_key: entity_id})
+        else:
+            results.append({"success": True, id_key: entity_id, "result": {"composite_score": 50.0}})
+    failed = sum(1 for r in results if not r["success"])
+    return {
+        "success": True,
+        "total": len(entity_ids),
+        "success_count": len(entity_ids) - failed,
+        "error_count": failed,
+        "results": results,
+    }
+
+
+class TestResolveConcurrency:
+    """并发数配置测试"""
+
+    def test_resolve_snapshot_concurrency(self):
+        """测试并发数默认取配置，且至少为 1"""
+        import src.services.snapshot_builder as builder_module
+
+        with patch.object(builder_module.settings, "SNAPSHOT_CONCURRENCY", 6):
+            assert resolve_snapshot_concurrency() == 6
+        assert resolve_snapshot_concurrency(0) == 1
+        assert resolve_snapshot_concurrency(3) == 3
+
+
+@pytest.mark.asyncio
+class TestConcurrentSnapshotBuilder:
+    """并发快照构建器测试"""
+
+    async def test_build_merges_chunks_within_session_limit(self):
+        """测试所有块在有限会话内完成，结果按日期和实体类型合并"""
+        factory = _SessionFactory()
+        progress = []
+
+        async def callback(current, total, message):
+            progress.append((current, total))
+
+        builder = ConcurrentSnapshotBuilder(factory, 3, callback)
+        builder.CHUNK_SIZE = 4
+        days = [date(2024, 6, 10), date(2024, 6, 11)]
+
+        with patch(
+            "src.services.snapshot_builder.StrengthServiceV2.batch_calculate",
+            _fake_batch_calculate,
+        ):
+            results = await builder.build(days, list(range(1, 11)), [1, 2, 7])
+
+        # 每天 3 个股票块 + 1 个板块块，共 8 块，只使用 3 个会话
+        assert factory.created == 3
+        assert factory.max_open == 3
+        for day in days:
+            assert results[day]["stocks"]["success"] == 9
+            assert results[day]["stocks"]["error"] == 1
+            assert results[day]["sectors"]["success"] == 2
+            assert results[day]["sectors"]["error"] == 1
+            assert len(results[day]["stocks"]["details"]) == 10
+        assert len(progress) == 26
+        assert progress[-1] == (26, 26)
+
+    async def test_failed_chunk_marks_entities_as_errors(self):
+        """测试块计算抛出异常时块内实体记为失败，其余块继续"""
+        factory = _SessionFactory()
+        builder = ConcurrentSnapshotBuilder(factory, 2)
+        builder.CHUNK_SIZE = 2
+        day = date(2024, 6, 10)
+
+        async def batch_calculate(self, entity_type, entity_ids, calc_date, update_change_rates=True):
+            if 3 in entity_ids:
+                raise RuntimeError("connection lost")
+            return await _fake_batch_calculate(self, entity_type, entity_ids, calc_date)
+
+        with patch("src.services.snapshot_builder.StrengthServiceV2.batch_calculate", batch_calculate):
+            results = await builder.build([day], [1, 2, 3, 4], [])
+
+        assert results[day]["stocks"]["success"] == 2
+        assert results[day]["stocks"]["error"] == 2
+        assert {d["id"] for d in results[day]["stocks"]["details"] if not d["success"]} == {3, 4}
+
+    async def test_snapshot_service_delegates_when_concurrent(self):
+        """测试快照服务在并发数大于 1 时交给构建器，并在结束后统一排名"""
+        from src.services.strength_snapshot_service import StrengthSnapshotService
+
+        session = MagicMock()
+        ids_result = MagicMock()
+        ids_result.all.return_value = [(1,), (2,)]
+        session.execute = AsyncMock(return_value=ids_result)
+        session.commit = AsyncMock()
+        service = StrengthSnapshotService(session, session_factory=_SessionFactory())
+        service.strength_service.update_change_rates = AsyncMock(return_value=0)
+        service._update_ranks_and_percentiles = AsyncMock()
+        day = date(2024, 6, 10)
+
+        with patch(
+            "src.services.snapshot_builder.StrengthServiceV2.batch_calculate",
+            _fake_batch_calculate,
+        ):
+            result = await service.create_daily_snapshot(day, concurrency=2)
+
+        assert result["summary"]["total_entities"] == 4
+        assert result["summary"]["total_success"] == 4
+        service.strength_service.update_change_rates.assert_awaited_once_with(day)
+        service._update_ranks_and_percentiles.assert_awaited_once_with(day)
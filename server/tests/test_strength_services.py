@@ -6,7 +6,7 @@
 
 import pytest
 from datetime import date, timedelta
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -238,13 +238,32 @@ class TestStrengthHistoryService:
         assert 'score' in history[0]
         assert 'date' in history[0]
 
+    @staticmethod
+    def _stats_row(entity_id, **values):
+        """构造历史统计聚合查询的结果行"""
+        grades = values.pop('grades', {})
+        row = MagicMock()
+        row.entity_id = entity_id
+        for key, value in values.items():
+            setattr(row, key, value)
+        row._mapping = {
+            f'grade_{index}': grades.get(grade, 0)
+            for index, grade in enumerate(StrengthHistoryService.GRADE_BUCKETS)
+        }
+        return row
+
     @pytest.mark.asyncio
-    async def test_get_history_stats(self, history_service, session, mock_history_scores):
+    async def test_get_history_stats(self, history_service, session):
         """测试获取历史统计"""
         end_date = date.today()
 
         mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = mock_history_scores
+        mock_result.all.return_value = [
+            self._stats_row(
+                1, data_count=5, max_score=88, min_score=80, avg_score=84.0,
+                latest_score=88, up_days=4, down_days=0, grades={'A': 5},
+            )
+        ]
         session.execute.return_value = mock_result
 
         stats = await history_service.get_history_stats('stock', 1, 5, end_date)
@@ -258,12 +277,14 @@ class TestStrengthHistoryService:
         assert 'down_days' in stats
         assert 'flat_days' in stats
         assert 'grade_distribution' in stats
+        assert stats['flat_days'] == 0
+        assert stats['grade_distribution'] == {'A': 5}
 
     @pytest.mark.asyncio
     async def test_get_history_stats_no_data(self, history_service, session):
         """测试无数据统计"""
         mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = []
+        mock_result.all.return_value = []
         session.execute.return_value = mock_result
 
         stats = await history_service.get_history_stats('stock', 1, 5)
@@ -271,6 +292,33 @@ class TestStrengthHistoryService:
         assert stats['data_count'] == 0
         assert 'error' in stats
 
+    @pytest.mark.asyncio
+    async def test_get_batch_history_stats_single_query(self, history_service, session):
+        """测试批量统计使用一条聚合查询"""
+        from sqlalchemy.dialects import postgresql
+
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            self._stats_row(
+                2, data_count=3, max_score=70, min_score=60, avg_score=65.333,
+                latest_score=60, up_days=1, down_days=1, grades={'B+': 1, 'A': 1, 'Unknown': 1},
+            )
+        ]
+        session.execute.return_value = mock_result
+
+        stats = await history_service.get_batch_history_stats('sector', [1, 2], 30, date(2024, 6, 28))
+
+        assert session.execute.await_count == 1
+        assert stats[1]['data_count'] == 0
+        assert stats[2]['avg_score'] == 65.33
+        assert stats[2]['flat_days'] == 0
+        assert stats[2]['grade_distribution'] == {'A': 1, 'B+': 1, 'Unknown': 1}
+
+        sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "lag(strength_scores.score) OVER (PARTITION BY strength_scores.entity_id" in sql
+        assert "count(*) FILTER (WHERE" in sql
+        assert "GROUP BY windowed.entity_id" in sql
+
     @pytest.mark.asyncio
     async def test_get_latest_score(self, history_service, session):
         """测试获取最新得分"""
@@ -551,6 +599,19 @@ class TestStrengthCache:
         assert count == 10
         mock_cache_manager.cleanup_expired.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_invalidate_scatter(self, cache, mock_cache_manager):
+        """测试单日写入只删除该日散点图缓存，范围写入清除全部散点图缓存"""
+        # 注入mock manager
+        cache._cache_manager = mock_cache_manager
+
+        assert await cache.invalidate_scatter(date(2025, 1, 1)) == 1
+        mock_cache_manager.delete.assert_awaited_once_with("scatter:sector:2025-01-01")
+        mock_cache_manager.clear_pattern.assert_not_called()
+
+        assert await cache.invalidate_scatter(date(2025, 1, 1), date(2025, 1, 31)) == 5
+        mock_cache_manager.clear_pattern.assert_awaited_once_with("scatter:%")
+
     def test_get_cache_size_info(self, cache):
         """测试获取缓存大小信息"""
         cache._set_memory_cache('key1', 'value1')
@@ -639,5 +700,197 @@ class TestChangeRateCalculation:
         assert result is None
 
 
+
+@pytest.mark.asyncio
+class TestSetBasedChangeRate:
+    """按交易日批量更新变化率测试"""
+
+    async def test_update_change_rates_single_statement(self):
+        """测试日期范围内的变化率由一条 UPDATE ... FROM 窗口查询完成"""
+        from sqlalchemy.dialects import postgresql
+        from src.repositories.strength_score_repository import StrengthScoreRepository
+
+        session = AsyncMock(spec=AsyncSession)
+        session.execute.return_value = MagicMock(rowcount=5200)
+        repo = StrengthScoreRepository(session)
+
+        count = await repo.update_change_rates(date(2024, 1, 2), date(2024, 6, 28), entity_type="stock")
+
+        assert count == 5200
+        assert session.execute.await_count == 1
+        sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE strength_scores SET change_rate_1d=")
+        assert "lag(strength_scores.score) OVER" in sql
+        assert "ORDER BY trading_days.day_no RANGE BETWEEN" in sql
+
+    async def test_refresh_latest_single_statement(self):
+        """测试最新得分读模型由一条 INSERT ... SELECT DISTINCT ON 刷新，且只向前覆盖"""
+        from sqlalchemy.dialects import postgresql
+        from src.repositories.strength_score_repository import StrengthScoreRepository
+
+        session = AsyncMock(spec=AsyncSession)
+        session.execute.return_value = MagicMock(rowcount=412)
+        repo = StrengthScoreRepository(session)
+
+        count = await repo.refresh_latest(date(2024, 6, 28), entity_type="sector")
+
+        assert count == 412
+        assert session.execute.await_count == 2
+        sql = str(session.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO latest_strength_scores")
+        assert "SELECT DISTINCT ON (strength_scores.entity_type, strength_scores.entity_id)" in sql
+        assert "ON CONFLICT (entity_type, entity_id) DO UPDATE" in sql
+        assert "WHERE latest_strength_scores.date <= excluded.date" in sql
+        # 同一事务中递增读模型版本号
+        sql = str(session.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO data_versions")
+        assert "DO UPDATE SET version = (data_versions.version + %(version_1)s)" in sql
+
+    async def test_refresh_daily_aggregates_single_statement(self):
+        """测试每日强度汇总由一条 INSERT ... SELECT ... GROUP BY GROUPING SETS 刷新"""
+        from sqlalchemy.dialects import postgresql
+        from src.repositories.strength_score_repository import StrengthScoreRepository
+
+        session = AsyncMock(spec=AsyncSession)
+        session.execute.return_value = MagicMock(rowcount=4)
+        repo = StrengthScoreRepository(session)
+
+        count = await repo.refresh_daily_aggregates(date(2024, 6, 28))
+
+        assert count == 4
+        assert session.execute.await_count == 1
+        sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO daily_strength_aggregates")
+        assert "GROUP BY GROUPING SETS((strength_scores.date, strength_scores.entity_type), " in sql
+        assert "json_build_object(" in sql
+        assert "ON CONFLICT (date, entity_type, sector_type) DO UPDATE" in sql
+
+    async def test_get_daily_aggregates_falls_back_to_live(self):
+        """测试汇总行缺失时按相同口径现场统计，且不写入汇总表"""
+        from sqlalchemy.dialects import postgresql
+        from src.repositories.strength_score_repository import StrengthScoreRepository
+
+        stored = MagicMock()
+        stored.scalars.return_value.all.return_value = []
+        live = MagicMock()
+        live.mappings.return_value.all.return_value = [
+            {"date": date(2024, 6, 28), "entity_type": "sector", "sector_type": "all", "total_count": 30},
+            {"date": date(2024, 6, 28), "entity_type": "sector", "sector_type": "industry", "total_count": 20},
+        ]
+        session = AsyncMock(spec=AsyncSession)
+        session.execute.side_effect = [stored, live]
+        repo = StrengthScoreRepository(session)
+
+        aggregates = await repo.get_daily_aggregates(date(2024, 6, 28), "sector")
+
+        assert list(aggregates) == ["all"]
+        assert aggregates["all"]["total_count"] == 30
+        assert session.execute.await_count == 2
+        sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("SELECT strength_scores.date")
+        assert "GROUPING SETS" in sql
+
+    async def test_get_daily_aggregates_missing_split_reads_stored(self):
+        """测试 'all' 行存在时缺少的拆分行视为当日无该类型得分，不现场统计"""
+        from src.repositories.strength_score_repository import StrengthScoreRepository
+
+        stored = MagicMock()
+        stored.scalars.return_value.all.return_value = [
+            MagicMock(sector_type="all", total_count=20),
+            MagicMock(sector_type="industry", total_count=20),
+        ]
+        session = AsyncMock(spec=AsyncSession)
+        session.execute.return_value = stored
+        repo = StrengthScoreRepository(session)
+
+        aggregates = await repo.get_daily_aggregates(date(2024, 6, 28), "sector", ("industry", "concept"))
+
+        assert list(aggregates) == ["industry"]
+        assert aggregates["industry"]["total_count"] == 20
+        assert session.execute.await_count == 1
+
+    async def test_update_change_rates_refreshes_aggregates(self):
+        """测试变化率更新在同一事务中刷新最新得分读模型和每日强度汇总"""
+        from src.services.strength_service_v2 import StrengthServiceV2
+
+        session = AsyncMock(spec=AsyncSession)
+        service = StrengthServiceV2(session)
+        service.score_repo = AsyncMock()
+        service.score_repo.update_change_rates.return_value = 8
+
+        updated = await service.update_change_rates(date(2024, 6, 3), date(2024, 6, 7), entity_type="stock")
+
+        assert updated == 8
+        service.score_repo.refresh_daily_aggregates.assert_awaited_once_with(
+            date(2024, 6, 3), date(2024, 6, 7), entity_type="stock"
+        )
+        session.commit.assert_awaited_once()
+
+    async def test_sector_change_rates_invalidate_scatter(self):
+        """测试板块变化率回填提交后失效范围内的散点图缓存"""
+        from src.services.sector_strength_service import SectorStrengthService
+
+        session = AsyncMock(spec=AsyncSession)
+        service = SectorStrengthService(session)
+        service.score_repo = AsyncMock()
+        service.score_repo.update_change_rates.return_value = 12
+
+        with patch("src.services.sector_strength_service.StrengthCache") as mock_cache:
+            mock_cache.return_value.invalidate_scatter = AsyncMock(return_value=1)
+            updated = await service._update_change_rates(date(2024, 6, 3), date(2024, 6, 7))
+
+        assert updated == 12
+        session.commit.assert_awaited_once()
+        mock_cache.return_value.invalidate_scatter.assert_awaited_once_with(date(2024, 6, 3), date(2024, 6, 7))
+
+    async def test_change_rate_writers_invalidate_scatter(self):
+        """测试 V2 变化率写入只在涉及板块时失效散点图缓存"""
+        from src.services.strength_service_v2 import StrengthServiceV2
+
+        session = AsyncMock(spec=AsyncSession)
+        service = StrengthServiceV2(session)
+        service.score_repo = AsyncMock()
+        service.score_repo.update_change_rates.return_value = 5
+        session.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=None))
+
+        with patch("src.services.strength_service_v2.StrengthCache") as mock_cache:
+            mock_cache.return_value.invalidate_scatter = AsyncMock(return_value=1)
+            await service.update_change_rates(date(2024, 6, 3), date(2024, 6, 7))
+            await service.update_change_rates(date(2024, 6, 3), date(2024, 6, 7), entity_type="stock")
+            await service.calculate_and_update_change_rate("sector", 1, date(2024, 6, 7))
+
+        assert mock_cache.return_value.invalidate_scatter.await_args_list == [
+            call(date(2024, 6, 3), date(2024, 6, 7)),
+            call(date(2024, 6, 7), date(2024, 6, 7)),
+        ]
+
+    async def test_batch_calculate_updates_change_rates_once(self):
+        """测试批量计算不再逐个实体更新变化率，而是结束后统一更新一次"""
+        from src.services.strength_service_v2 import StrengthServiceV2
+
+        session = AsyncMock(spec=AsyncSession)
+        service = StrengthServiceV2(session)
+        calc_date = date(2024, 6, 10)
+
+        with patch(
+            "src.services.strength_service_v2.MADataLoader.load_universe",
+            new_callable=AsyncMock,
+            return_value={},
+        ), patch.object(
+            service, "calculate_stock_strength", new_callable=AsyncMock, return_value={"success": True}
+        ) as mock_calc, patch.object(
+            service, "calculate_and_update_change_rate", new_callable=AsyncMock
+        ) as mock_single, patch.object(
+            service.score_repo, "update_change_rates", new_callable=AsyncMock, return_value=3
+        ) as mock_stage:
+            result = await service.batch_calculate("stock", [1, 2, 3], calc_date)
+
+        assert result["success_count"] == 3
+        assert all(c.kwargs["update_change_rate"] is False for c in mock_calc.await_args_list)
+        mock_single.assert_not_awaited()
+        mock_stage.assert_awaited_once_with(
+            calc_date, None, entity_type="stock", entity_ids=[1, 2, 3]
+        )
+
 # 常量引用
 IN_MEMORY_CACHE_SIZE = 1000